@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+SmartCompute - SCADA Alert Rules Benchmark
+
+Evaluates a stream of SCADA log entries against the default alert rules
+plus N site-specific rules (each bound to one category or alarm type and a
+tag glob). The previous path runs every rule per entry with fnmatch on
+uppercased strings; the compiled matcher only visits the rules indexed
+under the entry's category, alarm type and severity whose tag glob matches
+(memoized per tag). Reports entries/sec and rule visits per entry for each
+rule count.
+
+Usage::
+
+    python benchmarks/alert_rules_benchmark.py --entries 20000 --rules 5 50 200 500
+"""
+
+import argparse
+import fnmatch
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from smartcompute.industrial.scada.logging_system import (
+    ICSEventCategory,
+    IndustrialSCADALogger,
+    LogSeverity,
+    ProcessAlarmType,
+    SCADALogEntry,
+    SCADASystem,
+)
+from smartcompute.industrial.scada.rules import AlertRuleMatcher
+
+CATEGORIES = list(ICSEventCategory)
+ALARM_TYPES = list(ProcessAlarmType)
+SEVERITIES = [LogSeverity.INFO, LogSeverity.WARNING, LogSeverity.ERROR, LogSeverity.CRITICAL]
+
+
+def make_entries(count: int):
+    t0 = datetime(2025, 1, 15, 8, 0)
+    entries = []
+    for i in range(count):
+        # Cada tag emite siempre la misma categoría, severidad y tipo de alarma
+        j = i % 400
+        alarm = ALARM_TYPES[j % len(ALARM_TYPES)] if j % 3 == 0 else None
+        entries.append(SCADALogEntry(
+            log_id=str(i), timestamp=t0 + timedelta(seconds=i), scada_system=SCADASystem.WONDERWARE,
+            source_node="node", severity=SEVERITIES[j % len(SEVERITIES)], category=CATEGORIES[j % len(CATEGORIES)],
+            message="m", tag_name=f"Area{j % 7}.Unit{j}.PV", tag_value=50.0 + i % 13, alarm_type=alarm))
+    return entries
+
+
+def site_rules(count: int):
+    rules = {}
+    for i in range(count):
+        key, values = (("categories", [CATEGORIES[i % len(CATEGORIES)]]) if i % 2
+                       else ("alarm_types", [ALARM_TYPES[i % len(ALARM_TYPES)]]))
+        rules[f"site_{i}"] = {"conditions": {key: values, "tag_patterns": [f"*.UNIT{i}.*"]}, "actions": {}}
+    return rules
+
+
+def legacy_matches(entry, conditions) -> bool:
+    """Camino anterior: todas las reglas, fnmatch por patrón y entrada"""
+    patterns = conditions.get('tag_patterns', [])
+    if patterns and entry.tag_name:
+        if not any(fnmatch.fnmatch(entry.tag_name.upper(), p.upper()) for p in patterns):
+            return False
+    for key, attr in (('alarm_types', 'alarm_type'), ('severity', 'severity'), ('categories', 'category')):
+        values = conditions.get(key, [])
+        if values and getattr(entry, attr) not in values:
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=20_000)
+    parser.add_argument("--rules", type=int, nargs="+", default=[5, 50, 200, 500],
+                        help="site-specific rules added to the defaults")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        scada = IndustrialSCADALogger(db_path=os.path.join(tmp, "rules.db"), simulate=False)
+        defaults = dict(scada.alert_rules)
+        scada.close()
+
+    entries = make_entries(args.entries)
+    print(f"{args.entries} entries, {len(defaults)} default rules")
+    print(f"{'rules':>6} {'legacy/s':>12} {'compiled/s':>12} {'visits/entry':>13} {'speedup':>8}")
+    print("=" * 55)
+    for count in args.rules:
+        rules = {**defaults, **site_rules(count)}
+
+        started = time.perf_counter()
+        for entry in entries:
+            for config in rules.values():
+                legacy_matches(entry, config.get('conditions', {}))
+        legacy = args.entries / (time.perf_counter() - started)
+
+        matcher = AlertRuleMatcher(rules)
+        started = time.perf_counter()
+        for entry in entries:
+            matcher.match(entry)
+        compiled = args.entries / (time.perf_counter() - started)
+
+        print(f"{len(rules):>6} {legacy:>12.0f} {compiled:>12.0f} "
+              f"{matcher.get_stats()['visits_per_entry']:>13} {compiled / legacy:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+SmartCompute - Streaming Backup Benchmark
+
+Measures throughput and peak RSS of the streaming backup pipeline against
+the legacy zip -> checksum -> Fernet path on a generated fixture.
+
+Usage::
+
+    python benchmarks/backup_stream_benchmark.py            # 2 GB fixture
+    python benchmarks/backup_stream_benchmark.py --size-mb 256 --skip-legacy
+"""
+
+import argparse
+import hashlib
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from multiprocessing import get_context
+from pathlib import Path
+
+from smartcompute.enterprise.ops.backup_stream import StreamingBackupReader, StreamingBackupWriter
+
+
+def build_fixture(root: Path, size_mb: int, files: int = 8) -> Path:
+    """Half-compressible fixture split across ``files`` files"""
+    src = root / "fixture"
+    src.mkdir()
+    block = os.urandom(512 * 1024) + bytes(512 * 1024)
+    per_file = max(1, size_mb // files)
+    for i in range(files):
+        with open(src / f"historian_{i}.db", 'wb') as f:
+            for _ in range(per_file):
+                f.write(block)
+    return src
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 ** 2) if sys.platform == "darwin" else rss / 1024
+
+
+def _run_streaming(src: str, out: str, workers: int, queue) -> None:
+    key = os.urandom(32)
+    start = time.perf_counter()
+    stats = StreamingBackupWriter(key, workers=workers).write(src, Path(out))
+    backup_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    StreamingBackupReader(key).verify(Path(out))
+    verify_s = time.perf_counter() - start
+    queue.put((stats.bytes_in, backup_s, verify_s, _peak_rss_mb()))
+
+
+def _run_legacy(src: str, out: str, workers: int, queue) -> None:
+    from cryptography.fernet import Fernet
+
+    start = time.perf_counter()
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for file_path in Path(src).rglob('*'):
+            zipf.write(file_path, file_path.name)
+    sha = hashlib.sha256()
+    with open(out, 'rb') as f:
+        while chunk := f.read(8192):
+            sha.update(chunk)
+    with open(out, 'rb') as f:
+        data = Fernet(Fernet.generate_key()).encrypt(f.read())
+    with open(out + ".encrypted", 'wb') as f:
+        f.write(data)
+    total = sum(p.stat().st_size for p in Path(src).rglob('*'))
+    queue.put((total, time.perf_counter() - start, 0.0, _peak_rss_mb()))
+
+
+def measure(fn, src: Path, out: Path, workers: int):
+    """Run ``fn`` in a fresh process so peak RSS is not polluted by earlier runs"""
+    ctx = get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=fn, args=(str(src), str(out), workers, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 4))
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="sc_backup_bench_"))
+    try:
+        src = build_fixture(root, args.size_mb)
+        print(f"Fixture: {args.size_mb} MB in {src}")
+        print("=" * 60)
+
+        size, backup_s, verify_s, rss = measure(_run_streaming, src, root / "out.scsb", args.workers)
+        mb = size / (1024 ** 2)
+        print(f"streaming  backup {mb / backup_s:8.1f} MB/s  verify {mb / verify_s:8.1f} MB/s  "
+              f"peak RSS {rss:7.1f} MB")
+
+        if not args.skip_legacy:
+            size, backup_s, _, rss = measure(_run_legacy, src, root / "out.zip", args.workers)
+            print(f"legacy     backup {mb / backup_s:8.1f} MB/s  "
+                  f"{'':22}peak RSS {rss:7.1f} MB")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+SmartCompute - Central Server Load Benchmark
+
+Starts a local central server (plain HTTP, temporary database) in a child
+process and drives ``POST /api/analysis`` from concurrent clients, once with
+commit-per-request settings and once with the default group commit.
+
+Usage::
+
+    python benchmarks/central_server_load.py --clients 64 --duration 10
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import aiohttp
+
+
+def run_server(workdir: str, port: int, batch_ms: float, batch_max: int, ready):
+    """Child process: central server with the requested storage settings"""
+    os.chdir(workdir)
+    os.makedirs("static", exist_ok=True)
+
+    from aiohttp import web
+    from smartcompute.network.central_server import SmartComputeCentralServer
+
+    async def main():
+        server = SmartComputeCentralServer(config_path="missing.yaml")
+        server.storage.batch_window = batch_ms / 1000.0
+        server.storage.max_batch = batch_max
+        await server.initialize_database()
+
+        runner = web.AppRunner(server.create_app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        ready.set()
+        while True:
+            await asyncio.sleep(3600)
+
+    asyncio.run(main())
+
+
+async def drive(port: int, clients: int, duration: float):
+    base = f"http://127.0.0.1:{port}"
+    latencies = []
+
+    async with aiohttp.ClientSession() as session:
+        async def register(i):
+            async with session.post(f"{base}/api/register", json={
+                "client_id": f"bench-{i}", "client_type": "enterprise",
+                "hostname": f"host-{i}", "ip_address": "127.0.0.1"
+            }) as resp:
+                return (await resp.json())["token"]
+
+        tokens = await asyncio.gather(*[register(i) for i in range(clients)])
+        deadline = time.perf_counter() + duration
+
+        async def client(token):
+            headers = {"Authorization": f"Bearer {token}"}
+            payload = {
+                "analysis_type": "enterprise",
+                "timestamp": datetime.utcnow().isoformat(),
+                "severity": "low",
+                "data": {"cpu": 42.0, "findings": ["port 502 open"] * 8}
+            }
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                async with session.post(f"{base}/api/analysis", json=payload,
+                                        headers=headers) as resp:
+                    await resp.read()
+                    if resp.status == 200:
+                        latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[client(t) for t in tokens])
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+    }
+
+
+def bench(label: str, batch_ms: float, batch_max: int, args):
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Event()
+    with tempfile.TemporaryDirectory(prefix="sc_central_bench_") as workdir:
+        proc = ctx.Process(target=run_server,
+                           args=(workdir, args.port, batch_ms, batch_max, ready), daemon=True)
+        proc.start()
+        try:
+            if not ready.wait(30):
+                raise RuntimeError("server did not start")
+            result = asyncio.run(drive(args.port, args.clients, args.duration))
+        finally:
+            proc.terminate()
+            proc.join()
+
+    print(f"{label:<22} {result['rps']:8.1f} req/s  p50 {result['p50_ms']:6.1f} ms  "
+          f"p99 {result['p99_ms']:6.1f} ms  ({result['requests']} requests)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=18080)
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients, {args.duration:.0f}s per run")
+    print("=" * 70)
+    bench("commit per request", 0, 1, args)
+    bench("group commit (3 ms)", 3, 256, args)
+
+
+if __name__ == "__main__":
+    main()
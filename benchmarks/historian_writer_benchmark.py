@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+SmartCompute - Historian Writer Benchmark
+
+Writes scan batches of variable readings to SQLite for a fixed duration,
+once with the previous store_reading path (connect, INSERT and COMMIT per
+reading on the event loop) and once through HistorianWriter (buffered
+executemany per flush interval on a writer thread, WAL), both paced at
+``--scan-ms`` and unpaced (backpressure bound). Reports sustained rows/sec
+and, for the historian, p99 flush latency.
+
+Usage::
+
+    python benchmarks/historian_writer_benchmark.py --tags 1000 --duration 5 --scan-ms 20
+"""
+
+import argparse
+import asyncio
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from smartcompute.industrial.variables.historian import READINGS_INSERT, HistorianWriter
+
+SCHEMA = '''
+    CREATE TABLE variable_readings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        variable_id TEXT NOT NULL, timestamp TIMESTAMP NOT NULL, value REAL NOT NULL,
+        quality INTEGER, status TEXT, raw_value REAL, processed_value REAL, anomaly_score REAL
+    )
+'''
+
+
+def create_db(directory: Path, name: str) -> Path:
+    path = directory / name
+    with sqlite3.connect(path) as conn:
+        conn.execute(SCHEMA)
+    return path
+
+
+def scan_rows(tags: int, scan: int):
+    timestamp = datetime.now().isoformat(' ')
+    return [(f"tag_{i}", timestamp, float(scan + i), 100, "online", float(scan + i),
+             float(scan + i), 0.0) for i in range(tags)]
+
+
+async def per_reading(db_path: Path, tags: int, duration: float) -> float:
+    """Una conexión, un INSERT y un COMMIT por lectura (camino anterior)"""
+    rows, scan = 0, 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        for row in scan_rows(tags, scan):
+            conn = sqlite3.connect(db_path)
+            conn.execute(READINGS_INSERT, row)
+            conn.commit()
+            conn.close()
+            rows += 1
+        scan += 1
+        await asyncio.sleep(0)
+    return rows / (time.perf_counter() - started)
+
+
+async def historian(db_path: Path, tags: int, duration: float, flush_ms: float, period: float):
+    writer = HistorianWriter(db_path, flush_interval_ms=flush_ms)
+    scan = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        await writer.write(scan_rows(tags, scan))
+        scan += 1
+        # Ritmo de escaneo fijo (period 0 = tan rápido como acepte el escritor)
+        await asyncio.sleep(max(0.0, started + scan * period - time.perf_counter()))
+    await asyncio.to_thread(writer.close)
+    elapsed = time.perf_counter() - started
+    return writer.stats['rows'] / elapsed, writer.get_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tags", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--flush-ms", type=float, default=250.0)
+    parser.add_argument("--scan-ms", type=float, default=20.0,
+                        help="scan period for the historian run (0 = unpaced)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        print(f"{args.tags} tags per scan, {args.duration:.0f}s per run")
+        print("=" * 70)
+
+        rate = asyncio.run(per_reading(create_db(directory, "legacy.db"), args.tags, args.duration))
+        print(f"{'commit per reading':<20} {rate:11.0f} rows/s")
+
+        runs = [("historian writer", args.scan_ms), ("historian unpaced", 0.0)] if args.scan_ms \
+            else [("historian unpaced", 0.0)]
+        for label, scan_ms in runs:
+            rate, stats = asyncio.run(historian(create_db(directory, f"{scan_ms}.db"), args.tags,
+                                                args.duration, args.flush_ms, scan_ms / 1000.0))
+            print(f"{label:<20} {rate:11.0f} rows/s  "
+                  f"p99 flush {stats['flush_p99_ms']:7.1f} ms  ({stats['flushes']} flushes, "
+                  f"{stats['blocked_writes']} blocked writes)")
+
+
+if __name__ == "__main__":
+    main()
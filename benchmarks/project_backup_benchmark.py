@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+SmartCompute - Incremental PLC Project Backup Benchmark
+
+Backs up a fleet of PLC projects several times. Each project has a hardware
+XML, an SCL program, an HMI XML and a project JSON. Between rounds a few
+PLCs get a small program edit. The old path writes a complete zip per
+backup and re-reads it to compute its checksum, like the previous
+``TIAPortalConnector.backup_project``. The new path hashes each artifact as
+it is produced and writes only artifacts whose content is new, using
+``ProjectArtifactStore``. Reports bytes written, time and disk usage.
+
+Usage::
+
+    python benchmarks/project_backup_benchmark.py --plcs 40 --rounds 10 --networks 20000
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from smartcompute.industrial.protocols.project_store import ProjectArtifactStore
+
+
+def make_project(index: int, networks: int, rng: random.Random):
+    program = [f"NETWORK {n}: A I{n % 64}.{n % 8} AN M{n % 128}.{n % 8} = Q{n % 32}.{n % 8} // plc{index}"
+               for n in range(networks)]
+    return {
+        'hardware.xml': "\n".join(f'<Module Slot="{s}" Type="DI 32x24VDC" Article="6ES7 521-1BH50-0AA{s}"/>'
+                                  for s in range(64)),
+        'program.scl': program,
+        'hmi.xml': "\n".join(f'<Object Type="Gauge" X="{rng.randrange(1920)}" Y="{rng.randrange(1080)}" '
+                             f'Tag="Tag_{i}"/>' for i in range(networks // 10)),
+        'project.json': json.dumps({'name': f'PLC{index}', 'blocks': networks, 'version': '1.0'}),
+    }
+
+
+def artifacts(project):
+    for name, content in project.items():
+        if name == 'program.scl':
+            content = "\n".join(content)
+        yield name, content.encode()
+
+
+def old_backup(root: Path, system_id: str, project, round_index: int) -> int:
+    path = root / system_id / f"TIA_Project_{round_index:04d}.zip"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in artifacts(project):
+            archive.writestr(name, data)
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:  # El checksum volvía a leer el zip entero
+        for chunk in iter(lambda: f.read(4096), b""):
+            sha256.update(chunk)
+    return path.stat().st_size
+
+
+def disk_usage(root: Path) -> int:
+    return sum(p.stat().st_size for p in root.rglob('*') if p.is_file())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--plcs", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--networks", type=int, default=20_000, help="SCL networks per program")
+    parser.add_argument("--changed", type=float, default=0.1, help="share of PLCs edited per round")
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    projects = {f"plc{i}": make_project(i, args.networks, rng) for i in range(args.plcs)}
+    old_bytes = generated = 0
+    old_time = new_time = 0.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_root, new_root = Path(tmp) / "old", Path(tmp) / "new"
+        store = ProjectArtifactStore(new_root)
+        for round_index in range(args.rounds):
+            if round_index:
+                for system_id in rng.sample(sorted(projects), max(1, int(args.plcs * args.changed))):
+                    program = projects[system_id]['program.scl']
+                    n = rng.randrange(len(program))
+                    program[n] = program[n].replace(" = ", " O M0.1 = ", 1)
+            for system_id, project in projects.items():
+                generated += sum(len(data) for _, data in artifacts(project))
+                started = time.perf_counter()
+                old_bytes += old_backup(old_root, system_id, project, round_index)
+                old_time += time.perf_counter() - started
+                started = time.perf_counter()
+                store.commit(system_id, artifacts(project))
+                new_time += time.perf_counter() - started
+        old_disk, new_disk = disk_usage(old_root), disk_usage(new_root)
+
+    stats = store.get_stats()
+    new_bytes = stats['bytes_written']
+    print(f"{args.plcs} PLCs x {args.rounds} backups, {args.networks} networks per program, "
+          f"{args.changed:.0%} edited per round ({generated / 2 ** 20:.0f} MB of artifacts generated)")
+    print(f"{'path':<6} {'written':>11} {'on disk':>11} {'time':>9}")
+    print("=" * 40)
+    print(f"{'old':<6} {old_bytes / 2 ** 20:>8.1f} MB {old_disk / 2 ** 20:>8.1f} MB {old_time:>7.2f} s")
+    print(f"{'new':<6} {new_bytes / 2 ** 20:>8.1f} MB {new_disk / 2 ** 20:>8.1f} MB {new_time:>7.2f} s")
+    print(f"new: {stats['versions']} versions, {stats['unchanged_backups']} unchanged backups, "
+          f"{stats['artifacts_written']} artifacts written, {stats['artifacts_skipped']} skipped")
+
+
+if __name__ == "__main__":
+    main()
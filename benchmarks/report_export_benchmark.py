@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+SmartCompute - Encrypted Report Export Benchmark
+
+Exports the same synthetic SCADA log report as CSV twice. The old path
+builds the rows list and the CSV body in memory, derives the operator key
+with PBKDF2 and AES-GCM-encrypts the whole blob before writing it. The new
+path streams rows through iter_csv into EncryptedReportWriter (1 MiB
+authenticated chunks written as they fill) with the PBKDF2 key cached.
+Reports wall time and tracemalloc peak for each, then the cost of
+repeated exports by the same operator with and without the key cache.
+
+Usage::
+
+    python benchmarks/report_export_benchmark.py --rows 500000 --exports 10
+"""
+
+import argparse
+import csv
+import io
+import secrets
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+from smartcompute.industrial.scada.report_stream import OperatorKeyCache, iter_csv, write_encrypted_report
+
+FIELDS = ['timestamp', 'system', 'level', 'message', 'tag', 'value', 'operator']
+
+
+def rows(count: int):
+    for i in range(count):
+        yield {'timestamp': f'2025-01-15 14:{i // 60 % 60:02d}:{i % 60:02d}', 'system': 'wonderware',
+               'level': 'WARNING', 'message': f'Area1.Pump{i % 400}.Speed HH {1800 + i % 97}.5 rpm (Limit: 1800.0)',
+               'tag': f'Area1.Pump{i % 400}.Speed', 'value': 1800 + i % 97, 'operator': 'JSmith'}
+
+
+def old_export(path: Path, count: int, operator_key: str):
+    """Camino anterior: todo en memoria y un único blob cifrado"""
+    entries = list(rows(count))
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=FIELDS)
+    writer.writeheader()
+    for entry in entries:
+        writer.writerow(entry)
+    content = output.getvalue().encode('utf-8')
+    salt = secrets.token_bytes(16)
+    key = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=100000).derive(operator_key.encode())
+    nonce = secrets.token_bytes(12)
+    path.write_bytes(salt + nonce + AESGCM(key).encrypt(nonce, content, None))
+
+
+def new_export(path: Path, count: int, operator_key: str, cache: OperatorKeyCache):
+    write_encrypted_report(path, iter_csv(FIELDS, rows(count)), operator_key, cache)
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--exports", type=int, default=10, help="repeated small exports by one operator")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache = OperatorKeyCache()
+        old_time, old_peak = measure(old_export, tmp / "old.csv.encrypted", args.rows, "k")
+        new_time, new_peak = measure(new_export, tmp / "new.csv.encrypted", args.rows, "k", cache)
+        size = (tmp / "new.csv.encrypted").stat().st_size / 1e6
+
+        print(f"{args.rows} rows ({size:.1f} MB encrypted)")
+        print(f"{'path':<26} {'time':>9} {'peak memory':>14}")
+        print("=" * 52)
+        print(f"{'in memory + single blob':<26} {old_time:>7.2f} s {old_peak / 1e6:>11.1f} MB")
+        print(f"{'streaming chunks':<26} {new_time:>7.2f} s {new_peak / 1e6:>11.1f} MB")
+
+        print()
+        print(f"{args.exports} exports of 1000 rows by the same operator")
+        print("=" * 52)
+        started = time.perf_counter()
+        for i in range(args.exports):
+            new_export(tmp / f"nocache{i}", 1000, "k", OperatorKeyCache(ttl_seconds=0))
+        print(f"{'PBKDF2 per export':<26} {(time.perf_counter() - started) * 1000 / args.exports:>7.1f} ms/export")
+        started = time.perf_counter()
+        for i in range(args.exports):
+            new_export(tmp / f"cache{i}", 1000, "k", cache)
+        print(f"{'cached operator key':<26} {(time.perf_counter() - started) * 1000 / args.exports:>7.1f} ms/export")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+SmartCompute - SCADA Ingest Benchmark
+
+Writes a replay file of mixed SCADA log lines (Wonderware, DeltaV, Experion,
+WinCC, FactoryTalk text and XML), then ingests it twice. The first run
+uses the previous per-line path: parse, analyze and a connect/INSERT/COMMIT
+per line. The second uses IndustrialSCADALogger.ingest_many in batches with
+the batched writers, and FactoryTalk XML goes through the parse pool when
+more than one CPU is available. Reports lines/sec.
+
+Usage::
+
+    python benchmarks/scada_ingest_benchmark.py --lines 100000 --batch 5000
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from smartcompute.industrial.scada.logging_system import IndustrialSCADALogger, SCADASystem
+
+FORMATS = (
+    (SCADASystem.WONDERWARE,
+     lambda i: f"2025-01-15 14:{i // 60 % 60:02d}:{i % 60:02d}.{i % 1000:03d} [ALARM] Area1.Pump{i % 400}.Speed HH "
+               f"{1800 + i % 97}.5 rpm (Limit: 1800.0) Operator: JSmith"),
+    (SCADASystem.EMERSON_DELTAV,
+     lambda i: f"15-JAN-25 14:{i // 60 % 60:02d}:{i % 60:02d}.{i % 1000:03d} REACTOR01/TIC_{i % 300:03d}/PV.CV HI_ALM "
+               f"{80 + i % 13}.5 DEG_C PRIO=3 USER=OPERATOR1"),
+    (SCADASystem.HONEYWELL_EXPERION,
+     lambda i: f"2025.01.15 14:{i // 60 % 60:02d}:{i % 60:02d}.{i % 1000:03d} C300_01 ALARM FC_{i % 200}.PV HIGH "
+               f"{70 + i % 11}.5 KPA [ACK: OPERATOR2 14:32:15]"),
+    (SCADASystem.SIEMENS_WINCC,
+     lambda i: f"2025-01-15,14:{i // 60 % 60:02d}:{i % 60:02d}.{i % 1000:03d},S7-1500_01,Motor{i % 50}Speed,"
+               f"{1800 + i % 89}.5,rpm,HH_ALM,User01,Acknowledged"),
+    (SCADASystem.FACTORYTALK,
+     lambda i: f"[2025-01-15 14:{i // 60 % 60:02d}:{i % 60:02d}] [INFO] HMI_Station_{i % 9:02d}: "
+               f"Motor{i}_Start = TRUE (User: OPERATOR1)"),
+    (SCADASystem.FACTORYTALK,
+     lambda i: f'<Event type="Start" timestamp="2025-01-15T14:{i // 60 % 60:02d}:{i % 60:02d}Z">'
+               f'<BatchId>B{i}</BatchId><Recipe>R{i % 7}</Recipe><Operator>OP{i % 3}</Operator></Event>'),
+)
+
+
+def write_replay(path: Path, lines: int):
+    """Una línea por evento: ``<sistema>\\t<log>``"""
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(lines):
+            scada_system, render = FORMATS[i % len(FORMATS)]
+            f.write(f"{scada_system.value}\t{render(i)}\n")
+
+
+def read_replay(path: Path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            system_value, raw_log = line.rstrip("\n").split("\t", 1)
+            yield SCADASystem(system_value), raw_log
+
+
+def per_line(scada: IndustrialSCADALogger, replay: Path, limit: int) -> float:
+    """Camino anterior: parseo, análisis y una transacción por línea"""
+    done = 0
+    started = time.perf_counter()
+    for scada_system, raw_log in read_replay(replay):
+        entry = scada.log_parser.parse_log_entry(raw_log, scada_system)
+        if entry:
+            scada.analyze_log_entry(entry)
+            scada.check_alert_rules(entry)
+            conn = sqlite3.connect(scada.db_path)
+            scada.log_store.insert(conn, [scada.log_row(entry)])
+            conn.commit()
+            conn.close()
+        done += 1
+        if done >= limit:
+            break
+    return done / (time.perf_counter() - started)
+
+
+def batched(scada: IndustrialSCADALogger, replay: Path, batch: int) -> float:
+    groups = {}
+    done = 0
+    started = time.perf_counter()
+    for scada_system, raw_log in read_replay(replay):
+        lines = groups.setdefault(scada_system, [])
+        lines.append(raw_log)
+        if len(lines) >= batch:
+            done += scada.ingest_many(lines, scada_system)
+            groups[scada_system] = []
+    for scada_system, lines in groups.items():
+        done += scada.ingest_many(lines, scada_system)
+    scada.close()
+    return done / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=5_000)
+    parser.add_argument("--per-line-limit", type=int, default=5_000,
+                        help="lines replayed through the per-line path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        os.chdir(directory)
+        replay = directory / "replay.log"
+        write_replay(replay, args.lines)
+
+        print(f"{args.lines} replay lines ({replay.stat().st_size / 1e6:.1f} MB), "
+              f"{os.cpu_count()} CPUs")
+        print("=" * 70)
+
+        scada = IndustrialSCADALogger(db_path=directory / "legacy.db", simulate=False)
+        rate = per_line(scada, replay, args.per_line_limit)
+        scada.close()
+        print(f"{'per line + commit':<20} {rate:>10.0f} lines/s  (first {args.per_line_limit} lines)")
+
+        scada = IndustrialSCADALogger(db_path=directory / "batched.db", simulate=False, batch_size=args.batch)
+        rate = batched(scada, replay, args.batch)
+        stats = scada.get_ingest_stats()["logs"]
+        print(f"{'ingest_many':<20} {rate:>10.0f} lines/s  ({stats['rows']} rows in {stats['flushes']} "
+              f"flushes, p99 flush {stats['flush_p99_ms']} ms)")
+
+
+if __name__ == "__main__":
+    main()
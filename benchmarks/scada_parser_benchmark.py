@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+SmartCompute - SCADA Parser Benchmark
+
+Builds a corpus per supported SCADA system (Wonderware, DeltaV, Experion,
+WinCC, FactoryTalk text and XML) and parses it with SCADALogParser,
+reporting lines/sec per parser and whether the format auto-detector picks
+the right system from the first lines. Also compares the per-line
+primitives the parsers used before (datetime.strptime, MD5 log ids) with
+the cached TimestampDecoder and fast_log_id.
+
+Usage::
+
+    python benchmarks/scada_parser_benchmark.py --lines 50000
+"""
+
+import argparse
+import hashlib
+import time
+from datetime import datetime
+
+from smartcompute.industrial.scada.logging_system import SCADALogParser, SCADASystem
+from smartcompute.industrial.scada.parsing import TimestampDecoder, fast_log_id
+
+CORPUS = (
+    ("wonderware", SCADASystem.WONDERWARE,
+     lambda i: f"2025-01-15 14:{i // 60 % 60:02d}:{i % 60:02d}.{i % 1000:03d} [ALARM] Area1.Pump{i % 400}.Speed HH "
+               f"{1800 + i % 97}.5 rpm (Limit: 1800.0) Operator: JSmith"),
+    ("deltav", SCADASystem.EMERSON_DELTAV,
+     lambda i: f"15-JAN-25 14:{i // 60 % 60:02d}:{i % 60:02d}.{i % 1000:03d} REACTOR01/TIC_{i % 300:03d}/PV.CV HI_ALM "
+               f"{80 + i % 13}.5 DEG_C PRIO=3 USER=OPERATOR1"),
+    ("experion", SCADASystem.HONEYWELL_EXPERION,
+     lambda i: f"2025.01.15 14:{i // 60 % 60:02d}:{i % 60:02d}.{i % 1000:03d} C300_01 ALARM FC_{i % 200}.PV HIGH "
+               f"{70 + i % 11}.5 % [ACK: OPERATOR2 14:32:15]"),
+    ("wincc", SCADASystem.SIEMENS_WINCC,
+     lambda i: f"2025-01-15,14:{i // 60 % 60:02d}:{i % 60:02d}.{i % 1000:03d},S7-1500_01,Motor{i % 50}Speed,"
+               f"{1800 + i % 89}.5,rpm,HH_ALM,User01,Acknowledged"),
+    ("factorytalk text", SCADASystem.FACTORYTALK,
+     lambda i: f"[2025-01-15 14:{i // 60 % 60:02d}:{i % 60:02d}] [INFO] HMI_Station_{i % 9:02d}: "
+               f"Motor{i}_Start = TRUE (User: OPERATOR1)"),
+    ("factorytalk xml", SCADASystem.FACTORYTALK,
+     lambda i: f'<Event type="Start" timestamp="2025-01-15T14:{i // 60 % 60:02d}:{i % 60:02d}Z">'
+               f'<BatchId>B{i}</BatchId><Recipe>R{i % 7}</Recipe><Operator>OP{i % 3}</Operator></Event>'),
+)
+
+
+def rate(func, items) -> float:
+    started = time.perf_counter()
+    for item in items:
+        func(item)
+    return len(items) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=50_000, help="lines per system")
+    args = parser.parse_args()
+
+    log_parser = SCADALogParser()
+    print(f"{args.lines} lines per system")
+    print(f"{'parser':<18} {'lines/s':>10} {'parsed':>8}  detected")
+    print("=" * 60)
+    for name, scada_system, render in CORPUS:
+        lines = [render(i) for i in range(args.lines)]
+        detected = log_parser.detect_system(lines)
+        started = time.perf_counter()
+        parsed = sum(log_parser.parse_log_entry(line, scada_system) is not None for line in lines)
+        elapsed = time.perf_counter() - started
+        print(f"{name:<18} {len(lines) / elapsed:>10.0f} {parsed:>8}  {detected.value if detected else None}")
+
+    stamps = [f"2025-01-15 14:{i // 60 % 60:02d}:{i % 60:02d}.{i % 1000:03d}" for i in range(args.lines)]
+    decoder = TimestampDecoder('%Y-%m-%d', 10)
+    lines = [render(i) for _, _, render in CORPUS[:1] for i in range(args.lines)]
+    print()
+    print(f"{'primitive':<18} {'calls/s':>10}")
+    print("=" * 30)
+    print(f"{'strptime':<18} {rate(lambda s: datetime.strptime(s, '%Y-%m-%d %H:%M:%S.%f'), stamps):>10.0f}")
+    print(f"{'TimestampDecoder':<18} {rate(decoder.decode, stamps):>10.0f}")
+    print(f"{'md5 hexdigest':<18} {rate(lambda s: hashlib.md5(s.encode()).hexdigest(), lines):>10.0f}")
+    print(f"{'fast_log_id':<18} {rate(fast_log_id, lines):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+SmartCompute - SCADA Log Query Benchmark
+
+Loads the same synthetic SCADA log rows into SCADALogStore (weekly
+partitions, composite indexes, FTS5 on message) and into the previous
+single ``scada_logs`` table with single-column indexes, then compares:
+text search (FTS5 vs ``message LIKE '%...%'``), a time range + system +
+tag lookup, paging through every row with the keyset cursor vs
+LIMIT/OFFSET (the legacy side returns plain tuples, the store builds
+dicts), and dropping the oldest weeks (DROP TABLE of partitions vs
+DELETE ... WHERE timestamp < ?).
+
+Usage::
+
+    python benchmarks/scada_query_benchmark.py --rows 500000 --weeks 8
+"""
+
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from smartcompute.industrial.scada.log_store import LOG_COLUMNS, SCADALogStore
+
+SYSTEMS = ("wonderware", "emerson_deltav", "honeywell_experion", "siemens_wincc")
+WORDS = ("pump", "valve", "motor", "reactor", "steam", "pressure", "flow", "level", "speed", "temperature")
+
+LEGACY_SCHEMA = (
+    f"CREATE TABLE scada_logs ({', '.join(LOG_COLUMNS)}, raw_data BLOB, created_at TIMESTAMP, "
+    f"PRIMARY KEY (log_id))",
+    "CREATE INDEX idx_logs_timestamp ON scada_logs(timestamp)",
+    "CREATE INDEX idx_logs_severity ON scada_logs(severity)",
+    "CREATE INDEX idx_logs_system ON scada_logs(scada_system)",
+    "CREATE INDEX idx_logs_tag ON scada_logs(tag_name)",
+)
+
+
+def make_rows(count: int, end: datetime, weeks: int):
+    rng = random.Random(7)
+    span = weeks * 7 * 86400
+    for i in range(count):
+        when = end - timedelta(seconds=span * (count - i) / count)
+        words = rng.sample(WORDS, 4)
+        if i % 997 == 0:
+            words.append("cavitation")
+        values = dict.fromkeys(LOG_COLUMNS)
+        values.update(log_id=f"{i:012x}", timestamp=when.isoformat(" "), scada_system=SYSTEMS[i % 4],
+                      source_node=f"node{i % 16}", severity="warning", category="process_control",
+                      message=" ".join(words), tag_name=f"Area{i % 8}.Pump{i % 200}.Speed")
+        yield tuple(values[column] for column in LOG_COLUMNS)
+
+
+def timed(func) -> float:
+    started = time.perf_counter()
+    func()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--weeks", type=int, default=8)
+    parser.add_argument("--page-size", type=int, default=500)
+    args = parser.parse_args()
+
+    end = datetime(2025, 3, 3)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SCADALogStore(Path(tmp) / "partitioned.db")
+        legacy = sqlite3.connect(Path(tmp) / "legacy.db")
+        for statement in LEGACY_SCHEMA:
+            legacy.execute(statement)
+        placeholders = ", ".join("?" * len(LOG_COLUMNS))
+
+        rows = list(make_rows(args.rows, end, args.weeks))
+        conn = sqlite3.connect(store.db_path)
+        load_new = timed(lambda: (store.insert(conn, rows), conn.commit()))
+        conn.close()
+        load_old = timed(lambda: (legacy.executemany(
+            f"INSERT INTO scada_logs ({', '.join(LOG_COLUMNS)}) VALUES ({placeholders})", rows), legacy.commit()))
+
+        day = end - timedelta(days=1)
+        week = end - timedelta(days=7)
+        print(f"{args.rows} rows over {args.weeks} weeks, {len(store.partitions())} partitions")
+        print(f"{'operation':<34} {'single table':>14} {'partitioned':>14}")
+        print("=" * 64)
+        print(f"{'load (executemany)':<34} {load_old:>11.0f} ms {load_new:>11.0f} ms")
+
+        old = timed(lambda: legacy.execute(
+            "SELECT * FROM scada_logs WHERE timestamp >= ? AND message LIKE '%cavitation%' "
+            "ORDER BY timestamp DESC LIMIT 100", (day.isoformat(" "),)).fetchall())
+        new = timed(lambda: store.query(text="cavitation", since=day))
+        print(f"{'text search, last day':<34} {old:>11.1f} ms {new:>11.1f} ms")
+
+        old = timed(lambda: legacy.execute(
+            "SELECT * FROM scada_logs WHERE message LIKE '%cavitation%' ORDER BY timestamp DESC LIMIT 100").fetchall())
+        new = timed(lambda: store.query(text="cavitation"))
+        print(f"{'text search, all weeks':<34} {old:>11.1f} ms {new:>11.1f} ms")
+
+        tag = "Area3.Pump123.Speed"
+        old = timed(lambda: legacy.execute(
+            "SELECT * FROM scada_logs WHERE timestamp >= ? AND scada_system = ? AND tag_name = ? "
+            "ORDER BY timestamp DESC LIMIT 100", (week.isoformat(" "), "honeywell_experion", tag)).fetchall())
+        new = timed(lambda: store.query(since=week, scada_system="honeywell_experion", tag_name=tag))
+        print(f"{'range + system + tag, last week':<34} {old:>11.1f} ms {new:>11.1f} ms")
+
+        def offset_pages():
+            offset = 0
+            while True:
+                page = legacy.execute("SELECT * FROM scada_logs ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+                                      (args.page_size, offset)).fetchall()
+                if len(page) < args.page_size:
+                    return
+                offset += args.page_size
+
+        old = timed(offset_pages)
+        new = timed(lambda: sum(1 for _ in store.iter_query(page_size=args.page_size)))
+        print(f"{'page through all rows':<34} {old:>11.1f} ms {new:>11.1f} ms")
+
+        cutoff = end - timedelta(weeks=args.weeks // 2)
+        old = timed(lambda: (legacy.execute("DELETE FROM scada_logs WHERE timestamp < ?", (cutoff.isoformat(" "),)),
+                             legacy.commit()))
+        new = timed(lambda: store.drop_partitions(cutoff))
+        print(f"{'drop oldest half':<34} {old:>11.1f} ms {new:>11.1f} ms")
+        legacy.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+SmartCompute - SCADA Tail and Syslog Benchmark
+
+Writes a SCADA log file and reads it back with FileTailer (1 MiB block
+reads, partial lines carried, checkpoint per batch) and, for comparison,
+with a line-by-line readline() loop plus a checkpoint per line. Then sends
+UDP syslog datagrams over loopback to a SyslogListener. The sinks only
+count lines, so the numbers are the cost of the source itself, without
+parsing.
+
+Usage::
+
+    python benchmarks/scada_tail_benchmark.py --lines 500000 --datagrams 50000
+"""
+
+import argparse
+import asyncio
+import socket
+import tempfile
+import time
+from pathlib import Path
+
+from smartcompute.industrial.scada.sources import CheckpointStore, FileTailer, SyslogListener
+
+LINE = ("2025-01-15 14:30:{s:02d}.{ms:03d} [ALARM] Area1.Pump{i}.Speed HH 1850.5 rpm "
+        "(Limit: 1800.0) Operator: JSmith\n")
+
+
+def tail_rate(path: Path, store: CheckpointStore) -> float:
+    count = [0]
+    tailer = FileTailer(path, store, lambda lines, _: count.__setitem__(0, count[0] + len(lines)))
+    started = time.perf_counter()
+    tailer.poll()
+    elapsed = time.perf_counter() - started
+    tailer.close()
+    return count[0] / elapsed
+
+
+def readline_rate(path: Path, store: CheckpointStore, limit: int, checkpoint: bool) -> float:
+    done = 0
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        for line in iter(f.readline, b""):
+            line.decode().rstrip("\n")
+            if checkpoint:
+                store.save("readline", 0, f.tell())
+            done += 1
+            if done >= limit:
+                break
+    return done / (time.perf_counter() - started)
+
+
+async def syslog_rate(datagrams: int) -> float:
+    received = [0]
+    listener = SyslogListener(lambda lines, _: received.__setitem__(0, received[0] + len(lines)),
+                              host="127.0.0.1", udp_port=0, tcp_port=None, batch_size=5_000)
+    await listener.start()
+    payload = b"<34>Jan 15 14:30:25 ww01 intouch: " + LINE.format(s=1, ms=2, i=3).encode()
+
+    def send():
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+            for i in range(datagrams):
+                udp.sendto(payload, listener.udp_address)
+                if i % 100 == 99:
+                    time.sleep(0.001)  # Ritmo de un emisor real, no un bucle cerrado
+
+    started = time.perf_counter()
+    await asyncio.to_thread(send)
+    for _ in range(200):
+        if listener.stats['messages'] >= datagrams:
+            break
+        await asyncio.sleep(0.01)
+    await listener.stop()
+    elapsed = time.perf_counter() - started
+    print(f"{'syslog udp':<28} {received[0] / elapsed:>10.0f} msgs/s  ({received[0]}/{datagrams} received, "
+          f"{listener.stats['batches']} batches)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=500_000)
+    parser.add_argument("--readline-limit", type=int, default=20_000,
+                        help="lines read through the per-line checkpoint loop")
+    parser.add_argument("--datagrams", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "intouch.log"
+        with open(path, "w") as f:
+            for i in range(args.lines):
+                f.write(LINE.format(s=i % 60, ms=i % 1000, i=i % 400))
+        store = CheckpointStore(Path(tmp) / "checkpoints.db")
+
+        print(f"{args.lines} lines ({path.stat().st_size / 1e6:.1f} MB)")
+        print("=" * 70)
+        print(f"{'readline + checkpoint/line':<28} "
+              f"{readline_rate(path, store, args.readline_limit, True):>10.0f} lines/s")
+        print(f"{'readline, no checkpoint':<28} {readline_rate(path, store, args.lines, False):>10.0f} lines/s")
+        print(f"{'FileTailer':<28} {tail_rate(path, store):>10.0f} lines/s")
+        asyncio.run(syslog_rate(args.datagrams))
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+SmartCompute - Secure Protocol Server Benchmark
+
+Runs the Modbus secure server in a child process and drives it from 1k
+concurrent simulated clients, once with the asyncio server and once with
+a thread-per-client server equivalent to the previous implementation
+(blocking accept loop, one thread and one AESGCM construction per message).
+Reports messages/sec, server peak RSS and server thread count.
+
+Usage::
+
+    python benchmarks/secure_protocol_benchmark.py --clients 1000 --messages 20
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import resource
+import secrets
+import socket
+import struct
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from smartcompute.industrial.protocols.engine import (
+    ModbusSecureProtocol,
+    SecureProtocolClient,
+    derive_session_key,
+    frame,
+    open_envelope,
+    seal_envelope,
+)
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 ** 2) if sys.platform == "darwin" else rss / 1024
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return b""
+        data += chunk
+    return data
+
+
+def _thread_client(protocol: ModbusSecureProtocol, sock: socket.socket, peer):
+    """One thread per client, AESGCM built per message (previous model)"""
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    try:
+        challenge = secrets.token_bytes(32)
+        sock.sendall(protocol.create_auth_challenge(challenge))
+        length = struct.unpack("!I", _recv_exactly(sock, 4))[0]
+        if not protocol.validate_auth_response(_recv_exactly(sock, length), challenge):
+            return
+        key = derive_session_key(protocol.encryption_key, challenge, protocol.protocol_name)
+        sock.sendall(frame(json.dumps({"type": "auth_ok", "session_id": "t"}).encode()))
+        protocol.authenticated_clients["t"] = {"expires_at": datetime.utcnow() + timedelta(hours=1)}
+        while True:
+            header = _recv_exactly(sock, 4)
+            if not header:
+                break
+            data = _recv_exactly(sock, struct.unpack("!I", header)[0])
+            request = open_envelope(AESGCM(key), "Modbus", peer[0], data)
+            response = protocol.process_modbus_request(request, "t")
+            sock.sendall(frame(seal_envelope(AESGCM(key), "Modbus", peer[0], response)))
+    except OSError:
+        pass
+    finally:
+        sock.close()
+
+
+def run_server(mode: str, port: int, key_queue, ready, done):
+    """Child process: secure server in the requested model"""
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    protocol = ModbusSecureProtocol()
+    protocol.anomaly_thresholds["max_connections_per_minute"] = 10 ** 6
+    protocol.log_secure_event = lambda *args, **kwargs: None
+    key_queue.put(protocol.encryption_key)
+
+    peak_threads = 0
+    if mode == "asyncio":
+        async def main():
+            task = asyncio.create_task(protocol.start_secure_server("127.0.0.1", port))
+            while protocol.bound_address is None:
+                await asyncio.sleep(0.01)
+            ready.set()
+            while not done.is_set():
+                await asyncio.sleep(0.1)
+            await protocol.stop_server()
+            await task
+        asyncio.run(main())
+    else:
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(("127.0.0.1", port))
+        server.listen(1024)
+        server.settimeout(0.1)
+        ready.set()
+        while not done.is_set():
+            try:
+                sock, peer = server.accept()
+            except socket.timeout:
+                continue
+            sock.settimeout(None)
+            threading.Thread(target=_thread_client, args=(protocol, sock, peer), daemon=True).start()
+            peak_threads = max(peak_threads, threading.active_count())
+        server.close()
+
+    key_queue.put((_peak_rss_mb(), peak_threads or 1))
+
+
+async def drive(port: int, key: bytes, clients: int, messages: int):
+    request = struct.pack("!HHHBBHH", 1, 0, 6, 1, 0x03, 0, 10)
+
+    async def one():
+        client = SecureProtocolClient("Modbus", key)
+        await client.connect("127.0.0.1", port, timeout=60)
+        return client
+
+    connected = await asyncio.gather(*[one() for _ in range(clients)])
+
+    async def run(client):
+        for _ in range(messages):
+            await client.request(request)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[run(c) for c in connected])
+    elapsed = time.perf_counter() - started
+    await asyncio.gather(*[c.close() for c in connected])
+    return clients * messages / elapsed
+
+
+def bench(mode: str, args):
+    ctx = multiprocessing.get_context("spawn")
+    key_queue, ready, done = ctx.Queue(), ctx.Event(), ctx.Event()
+    proc = ctx.Process(target=run_server, args=(mode, args.port, key_queue, ready, done), daemon=True)
+    proc.start()
+    try:
+        key = key_queue.get(timeout=60)
+        if not ready.wait(30):
+            raise RuntimeError("server did not start")
+        rate = asyncio.run(drive(args.port, key, args.clients, args.messages))
+    finally:
+        done.set()
+    rss, threads = key_queue.get(timeout=60)
+    proc.join(10)
+    print(f"{mode:<18} {rate:9.1f} msg/s  server peak RSS {rss:7.1f} MB  threads {threads}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--port", type=int, default=15020)
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients x {args.messages} requests")
+    print("=" * 70)
+    bench("asyncio", args)
+    bench("thread per client", args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+SmartCompute - Industrial Systems Sync Benchmark
+
+Simulates several PLC connectors (a fixed round trip per tag read) where a
+small share of the tags change between cycles, plus a slow project backup
+on the first system. The old loop reads every tag one by one, writes every
+value with a per-row INSERT OR REPLACE and a sync_count subquery, and runs
+the backup inline before sleeping. The new loop reads tag batches in
+parallel through a ConnectorGate, writes only the changed values with one
+batched upsert, and runs the backup as a background job. Reports cycles per
+system, rows written and the worst gap between two successful syncs.
+
+Usage::
+
+    python benchmarks/systems_sync_benchmark.py --systems 4 --tags 400 --duration 5
+"""
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+from smartcompute.industrial.protocols.sync_engine import (
+    BackgroundJobRunner,
+    ChangeTracker,
+    ConnectorGate,
+    ConnectorLimits,
+)
+from smartcompute.industrial.protocols.systems_integrator import SYNCHRONIZED_VARIABLE_UPSERT
+
+SCHEMA = '''
+    CREATE TABLE synchronized_variables (
+        variable_id TEXT PRIMARY KEY, system_id TEXT NOT NULL, tag_name TEXT NOT NULL,
+        data_type TEXT, last_value TEXT, last_sync TIMESTAMP, sync_count INTEGER DEFAULT 0
+    )
+'''
+
+
+class SimulatedPLC:
+    def __init__(self, system_id: str, tags: int, change_ratio: float, round_trip: float, rng: random.Random):
+        self.system_id = system_id
+        self.values = {f"Tag_{i}": rng.uniform(0, 100) for i in range(tags)}
+        self.change_ratio = change_ratio
+        self.round_trip = round_trip
+        self.rng = rng
+
+    def step(self):
+        for tag in self.rng.sample(list(self.values), max(1, int(len(self.values) * self.change_ratio))):
+            self.values[tag] = self.rng.uniform(0, 100)
+
+    async def read_variables(self, tags):
+        variables = {}
+        for tag in tags:  # Una petición por tag, como los conectores actuales
+            await asyncio.sleep(self.round_trip)
+            variables[tag] = SimpleNamespace(
+                variable_id=f"{self.system_id}_{tag}", system_id=self.system_id, tag_name=tag, data_type="Real",
+                value=round(self.values[tag], 2), timestamp=datetime.now())
+        return variables
+
+
+async def slow_backup(seconds: float):
+    await asyncio.sleep(seconds)
+
+
+def old_write(db_path: Path, variables):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    for variable in variables.values():
+        cursor.execute('''
+            INSERT OR REPLACE INTO synchronized_variables
+            (variable_id, system_id, tag_name, data_type, last_value, last_sync, sync_count)
+            VALUES (?, ?, ?, ?, ?, ?,
+                COALESCE((SELECT sync_count FROM synchronized_variables WHERE variable_id = ?), 0) + 1)
+        ''', (variable.variable_id, variable.system_id, variable.tag_name, variable.data_type,
+              ChangeTracker.encode(variable.value), variable.timestamp, variable.variable_id))
+    conn.commit()
+    conn.close()
+
+
+def new_write(db_path: Path, rows):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(SYNCHRONIZED_VARIABLE_UPSERT, rows)
+    conn.close()
+
+
+async def run_old(db_path: Path, plcs, args):
+    stats = {plc.system_id: {'cycles': 0, 'rows': 0, 'max_gap': 0.0} for plc in plcs}
+    deadline = time.perf_counter() + args.duration
+
+    async def loop(index, plc):
+        last = time.perf_counter()
+        backup_done = False
+        while time.perf_counter() < deadline:
+            plc.step()
+            variables = await plc.read_variables(list(plc.values))
+            old_write(db_path, variables)
+            now = time.perf_counter()
+            stats[plc.system_id]['cycles'] += 1
+            stats[plc.system_id]['rows'] += len(variables)
+            stats[plc.system_id]['max_gap'] = max(stats[plc.system_id]['max_gap'], now - last)
+            last = now
+            if index == 0 and not backup_done:
+                await slow_backup(args.backup_seconds)  # Dentro del mismo lazo
+                backup_done = True
+            await asyncio.sleep(args.interval)
+
+    await asyncio.gather(*(loop(i, plc) for i, plc in enumerate(plcs)))
+    return stats
+
+
+async def run_new(db_path: Path, plcs, args):
+    stats = {plc.system_id: {'cycles': 0, 'rows': 0, 'max_gap': 0.0} for plc in plcs}
+    deadline = time.perf_counter() + args.duration
+    tracker, jobs = ChangeTracker(), BackgroundJobRunner()
+    limits = ConnectorLimits(max_concurrency=args.concurrency, requests_per_second=args.rate,
+                             read_batch_size=args.batch)
+
+    async def loop(index, plc):
+        gate = ConnectorGate(limits)
+        last = time.perf_counter()
+        if index == 0:
+            jobs.submit(f"backup:{plc.system_id}", lambda: slow_backup(args.backup_seconds))
+        while time.perf_counter() < deadline:
+            plc.step()
+            variables = await gate.map_batches(plc.read_variables, list(plc.values))
+            changed = tracker.changed(variables.values())
+            rows = [(v.variable_id, v.system_id, v.tag_name, v.data_type, tracker.encode(v.value), v.timestamp)
+                    for v in changed]
+            if rows:
+                await asyncio.to_thread(new_write, db_path, rows)
+                tracker.commit(changed)
+            now = time.perf_counter()
+            stats[plc.system_id]['cycles'] += 1
+            stats[plc.system_id]['rows'] += len(rows)
+            stats[plc.system_id]['max_gap'] = max(stats[plc.system_id]['max_gap'], now - last)
+            last = now
+            await asyncio.sleep(args.interval)
+
+    runner = asyncio.create_task(jobs.run())
+    await asyncio.gather(*(loop(i, plc) for i, plc in enumerate(plcs)))
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--systems", type=int, default=4)
+    parser.add_argument("--tags", type=int, default=400, help="tags per system")
+    parser.add_argument("--change-ratio", type=float, default=0.05, help="share of tags changing per cycle")
+    parser.add_argument("--round-trip", type=float, default=0.0005, help="seconds per tag read")
+    parser.add_argument("--interval", type=float, default=0.1, help="sync interval in seconds")
+    parser.add_argument("--backup-seconds", type=float, default=2.0)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=4, help="per-connector concurrent requests")
+    parser.add_argument("--rate", type=float, default=500.0, help="per-connector requests per second")
+    parser.add_argument("--batch", type=int, default=50, help="tags per request")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, runner in (("old", run_old), ("new", run_new)):
+            db_path = Path(tmp) / f"{name}.db"
+            with sqlite3.connect(db_path) as conn:
+                conn.execute(SCHEMA)
+            plcs = [SimulatedPLC(f"plc{i}", args.tags, args.change_ratio, args.round_trip, random.Random(i))
+                    for i in range(args.systems)]
+            results[name] = asyncio.run(runner(db_path, plcs, args))
+
+    print(f"{args.systems} systems x {args.tags} tags, {args.change_ratio:.0%} changing per cycle, "
+          f"{args.backup_seconds:.1f} s backup on plc0, {args.duration:.0f} s run")
+    print(f"{'system':<8} {'old cycles':>11} {'new cycles':>11} {'old rows':>10} {'new rows':>10} "
+          f"{'old max gap':>12} {'new max gap':>12}")
+    print("=" * 80)
+    for system_id in results["old"]:
+        old, new = results["old"][system_id], results["new"][system_id]
+        print(f"{system_id:<8} {old['cycles']:>11} {new['cycles']:>11} {old['rows']:>10} {new['rows']:>10} "
+              f"{old['max_gap']:>10.2f} s {new['max_gap']:>10.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+SmartCompute - Tag Bus Benchmark
+
+Simulates a stable plant (most tags hold steady, a few percent move per
+scan) and compares what a dashboard receives when it polls the full
+``active_readings`` state every scan against a TagBus subscription with
+change-of-value and with a deadband: messages, JSON bytes and CPU time spent
+filtering plus serializing.
+
+Usage::
+
+    python benchmarks/tag_bus_benchmark.py --tags 10000 --scans 200 --moving 0.02
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from smartcompute.industrial.variables.bus import TagBus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tags", type=int, default=10_000)
+    parser.add_argument("--scans", type=int, default=200)
+    parser.add_argument("--moving", type=float, default=0.02,
+                        help="fraction of tags that change per scan")
+    parser.add_argument("--deadband", type=float, default=0.5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(38)
+    ids = [f"tag_{i}" for i in range(args.tags)]
+    values = rng.uniform(0, 100, args.tags).round(2)
+    quality = np.full(args.tags, 100)
+
+    bus = TagBus()
+    cov = bus.subscribe()
+    banded = bus.subscribe(deadband=args.deadband)
+    totals = {name: [0, 0, 0.0] for name in ("polling", "change of value", f"deadband {args.deadband}")}
+
+    for scan in range(args.scans):
+        moving = rng.random(args.tags) < args.moving
+        values[moving] += rng.normal(0, 0.5, int(moving.sum())).round(2)
+
+        started = time.perf_counter()
+        bus.publish(ids, values, quality, float(scan))
+        publish_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        snapshot = {v: {'value': value, 'quality': 100, 'timestamp': float(scan)}
+                    for v, value in zip(ids, values.tolist())}
+        payload = json.dumps(snapshot)
+        totals["polling"][0] += len(snapshot)
+        totals["polling"][1] += len(payload)
+        totals["polling"][2] += time.perf_counter() - started
+
+        for name, subscription in zip(list(totals)[1:], (cov, banded)):
+            started = time.perf_counter()
+            updates = subscription.drain()
+            payload = json.dumps(updates)
+            totals[name][0] += len(updates)
+            totals[name][1] += len(payload)
+            totals[name][2] += time.perf_counter() - started + publish_s / 2
+
+    print(f"{args.tags} tags, {args.scans} scans, {args.moving:.0%} moving per scan")
+    print("=" * 70)
+    base_bytes = totals["polling"][1]
+    for name, (messages, size, seconds) in totals.items():
+        ratio = f"  ({base_bytes / size:.0f}x fewer bytes)" if name != "polling" else ""
+        print(f"{name:<18} {messages / args.scans:>9.0f} tags/scan  {size / args.scans / 1024:>9.1f} KiB/scan  "
+              f"{seconds / args.scans * 1000:>7.2f} ms/scan{ratio}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+SmartCompute - Columnar Scan Batch Benchmark
+
+Processes scan batches of N tags, once per reading through
+VariableDataProcessor.process_reading (one VariableReading and one nested
+result dict per tag) and once through the columnar VariableBatchProcessor
+(array operations, alarm dicts only for tripped rows), and reports tag
+updates/sec and the time to process one scan of N tags.
+
+Usage::
+
+    python benchmarks/variable_batch_benchmark.py --tags 10000 --scans 20
+"""
+
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from smartcompute.industrial.variables.monitor import (
+    IndustrialVariable,
+    SensorStatus,
+    VariableBatchProcessor,
+    VariableDataProcessor,
+    VariableReading,
+    VariableType,
+)
+
+
+def build_variables(count: int):
+    return [
+        IndustrialVariable(
+            id=f"tag_{i}", name=f"Tag {i}", description="", variable_type=VariableType.ANALOG,
+            unit="bar", min_value=0.0, max_value=100.0, nominal_value=50.0,
+            warning_low=30.0, warning_high=70.0, alarm_low=20.0, alarm_high=80.0,
+            location="", plc_address=str(40001 + i), update_rate_ms=1000,
+        )
+        for i in range(count)
+    ]
+
+
+def build_scans(count: int, tags: int):
+    """Lecturas alrededor del nominal con ~1% de filas fuera de umbral"""
+    rng = np.random.default_rng(35)
+    scans = []
+    for _ in range(count):
+        values = rng.normal(50.0, 5.0, tags)
+        spikes = rng.random(tags) < 0.01
+        values[spikes] = rng.choice([10.0, 90.0], spikes.sum())
+        scans.append(values)
+    return scans
+
+
+def per_reading(variables, scans, start):
+    processor = VariableDataProcessor()
+    alarms = 0
+    started = time.perf_counter()
+    for n, values in enumerate(scans):
+        timestamp = start + timedelta(seconds=n)
+        for variable, value in zip(variables, values.tolist()):
+            reading = VariableReading(
+                variable_id=variable.id, timestamp=timestamp, value=value, quality=100,
+                status=SensorStatus.ONLINE, raw_value=value, engineering_units=variable.unit,
+                source_address=variable.plc_address
+            )
+            alarms += len(processor.process_reading(reading, variable)['alarms'])
+    return time.perf_counter() - started, alarms
+
+
+def columnar(variables, scans, start):
+    processor = VariableBatchProcessor()
+    rows = processor.register(variables)
+    quality = np.full(len(rows), 100)
+    alarms = 0
+    started = time.perf_counter()
+    for n, values in enumerate(scans):
+        alarms += len(processor.process(rows, values, quality, start + timedelta(seconds=n)))
+    return time.perf_counter() - started, alarms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tags", type=int, default=10000)
+    parser.add_argument("--scans", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    variables = build_variables(args.tags)
+    scans = build_scans(args.scans, args.tags)
+    start = datetime(2026, 1, 1)
+    updates = args.tags * args.scans
+
+    print(f"{args.tags} tags x {args.scans} scans")
+    print("=" * 70)
+    for name, run in (("per reading", per_reading), ("columnar", columnar)):
+        elapsed, alarms = run(variables, scans, start)
+        print(f"{name:<14} {updates / elapsed:11.0f} updates/s  "
+              f"{elapsed / args.scans * 1000:8.1f} ms/scan  {alarms} alarms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+SmartCompute - Variable Statistics Benchmark
+
+Feeds synthetic readings for a set of tags through the per-reading analysis
+of VariableDataProcessor (noise filter, statistics, trend, prediction and
+anomaly score), once with the previous implementation that recomputed every
+estimator from its window and once with the incremental per-variable slots,
+and reports readings/sec.
+
+Usage::
+
+    python benchmarks/variable_stats_benchmark.py --tags 200 --readings 200000
+"""
+
+import argparse
+import logging
+import random
+import time
+from collections import deque
+from typing import Dict
+
+import numpy as np
+
+from smartcompute.industrial.variables.monitor import VariableDataProcessor
+
+
+class LegacyDataProcessor(VariableDataProcessor):
+    """Previous implementation: every estimator rebuilt from its window"""
+
+    def __init__(self):
+        super().__init__()
+        self.moving_averages = {}
+        self.trend_analyzers = {}
+
+    def apply_noise_filter(self, variable_id: str, value: float) -> float:
+        if variable_id not in self.moving_averages:
+            self.moving_averages[variable_id] = deque(maxlen=10)
+        self.moving_averages[variable_id].append(value)
+        if len(self.moving_averages[variable_id]) > 1:
+            previous_avg = list(self.moving_averages[variable_id])[-2]
+            return 0.3 * value + 0.7 * previous_avg
+        return value
+
+    def calculate_statistics(self, variable_id: str, value: float) -> Dict:
+        values = list(self.moving_averages.get(variable_id, ()))
+        if len(values) < 2:
+            return {}
+        return {
+            'mean': np.mean(values),
+            'std': np.std(values),
+            'min': np.min(values),
+            'max': np.max(values),
+            'range': np.max(values) - np.min(values),
+            'cv': np.std(values) / np.mean(values) if np.mean(values) != 0 else 0
+        }
+
+    def analyze_trend(self, variable_id: str, value: float) -> Dict:
+        if variable_id not in self.trend_analyzers:
+            self.trend_analyzers[variable_id] = deque(maxlen=20)
+        self.trend_analyzers[variable_id].append({'timestamp': time.time(), 'value': value})
+        if len(self.trend_analyzers[variable_id]) < 5:
+            return {'trend': 'insufficient_data'}
+        data = list(self.trend_analyzers[variable_id])
+        times = [d['timestamp'] for d in data]
+        values = [d['value'] for d in data]
+        n = len(values)
+        sum_x, sum_y = sum(times), sum(values)
+        sum_xy = sum(t * v for t, v in zip(times, values))
+        sum_x2 = sum(t * t for t in times)
+        denominator = n * sum_x2 - sum_x * sum_x
+        slope = (n * sum_xy - sum_x * sum_y) / denominator if denominator else 0.0
+        return {'trend': 'stable', 'slope': slope, 'rate_of_change': slope * 60,
+                'confidence': min(n / 20.0, 1.0)}
+
+    def predict_future_values(self, variable_id: str, current_value: float) -> Dict:
+        if len(self.trend_analyzers.get(variable_id, ())) < 10:
+            return {'prediction': 'insufficient_data'}
+        values = [d['value'] for d in list(self.trend_analyzers[variable_id])[-10:]]
+        mean_value = np.mean(values)
+        trend_slope = (values[-1] - values[0]) / len(values)
+        std_dev = np.std(values)
+        return {
+            'predictions': {
+                horizon: {'predicted_value': current_value + trend_slope * minutes,
+                          'lower_bound': current_value + trend_slope * minutes - 2 * std_dev,
+                          'upper_bound': current_value + trend_slope * minutes + 2 * std_dev,
+                          'confidence': 0.95}
+                for horizon, minutes in (('1_minute', 1), ('5_minutes', 5),
+                                         ('15_minutes', 15), ('1_hour', 60))
+            },
+            'model_type': 'linear_trend',
+            'accuracy_estimate': max(0.5, 1.0 - (std_dev / abs(mean_value)) if mean_value != 0 else 0.5)
+        }
+
+    def detect_anomalies(self, variable_id: str, value: float) -> float:
+        values = list(self.moving_averages.get(variable_id, ()))
+        if len(values) < 3:
+            return 0.0
+        mean_val, std_val = np.mean(values), np.std(values)
+        if std_val == 0:
+            return 0.0
+        return min(abs(value - mean_val) / std_val / 3.0, 1.0)
+
+
+def run(processor: VariableDataProcessor, readings) -> float:
+    started = time.perf_counter()
+    for variable_id, value in readings:
+        filtered = processor.apply_noise_filter(variable_id, value)
+        processor.calculate_statistics(variable_id, filtered)
+        processor.analyze_trend(variable_id, filtered)
+        processor.predict_future_values(variable_id, filtered)
+        processor.detect_anomalies(variable_id, filtered)
+    return len(readings) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tags", type=int, default=200)
+    parser.add_argument("--readings", type=int, default=200000)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    rng = random.Random(34)
+    readings = [(f"tag_{i % args.tags}", 50.0 + rng.gauss(0, 2.5)) for i in range(args.readings)]
+
+    print(f"{args.tags} tags, {args.readings} readings")
+    print("=" * 60)
+    print(f"{'recompute per reading':<24} {run(LegacyDataProcessor(), readings):10.0f} readings/s")
+    print(f"{'incremental slots':<24} {run(VariableDataProcessor(), readings):10.0f} readings/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+SmartCompute - Vulnerability Matching Benchmark
+
+Imports a synthetic ICS advisory feed (vendors x products, one to three
+version ranges per advisory) into VulnerabilityKnowledgeBase and matches
+a fleet of assets against it: the per-product interval index vs a linear
+scan of every advisory per asset (timed on a sample and extrapolated, a
+full linear run is hours). Also times a 1% delta feed import against
+re-importing the whole feed.
+
+Usage::
+
+    python benchmarks/vulnerability_match_benchmark.py --advisories 200000 --assets 50000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from smartcompute.industrial.scada.advisories import (
+    ANY_PRODUCT,
+    VulnerabilityKnowledgeBase,
+    parse_advisory,
+    parse_version,
+    product_key,
+)
+
+
+def version(rng: random.Random) -> str:
+    return f"{rng.randint(0, 9)}.{rng.randint(0, 20)}.{rng.randint(0, 9)}"
+
+
+def make_feed(count: int, vendors: int, products: int, rng: random.Random, prefix: str = "ICSA"):
+    feed = []
+    for i in range(count):
+        ranges = []
+        for _ in range(rng.randint(1, 3)):
+            low = version(rng)
+            kind = rng.random()
+            if kind < 0.6:
+                major = int(low.split(".")[0])
+                ranges.append({"introduced": low, "fixed": f"{major + rng.randint(0, 1)}.{rng.randint(0, 20)}"})
+            elif kind < 0.8:
+                ranges.append({"version": low})
+            else:
+                ranges.append({"introduced": "0", "last_affected": low})
+        feed.append({"id": f"{prefix}-{i:07d}", "cve": f"CVE-2024-{i:07d}", "title": f"Advisory {i}",
+                     "cvss_score": round(rng.uniform(2, 10), 1),
+                     "affected": [{"vendor": f"Vendor {rng.randrange(vendors)} AG",
+                                   "product": f"Product-{rng.randrange(products)}", "versions": ranges}]})
+    return feed
+
+
+def linear_match(advisories, vendor: str, product: str, firmware: str):
+    """Recorrer todos los avisos (nombres y versión del activo normalizados una sola vez)"""
+    vendor_key, product_name = product_key(vendor, product)
+    parsed = parse_version(firmware)
+    return [advisory for advisory, keys in advisories
+            if any(v == vendor_key and p in (product_name, ANY_PRODUCT) and any(r.contains(parsed) for r in ranges)
+                   for v, p, ranges in keys)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--advisories", type=int, default=200_000)
+    parser.add_argument("--assets", type=int, default=50_000)
+    parser.add_argument("--vendors", type=int, default=40)
+    parser.add_argument("--products", type=int, default=100, help="products per vendor")
+    parser.add_argument("--linear-sample", type=int, default=100, help="assets timed with the linear scan")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    feed = make_feed(args.advisories, args.vendors, args.products, rng)
+    assets = [(f"Vendor {rng.randrange(args.vendors)}", f"Product-{rng.randrange(args.products)}", version(rng))
+              for _ in range(args.assets)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        kb = VulnerabilityKnowledgeBase(Path(tmp) / "kb.db")
+        started = time.perf_counter()
+        kb.import_feed(feed)
+        import_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        matches = sum(len(kb.match(*asset)) for asset in assets)
+        index_time = time.perf_counter() - started  # Incluye construir los árboles en la primera consulta
+
+        parsed = [(advisory, [item.key + (item.ranges,) for item in advisory.affected])
+                  for advisory in map(parse_advisory, feed)]
+        sample = assets[:args.linear_sample]
+        started = time.perf_counter()
+        linear_matches = sum(len(linear_match(parsed, *asset)) for asset in sample)
+        linear_time = (time.perf_counter() - started) * len(assets) / len(sample)
+        assert linear_matches == sum(len(kb.match(*asset)) for asset in sample)
+
+        delta = [dict(data, cvss_score=9.9) for data in rng.sample(feed, len(feed) // 100)]
+        started = time.perf_counter()
+        result = kb.import_feed({"advisories": delta})
+        kb.match(*assets[0])
+        delta_time = time.perf_counter() - started
+
+        fresh = VulnerabilityKnowledgeBase(Path(tmp) / "full.db")
+        started = time.perf_counter()
+        fresh.import_feed(feed)
+        full_time = time.perf_counter() - started
+
+    print(f"{args.advisories} advisories over {len(kb.affected_products())} products, {args.assets} assets, "
+          f"{matches} matches")
+    print(f"{'operation':<36} {'time':>10}")
+    print("=" * 48)
+    print(f"{'import feed':<36} {import_time:>8.2f} s")
+    print(f"{'match assets, linear scan (extrap.)':<36} {linear_time:>8.1f} s")
+    print(f"{'match assets, interval index':<36} {index_time:>8.2f} s")
+    print(f"{f'delta import ({result.updated} updated)':<36} {delta_time:>8.2f} s")
+    print(f"{'full re-import':<36} {full_time:>8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
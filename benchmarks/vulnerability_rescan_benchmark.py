@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+SmartCompute - Incremental Vulnerability Rescan Benchmark
+
+Simulates a plant (assets spread over zones, matched against a synthetic
+advisory knowledge base) and runs scan cycles where 1% of the assets get a
+firmware change. The old cycle rescans every asset, writes each finding
+with its own connection and commit, and recomputes the dashboard numbers by
+filtering all findings per zone. The new cycle rescans only the assets
+whose fingerprint changed (AssetScanLedger), upserts each zone in one
+transaction (save_zone_scan) and reads the dashboard from
+VulnerabilityAggregates.
+
+Usage::
+
+    python benchmarks/vulnerability_rescan_benchmark.py --assets 5000 --zones 50 --cycles 3
+"""
+
+import argparse
+import hashlib
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+from smartcompute.industrial.scada.advisories import VulnerabilityKnowledgeBase
+from smartcompute.industrial.scada.scan_state import (
+    VULNERABILITY_COLUMNS,
+    AssetScanLedger,
+    VulnerabilityAggregates,
+    asset_fingerprint,
+    save_zone_scan,
+    vulnerability_row,
+)
+
+SCHEMA = (
+    f"CREATE TABLE vulnerabilities ({', '.join(VULNERABILITY_COLUMNS)}, "
+    f"created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (vuln_id))",
+    "CREATE TABLE industrial_assets (asset_id TEXT PRIMARY KEY, last_scan TIMESTAMP)",
+)
+
+
+def make_plant(assets: int, zones: int, rng: random.Random):
+    plant = []
+    for i in range(assets):
+        plant.append(SimpleNamespace(
+            asset_id=f"asset{i}", name=f"Asset {i}", asset_type="PLC", manufacturer=f"Vendor {i % 20}",
+            model=f"Model-{i % 50}", firmware_version=f"{rng.randint(1, 5)}.{rng.randint(0, 9)}",
+            zone_id=f"zone{i % zones}", protocols=["Modbus TCP"], services=[{"name": "Modbus", "port": 502}]))
+    return plant
+
+
+def make_feed(count: int, rng: random.Random):
+    return [{"id": f"ICSA-{i:06d}", "cvss_score": round(rng.uniform(3, 10), 1),
+             "affected": [{"vendor": f"Vendor {rng.randrange(20)}", "product": f"Model-{rng.randrange(50)}",
+                           "versions": [{"introduced": f"{rng.randint(1, 5)}.0", "fixed": f"{rng.randint(1, 6)}.5"}]}]}
+            for i in range(count)]
+
+
+def findings_for(kb: VulnerabilityKnowledgeBase, asset):
+    found = []
+    for advisory in kb.match(asset.manufacturer, asset.model, asset.firmware_version):
+        vuln_id = f"vuln_{hashlib.sha1(f'{advisory.advisory_id}|{asset.asset_id}'.encode()).hexdigest()[:12]}"
+        found.append(SimpleNamespace(
+            vuln_id=vuln_id, cve_id=advisory.cve_id, title=advisory.title, description="", severity=advisory.severity,
+            cvss_score=advisory.cvss_score, cvss_vector="AV:N", affected_assets=[asset.asset_id],
+            discovery_date=datetime.now(), source="feed", exploit_available=False, exploit_complexity="low",
+            threat_actor_interest="high", industrial_impact={}, safety_impact=False, production_impact=True,
+            environmental_impact=False, affected_zones=[asset.zone_id], business_priority=5,
+            technical_priority=int(advisory.cvss_score), operational_impact_hours=6.0,
+            remediation_status="identified", assigned_to=None, remediation_plan=None,
+            estimated_effort_hours=2.0, target_resolution_date=None))
+    return found
+
+
+def old_cycle(db_path: Path, kb, plant, zones):
+    """Todo se re-escanea, una conexión y un commit por hallazgo, dashboard recalculado"""
+    vulnerabilities = {}
+    for asset in plant:
+        for vuln in findings_for(kb, asset):
+            vulnerabilities[vuln.vuln_id] = vuln
+            conn = sqlite3.connect(db_path)
+            conn.execute(f"INSERT OR REPLACE INTO vulnerabilities ({', '.join(VULNERABILITY_COLUMNS)}) "
+                         f"VALUES ({', '.join('?' * len(VULNERABILITY_COLUMNS))})", vulnerability_row(vuln))
+            conn.commit()
+            conn.close()
+    return vulnerabilities
+
+
+def old_dashboard(vulnerabilities, zones):
+    analysis = []
+    for zone_id in zones:
+        zone_vulns = [v for v in vulnerabilities.values() if zone_id in v.affected_zones]
+        if zone_vulns:
+            analysis.append((zone_id, len(zone_vulns),
+                             sum(v.business_priority * v.technical_priority for v in zone_vulns) / len(zone_vulns),
+                             len([v for v in zone_vulns if v.severity == "critical"])))
+    return analysis
+
+
+def new_cycle(db_path: Path, kb, plant, ledger: AssetScanLedger, aggregates: VulnerabilityAggregates, by_asset):
+    """Sólo los activos cambiados, una transacción por zona, agregados incrementales"""
+    pending = {}
+    for asset in plant:
+        fingerprint = asset_fingerprint(asset)
+        if ledger.reason(asset.asset_id, fingerprint, kb.revision_for(asset.manufacturer, asset.model)):
+            pending.setdefault(asset.zone_id, []).append((asset, fingerprint))
+    conn = sqlite3.connect(db_path)
+    scanned = 0
+    for zone_id, items in pending.items():
+        findings, removed = [], []
+        for asset, _ in items:
+            previous = by_asset.pop(asset.asset_id, set())
+            for vuln in findings_for(kb, asset):
+                findings.append(vuln)
+                aggregates.upsert(vuln)
+                previous.discard(vuln.vuln_id)
+                by_asset.setdefault(asset.asset_id, set()).add(vuln.vuln_id)
+            for vuln_id in previous:
+                aggregates.discard(vuln_id)
+                removed.append(vuln_id)
+        rows = [(asset.asset_id, fingerprint, kb.revision, datetime.now()) for asset, fingerprint in items]
+        save_zone_scan(conn, findings, removed, rows)
+        ledger.commit(rows)
+        scanned += len(items)
+    conn.close()
+    return scanned
+
+
+def new_dashboard(aggregates: VulnerabilityAggregates, zones):
+    return [(zone_id, z.count, z.risk_score, z.severity["critical"])
+            for zone_id in zones if (z := aggregates.zones.get(zone_id))]
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - started) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--assets", type=int, default=5_000)
+    parser.add_argument("--zones", type=int, default=50)
+    parser.add_argument("--advisories", type=int, default=5_000)
+    parser.add_argument("--cycles", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(21)
+    plant = make_plant(args.assets, args.zones, rng)
+    zones = [f"zone{i}" for i in range(args.zones)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        kb = VulnerabilityKnowledgeBase(tmp / "kb.db")
+        kb.import_feed(make_feed(args.advisories, rng))
+        for name in ("old.db", "new.db"):
+            with sqlite3.connect(tmp / name) as conn:
+                for statement in SCHEMA:
+                    conn.execute(statement)
+                conn.executemany("INSERT INTO industrial_assets (asset_id) VALUES (?)", [(a.asset_id,) for a in plant])
+
+        ledger, aggregates, by_asset = AssetScanLedger(), VulnerabilityAggregates(), {}
+        with sqlite3.connect(tmp / "new.db") as conn:
+            ledger.load(conn)
+        first, _ = timed(new_cycle, tmp / "new.db", kb, plant, ledger, aggregates, by_asset)
+
+        print(f"{args.assets} assets in {args.zones} zones, {len(aggregates)} findings; "
+              f"first full scan (new path) {first:.0f} ms")
+        print(f"{'cycle (1% changed)':<20} {'old scan':>11} {'new scan':>11} {'old dash':>10} {'new dash':>10}")
+        print("=" * 66)
+        for cycle in range(args.cycles):
+            for asset in rng.sample(plant, max(1, args.assets // 100)):
+                asset.firmware_version = f"{rng.randint(1, 5)}.{rng.randint(0, 9)}"
+            old_scan, vulnerabilities = timed(old_cycle, tmp / "old.db", kb, plant, zones)
+            new_scan, scanned = timed(new_cycle, tmp / "new.db", kb, plant, ledger, aggregates, by_asset)
+            old_dash, expected = timed(old_dashboard, vulnerabilities, zones)
+            new_dash, actual = timed(new_dashboard, aggregates, zones)
+            assert [row[:2] for row in expected] == [row[:2] for row in actual]
+            print(f"{f'#{cycle + 1} ({scanned} rescanned)':<20} {old_scan:>8.0f} ms {new_scan:>8.0f} ms "
+                  f"{old_dash:>7.1f} ms {new_dash:>7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+SmartCompute Enterprise - Deduplicated Incremental Backups
+==========================================================
+
+Content-defined chunking (CDC) plus a content-addressed chunk store.
+
+Sources are split at boundaries chosen by a rolling gear hash, so an edit
+in the middle of a SQLite file only changes the chunks around the edit and
+every other chunk keeps its identity between runs.  Chunks are stored once
+under a keyed hash of their plaintext; a backup is just an encrypted
+manifest listing chunk references per file.  Unreferenced chunks are
+garbage-collected by a mark-and-sweep over the live manifests.
+
+Copyright (c) 2024 SmartCompute. All rights reserved.
+"""
+
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager, suppress
+from dataclasses import asdict, dataclass
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+    DEDUP_AVAILABLE = True
+except ImportError:
+    DEDUP_AVAILABLE = False
+
+
+MIN_CHUNK_SIZE = 16 * 1024
+AVG_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 256 * 1024
+READ_BLOCK_SIZE = 4 * 1024 * 1024
+COMPRESSION_LEVEL = 6
+NORMALIZATION = 1  # extra/fewer mask bits below/above the average chunk size
+
+_WINDOW = 32  # bytes of context in a 32-bit gear hash
+_GEAR_RNG = random.Random(0x5C0DEC)  # fixed seed: boundaries must be stable across runs
+_GEAR = [_GEAR_RNG.getrandbits(32) for _ in range(256)]
+
+
+class DedupStoreError(ValueError):
+    """Raised when a chunk or manifest is missing, corrupted or tampered with"""
+
+
+class StoreLock:
+    """
+    Shared/exclusive lock for one store root.
+
+    A backup finds existing chunks before the manifest that references them
+    is written, so a concurrent sweep could delete a chunk the backup is
+    counting on.  Backups and replication hold the lock shared (they may
+    overlap), garbage collection holds it exclusive.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+
+    @contextmanager
+    def shared(self):
+        with self._cond:
+            while self._exclusive:
+                self._cond.wait()
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._shared -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            while self._exclusive or self._shared:
+                self._cond.wait()
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusive = False
+                self._cond.notify_all()
+
+
+_STORE_LOCKS: Dict[Path, StoreLock] = {}
+_STORE_LOCKS_GUARD = threading.Lock()
+
+
+def store_lock(root: Path) -> StoreLock:
+    """The lock for ``root``, shared by every ``ChunkStore`` opened on it"""
+    key = Path(root).resolve()
+    with _STORE_LOCKS_GUARD:
+        return _STORE_LOCKS.setdefault(key, StoreLock())
+
+
+@dataclass
+class DedupStats:
+    """Per-run deduplication report"""
+    files: int = 0
+    bytes_in: int = 0
+    chunks_total: int = 0
+    chunks_new: int = 0
+    bytes_new: int = 0
+    bytes_written: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Logical bytes per newly stored plaintext byte (1.0 = nothing deduplicated)"""
+        if self.bytes_new == 0:
+            return float(self.bytes_in) if self.bytes_in else 1.0
+        return self.bytes_in / self.bytes_new
+
+    def to_dict(self) -> Dict[str, float]:
+        result = asdict(self)
+        result["dedup_ratio"] = round(self.dedup_ratio, 3)
+        return result
+
+
+class ContentDefinedChunker:
+    """
+    Split a byte stream at content-defined boundaries.
+
+    A cut point is any position where the 32-bit gear hash of the preceding
+    32 bytes has all mask bits clear, subject to min/max chunk sizes.
+    Chunking is normalized: below ``avg_size`` a stricter mask applies and
+    above it a looser one, which keeps chunk sizes close to the average.
+    Without it the size distribution has a long tail, and an edit landing
+    in one of the large chunks rewrites far more than the average chunk.
+    Boundaries depend only on content, never on how the stream was read.
+    """
+
+    def __init__(self, min_size: int = MIN_CHUNK_SIZE, avg_size: int = AVG_CHUNK_SIZE,
+                 max_size: int = MAX_CHUNK_SIZE, read_size: int = READ_BLOCK_SIZE):
+        if not min_size <= avg_size <= max_size:
+            raise ValueError("chunk sizes must satisfy min <= avg <= max")
+
+        self.min_size = min_size
+        self.avg_size = avg_size
+        self.max_size = max_size
+        self.read_size = read_size
+        bits = max(1, (avg_size - min_size).bit_length() - 1)
+        # Use the high bits: they mix the whole 32-byte window.  The strict
+        # mask's bits include the loose mask's, so strict cuts are a subset.
+        self.mask = self._high_bits(bits + NORMALIZATION)
+        self.loose_mask = self._high_bits(max(1, bits - NORMALIZATION))
+
+        if NUMPY_AVAILABLE:
+            self._gear = np.array(_GEAR, dtype=np.uint32)
+
+    @staticmethod
+    def _high_bits(bits: int) -> int:
+        return ((1 << bits) - 1) << (32 - bits)
+
+    def _candidates(self, context: bytes, block: bytes) -> List[Tuple[int, bool]]:
+        """
+        Offsets in ``block`` after which the loose hash condition holds,
+        each flagged with whether the strict condition holds too
+        """
+        if NUMPY_AVAILABLE:
+            data = np.frombuffer(context + block, dtype=np.uint8)
+            values = self._gear[data]
+            lead = len(context)
+            n = len(block)
+            acc = np.zeros(n, dtype=np.uint32)
+            for k in range(_WINDOW):
+                start = lead - k
+                if start >= 0:
+                    acc += values[start:start + n] << np.uint32(k)
+                elif n + start > 0:
+                    acc[-start:] += values[:n + start] << np.uint32(k)
+            hits = np.flatnonzero((acc & np.uint32(self.loose_mask)) == 0)
+            strict = (acc[hits] & np.uint32(self.mask)) == 0
+            return list(zip((hits + 1).tolist(), strict.tolist()))
+
+        h = 0
+        for byte in context:
+            h = ((h << 1) + _GEAR[byte]) & 0xFFFFFFFF
+        found = []
+        mask, loose_mask = self.mask, self.loose_mask
+        for i, byte in enumerate(block):
+            h = ((h << 1) + _GEAR[byte]) & 0xFFFFFFFF
+            if not h & loose_mask:
+                found.append((i + 1, not h & mask))
+        return found
+
+    def iter_chunks(self, stream: BinaryIO) -> Iterator[bytes]:
+        """Yield the chunks of ``stream`` in order"""
+        pending = bytearray()
+        context = b""
+
+        while True:
+            block = stream.read(self.read_size)
+            if not block:
+                break
+
+            base = len(pending)
+            pending += block
+            start = 0
+            for offset, strict in self._candidates(context, block):
+                cut = base + offset
+                while cut - start > self.max_size:
+                    yield bytes(pending[start:start + self.max_size])
+                    start += self.max_size
+                size = cut - start
+                if size >= self.avg_size or (strict and size >= self.min_size):
+                    yield bytes(pending[start:cut])
+                    start = cut
+
+            while len(pending) - start >= self.max_size:
+                yield bytes(pending[start:start + self.max_size])
+                start += self.max_size
+
+            del pending[:start]
+            context = (context + block)[-(_WINDOW - 1):]
+
+        if pending:
+            yield bytes(pending)
+
+
+class ChunkStore:
+    """Content-addressed, encrypted chunk store with encrypted manifests"""
+
+    def __init__(self, root: Path, master_key: bytes,
+                 chunker: Optional[ContentDefinedChunker] = None):
+        if not DEDUP_AVAILABLE:
+            raise RuntimeError("cryptography is required for deduplicated backups")
+
+        self.root = Path(root)
+        self.chunks_dir = self.root / "chunks"
+        self.manifests_dir = self.root / "manifests"
+        self.chunks_dir.mkdir(parents=True, exist_ok=True)
+        self.manifests_dir.mkdir(parents=True, exist_ok=True)
+
+        self.chunker = chunker or ContentDefinedChunker()
+        self.lock = store_lock(self.root)
+        self._id_key = self._derive(master_key, b"smartcompute-dedup-id-v1")
+        self._cipher = AESGCM(self._derive(master_key, b"smartcompute-dedup-data-v1"))
+
+    @staticmethod
+    def _derive(master_key: bytes, info: bytes) -> bytes:
+        return HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=info).derive(master_key)
+
+    def chunk_id(self, data: bytes) -> str:
+        """Keyed content hash, so chunk names do not leak plaintext hashes"""
+        return hashlib.blake2b(data, key=self._id_key, digest_size=32).hexdigest()
+
+    def _chunk_path(self, chunk_id: str) -> Path:
+        return self.chunks_dir / chunk_id[:2] / chunk_id
+
+    def _seal(self, payload: bytes, aad: bytes) -> bytes:
+        nonce = os.urandom(12)
+        return nonce + self._cipher.encrypt(nonce, payload, aad)
+
+    def _open(self, sealed: bytes, aad: bytes) -> bytes:
+        try:
+            return self._cipher.decrypt(sealed[:12], sealed[12:], aad)
+        except InvalidTag:
+            raise DedupStoreError(f"authentication failed for {aad.decode()}")
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        # Unique temp name: concurrent backups may write the same new chunk
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.unlink(tmp)
+            raise
+
+    def put_chunk(self, data: bytes, stats: DedupStats) -> str:
+        """Store ``data`` unless an identical chunk already exists"""
+        chunk_id = self.chunk_id(data)
+        path = self._chunk_path(chunk_id)
+        stats.chunks_total += 1
+
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            sealed = self._seal(zlib.compress(data, COMPRESSION_LEVEL), chunk_id.encode())
+            self._write_atomic(path, sealed)
+            stats.chunks_new += 1
+            stats.bytes_new += len(data)
+            stats.bytes_written += len(sealed)
+
+        return chunk_id
+
+    def get_chunk(self, chunk_id: str) -> bytes:
+        path = self._chunk_path(chunk_id)
+        if not path.exists():
+            raise DedupStoreError(f"missing chunk {chunk_id}")
+
+        data = zlib.decompress(self._open(path.read_bytes(), chunk_id.encode()))
+        if self.chunk_id(data) != chunk_id:
+            raise DedupStoreError(f"chunk {chunk_id} content mismatch")
+        return data
+
+    def backup(self, source_path: str, backup_id: str) -> Dict:
+        """
+        Chunk ``source_path`` (file or directory) into the store and write
+        its manifest.  Returns the manifest, including per-run ``stats``.
+        """
+        with self.lock.shared():
+            return self._backup(source_path, backup_id)
+
+    def _backup(self, source_path: str, backup_id: str) -> Dict:
+        start = time.perf_counter()
+        stats = DedupStats()
+        source = Path(source_path)
+        hasher = hashlib.sha256()
+
+        if source.is_file():
+            members = [(source, source.name)]
+        else:
+            members = [(p, p.relative_to(source).as_posix())
+                       for p in sorted(source.rglob('*')) if p.is_file()]
+
+        files = []
+        for file_path, arcname in members:
+            st = os.stat(file_path)
+            chunk_ids = []
+            size = 0
+            with open(file_path, 'rb') as f:
+                for chunk in self.chunker.iter_chunks(f):
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    chunk_ids.append(self.put_chunk(chunk, stats))
+
+            files.append({
+                "path": arcname,
+                "size": size,
+                "mode": st.st_mode & 0o7777,
+                "mtime": st.st_mtime,
+                "chunks": chunk_ids,
+            })
+            stats.files += 1
+            stats.bytes_in += size
+
+        stats.elapsed_seconds = time.perf_counter() - start
+        manifest = {
+            "backup_id": backup_id,
+            "created": time.time(),
+            "source": str(source_path),
+            "sha256": hasher.hexdigest(),
+            "files": files,
+            "stats": stats.to_dict(),
+        }
+        sealed = self._seal(json.dumps(manifest).encode(), backup_id.encode())
+        self._write_atomic(self.manifest_path(backup_id), sealed)
+        return manifest
+
+    def manifest_path(self, backup_id: str) -> Path:
+        return self.manifests_dir / f"{backup_id}.manifest"
+
+    def load_manifest(self, backup_id: str) -> Dict:
+        path = self.manifest_path(backup_id)
+        if not path.exists():
+            raise DedupStoreError(f"missing manifest {backup_id}")
+        return json.loads(self._open(path.read_bytes(), backup_id.encode()))
+
+    def restore(self, backup_id: str, restore_dir: Path,
+                member_filter: Optional[Callable[[str], bool]] = None) -> str:
+        """Reassemble files from a manifest; returns the plaintext checksum"""
+        manifest = self.load_manifest(backup_id)
+        hasher = hashlib.sha256()
+
+        for entry in manifest["files"]:
+            extract = member_filter is None or member_filter(entry["path"])
+            target = None
+            if extract:
+                parts = PurePosixPath(entry["path"]).parts
+                if PurePosixPath(entry["path"]).is_absolute() or '..' in parts:
+                    raise DedupStoreError(f"unsafe member path: {entry['path']}")
+                target = Path(restore_dir).joinpath(*parts)
+                target.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(target, 'wb') if target else open(os.devnull, 'wb') as out:
+                for chunk_id in entry["chunks"]:
+                    data = self.get_chunk(chunk_id)
+                    hasher.update(data)
+                    out.write(data)
+            if target:
+                os.chmod(target, entry["mode"])
+
+        checksum = hasher.hexdigest()
+        if checksum != manifest["sha256"]:
+            raise DedupStoreError(f"backup {backup_id} checksum mismatch")
+        return checksum
+
+    def delete_manifest(self, backup_id: str):
+        path = self.manifest_path(backup_id)
+        if path.exists():
+            path.unlink()
+
+    def live_chunk_ids(self) -> Set[str]:
+        """Mark phase: every chunk referenced by a manifest on disk"""
+        live = set()
+        for path in self.manifests_dir.glob("*.manifest"):
+            manifest = self.load_manifest(path.stem)
+            for entry in manifest["files"]:
+                live.update(entry["chunks"])
+        return live
+
+    def garbage_collect(self) -> Dict[str, int]:
+        """Sweep chunks no live manifest references (waits for running backups)"""
+        with self.lock.exclusive():
+            live = self.live_chunk_ids()
+            removed = 0
+            freed = 0
+            for path in self.chunks_dir.glob("*/*"):
+                if path.name not in live and not path.name.endswith(".tmp"):
+                    freed += path.stat().st_size
+                    path.unlink()
+                    removed += 1
+        return {"chunks_removed": removed, "bytes_freed": freed, "chunks_live": len(live)}
+
+    def usage(self) -> Dict[str, int]:
+        chunk_files = list(self.chunks_dir.glob("*/*"))
+        return {
+            "chunks": len(chunk_files),
+            "stored_bytes": sum(p.stat().st_size for p in chunk_files),
+            "manifests": sum(1 for _ in self.manifests_dir.glob("*.manifest")),
+        }
@@ -19,6 +19,7 @@ Copyright (c) 2024 SmartCompute. All rights reserved.
 """
 
 import asyncio
+import base64
 import json
 import logging
 import os
@@ -32,7 +33,7 @@ import hashlib
 import shutil
 import zipfile
 import psutil
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 
 # Try to import cryptography, use fallback if not available
 try:
@@ -58,6 +59,13 @@ except ImportError:
         def decrypt(self, data):
             return base64.b64decode(data)
 
+from smartcompute.enterprise.ops.backup_dedup import DEDUP_AVAILABLE, ChunkStore, store_lock
+from smartcompute.enterprise.ops.backup_stream import (
+    STREAMING_AVAILABLE,
+    StreamingBackupReader,
+    StreamingBackupWriter,
+)
+
 
 class BackupTier(Enum):
     """Backup tier classifications"""
@@ -100,6 +108,7 @@ class BackupMetadata:
     backup_type: str
     source_location: str
     storage_location: str
+    archive_format: str = "zip"  # "zip" (Fernet blob), "stream" (chunked AES-GCM), "dedup"
 
 
 @dataclass
@@ -126,6 +135,10 @@ class BackupDisasterRecovery:
         self.encryption_keys = {}
         self.backup_schedule = {}
         self.retention_policies = {}
+        self.stream_chunk_size = 1024 * 1024
+        self.stream_workers = min(8, os.cpu_count() or 4)
+        self.chunk_store: Optional[ChunkStore] = None
+        self.incremental_runs = {}
 
         # DR configuration
         self.dr_regions = ["us-east-1", "us-west-2", "eu-west-1"]
@@ -236,9 +249,14 @@ class BackupDisasterRecovery:
                           source_path: str,
                           backup_type: str,
                           tier: BackupTier = BackupTier.WARM,
-                          compliance_tags: Optional[List[str]] = None) -> str:
+                          compliance_tags: Optional[List[str]] = None,
+                          incremental: bool = False) -> str:
         """
-        Create a backup with specified tier and compliance requirements
+        Create a backup with specified tier and compliance requirements.
+
+        With ``incremental=True`` the source is split into content-defined
+        chunks and only chunks not already in the deduplicated store are
+        written; the backup itself is a manifest of chunk references.
         """
         try:
             backup_id = f"backup_{backup_type}_{int(time.time())}"
@@ -247,17 +265,30 @@ class BackupDisasterRecovery:
 
             self.logger.info(f"Creating {tier.value} backup: {backup_id}")
 
-            # Determine storage location
-            storage_path = self.backup_root / tier.value / f"{backup_id}.zip"
+            if incremental and DEDUP_AVAILABLE:
+                archive_format = "dedup"
+                encrypted_path, checksum = await self._create_incremental_backup(
+                    source_path, backup_id
+                )
+            elif STREAMING_AVAILABLE:
+                # Single pass: compress, hash and encrypt chunk by chunk
+                archive_format = "stream"
+                encrypted_path = self.backup_root / tier.value / f"{backup_id}.scsb"
+                checksum = await self._create_streaming_backup(source_path, encrypted_path)
+            else:
+                archive_format = "zip"
+
+                # Determine storage location
+                storage_path = self.backup_root / tier.value / f"{backup_id}.zip"
 
-            # Create compressed backup
-            await self._create_compressed_backup(source_path, storage_path)
+                # Create compressed backup
+                await self._create_compressed_backup(source_path, storage_path)
 
-            # Calculate checksum
-            checksum = await self._calculate_checksum(storage_path)
+                # Calculate checksum
+                checksum = await self._calculate_checksum(storage_path)
 
-            # Encrypt backup
-            encrypted_path = await self._encrypt_backup(storage_path)
+                # Encrypt backup
+                encrypted_path = await self._encrypt_backup(storage_path)
 
             # Get file size
             size_bytes = encrypted_path.stat().st_size
@@ -277,7 +308,8 @@ class BackupDisasterRecovery:
                 compliance_tags=compliance_tags,
                 backup_type=backup_type,
                 source_location=source_path,
-                storage_location=str(encrypted_path)
+                storage_location=str(encrypted_path),
+                archive_format=archive_format
             )
 
             # Store metadata
@@ -308,6 +340,82 @@ class BackupDisasterRecovery:
                         arcname = file_path.relative_to(source)
                         zipf.write(file_path, arcname)
 
+    def _stream_key(self, key_id: str) -> bytes:
+        """Raw 32-byte master key behind a stored Fernet key"""
+        key = self.encryption_keys["keys"][key_id]["key"]
+        return base64.urlsafe_b64decode(key.encode())
+
+    async def _create_streaming_backup(self, source_path: str, output_path: Path) -> str:
+        """Create a chunked, authenticated-encrypted archive; returns the plaintext checksum"""
+        writer = StreamingBackupWriter(
+            self._stream_key(self.encryption_keys["active_key_id"]),
+            chunk_size=self.stream_chunk_size,
+            workers=self.stream_workers
+        )
+        loop = asyncio.get_running_loop()
+        stats = await loop.run_in_executor(None, writer.write, source_path, output_path)
+
+        self.logger.info(
+            f"Streamed {stats.files} files, {stats.bytes_in} bytes -> {stats.bytes_out} bytes "
+            f"in {stats.elapsed_seconds:.2f}s ({stats.throughput_mb_s:.1f} MB/s)"
+        )
+        return stats.checksum
+
+    def _get_chunk_store(self) -> ChunkStore:
+        """Deduplicated chunk store shared by all incremental backups"""
+        if self.chunk_store is None:
+            master_key = base64.urlsafe_b64decode(self.encryption_keys["master_key"].encode())
+            self.chunk_store = ChunkStore(self.backup_root / "incremental", master_key)
+        return self.chunk_store
+
+    async def _create_incremental_backup(self, source_path: str, backup_id: str) -> Tuple[Path, str]:
+        """Chunk the source into the dedup store; returns (manifest path, checksum)"""
+        store = self._get_chunk_store()
+        loop = asyncio.get_running_loop()
+        manifest = await loop.run_in_executor(None, store.backup, source_path, backup_id)
+
+        stats = manifest["stats"]
+        self.incremental_runs[backup_id] = stats
+        self.logger.info(
+            f"Incremental backup {backup_id}: {stats['bytes_in']} bytes scanned, "
+            f"{stats['chunks_new']}/{stats['chunks_total']} new chunks, "
+            f"{stats['bytes_written']} bytes written, dedup ratio {stats['dedup_ratio']}"
+        )
+        return store.manifest_path(backup_id), manifest["sha256"]
+
+    async def _restore_incremental_backup(self, metadata: BackupMetadata, restore_path: str,
+                                          recovery_type: RecoveryType):
+        """Reassemble files from the manifest's chunk references"""
+        member_filter = None
+        if recovery_type != RecoveryType.FULL_SYSTEM:
+            def member_filter(member: str) -> bool:
+                return self._should_extract_member(member, recovery_type)
+
+        loop = asyncio.get_running_loop()
+        checksum = await loop.run_in_executor(
+            None, self._get_chunk_store().restore, metadata.backup_id, Path(restore_path),
+            member_filter
+        )
+        if checksum != metadata.checksum:
+            raise ValueError(f"Backup {metadata.backup_id} checksum does not match metadata")
+
+    async def _restore_streaming_backup(self, metadata: BackupMetadata, restore_path: str,
+                                        recovery_type: RecoveryType):
+        """Authenticate, decrypt and extract a streaming archive in one pass"""
+        reader = StreamingBackupReader(self._stream_key(metadata.encryption_key_id))
+
+        member_filter = None
+        if recovery_type != RecoveryType.FULL_SYSTEM:
+            def member_filter(member: str) -> bool:
+                return self._should_extract_member(member, recovery_type)
+
+        loop = asyncio.get_running_loop()
+        stats = await loop.run_in_executor(
+            None, reader.restore, Path(metadata.storage_location), Path(restore_path), member_filter
+        )
+        if stats.checksum != metadata.checksum:
+            raise ValueError(f"Backup {metadata.backup_id} checksum does not match metadata")
+
     async def _calculate_checksum(self, file_path: Path) -> str:
         """Calculate SHA-256 checksum of file"""
         hash_sha256 = hashlib.sha256()
@@ -376,19 +484,48 @@ class BackupDisasterRecovery:
         # Simulate replication delay
         await asyncio.sleep(1)
 
-        # Copy backup file to DR region
-        source_file = Path(metadata.storage_location)
-        dest_file = dr_path / source_file.name
-        shutil.copy2(source_file, dest_file)
+        # Copies and the DR store lock wait block, so they run off the event loop
+        loop = asyncio.get_running_loop()
+        if metadata.archive_format == "dedup":
+            # Incremental backups only ship the chunks the region does not have yet
+            dest_file = await loop.run_in_executor(
+                None, self._replicate_chunks, metadata.backup_id, dr_path / "incremental")
+        else:
+            # Copy backup file to DR region
+            source_file = Path(metadata.storage_location)
+            dest_file = dr_path / source_file.name
+            await loop.run_in_executor(None, shutil.copy2, source_file, dest_file)
 
         # Update metadata with DR location
-        dr_metadata = metadata
-        dr_metadata.storage_location = str(dest_file)
+        dr_metadata = replace(metadata, storage_location=str(dest_file))
 
         dr_metadata_file = dr_path / f"{metadata.backup_id}_metadata.json"
         with open(dr_metadata_file, 'w') as f:
             f.write(json.dumps(asdict(dr_metadata), default=str, indent=2))
 
+    def _replicate_chunks(self, backup_id: str, dest_root: Path) -> Path:
+        """Copy chunks referenced by a manifest that are missing at ``dest_root``"""
+        store = self._get_chunk_store()
+        manifest = store.load_manifest(backup_id)
+        copied = 0
+
+        # Held until the manifest lands, so a GC of the DR store cannot sweep
+        # chunks this copy skipped because they were already there
+        with store_lock(dest_root).shared():
+            for entry in manifest["files"]:
+                for chunk_id in entry["chunks"]:
+                    dest = dest_root / "chunks" / chunk_id[:2] / chunk_id
+                    if not dest.exists():
+                        dest.parent.mkdir(parents=True, exist_ok=True)
+                        shutil.copy2(store.chunks_dir / chunk_id[:2] / chunk_id, dest)
+                        copied += 1
+
+            manifest_dest = dest_root / "manifests" / store.manifest_path(backup_id).name
+            manifest_dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(store.manifest_path(backup_id), manifest_dest)
+        self.logger.info(f"Replicated {copied} new chunks for {backup_id} to {dest_root}")
+        return manifest_dest
+
     async def restore_backup(self,
                            backup_id: str,
                            restore_path: str,
@@ -408,11 +545,19 @@ class BackupDisasterRecovery:
             if not await self._validate_backup_integrity(metadata):
                 raise ValueError(f"Backup {backup_id} integrity validation failed")
 
-            # Decrypt backup
-            decrypted_path = await self._decrypt_backup(metadata)
+            if metadata.archive_format == "stream":
+                # Records are authenticated as they are extracted
+                Path(restore_path).mkdir(parents=True, exist_ok=True)
+                await self._restore_streaming_backup(metadata, restore_path, recovery_type)
+            elif metadata.archive_format == "dedup":
+                Path(restore_path).mkdir(parents=True, exist_ok=True)
+                await self._restore_incremental_backup(metadata, restore_path, recovery_type)
+            else:
+                # Decrypt backup
+                decrypted_path = await self._decrypt_backup(metadata)
 
-            # Extract backup
-            await self._extract_backup(decrypted_path, restore_path, recovery_type)
+                # Extract backup
+                await self._extract_backup(decrypted_path, restore_path, recovery_type)
 
             # Verify restoration
             if await self._verify_restoration(restore_path, metadata):
@@ -447,6 +592,11 @@ class BackupDisasterRecovery:
         if backup_path.stat().st_size != metadata.size_bytes:
             return False
 
+        # Streaming archives and dedup chunks are authenticated piece by piece
+        # during restore, so a separate full decryption pass would only double the I/O
+        if metadata.archive_format in ("stream", "dedup"):
+            return True
+
         # Validate checksum (after decryption)
         try:
             decrypted_path = await self._decrypt_backup(metadata)
@@ -737,7 +887,7 @@ class BackupDisasterRecovery:
             default=datetime.now()
         )
 
-        return {
+        status = {
             "total_backups": total_backups,
             "total_size_gb": round(total_size / (1024**3), 2),
             "tier_distribution": tier_distribution,
@@ -749,9 +899,17 @@ class BackupDisasterRecovery:
             "encryption_status": "enabled"
         }
 
+        if self.chunk_store is not None:
+            status["incremental_store"] = self.chunk_store.usage()
+            if self.incremental_runs:
+                status["last_incremental_run"] = list(self.incremental_runs.values())[-1]
+
+        return status
+
     async def cleanup_expired_backups(self) -> int:
         """Clean up expired backups based on retention policies"""
         cleaned_count = 0
+        dedup_cleaned = False
         current_time = datetime.now()
 
         for backup_id, metadata in list(self.active_backups.items()):
@@ -761,6 +919,10 @@ class BackupDisasterRecovery:
                     backup_path = Path(metadata.storage_location)
                     if backup_path.exists():
                         backup_path.unlink()
+                    if metadata.archive_format == "dedup":
+                        self._get_chunk_store().delete_manifest(backup_id)
+                        self.incremental_runs.pop(backup_id, None)
+                        dedup_cleaned = True
 
                     # Remove metadata
                     metadata_file = self.backup_root / "metadata" / f"{backup_id}.json"
@@ -770,6 +932,9 @@ class BackupDisasterRecovery:
                     # Remove from DR regions
                     for region in self.dr_regions:
                         dr_file = self.backup_root / "dr_regions" / region / backup_path.name
+                        if metadata.archive_format == "dedup":
+                            dr_file = (self.backup_root / "dr_regions" / region /
+                                       "incremental" / "manifests" / backup_path.name)
                         if dr_file.exists():
                             dr_file.unlink()
 
@@ -781,6 +946,23 @@ class BackupDisasterRecovery:
                 except Exception as e:
                     self.logger.error(f"Failed to cleanup backup {backup_id}: {e}")
 
+        # Sweep chunks no remaining manifest references, locally and in DR regions
+        if dedup_cleaned:
+            loop = asyncio.get_running_loop()
+            stores = [self._get_chunk_store()]
+            master_key = base64.urlsafe_b64decode(self.encryption_keys["master_key"].encode())
+            for region in self.dr_regions:
+                dr_store = self.backup_root / "dr_regions" / region / "incremental"
+                if dr_store.exists():
+                    stores.append(ChunkStore(dr_store, master_key))
+
+            for store in stores:
+                gc_result = await loop.run_in_executor(None, store.garbage_collect)
+                self.logger.info(
+                    f"Chunk store GC ({store.root}): removed {gc_result['chunks_removed']} "
+                    f"chunks, freed {gc_result['bytes_freed']} bytes"
+                )
+
         return cleaned_count
 
 
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+SmartCompute Industrial - Backfill de Historiadores
+===================================================
+
+Relleno del histórico local desde un historiador remoto (COLOS/Wonderware)
+sin cargar el rango entero en memoria:
+
+- ``plan_chunks()`` parte el rango en trozos tiempo × tags (por defecto una
+  hora × 50 tags), en orden cronológico.
+- ``HistorianBackfill.run()`` consulta los trozos con concurrencia acotada
+  y los entrega como un flujo asíncrono (``async for``) según terminan: en
+  memoria nunca hay más de ``concurrency`` trozos.
+- ``BackfillStore`` escribe cada trozo directamente en ``variable_readings``
+  (el mismo formato que ``HistorianWriter``) y marca el trozo como hecho en
+  la misma transacción. Si el backfill se interrumpe, repetir la misma
+  petición sólo consulta los trozos pendientes.
+- ``backfill_coverage`` registra, en esa misma transacción, qué intervalo
+  quedó rellenado para cada variable: repetir un rango (o solaparlo) con
+  otros trozos, que es otro trabajo, no vuelve a insertar esas lecturas.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Set
+
+from smartcompute.industrial.variables.historian import READINGS_INSERT
+
+logger = logging.getLogger('IndustrialBackfill')
+
+DEFAULT_CHUNK_DURATION = timedelta(hours=1)
+DEFAULT_TAGS_PER_CHUNK = 50
+DEFAULT_CONCURRENCY = 4
+
+Fetch = Callable[[Sequence[str], datetime, datetime], Awaitable[List[Sequence[Any]]]]
+
+
+class BackfillChunk(NamedTuple):
+    """Trozo de backfill: tags en el intervalo semiabierto [start, end)"""
+    index: int
+    tags: tuple
+    start: datetime
+    end: datetime
+
+
+@dataclass
+class BackfillChunkResult:
+    """Trozo terminado y ya confirmado en el almacén local"""
+    chunk: BackfillChunk
+    rows: List[Sequence[Any]]
+    elapsed: float
+
+
+def plan_chunks(tags: Sequence[str], start: datetime, end: datetime,
+                chunk_duration: timedelta = DEFAULT_CHUNK_DURATION,
+                tags_per_chunk: int = DEFAULT_TAGS_PER_CHUNK) -> List[BackfillChunk]:
+    """Partir [start, end) en trozos tiempo × tags, ordenados por tiempo"""
+    if chunk_duration <= timedelta(0) or tags_per_chunk <= 0:
+        raise ValueError("chunk_duration and tags_per_chunk must be positive")
+    groups = [tuple(tags[i:i + tags_per_chunk]) for i in range(0, len(tags), tags_per_chunk)]
+    chunks = []
+    window = start
+    while window < end:
+        window_end = min(window + chunk_duration, end)
+        for group in groups:
+            chunks.append(BackfillChunk(len(chunks), group, window, window_end))
+        window = window_end
+    return chunks
+
+
+def backfill_job_id(source: str, tags: Sequence[str], start: datetime, end: datetime,
+                    chunk_duration: timedelta, tags_per_chunk: int) -> str:
+    """Identificador estable de una petición: la misma petición reanuda el mismo trabajo"""
+    key = json.dumps([source, list(tags), start.isoformat(), end.isoformat(),
+                      chunk_duration.total_seconds(), tags_per_chunk])
+    return f"{source}:{hashlib.sha1(key.encode()).hexdigest()[:16]}"
+
+
+class BackfillStore:
+    """Histórico local (``variable_readings``) más el registro de trozos completados"""
+
+    SCHEMA = (
+        '''CREATE TABLE IF NOT EXISTS backfill_jobs (
+            job_id TEXT PRIMARY KEY,
+            source TEXT,
+            params TEXT,
+            chunks INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP
+        )''',
+        '''CREATE TABLE IF NOT EXISTS backfill_chunks (
+            job_id TEXT NOT NULL,
+            chunk_index INTEGER NOT NULL,
+            rows INTEGER,
+            completed_at TIMESTAMP,
+            PRIMARY KEY (job_id, chunk_index)
+        )''',
+        # Intervalos [start, end) ya rellenados por variable, sea cual sea el trabajo
+        '''CREATE TABLE IF NOT EXISTS backfill_coverage (
+            variable_id TEXT NOT NULL,
+            start TIMESTAMP NOT NULL,
+            end TIMESTAMP NOT NULL
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_backfill_coverage ON backfill_coverage(variable_id, start)',
+    )
+
+    def __init__(self, db_path, insert_sql: str = READINGS_INSERT):
+        self.db_path = str(db_path)
+        self.insert_sql = insert_sql
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        for statement in self.SCHEMA:
+            self._conn.execute(statement)
+
+    def begin_job(self, job_id: str, source: str, params: Dict[str, Any], chunks: int) -> Set[int]:
+        """Registrar el trabajo (si es nuevo) y devolver los trozos ya completados"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR IGNORE INTO backfill_jobs (job_id, source, params, chunks) VALUES (?, ?, ?, ?)',
+                (job_id, source, json.dumps(params, default=str), chunks)
+            )
+            return {row[0] for row in self._conn.execute(
+                'SELECT chunk_index FROM backfill_chunks WHERE job_id = ?', (job_id,))}
+
+    def write_chunk(self, job_id: str, chunk: BackfillChunk, rows: Sequence[Sequence[Any]]):
+        """Filas del trozo y su marca de completado en una sola transacción"""
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                variables = {row[0] for row in rows}
+                rows = self._uncovered(conn, chunk, variables, rows)
+                conn.executemany(self.insert_sql, rows)
+                conn.executemany('INSERT INTO backfill_coverage VALUES (?, ?, ?)',
+                                 [(variable_id, chunk.start.isoformat(' '), chunk.end.isoformat(' '))
+                                  for variable_id in variables])
+                conn.execute('INSERT INTO backfill_chunks VALUES (?, ?, ?, ?)',
+                             (job_id, chunk.index, len(rows), datetime.now().isoformat(' ')))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _uncovered(conn: sqlite3.Connection, chunk: BackfillChunk, variables: Set[str],
+                   rows: Sequence[Sequence[Any]]) -> Sequence[Sequence[Any]]:
+        """Quitar las lecturas que caen en intervalos ya rellenados (otro trabajo con otros trozos)"""
+        start, end = chunk.start.isoformat(' '), chunk.end.isoformat(' ')
+        covered: Dict[str, List[tuple]] = {}
+        for variable_id in variables:
+            spans = conn.execute('SELECT start, end FROM backfill_coverage '
+                                 'WHERE variable_id = ? AND start < ? AND end > ?',
+                                 (variable_id, end, start)).fetchall()
+            if spans:
+                covered[variable_id] = spans
+        if not covered:
+            return rows
+        return [row for row in rows
+                if not any(first <= row[1] < last for first, last in covered.get(row[0], ()))]
+
+    def finish_job(self, job_id: str):
+        with self._lock:
+            self._conn.execute('UPDATE backfill_jobs SET completed_at = ? WHERE job_id = ?',
+                               (datetime.now().isoformat(' '), job_id))
+
+    def job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._conn.execute(
+                'SELECT chunks, completed_at FROM backfill_jobs WHERE job_id = ?', (job_id,)).fetchone()
+            if job is None:
+                return None
+            done, rows = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(rows), 0) FROM backfill_chunks WHERE job_id = ?',
+                (job_id,)).fetchone()
+        return {'job_id': job_id, 'chunks': job[0], 'completed_chunks': done, 'rows': rows,
+                'completed_at': job[1]}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class HistorianBackfill:
+    """Consulta trozos con concurrencia acotada, los guarda y los entrega según terminan"""
+
+    def __init__(self, fetch: Fetch, store: BackfillStore, concurrency: int = DEFAULT_CONCURRENCY,
+                 chunk_duration: timedelta = DEFAULT_CHUNK_DURATION,
+                 tags_per_chunk: int = DEFAULT_TAGS_PER_CHUNK, retries: int = 2,
+                 retry_delay: float = 1.0, source: str = 'historian'):
+        self.fetch = fetch
+        self.store = store
+        self.concurrency = max(1, concurrency)
+        self.chunk_duration = chunk_duration
+        self.tags_per_chunk = tags_per_chunk
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.source = source
+        self.stats = {'chunks': 0, 'skipped_chunks': 0, 'rows': 0, 'retries': 0,
+                      'elapsed_seconds': 0.0, 'rows_per_sec': 0.0}
+
+    async def _fetch_chunk(self, chunk: BackfillChunk) -> BackfillChunkResult:
+        started = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            try:
+                rows = await self.fetch(chunk.tags, chunk.start, chunk.end)
+                break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                self.stats['retries'] += 1
+                logger.warning(f"Backfill chunk {chunk.index} failed ({e}), retrying")
+                await asyncio.sleep(self.retry_delay * (attempt + 1))
+        return BackfillChunkResult(chunk, rows, time.perf_counter() - started)
+
+    async def run(self, tags: Sequence[str], start: datetime, end: datetime) -> AsyncIterator[BackfillChunkResult]:
+        """Flujo de trozos completados; reanuda lo que una ejecución anterior dejó a medias"""
+        chunks = plan_chunks(tags, start, end, self.chunk_duration, self.tags_per_chunk)
+        job_id = backfill_job_id(self.source, tags, start, end, self.chunk_duration, self.tags_per_chunk)
+        params = {'tags': len(tags), 'start': start, 'end': end,
+                  'chunk_seconds': self.chunk_duration.total_seconds(), 'tags_per_chunk': self.tags_per_chunk}
+        done = await asyncio.to_thread(self.store.begin_job, job_id, self.source, params, len(chunks))
+        pending = iter([chunk for chunk in chunks if chunk.index not in done])
+        self.stats['skipped_chunks'] += len(done)
+        if done:
+            logger.info(f"Resuming backfill {job_id}: {len(done)}/{len(chunks)} chunks already stored")
+
+        started = time.perf_counter()
+        in_flight: Set[asyncio.Task] = set()
+        try:
+            while True:
+                while len(in_flight) < self.concurrency:
+                    chunk = next(pending, None)
+                    if chunk is None:
+                        break
+                    in_flight.add(asyncio.create_task(self._fetch_chunk(chunk)))
+                if not in_flight:
+                    break
+                finished, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    result = task.result()
+                    await asyncio.to_thread(self.store.write_chunk, job_id, result.chunk, result.rows)
+                    self.stats['chunks'] += 1
+                    self.stats['rows'] += len(result.rows)
+                    yield result
+            await asyncio.to_thread(self.store.finish_job, job_id)
+        finally:
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            elapsed = time.perf_counter() - started
+            self.stats['elapsed_seconds'] += elapsed
+            total = self.stats['elapsed_seconds']
+            self.stats['rows_per_sec'] = round(self.stats['rows'] / total, 1) if total else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats)
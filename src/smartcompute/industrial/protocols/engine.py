@@ -25,9 +25,7 @@ Version: 2.0.0 Industrial Protocols
 Date: 2025-09-19
 """
 
-import socket
 import struct
-import threading
 import time
 import json
 import hashlib
@@ -39,15 +37,86 @@ from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
 import logging
 import asyncio
 import ssl
+from abc import ABC, abstractmethod
 import ipaddress
 from pathlib import Path
 
-class SecureProtocolBase:
+FRAME_HEADER = struct.Struct('!I')
+DCP_HEADER = struct.Struct('!BBIHH')
+AUTH_TIMEOUT = 10.0
+_STOP = object()
+
+
+class FramingError(ValueError):
+    """Trama con longitud inválida o conexión cortada a mitad de trama"""
+
+
+def frame(payload: bytes) -> bytes:
+    """Añadir prefijo de longitud (u32 big-endian) a un payload"""
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader, max_size: int) -> Optional[bytes]:
+    """Leer una trama completa; ``None`` si el peer cerró limpiamente entre tramas"""
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise FramingError("connection closed inside frame header")
+
+    length = FRAME_HEADER.unpack(header)[0]
+    if length > max_size:
+        raise FramingError(f"frame of {length} bytes exceeds limit of {max_size}")
+    try:
+        return await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        raise FramingError("connection closed inside frame")
+
+
+def derive_session_key(master_key: bytes, challenge: bytes, protocol_name: str) -> bytes:
+    """Clave de sesión derivada de la clave maestra y el challenge del handshake"""
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=challenge,
+        info=f"smartcompute-{protocol_name.lower()}-session".encode()
+    ).derive(master_key)
+
+
+def seal_envelope(cipher: AESGCM, protocol_name: str, client_id: str, message: bytes) -> bytes:
+    """Sobre AES-GCM: nonce(12) + associated_data_length(4) + associated_data + ciphertext"""
+    nonce = secrets.token_bytes(12)  # 96-bit nonce para GCM
+    associated_data = f"{protocol_name}:{client_id}:{int(time.time())}".encode()
+    ciphertext = cipher.encrypt(nonce, message, associated_data)
+    return nonce + struct.pack('!I', len(associated_data)) + associated_data + ciphertext
+
+
+def open_envelope(cipher: AESGCM, protocol_name: str, client_id: str, envelope: bytes) -> bytes:
+    """Verificar y descifrar un sobre creado con ``seal_envelope``"""
+    if len(envelope) < 16:
+        raise ValueError("Envelope too short")
+
+    nonce = envelope[:12]
+    ad_length = struct.unpack('!I', envelope[12:16])[0]
+    associated_data = envelope[16:16 + ad_length]
+    ciphertext = envelope[16 + ad_length:]
+
+    # Verificar datos asociados
+    expected_prefix = f"{protocol_name}:{client_id}:".encode()
+    if not associated_data.startswith(expected_prefix):
+        raise ValueError("Associated data validation failed")
+
+    return cipher.decrypt(nonce, ciphertext, associated_data)
+
+
+class SecureProtocolBase(ABC):
     """Clase base para protocolos industriales seguros"""
 
     def __init__(self, protocol_name: str):
@@ -57,9 +126,22 @@ class SecureProtocolBase:
         # Configuración de seguridad
         self.security_config = self.load_security_config()
         self.encryption_key = self.generate_encryption_key()
+        self.cipher = AESGCM(self.encryption_key)
         self.session_keys = {}
         self.authenticated_clients = {}
 
+        # Servidor asyncio: conexiones activas (task -> estado) y métricas
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Dict[asyncio.Task, Dict[str, Any]] = {}
+        self._closing = False
+        self.bound_address: Optional[Tuple[str, int]] = None
+        self.server_stats = {
+            'connections': 0,
+            'messages': 0,
+            'errors': 0,
+            'auth_failures': 0
+        }
+
         # Rate limiting y anomaly detection
         self.connection_attempts = {}
         self.message_rates = {}
@@ -82,8 +164,9 @@ class SecureProtocolBase:
         logger = logging.getLogger(f'SecureProtocol-{self.protocol_name}')
         logger.setLevel(logging.INFO)
 
-        # Handler con rotación y cifrado
-        handler = logging.FileHandler(f'/var/log/smartcompute_{self.protocol_name.lower()}_secure.log')
+        # Handler con rotación y cifrado ("EtherNet/IP" no puede ir tal cual en el nombre)
+        log_name = self.protocol_name.lower().replace('/', '')
+        handler = logging.FileHandler(f'/var/log/smartcompute_{log_name}_secure.log')
 
         # Formato con hash de integridad
         class SecureFormatter(logging.Formatter):
@@ -118,7 +201,9 @@ class SecureProtocolBase:
                 'allowed_ips': [],  # Whitelist vacía = deny all
                 'blocked_ips': [],
                 'require_vlan_tagging': True,
-                'max_packet_size': 1024
+                'max_packet_size': 1024,
+                'max_queued_messages': 32,
+                'listen_backlog': 1024
             },
             'monitoring': {
                 'log_all_connections': True,
@@ -162,57 +247,32 @@ class SecureProtocolBase:
         except Exception as e:
             self.logger.error(f"❌ PKI initialization failed: {e}")
 
-    def encrypt_message(self, message: bytes, client_id: str = None) -> bytes:
-        """Cifrar mensaje usando AES-GCM"""
+    def encrypt_message(self, message: bytes, client_id: str = None,
+                        cipher: Optional[AESGCM] = None) -> bytes:
+        """Cifrar mensaje usando AES-GCM (cifrador de la sesión o el del servidor)"""
         try:
-            # Usar AEAD (Authenticated Encryption with Associated Data)
-            aesgcm = AESGCM(self.encryption_key)
-            nonce = secrets.token_bytes(12)  # 96-bit nonce para GCM
-
-            # Datos asociados para verificación adicional
-            associated_data = f"{self.protocol_name}:{client_id}:{int(time.time())}".encode()
-
-            ciphertext = aesgcm.encrypt(nonce, message, associated_data)
-
-            # Formato: nonce(12) + associated_data_length(4) + associated_data + ciphertext
-            encrypted_message = (
-                nonce +
-                struct.pack('!I', len(associated_data)) +
-                associated_data +
-                ciphertext
-            )
-
-            return encrypted_message
+            return seal_envelope(cipher or self.cipher, self.protocol_name, client_id, message)
 
         except Exception as e:
             self.logger.error(f"❌ Encryption failed: {e}")
             raise
 
-    def decrypt_message(self, encrypted_message: bytes, client_id: str = None) -> bytes:
+    def decrypt_message(self, encrypted_message: bytes, client_id: str = None,
+                        cipher: Optional[AESGCM] = None) -> bytes:
         """Descifrar mensaje usando AES-GCM"""
         try:
-            # Extraer componentes
-            nonce = encrypted_message[:12]
-            ad_length = struct.unpack('!I', encrypted_message[12:16])[0]
-            associated_data = encrypted_message[16:16+ad_length]
-            ciphertext = encrypted_message[16+ad_length:]
-
-            # Verificar datos asociados
-            expected_prefix = f"{self.protocol_name}:{client_id}:".encode()
-            if not associated_data.startswith(expected_prefix):
-                raise ValueError("Associated data validation failed")
-
-            # Descifrar
-            aesgcm = AESGCM(self.encryption_key)
-            plaintext = aesgcm.decrypt(nonce, ciphertext, associated_data)
-
-            return plaintext
+            return open_envelope(cipher or self.cipher, self.protocol_name, client_id, encrypted_message)
 
         except Exception as e:
             self.logger.error(f"❌ Decryption failed: {e}")
             raise
 
-    def authenticate_client(self, client_socket: socket.socket, client_address: Tuple[str, int]) -> Dict:
+    @property
+    def max_frame_size(self) -> int:
+        return self.security_config['network']['max_packet_size']
+
+    async def authenticate_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                                  client_address: Tuple[str, int]) -> Dict:
         """Autenticar cliente con múltiples factores"""
         client_ip = client_address[0]
 
@@ -229,30 +289,40 @@ class SecureProtocolBase:
 
             # 3. Challenge-response authentication
             challenge = secrets.token_bytes(32)
-            client_socket.send(self.create_auth_challenge(challenge))
+            writer.write(self.create_auth_challenge(challenge))
+            await writer.drain()
 
             # Esperar respuesta del cliente
-            client_socket.settimeout(10.0)  # 10 segundos timeout
-            response_data = client_socket.recv(1024)
+            response_data = await asyncio.wait_for(
+                read_frame(reader, self.max_frame_size), AUTH_TIMEOUT
+            )
 
-            if not self.validate_auth_response(response_data, challenge):
+            if response_data is None or not self.validate_auth_response(response_data, challenge):
                 self.increment_failed_auth(client_ip)
                 return {'authenticated': False, 'reason': 'invalid_response'}
 
-            # 4. Crear sesión segura
+            # 4. Crear sesión segura: clave derivada del challenge, cifrador cacheado
             session_id = secrets.token_urlsafe(32)
-            session_key = secrets.token_bytes(32)
+            session_key = derive_session_key(self.encryption_key, challenge, self.protocol_name)
+            session_timeout = self.security_config['authentication']['session_timeout']
 
             session_info = {
                 'session_id': session_id,
                 'session_key': session_key,
+                'cipher': AESGCM(session_key),
                 'client_ip': client_ip,
                 'authenticated_at': datetime.utcnow(),
-                'expires_at': datetime.utcnow() + timedelta(seconds=3600),
+                'expires_at': datetime.utcnow() + timedelta(seconds=session_timeout),
                 'protocol': self.protocol_name
             }
 
             self.authenticated_clients[session_id] = session_info
+            writer.write(frame(json.dumps({
+                'type': 'auth_ok',
+                'session_id': session_id,
+                'expires_in': session_timeout
+            }).encode()))
+            await writer.drain()
             self.logger.info(f"✅ Client authenticated: {client_ip} [{session_id[:8]}...]")
 
             return {
@@ -261,7 +331,7 @@ class SecureProtocolBase:
                 'session_key': base64.b64encode(session_key).decode()
             }
 
-        except socket.timeout:
+        except asyncio.TimeoutError:
             self.logger.warning(f"⏰ Authentication timeout: {client_ip}")
             return {'authenticated': False, 'reason': 'timeout'}
         except Exception as e:
@@ -324,17 +394,9 @@ class SecureProtocolBase:
         return struct.pack('!I', len(message)) + message
 
     def validate_auth_response(self, response_data: bytes, expected_challenge: bytes) -> bool:
-        """Validar respuesta de autenticación"""
+        """Validar respuesta de autenticación (payload de la trama)"""
         try:
-            # Extraer mensaje
-            if len(response_data) < 4:
-                return False
-
-            msg_length = struct.unpack('!I', response_data[:4])[0]
-            if len(response_data) < 4 + msg_length:
-                return False
-
-            message = json.loads(response_data[4:4+msg_length].decode())
+            message = json.loads(response_data.decode())
 
             # Validar estructura
             required_fields = ['type', 'response_hash', 'timestamp']
@@ -382,63 +444,86 @@ class SecureProtocolBase:
         self.logger.info(f"SECURE_EVENT:{event_json}:HASH:{event_hash}")
 
 
-class ModbusSecureProtocol(SecureProtocolBase):
-    """Protocolo Modbus con seguridad avanzada"""
-
-    def __init__(self):
-        super().__init__("Modbus")
-        self.modbus_functions = {
-            0x01: "Read Coils",
-            0x02: "Read Discrete Inputs",
-            0x03: "Read Holding Registers",
-            0x04: "Read Input Registers",
-            0x05: "Write Single Coil",
-            0x06: "Write Single Register",
-            0x0F: "Write Multiple Coils",
-            0x10: "Write Multiple Registers"
-        }
-
-        # Modbus Security Extensions
-        self.security_extensions = {
-            'authentication_required': True,
-            'authorization_per_function': True,
-            'data_encryption': True,
-            'message_authentication': True
-        }
+    # ── Servidor asyncio ────────────────────────────────────────
 
     async def start_secure_server(self, host: str = "0.0.0.0", port: int = 502):
-        """Iniciar servidor Modbus seguro"""
-        self.logger.info(f"🚀 Starting Modbus secure server on {host}:{port}")
-
-        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        server_socket.bind((host, port))
-        server_socket.listen(5)
-
+        """Servir conexiones hasta ``stop_server()`` (una corrutina por cliente)"""
+        self._closing = False
+        self._server = await asyncio.start_server(
+            self._handle_connection, host, port, reuse_address=True,
+            backlog=self.security_config['network']['listen_backlog']
+        )
+        self.bound_address = self._server.sockets[0].getsockname()[:2]
+        self.logger.info(f"🚀 Starting {self.protocol_name} secure server on {host}:{port}")
         self.log_secure_event('server_started', {
             'host': host,
             'port': port,
-            'security_extensions': self.security_extensions
+            'security_extensions': getattr(self, 'security_extensions', {})
         })
 
-        while True:
+        try:
+            await self._server.serve_forever()
+        except asyncio.CancelledError:
+            if not self._closing:
+                # Task cancelada desde fuera: cerrar ordenadamente y propagar
+                await self.stop_server()
+                raise
+
+    async def stop_server(self, timeout: float = 5.0):
+        """
+        Parada ordenada: dejar de aceptar conexiones y de leer peticiones,
+        responder las ya encoladas y cerrar.  Pasado ``timeout`` se cancela
+        lo que quede.
+        """
+        self._closing = True
+        if self._server is not None:
+            self._server.close()
+
+        for task, state in list(self._connections.items()):
+            if state['receiver'] is not None:
+                state['receiver'].cancel()
+            else:
+                task.cancel()  # Aún en handshake
+
+        pending = [task for task in self._connections if task is not asyncio.current_task()]
+        if pending:
+            _done, still_running = await asyncio.wait(pending, timeout=timeout)
+            for task in still_running:
+                task.cancel()
+            if still_running:
+                await asyncio.gather(*still_running, return_exceptions=True)
+
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+            self.log_secure_event('server_stopped', {'open_connections': len(self._connections)})
+
+    async def _receive_frames(self, reader: asyncio.StreamReader, queue: asyncio.Queue):
+        """Leer tramas a la cola; la cola acotada frena al cliente si el proceso se atrasa"""
+        try:
+            while True:
+                data = await read_frame(reader, self.max_frame_size)
+                if data is None:
+                    break
+                await queue.put(data)
+        except (FramingError, ConnectionError) as e:
+            self.logger.warning(f"Closing connection: {e}")
+            self.server_stats['errors'] += 1
+        finally:
             try:
-                client_socket, client_address = server_socket.accept()
-
-                # Manejar cliente en thread separado
-                client_thread = threading.Thread(
-                    target=self.handle_secure_client,
-                    args=(client_socket, client_address)
-                )
-                client_thread.daemon = True
-                client_thread.start()
+                queue.put_nowait(_STOP)
+            except asyncio.QueueFull:
+                pass  # El procesador verá el receptor terminado al vaciar la cola
 
-            except Exception as e:
-                self.logger.error(f"Server error: {e}")
-
-    def handle_secure_client(self, client_socket: socket.socket, client_address: Tuple[str, int]):
-        """Manejar cliente Modbus con seguridad"""
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Handshake y bucle de peticiones de un cliente"""
+        client_address = writer.get_extra_info('peername') or ('unknown', 0)
         client_ip = client_address[0]
+        task = asyncio.current_task()
+        state = {'writer': writer, 'receiver': None}
+        self._connections[task] = state
+        self.server_stats['connections'] += 1
+        session_id = None
 
         try:
             self.log_secure_event('client_connected', {
@@ -447,42 +532,146 @@ class ModbusSecureProtocol(SecureProtocolBase):
             })
 
             # Autenticación
-            auth_result = self.authenticate_client(client_socket, client_address)
+            auth_result = await self.authenticate_client(reader, writer, client_address)
             if not auth_result['authenticated']:
+                self.server_stats['auth_failures'] += 1
                 self.logger.warning(f"🚫 Client authentication failed: {client_ip}")
-                client_socket.close()
                 return
 
             session_id = auth_result['session_id']
+            cipher = self.authenticated_clients[session_id]['cipher']
+            queue = asyncio.Queue(maxsize=self.security_config['network']['max_queued_messages'])
+            receiver = asyncio.create_task(self._receive_frames(reader, queue))
+            state['receiver'] = receiver
 
-            # Procesar solicitudes Modbus
-            while True:
-                # Recibir datos cifrados
-                encrypted_data = client_socket.recv(1024)
-                if not encrypted_data:
-                    break
+            try:
+                while not (receiver.done() and queue.empty()):
+                    encrypted_data = await queue.get()
+                    if encrypted_data is _STOP:
+                        break
+
+                    try:
+                        request = self.decrypt_message(encrypted_data, client_ip, cipher)
+                        response = self.process_request(request, session_id)
+                        writer.write(frame(self.encrypt_message(response, client_ip, cipher)))
+                        await writer.drain()
+                        self.server_stats['messages'] += 1
+
+                    except (ConnectionError, OSError):
+                        raise
+                    except Exception as e:
+                        self.logger.error(f"Request processing error: {e}")
+                        self.server_stats['errors'] += 1
+                        break
+            finally:
+                receiver.cancel()
+
+        except (ConnectionError, OSError) as e:
+            self.logger.warning(f"Connection lost from {client_ip}: {e}")
+        except Exception as e:
+            self.logger.error(f"Client handling error: {e}")
+        finally:
+            self._connections.pop(task, None)
+            if session_id:
+                self.authenticated_clients.pop(session_id, None)
+            writer.close()
+            self.log_secure_event('client_disconnected', {'client_ip': client_ip})
 
-                try:
-                    # Descifrar
-                    decrypted_data = self.decrypt_message(encrypted_data, client_ip)
+    @abstractmethod
+    def process_request(self, request_data: bytes, session_id: str) -> bytes:
+        """Procesar una petición descifrada y devolver la respuesta en claro"""
 
-                    # Procesar solicitud Modbus
-                    response = self.process_modbus_request(decrypted_data, session_id)
+    def get_server_stats(self) -> Dict:
+        stats = dict(self.server_stats)
+        stats['active_connections'] = len(self._connections)
+        stats['active_sessions'] = len(self.authenticated_clients)
+        return stats
 
-                    # Cifrar respuesta
-                    encrypted_response = self.encrypt_message(response, client_ip)
 
-                    client_socket.send(encrypted_response)
+class SecureProtocolClient:
+    """Cliente del protocolo seguro: handshake, tramas y sobre AES-GCM de sesión"""
 
-                except Exception as e:
-                    self.logger.error(f"Request processing error: {e}")
-                    break
+    def __init__(self, protocol_name: str, master_key: bytes, max_frame_size: int = 1024):
+        self.protocol_name = protocol_name
+        self.master_key = master_key
+        self.max_frame_size = max_frame_size
+        self.session_id = None
+        self.cipher = None
+        self.client_id = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self, host: str, port: int, timeout: float = AUTH_TIMEOUT):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), timeout
+        )
+        self.client_id = self._writer.get_extra_info('sockname')[0]
+
+        challenge_msg = await asyncio.wait_for(read_frame(self._reader, self.max_frame_size), timeout)
+        if challenge_msg is None:
+            raise ConnectionError("Server closed the connection before the challenge")
+        challenge = base64.b64decode(json.loads(challenge_msg)['challenge'])
+
+        response_hash = hashlib.sha256(
+            challenge + f"smartcompute_auth_2025_{self.protocol_name}".encode()
+        ).hexdigest()
+        self._writer.write(frame(json.dumps({
+            'type': 'auth_response',
+            'response_hash': response_hash,
+            'timestamp': int(time.time())
+        }).encode()))
+        await self._writer.drain()
+
+        result = await asyncio.wait_for(read_frame(self._reader, self.max_frame_size), timeout)
+        if result is None:
+            raise ConnectionError("Authentication rejected")
+        self.session_id = json.loads(result)['session_id']
+        self.cipher = AESGCM(derive_session_key(self.master_key, challenge, self.protocol_name))
+
+    async def request(self, payload: bytes) -> bytes:
+        """Enviar una petición y esperar su respuesta (en orden)"""
+        self._writer.write(frame(seal_envelope(self.cipher, self.protocol_name, self.client_id, payload)))
+        await self._writer.drain()
+        response = await read_frame(self._reader, self.max_frame_size)
+        if response is None:
+            raise ConnectionError("Server closed the connection")
+        return open_envelope(self.cipher, self.protocol_name, self.client_id, response)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
 
-        except Exception as e:
-            self.logger.error(f"Client handling error: {e}")
-        finally:
-            client_socket.close()
-            self.log_secure_event('client_disconnected', {'client_ip': client_ip})
+
+class ModbusSecureProtocol(SecureProtocolBase):
+    """Protocolo Modbus con seguridad avanzada"""
+
+    def __init__(self):
+        super().__init__("Modbus")
+        self.modbus_functions = {
+            0x01: "Read Coils",
+            0x02: "Read Discrete Inputs",
+            0x03: "Read Holding Registers",
+            0x04: "Read Input Registers",
+            0x05: "Write Single Coil",
+            0x06: "Write Single Register",
+            0x0F: "Write Multiple Coils",
+            0x10: "Write Multiple Registers"
+        }
+
+        # Modbus Security Extensions
+        self.security_extensions = {
+            'authentication_required': True,
+            'authorization_per_function': True,
+            'data_encryption': True,
+            'message_authentication': True
+        }
+
+    def process_request(self, request_data: bytes, session_id: str) -> bytes:
+        return self.process_modbus_request(request_data, session_id)
 
     def process_modbus_request(self, request_data: bytes, session_id: str) -> bytes:
         """Procesar solicitud Modbus"""
@@ -589,10 +778,19 @@ class EtherNetIPSecureProtocol(SecureProtocolBase):
             0x4E: "Forward_Close"
         }
 
-    async def start_secure_server(self, host: str = "0.0.0.0", port: int = 44818):
-        """Iniciar servidor EtherNet/IP seguro"""
-        self.logger.info(f"🚀 Starting EtherNet/IP secure server on {host}:{port}")
-        # Implementación similar a Modbus pero con CIP Security
+    def process_request(self, request_data: bytes, session_id: str) -> bytes:
+        """Responder peticiones CIP del Message Router"""
+        service = request_data[0] if request_data else 0
+
+        self.log_secure_event('cip_request', {
+            'session_id': session_id[:8],
+            'service': service,
+            'service_name': self.cip_services.get(service, 'Unknown')
+        })
+
+        # Respuesta: servicio | 0x80, reservado, estado general 0x08 (Service not supported),
+        # sin estado extendido.  Los servicios reales se delegan al adaptador del dispositivo.
+        return bytes([service | 0x80, 0x00, 0x08, 0x00])
 
 
 class PROFINETSecureProtocol(SecureProtocolBase):
@@ -606,6 +804,31 @@ class PROFINETSecureProtocol(SecureProtocolBase):
             0x0003: "DCP_Get",
             0x0004: "DCP_Set"
         }
+        self.station_name = b"smartcompute"
+
+    def process_request(self, request_data: bytes, session_id: str) -> bytes:
+        """Responder peticiones DCP (cabecera de 10 bytes: servicio, tipo, Xid, retardo, longitud)"""
+        if len(request_data) < DCP_HEADER.size:
+            raise ValueError("DCP request too short")
+
+        service, _service_type, xid, _delay, _length = DCP_HEADER.unpack_from(request_data)
+        service_name = self.profinet_services.get(service, 'Unknown')
+
+        self.log_secure_event('dcp_request', {
+            'session_id': session_id[:8],
+            'service': service,
+            'service_name': service_name
+        })
+
+        if service_name != "DCP_Identify":
+            # Tipo 0x05: Request not supported; Get/Set/Hello se delegan al dispositivo
+            return DCP_HEADER.pack(service, 0x05, xid, 0, 0)
+
+        # Bloque DeviceProperties/NameOfStation (opción 0x02, subopción 0x02), con relleno par
+        block = struct.pack('!BBHH', 0x02, 0x02, len(self.station_name) + 2, 0) + self.station_name
+        if len(block) % 2:
+            block += b"\x00"
+        return DCP_HEADER.pack(service, 0x01, xid, 0, len(block)) + block
 
 
 class IndustrialProtocolsEngine:
@@ -654,6 +877,19 @@ class IndustrialProtocolsEngine:
 
         return server_task
 
+    async def stop_protocol_server(self, protocol_name: str, timeout: float = 5.0):
+        """Detener un servidor respondiendo las peticiones ya recibidas"""
+        server_info = self.active_servers.pop(protocol_name, None)
+        if server_info is None:
+            return
+
+        await self.protocols[protocol_name].stop_server(timeout)
+        await asyncio.gather(server_info['task'], return_exceptions=True)
+
+    async def stop_all(self, timeout: float = 5.0):
+        await asyncio.gather(*[self.stop_protocol_server(name, timeout)
+                               for name in list(self.active_servers)])
+
     def get_protocol_status(self) -> Dict:
         """Obtener estado de protocolos"""
         status = {}
@@ -662,7 +898,8 @@ class IndustrialProtocolsEngine:
                 'running': not server_info['task'].done(),
                 'host': server_info['host'],
                 'port': server_info['port'],
-                'started_at': server_info['started_at'].isoformat()
+                'started_at': server_info['started_at'].isoformat(),
+                'server': self.protocols[name].get_server_stats()
             }
         return status
 
@@ -686,6 +923,7 @@ async def main():
 
     except KeyboardInterrupt:
         print("\n🛑 Stopping protocol servers...")
+        await engine.stop_all()
     except Exception as e:
         print(f"❌ Critical error: {e}")
 
@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""
+SmartCompute Industrial - Cliente Modbus TCP Asíncrono
+======================================================
+
+Cliente Modbus TCP sobre streams de asyncio:
+
+- Trama MBAP completa (transaction id, protocol id, length, unit id).
+- Pipelining: varias peticiones en vuelo por conexión, emparejadas con su
+  respuesta por transaction id.  En enlaces de planta con decenas de ms de
+  latencia, el ritmo de lectura deja de estar limitado por el RTT.
+- Pool de conexiones por PLC con reconexión y backoff exponencial, y
+  timeout por petición.
+- Decodificación de tipos habituales (int16/32/64, uint, float32/64) con
+  los cuatro órdenes de palabra/byte que usan los fabricantes.
+
+``ModbusTCPSimulator`` es un servidor Modbus TCP local con latencia
+configurable para medir latencia y throughput sin hardware.
+"""
+
+import asyncio
+import logging
+import random
+import struct
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger('Modbus-TCP')
+
+MAX_READ_REGISTERS = 125
+MAX_WRITE_REGISTERS = 123
+MAX_READ_BITS = 2000
+
+FC_READ_COILS = 0x01
+FC_READ_DISCRETE_INPUTS = 0x02
+FC_READ_HOLDING_REGISTERS = 0x03
+FC_READ_INPUT_REGISTERS = 0x04
+FC_WRITE_SINGLE_REGISTER = 0x06
+FC_WRITE_MULTIPLE_REGISTERS = 0x10
+READ_FUNCTION_CODES = frozenset({FC_READ_COILS, FC_READ_DISCRETE_INPUTS,
+                                 FC_READ_HOLDING_REGISTERS, FC_READ_INPUT_REGISTERS})
+
+REGISTER_COUNTS = {
+    'int16': 1, 'uint16': 1,
+    'int32': 2, 'uint32': 2, 'float32': 2,
+    'int64': 4, 'uint64': 4, 'float64': 4
+}
+WORD_ORDERS = ('ABCD', 'CDAB', 'BADC', 'DCBA')
+
+_MBAP = struct.Struct('>HHHB')
+_FORMATS = {
+    'int16': 'h', 'uint16': 'H', 'int32': 'i', 'uint32': 'I', 'float32': 'f',
+    'int64': 'q', 'uint64': 'Q', 'float64': 'd'
+}
+_EXCEPTION_NAMES = {
+    0x01: 'Illegal Function',
+    0x02: 'Illegal Data Address',
+    0x03: 'Illegal Data Value',
+    0x04: 'Server Device Failure',
+    0x06: 'Server Device Busy',
+    0x0A: 'Gateway Path Unavailable',
+    0x0B: 'Gateway Target Failed to Respond'
+}
+
+
+class ModbusError(Exception):
+    """Error de comunicación Modbus"""
+
+
+class ModbusConnectionError(ModbusError):
+    """Conexión no disponible o cerrada con peticiones en vuelo"""
+
+
+class ModbusTimeoutError(ModbusError):
+    """El PLC no respondió dentro del timeout de la petición"""
+
+
+class ModbusExceptionResponse(ModbusError):
+    """El PLC respondió con una excepción Modbus"""
+
+    def __init__(self, function_code: int, exception_code: int):
+        self.function_code = function_code
+        self.exception_code = exception_code
+        name = _EXCEPTION_NAMES.get(exception_code, 'Unknown')
+        super().__init__(f"function 0x{function_code:02X}: exception 0x{exception_code:02X} ({name})")
+
+
+def _reorder(raw: bytes, word_order: str) -> bytes:
+    """Convertir entre el orden del PLC y big-endian (ABCD)"""
+    if word_order not in WORD_ORDERS:
+        raise ValueError(f"Unsupported word order: {word_order}")
+    if word_order in ('CDAB', 'DCBA'):
+        raw = b''.join(raw[i:i + 2] for i in range(len(raw) - 2, -1, -2))
+    if word_order in ('BADC', 'DCBA'):
+        raw = bytes(raw[i ^ 1] for i in range(len(raw)))
+    return raw
+
+
+def decode_registers(registers: Sequence[int], data_type: str = 'uint16',
+                     word_order: str = 'ABCD'):
+    """Decodificar un valor a partir de registros de 16 bits"""
+    count = REGISTER_COUNTS[data_type]
+    if len(registers) < count:
+        raise ValueError(f"{data_type} needs {count} registers, got {len(registers)}")
+    raw = _reorder(struct.pack(f'>{count}H', *registers[:count]), word_order)
+    return struct.unpack('>' + _FORMATS[data_type], raw)[0]
+
+
+def encode_value(value, data_type: str = 'uint16', word_order: str = 'ABCD') -> List[int]:
+    """Codificar un valor en registros de 16 bits (inverso de ``decode_registers``)"""
+    count = REGISTER_COUNTS[data_type]
+    raw = _reorder(struct.pack('>' + _FORMATS[data_type], value), word_order)
+    return list(struct.unpack(f'>{count}H', raw))
+
+
+def _unpack_bits(data: bytes, count: int) -> List[bool]:
+    return [bool(data[i // 8] >> (i % 8) & 1) for i in range(count)]
+
+
+class ModbusTCPConnection:
+    """Una conexión TCP con varias peticiones en vuelo"""
+
+    def __init__(self, host: str, port: int, max_in_flight: int = 16):
+        self.host = host
+        self.port = port
+        self.max_in_flight = max_in_flight
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._write_lock = asyncio.Lock()
+        self._next_tid = random.randint(0, 0xFFFF)
+        self.closed = True
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    async def open(self, timeout: float):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), timeout
+        )
+        self.closed = False
+        self._read_task = asyncio.create_task(self._read_loop())
+
+    def _allocate_tid(self) -> int:
+        tid = self._next_tid
+        while tid in self._pending:
+            tid = (tid + 1) & 0xFFFF
+        self._next_tid = (tid + 1) & 0xFFFF
+        return tid
+
+    async def request(self, unit_id: int, pdu: bytes, timeout: float) -> Tuple[int, bytes]:
+        """Enviar una PDU y esperar la respuesta con el mismo transaction id"""
+        async with self._slots:
+            if self.closed:
+                raise ModbusConnectionError(f"{self.host}:{self.port} not connected")
+
+            tid = self._allocate_tid()
+            future = asyncio.get_running_loop().create_future()
+            self._pending[tid] = future
+            try:
+                async with self._write_lock:
+                    self._writer.write(_MBAP.pack(tid, 0, len(pdu) + 1, unit_id) + pdu)
+                    await self._writer.drain()
+                return await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                raise ModbusTimeoutError(
+                    f"{self.host}:{self.port} transaction {tid} timed out after {timeout:.2f}s"
+                )
+            except (ConnectionError, OSError) as e:
+                self._fail_pending(ModbusConnectionError(str(e)))
+                raise ModbusConnectionError(f"{self.host}:{self.port}: {e}")
+            finally:
+                # Una respuesta tardía a un tid abandonado se descarta en _read_loop
+                self._pending.pop(tid, None)
+
+    async def _read_loop(self):
+        error: ModbusError = ModbusConnectionError(f"{self.host}:{self.port} closed by peer")
+        try:
+            while True:
+                header = await self._reader.readexactly(_MBAP.size)
+                tid, protocol_id, length, unit_id = _MBAP.unpack(header)
+                if protocol_id != 0 or length < 2:
+                    error = ModbusConnectionError(f"{self.host}:{self.port} sent a malformed MBAP header")
+                    break
+                body = await self._reader.readexactly(length - 1)
+
+                future = self._pending.get(tid)
+                if future is not None and not future.done():
+                    future.set_result((unit_id, body))
+                else:
+                    logger.debug(f"Discarding response for unknown transaction {tid}")
+        except (asyncio.IncompleteReadError, ConnectionError, OSError) as e:
+            if not isinstance(e, asyncio.IncompleteReadError):
+                error = ModbusConnectionError(f"{self.host}:{self.port}: {e}")
+        except asyncio.CancelledError:
+            error = ModbusConnectionError(f"{self.host}:{self.port} connection closed")
+            raise
+        finally:
+            self.closed = True
+            self._fail_pending(error)
+            if self._writer is not None:
+                self._writer.close()
+
+    def _fail_pending(self, error: ModbusError):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def close(self):
+        self.closed = True
+        if self._read_task is not None:
+            self._read_task.cancel()
+            try:
+                await self._read_task
+            except asyncio.CancelledError:
+                pass
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+
+class ModbusTCPClient:
+    """Cliente Modbus TCP con pool de conexiones por PLC, pipelining y reconexión"""
+
+    def __init__(self, host: str, port: int = 502, unit_id: int = 1, pool_size: int = 1,
+                 timeout: float = 3.0, retries: int = 1, max_in_flight: int = 16,
+                 backoff_initial: float = 0.5, backoff_max: float = 30.0):
+        self.host = host
+        self.port = port
+        self.unit_id = unit_id
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+        self._pool = [ModbusTCPConnection(host, port, max_in_flight) for _ in range(max(1, pool_size))]
+        self._backoff = [0.0] * len(self._pool)
+        self._retry_at = [0.0] * len(self._pool)
+        self._connect_lock = asyncio.Lock()
+
+        self.stats = {
+            'requests': 0,
+            'timeouts': 0,
+            'reconnects': 0,
+            'errors': 0
+        }
+
+    @property
+    def connected(self) -> bool:
+        return any(not conn.closed for conn in self._pool)
+
+    async def connect(self):
+        """Abrir todas las conexiones del pool (falla si no se abre ninguna)"""
+        await asyncio.gather(*[self._reopen(i) for i in range(len(self._pool))],
+                             return_exceptions=True)
+        if not self.connected:
+            raise ModbusConnectionError(f"Cannot connect to {self.host}:{self.port}")
+
+    async def _reopen(self, index: int):
+        conn = self._pool[index]
+        try:
+            await conn.open(self.timeout)
+            self._backoff[index] = 0.0
+        except (OSError, asyncio.TimeoutError) as e:
+            # Backoff exponencial con jitter para no martillear un PLC caído
+            self._backoff[index] = min(self.backoff_max,
+                                       max(self.backoff_initial, self._backoff[index] * 2))
+            self._retry_at[index] = time.monotonic() + self._backoff[index] * random.uniform(0.5, 1.0)
+            raise ModbusConnectionError(f"{self.host}:{self.port}: {e}")
+
+    async def _connection(self) -> ModbusTCPConnection:
+        """Conexión abierta menos cargada; reabre las caídas respetando el backoff"""
+        if any(conn.closed for conn in self._pool):
+            async with self._connect_lock:
+                now = time.monotonic()
+                for index, conn in enumerate(self._pool):
+                    if conn.closed and now >= self._retry_at[index]:
+                        try:
+                            await self._reopen(index)
+                            self.stats['reconnects'] += 1
+                        except ModbusConnectionError as e:
+                            logger.warning(f"Reconnect failed: {e} "
+                                           f"(retry in {self._backoff[index]:.1f}s)")
+
+        open_conns = [conn for conn in self._pool if not conn.closed]
+        if not open_conns:
+            raise ModbusConnectionError(f"{self.host}:{self.port} unavailable")
+        return min(open_conns, key=lambda conn: conn.in_flight)
+
+    async def execute(self, function_code: int, payload: bytes = b'',
+                      unit_id: Optional[int] = None, retry: Optional[bool] = None) -> bytes:
+        """
+        Ejecutar una función Modbus y devolver los datos de la respuesta.
+
+        Por defecto sólo se reintentan las lecturas (``retry=None``): una
+        escritura que agotó el timeout puede haberse aplicado ya en el PLC y
+        repetirla la ejecutaría dos veces. Si no se pudo obtener conexión la
+        petición no llegó a enviarse y se reintenta siempre.
+        """
+        unit_id = self.unit_id if unit_id is None else unit_id
+        pdu = bytes([function_code]) + payload
+        if retry is None:
+            retry = function_code in READ_FUNCTION_CODES
+
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                conn = await self._connection()
+            except ModbusConnectionError:
+                self.stats['errors'] += 1
+                if last_attempt:
+                    raise
+                continue
+            try:
+                self.stats['requests'] += 1
+                _unit, body = await conn.request(unit_id, pdu, self.timeout)
+                break
+            except ModbusTimeoutError:
+                self.stats['timeouts'] += 1
+                if last_attempt or not retry:
+                    raise
+            except ModbusConnectionError:
+                self.stats['errors'] += 1
+                if last_attempt or not retry:
+                    raise
+
+        if body[0] == function_code | 0x80:
+            raise ModbusExceptionResponse(function_code, body[1] if len(body) > 1 else 0)
+        if body[0] != function_code:
+            raise ModbusError(f"Unexpected function 0x{body[0]:02X} in response "
+                              f"to 0x{function_code:02X}")
+        return body[1:]
+
+    # ── Funciones Modbus ────────────────────────────────────────
+
+    async def _read_registers(self, function_code: int, address: int, count: int,
+                              unit_id: Optional[int]) -> List[int]:
+        if not 1 <= count <= MAX_READ_REGISTERS:
+            raise ValueError(f"Register count must be 1..{MAX_READ_REGISTERS}, got {count}")
+        data = await self.execute(function_code, struct.pack('>HH', address, count), unit_id)
+        if len(data) < 1 or data[0] != count * 2 or len(data) - 1 != count * 2:
+            raise ModbusError(f"Expected {count} registers, got {len(data) - 1} bytes")
+        return list(struct.unpack(f'>{count}H', data[1:]))
+
+    async def _read_bits(self, function_code: int, address: int, count: int,
+                         unit_id: Optional[int]) -> List[bool]:
+        if not 1 <= count <= MAX_READ_BITS:
+            raise ValueError(f"Bit count must be 1..{MAX_READ_BITS}, got {count}")
+        data = await self.execute(function_code, struct.pack('>HH', address, count), unit_id)
+        if len(data) < 1 or data[0] != (count + 7) // 8:
+            raise ModbusError("Unexpected byte count in bit response")
+        return _unpack_bits(data[1:], count)
+
+    async def read_holding_registers(self, address: int, count: int,
+                                     unit_id: Optional[int] = None) -> List[int]:
+        return await self._read_registers(FC_READ_HOLDING_REGISTERS, address, count, unit_id)
+
+    async def read_input_registers(self, address: int, count: int,
+                                   unit_id: Optional[int] = None) -> List[int]:
+        return await self._read_registers(FC_READ_INPUT_REGISTERS, address, count, unit_id)
+
+    async def read_coils(self, address: int, count: int,
+                         unit_id: Optional[int] = None) -> List[bool]:
+        return await self._read_bits(FC_READ_COILS, address, count, unit_id)
+
+    async def read_discrete_inputs(self, address: int, count: int,
+                                   unit_id: Optional[int] = None) -> List[bool]:
+        return await self._read_bits(FC_READ_DISCRETE_INPUTS, address, count, unit_id)
+
+    async def write_register(self, address: int, value: int, unit_id: Optional[int] = None,
+                             retry: bool = False):
+        """Escribir un registro; ``retry=True`` sólo si repetir la escritura es inocuo"""
+        await self.execute(FC_WRITE_SINGLE_REGISTER, struct.pack('>HH', address, value), unit_id, retry)
+
+    async def write_registers(self, address: int, values: Sequence[int],
+                              unit_id: Optional[int] = None, retry: bool = False):
+        """Escribir registros consecutivos; ``retry=True`` sólo si repetir la escritura es inocuo"""
+        if not 1 <= len(values) <= MAX_WRITE_REGISTERS:
+            raise ValueError(f"Register count must be 1..{MAX_WRITE_REGISTERS}, got {len(values)}")
+        payload = struct.pack(f'>HHB{len(values)}H', address, len(values), len(values) * 2, *values)
+        await self.execute(FC_WRITE_MULTIPLE_REGISTERS, payload, unit_id, retry)
+
+    async def read_registers(self, area: str, address: int, count: int,
+                             unit_id: Optional[int] = None) -> List[int]:
+        """Leer registros de un área ``'holding'`` o ``'input'``"""
+        if area == 'holding':
+            return await self.read_holding_registers(address, count, unit_id)
+        if area == 'input':
+            return await self.read_input_registers(address, count, unit_id)
+        raise ValueError(f"Unsupported register area: {area}")
+
+    async def read_value(self, area: str, address: int, data_type: str = 'uint16',
+                         word_order: str = 'ABCD', unit_id: Optional[int] = None):
+        """Leer y decodificar un valor tipado"""
+        registers = await self.read_registers(area, address, REGISTER_COUNTS[data_type], unit_id)
+        return decode_registers(registers, data_type, word_order)
+
+    async def close(self):
+        await asyncio.gather(*[conn.close() for conn in self._pool])
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats['connections'] = sum(1 for conn in self._pool if not conn.closed)
+        stats['in_flight'] = sum(conn.in_flight for conn in self._pool)
+        return stats
+
+
+class ModbusTCPSimulator:
+    """Servidor Modbus TCP local con latencia configurable (tests y benchmarks)"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 size: int = 65536):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.holding = [0] * size
+        self.input = [0] * size
+        self.coils = [False] * size
+        self.discrete = [False] * size
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._tasks = set()
+        self._clients = set()
+        self.requests = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+
+    async def start(self) -> Tuple[str, int]:
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.host, self.port
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+        for writer in list(self._clients):
+            writer.close()
+        for task in list(self._tasks):
+            task.cancel()
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(_MBAP.size)
+                tid, _protocol, length, unit_id = _MBAP.unpack(header)
+                pdu = await reader.readexactly(length - 1)
+                # Cada petición se atiende por separado: admite peticiones en vuelo
+                task = asyncio.create_task(self._respond(writer, tid, unit_id, pdu))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, tid: int, unit_id: int, pdu: bytes):
+        self.requests += 1
+        self._in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            response = self.process_pdu(pdu)
+            if not writer.is_closing():
+                writer.write(_MBAP.pack(tid, 0, len(response) + 1, unit_id) + response)
+        finally:
+            self._in_flight -= 1
+
+    def process_pdu(self, pdu: bytes) -> bytes:
+        function_code = pdu[0]
+        try:
+            if function_code in (FC_READ_HOLDING_REGISTERS, FC_READ_INPUT_REGISTERS):
+                address, count = struct.unpack('>HH', pdu[1:5])
+                if not 1 <= count <= MAX_READ_REGISTERS:
+                    return bytes([function_code | 0x80, 0x03])
+                bank = self.holding if function_code == FC_READ_HOLDING_REGISTERS else self.input
+                if address + count > len(bank):
+                    return bytes([function_code | 0x80, 0x02])
+                return struct.pack(f'>BB{count}H', function_code, count * 2,
+                                   *bank[address:address + count])
+
+            if function_code in (FC_READ_COILS, FC_READ_DISCRETE_INPUTS):
+                address, count = struct.unpack('>HH', pdu[1:5])
+                bank = self.coils if function_code == FC_READ_COILS else self.discrete
+                if address + count > len(bank):
+                    return bytes([function_code | 0x80, 0x02])
+                packed = bytearray((count + 7) // 8)
+                for i, bit in enumerate(bank[address:address + count]):
+                    if bit:
+                        packed[i // 8] |= 1 << (i % 8)
+                return bytes([function_code, len(packed)]) + bytes(packed)
+
+            if function_code == FC_WRITE_SINGLE_REGISTER:
+                address, value = struct.unpack('>HH', pdu[1:5])
+                self.holding[address] = value
+                return pdu[:5]
+
+            if function_code == FC_WRITE_MULTIPLE_REGISTERS:
+                address, count, _byte_count = struct.unpack('>HHB', pdu[1:6])
+                self.holding[address:address + count] = struct.unpack(f'>{count}H', pdu[6:6 + count * 2])
+                return pdu[:5]
+
+        except (struct.error, IndexError):
+            return bytes([function_code | 0x80, 0x03])
+
+        return bytes([function_code | 0x80, 0x01])
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+SmartCompute Industrial - Almacén Incremental de Proyectos PLC
+==============================================================
+
+Backups de proyectos (TIA Portal y similares) por artefacto y por contenido:
+
+- Cada artefacto generado (``hardware.xml``, ``program.scl``…) se hashea
+  (SHA-256) en cuanto se produce. Si coincide con el de la versión anterior
+  del mismo sistema no se escribe nada: la nueva versión sólo referencia el
+  contenido ya guardado. Los objetos se guardan una vez, comprimidos, bajo
+  su hash, así que proyectos idénticos de varios PLC comparten objetos.
+- Cadena de versiones compacta por sistema en SQLite: cada versión apunta a
+  su padre y lista sus artefactos (hash, tamaño, versión en que apareció ese
+  contenido) con metadatos de diff de los que cambiaron (líneas añadidas y
+  eliminadas, bloques cambiados, diferencia de bytes).
+- Si ningún artefacto cambió no se crea versión nueva. La E/S de un backup
+  crece con los cambios reales del programa, no con el tamaño del proyecto.
+- ``export_zip()`` reconstruye el zip de cualquier versión para restaurar.
+"""
+
+import difflib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zipfile
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from smartcompute.industrial.protocols.sync_engine import IOThrottle, ThrottledWriter
+
+COMPRESSION_LEVEL = 6
+
+
+class ArtifactRef(NamedTuple):
+    """Artefacto dentro de una versión"""
+    name: str
+    digest: str
+    size: int
+    since: int          # Versión en la que se guardó este contenido
+    change: str         # 'added', 'modified' o 'unchanged'
+    diff: Optional[Dict[str, Any]]
+
+
+@dataclass
+class ProjectVersion:
+    """Versión de proyecto de un sistema"""
+    system_id: str
+    version: int
+    parent: Optional[int]
+    digest: str
+    created_at: str
+    size_bytes: int
+    bytes_written: int
+    artifacts: List[ArtifactRef]
+    removed: List[str] = field(default_factory=list)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    created: bool = True  # False: nada cambió y se devuelve la versión vigente
+
+    @property
+    def changed(self) -> List[str]:
+        return [a.name for a in self.artifacts if a.change != 'unchanged']
+
+    @property
+    def diffs(self) -> Dict[str, Dict[str, Any]]:
+        return {a.name: a.diff for a in self.artifacts if a.diff}
+
+
+def text_diff(old: bytes, new: bytes) -> Dict[str, Any]:
+    """Metadatos de diff entre dos versiones de un artefacto"""
+    diff: Dict[str, Any] = {'bytes_delta': len(new) - len(old)}
+    try:
+        old_lines = old.decode('utf-8').splitlines()
+        new_lines = new.decode('utf-8').splitlines()
+    except UnicodeDecodeError:
+        return diff
+    added = removed = hunks = 0
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            continue
+        hunks += 1
+        removed += i2 - i1
+        added += j2 - j1
+    diff.update(lines_added=added, lines_removed=removed, hunks=hunks)
+    return diff
+
+
+class ProjectArtifactStore:
+    """Objetos por contenido (``objects/``) y cadena de versiones por sistema (``versions.db``)"""
+
+    SCHEMA = (
+        '''CREATE TABLE IF NOT EXISTS project_versions (
+            system_id TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            parent INTEGER,
+            digest TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            size_bytes INTEGER,
+            bytes_written INTEGER,
+            removed TEXT,
+            metadata TEXT,
+            PRIMARY KEY (system_id, version)
+        )''',
+        '''CREATE TABLE IF NOT EXISTS version_artifacts (
+            system_id TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            digest TEXT NOT NULL,
+            size INTEGER,
+            since INTEGER,
+            change TEXT,
+            diff TEXT,
+            PRIMARY KEY (system_id, version, name)
+        )''',
+    )
+
+    def __init__(self, root, io_throttle: Optional[IOThrottle] = None):
+        self.root = Path(root)
+        self.objects = self.root / 'objects'
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.root / 'versions.db'
+        self.io_throttle = io_throttle
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+        self.stats = {'versions': 0, 'unchanged_backups': 0, 'artifacts_written': 0,
+                      'artifacts_skipped': 0, 'bytes_generated': 0, 'bytes_written': 0}
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Conexión corta: confirma al salir (o deshace si hay error) y se cierra"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ── Objetos ─────────────────────────────────────────────────
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / f"{digest}.z"
+
+    def _put(self, digest: str, data: bytes) -> int:
+        """Guardar el objeto si no existe; devuelve los bytes escritos"""
+        path = self._object_path(digest)
+        if path.exists():
+            return 0
+        path.parent.mkdir(exist_ok=True)
+        payload = zlib.compress(data, COMPRESSION_LEVEL)
+        tmp = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        raw = open(tmp, 'wb')
+        with (ThrottledWriter(raw, self.io_throttle) if self.io_throttle else raw) as out:
+            out.write(payload)
+        os.replace(tmp, path)
+        return len(payload)
+
+    def read_artifact(self, digest: str) -> bytes:
+        data = zlib.decompress(self._object_path(digest).read_bytes())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Corrupted project artifact {digest}")
+        return data
+
+    # ── Versiones ───────────────────────────────────────────────
+
+    def _version(self, conn: sqlite3.Connection, system_id: str, version: Optional[int]) -> Optional[ProjectVersion]:
+        if version is None:
+            row = conn.execute('SELECT * FROM project_versions WHERE system_id = ? ORDER BY version DESC LIMIT 1',
+                               (system_id,)).fetchone()
+        else:
+            row = conn.execute('SELECT * FROM project_versions WHERE system_id = ? AND version = ?',
+                               (system_id, version)).fetchone()
+        if row is None:
+            return None
+        artifacts = [ArtifactRef(name, digest, size, since, change, json.loads(diff) if diff else None)
+                     for name, digest, size, since, change, diff in conn.execute(
+                         'SELECT name, digest, size, since, change, diff FROM version_artifacts '
+                         'WHERE system_id = ? AND version = ? ORDER BY name', (system_id, row[1]))]
+        return ProjectVersion(system_id=row[0], version=row[1], parent=row[2], digest=row[3], created_at=row[4],
+                              size_bytes=row[5], bytes_written=row[6], artifacts=artifacts,
+                              removed=json.loads(row[7] or '[]'), metadata=json.loads(row[8] or '{}'))
+
+    def head(self, system_id: str) -> Optional[ProjectVersion]:
+        with self._connect() as conn:
+            return self._version(conn, system_id, None)
+
+    def get_version(self, system_id: str, version: int) -> Optional[ProjectVersion]:
+        with self._connect() as conn:
+            return self._version(conn, system_id, version)
+
+    def history(self, system_id: str) -> List[Dict[str, Any]]:
+        """Cadena de versiones (sin artefactos), de la más reciente a la más antigua"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT v.version, v.parent, v.digest, v.created_at, v.size_bytes, v.bytes_written, '
+                "(SELECT COUNT(*) FROM version_artifacts a WHERE a.system_id = v.system_id "
+                "AND a.version = v.version AND a.change != 'unchanged') "
+                'FROM project_versions v WHERE v.system_id = ? ORDER BY v.version DESC', (system_id,)
+            ).fetchall()
+        return [{'version': r[0], 'parent': r[1], 'digest': r[2], 'created_at': r[3], 'size_bytes': r[4],
+                 'bytes_written': r[5], 'changed_artifacts': r[6]} for r in rows]
+
+    def commit(self, system_id: str, artifacts: Iterable[Tuple[str, bytes]],
+               metadata: Optional[Dict[str, Any]] = None) -> ProjectVersion:
+        """
+        Guardar una versión a partir de artefactos ``(nombre, contenido)``.
+
+        Cada artefacto se hashea al llegar y sólo se escribe si su contenido
+        no estaba ya en la versión anterior (ni en el almacén).
+        """
+        with self._lock:
+            head = self.head(system_id)
+            previous = {a.name: a for a in head.artifacts} if head else {}
+            version = head.version + 1 if head else 1
+
+            refs: List[ArtifactRef] = []
+            written = generated = 0
+            for name, data in artifacts:
+                generated += len(data)
+                digest = hashlib.sha256(data).hexdigest()
+                old = previous.get(name)
+                if old and old.digest == digest:
+                    refs.append(ArtifactRef(name, digest, len(data), old.since, 'unchanged', None))
+                    self.stats['artifacts_skipped'] += 1
+                    continue
+                bytes_out = self._put(digest, data)
+                written += bytes_out
+                self.stats['artifacts_written' if bytes_out else 'artifacts_skipped'] += 1
+                diff = text_diff(self.read_artifact(old.digest), data) if old else None
+                refs.append(ArtifactRef(name, digest, len(data), version, 'modified' if old else 'added', diff))
+
+            names = {ref.name for ref in refs}
+            removed = sorted(set(previous) - names)
+            self.stats['bytes_generated'] += generated
+            self.stats['bytes_written'] += written
+            refs.sort(key=lambda ref: ref.name)
+            digest = hashlib.sha256('\n'.join(f"{r.name}:{r.digest}" for r in refs).encode()).hexdigest()
+
+            if head and digest == head.digest:
+                self.stats['unchanged_backups'] += 1
+                head.created = False
+                return head
+
+            created_at = datetime.now().isoformat(' ')
+            size = sum(ref.size for ref in refs)
+            with self._connect() as conn:
+                conn.execute('INSERT INTO project_versions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+                    system_id, version, head.version if head else None, digest, created_at, size, written,
+                    json.dumps(removed), json.dumps(metadata or {}, default=str)))
+                conn.executemany('INSERT INTO version_artifacts VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [
+                    (system_id, version, r.name, r.digest, r.size, r.since, r.change,
+                     json.dumps(r.diff) if r.diff else None) for r in refs])
+            self.stats['versions'] += 1
+            return ProjectVersion(system_id, version, head.version if head else None, digest, created_at, size,
+                                  written, refs, removed, metadata or {})
+
+    def export_zip(self, system_id: str, version: Optional[int], path) -> Path:
+        """Reconstruir el zip de una versión (la vigente con ``version=None``)"""
+        with self._connect() as conn:
+            project = self._version(conn, system_id, version)
+        if project is None:
+            raise KeyError(f"No project version {version} for {system_id}")
+        path = Path(path)
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for ref in project.artifacts:
+                archive.writestr(ref.name, self.read_artifact(ref.digest))
+        return path
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        generated = stats['bytes_generated']
+        stats['write_ratio'] = round(stats['bytes_written'] / generated, 4) if generated else 0.0
+        return stats
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+SmartCompute Industrial - Sync Engine para Sistemas Integrados
+==============================================================
+
+Piezas con las que ``IndustrialSystemsManager`` separa la sincronización
+de variables de los backups de proyecto:
+
+- ``ConnectorGate``: límite de peticiones concurrentes y de peticiones por
+  segundo (token bucket) por conector. Todas las lecturas de un sistema
+  pasan por su puerta, así que leer en paralelo nunca supera lo que el
+  PLC/servidor admite.
+- ``ChangeTracker``: último valor escrito por variable. Sólo las variables
+  cuyo valor o tipo cambió llegan a la base de datos.
+- ``SyncMetrics``: por sistema, duración del último ciclo, retraso sobre
+  su hora prevista, ciclos atrasados y ``lag_seconds`` (antigüedad de los
+  últimos datos sincronizados).
+- ``BackgroundJobRunner``: cola con prioridad y un número fijo de
+  trabajadores para trabajos largos (backups) fuera de los lazos de
+  sincronización; un trabajo con la misma clave no se encola dos veces.
+- ``IOThrottle`` / ``ThrottledWriter``: límite de bytes por segundo para la
+  E/S de disco de esos trabajos, que corre en hilos (``asyncio.to_thread``).
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger('IndustrialSyncEngine')
+
+DEFAULT_MAX_CONCURRENCY = 2
+DEFAULT_REQUESTS_PER_SECOND = 20.0
+DEFAULT_READ_BATCH_SIZE = 16
+
+
+class RateLimiter:
+    """Token bucket asíncrono: ``rate`` tokens/s con ráfagas de hasta ``burst``"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """Esperar hasta disponer de ``tokens``; devuelve los segundos esperados"""
+        waited = 0.0
+        async with self._lock:  # FIFO: nadie adelanta a quien ya está esperando
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+@dataclass
+class ConnectorLimits:
+    """Límites de un conector (``connection_params``: ``max_concurrency``,
+    ``max_requests_per_second``, ``read_batch_size``)"""
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND
+    read_batch_size: int = DEFAULT_READ_BATCH_SIZE
+
+    @classmethod
+    def from_params(cls, params: Dict[str, Any]) -> 'ConnectorLimits':
+        return cls(
+            max_concurrency=int(params.get('max_concurrency', DEFAULT_MAX_CONCURRENCY)),
+            requests_per_second=float(params.get('max_requests_per_second', DEFAULT_REQUESTS_PER_SECOND)),
+            read_batch_size=int(params.get('read_batch_size', DEFAULT_READ_BATCH_SIZE)),
+        )
+
+
+class ConnectorGate:
+    """Concurrencia y ritmo máximos de peticiones hacia un conector (``async with gate:``)"""
+
+    def __init__(self, limits: ConnectorLimits):
+        self.limits = limits
+        self._slots = asyncio.Semaphore(limits.max_concurrency)
+        self._limiter = RateLimiter(limits.requests_per_second)
+        self.in_flight = 0
+        self.stats = {'requests': 0, 'throttled_seconds': 0.0, 'max_in_flight': 0}
+
+    async def __aenter__(self):
+        await self._slots.acquire()
+        try:
+            self.stats['throttled_seconds'] += await self._limiter.acquire()
+        except BaseException:
+            self._slots.release()
+            raise
+        self.in_flight += 1
+        self.stats['requests'] += 1
+        self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.in_flight)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.in_flight -= 1
+        self._slots.release()
+
+    async def map_batches(self, read: Callable[[List[str]], Awaitable[Dict[str, Any]]],
+                          items: List[str]) -> Dict[str, Any]:
+        """Leer ``items`` en lotes de ``read_batch_size``, en paralelo dentro de los límites"""
+        size = max(1, self.limits.read_batch_size)
+
+        async def one(batch: List[str]) -> Dict[str, Any]:
+            async with self:
+                return await read(batch)
+
+        results = await asyncio.gather(*[one(items[i:i + size]) for i in range(0, len(items), size)])
+        merged: Dict[str, Any] = {}
+        for result in results:
+            merged.update(result)
+        return merged
+
+
+class ChangeTracker:
+    """Último valor escrito por variable, para escribir sólo los cambios"""
+
+    def __init__(self):
+        self._last: Dict[str, Tuple[str, Any]] = {}
+
+    @staticmethod
+    def encode(value: Any) -> str:
+        return json.dumps(value, default=str)
+
+    def seed(self, rows: Iterable[Tuple[str, str, Any]]):
+        """``(variable_id, valor JSON, tipo)`` ya persistidos"""
+        for variable_id, encoded, data_type in rows:
+            self._last[variable_id] = (encoded, data_type)
+
+    def changed(self, variables: Iterable[Any]) -> List[Any]:
+        """Variables cuyo valor o tipo difiere del último escrito (y las nuevas)"""
+        return [variable for variable in variables
+                if self._last.get(variable.variable_id) != (self.encode(variable.value), variable.data_type)]
+
+    def commit(self, variables: Iterable[Any]):
+        """Registrar como escritas (después de confirmar la transacción)"""
+        for variable in variables:
+            self._last[variable.variable_id] = (self.encode(variable.value), variable.data_type)
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+
+@dataclass
+class SyncMetrics:
+    """Estado de sincronización de un sistema"""
+    interval: float
+    cycles: int = 0
+    errors: int = 0
+    overruns: int = 0
+    variables_read: int = 0
+    variables_written: int = 0
+    last_success: Optional[datetime] = None
+    last_duration: float = 0.0
+    last_delay: float = 0.0
+    last_error: Optional[str] = None
+
+    def record(self, started: float, finished: float, due: float, read: int, written: int):
+        """Ciclo correcto: tiempos del reloj del loop, ``due`` = hora prevista de inicio"""
+        self.cycles += 1
+        self.variables_read += read
+        self.variables_written += written
+        self.last_duration = finished - started
+        self.last_delay = max(0.0, started - due)
+        self.last_success = datetime.now()
+        self.last_error = None
+
+    def record_error(self, error: Exception):
+        self.errors += 1
+        self.last_error = str(error)
+
+    def snapshot(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        now = now or datetime.now()
+        return {
+            'interval_seconds': self.interval,
+            'lag_seconds': round((now - self.last_success).total_seconds(), 3) if self.last_success else None,
+            'last_cycle_seconds': round(self.last_duration, 4),
+            'last_start_delay_seconds': round(self.last_delay, 4),
+            'cycles': self.cycles,
+            'overruns': self.overruns,
+            'errors': self.errors,
+            'variables_read': self.variables_read,
+            'variables_written': self.variables_written,
+            'last_error': self.last_error,
+        }
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    key: str = field(compare=False)
+    factory: Callable[[], Awaitable[Any]] = field(compare=False)
+
+
+class BackgroundJobRunner:
+    """Trabajos largos con prioridad (menor = antes) y ``workers`` ejecutándose a la vez"""
+
+    def __init__(self, workers: int = 1):
+        self.workers = workers
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._pending: set = set()
+        self._seq = itertools.count()
+        self.running: Dict[str, float] = {}
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'deduplicated': 0}
+
+    @property
+    def queue(self) -> asyncio.PriorityQueue:
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        return self._queue
+
+    def submit(self, key: str, factory: Callable[[], Awaitable[Any]], priority: int = 10) -> bool:
+        """Encolar ``factory()``; False si ya hay un trabajo pendiente o en curso con esa clave"""
+        if key in self._pending:
+            self.stats['deduplicated'] += 1
+            return False
+        self._pending.add(key)
+        self.stats['submitted'] += 1
+        self.queue.put_nowait(_Job(priority, next(self._seq), key, factory))
+        return True
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            self.running[job.key] = loop.time()
+            try:
+                await job.factory()
+                self.stats['completed'] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error(f"Background job {job.key} failed: {e}")
+            finally:
+                self.running.pop(job.key, None)
+                self._pending.discard(job.key)
+                self.queue.task_done()
+
+    async def run(self):
+        """Trabajadores hasta ser cancelados"""
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def join(self):
+        await self.queue.join()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats, queued=self.queue.qsize() if self._queue else 0, running=sorted(self.running))
+
+
+class IOThrottle:
+    """Límite de bytes/s compartido por hilos (E/S de trabajos en ``asyncio.to_thread``)"""
+
+    def __init__(self, bytes_per_second: Optional[float], sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic):
+        self.bytes_per_second = bytes_per_second
+        self._sleep = sleep
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._next_free: Optional[float] = None
+        self.bytes = 0
+        self.throttled_seconds = 0.0
+
+    def consume(self, size: int):
+        """Reservar ``size`` bytes y dormir lo necesario para no superar el ritmo"""
+        with self._lock:
+            self.bytes += size
+            if not self.bytes_per_second:
+                return
+            now = self._clock()
+            start = now if self._next_free is None or self._next_free < now else self._next_free
+            self._next_free = start + size / self.bytes_per_second
+            # Se duerme hasta que el tramo anterior "termina"; el primero de una ráfaga pasa directo
+            delay = start - now
+            if delay > 0:
+                self.throttled_seconds += delay
+        if delay > 0:
+            self._sleep(delay)
+
+
+class ThrottledWriter:
+    """Fichero binario cuyas escrituras pasan por un ``IOThrottle`` (válido para ``zipfile``)"""
+
+    def __init__(self, raw, throttle: IOThrottle):
+        self._raw = raw
+        self._throttle = throttle
+
+    def write(self, data) -> int:
+        self._throttle.consume(len(data))
+        return self._raw.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._raw.close()
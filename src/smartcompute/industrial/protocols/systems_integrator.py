@@ -40,7 +40,7 @@ import time
 import zipfile
 import shutil
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
 from dataclasses import dataclass, asdict
 from enum import Enum
@@ -52,6 +52,23 @@ from collections import defaultdict
 import subprocess
 import tempfile
 
+from smartcompute.industrial.protocols.backfill import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_TAGS_PER_CHUNK,
+    BackfillChunkResult,
+    BackfillStore,
+    HistorianBackfill,
+)
+from smartcompute.industrial.protocols.project_store import ProjectArtifactStore
+from smartcompute.industrial.protocols.sync_engine import (
+    BackgroundJobRunner,
+    ChangeTracker,
+    ConnectorGate,
+    ConnectorLimits,
+    IOThrottle,
+    SyncMetrics,
+)
+
 # Simulación de conectores industriales
 # En producción usar bibliotecas especializadas:
 # import snap7  # Para TIA Portal/STEP 7
@@ -137,6 +154,9 @@ class TIAPortalConnector:
         self.connected = False
         self.plc_connection = None
         self.project_data = {}
+        # Límite de E/S de disco para backups (lo asigna IndustrialSystemsManager)
+        self.io_throttle: Optional[IOThrottle] = None
+        self.project_store: Optional[ProjectArtifactStore] = None
 
     async def connect(self) -> bool:
         """Conectar a TIA Portal / S7-1500"""
@@ -224,6 +244,10 @@ class TIAPortalConnector:
             'Production_Count': {'address': 'DB2.DBD4', 'type': 'DInt', 'comment': 'Production Counter'}
         }
 
+    def list_tags(self) -> List[str]:
+        """Tags disponibles según la tabla de variables del proyecto"""
+        return list(self.project_data.get('tag_table', {}))
+
     async def read_variables(self, tag_list: List[str]) -> Dict[str, SystemVariable]:
         """Leer variables del PLC"""
         if not self.connected:
@@ -287,66 +311,72 @@ class TIAPortalConnector:
             return 0
 
     async def backup_project(self) -> Optional[ProjectBackup]:
-        """Realizar backup del proyecto TIA Portal"""
+        """Realizar backup incremental del proyecto TIA Portal (sólo artefactos que cambiaron)"""
         try:
             self.logger.info("Starting TIA Portal project backup...")
 
-            # Crear directorio de backup
-            backup_dir = Path("backups") / "tia_portal" / self.config.system_id
-            backup_dir.mkdir(parents=True, exist_ok=True)
+            if self.project_store is None:
+                self.project_store = ProjectArtifactStore(Path("backups") / "tia_portal", self.io_throttle)
 
             timestamp = datetime.now()
-            backup_filename = f"TIA_Project_{timestamp.strftime('%Y%m%d_%H%M%S')}.zip"
-            backup_path = backup_dir / backup_filename
-
-            # Crear backup simulado
-            await self._create_project_backup(backup_path)
+            metadata = {
+                'project_version': self.project_data.get('version'),
+                'hardware_config': self.project_data.get('hardware_config'),
+                'block_count': len(self.project_data.get('program_blocks', {})),
+                'hmi_screen_count': len(self.project_data.get('hmi_screens', {}))
+            }
 
-            # Calcular checksum
-            checksum = await self._calculate_file_checksum(backup_path)
+            # Generar, hashear y guardar cada artefacto en un hilo, uno a uno
+            version = await asyncio.to_thread(
+                self.project_store.commit, self.config.system_id, self._iter_project_artifacts(), metadata
+            )
 
             backup = ProjectBackup(
-                backup_id=f"tia_{int(timestamp.timestamp())}",
+                backup_id=f"tia_{self.config.system_id}_{timestamp.strftime('%Y%m%d%H%M%S%f')}",
                 system_id=self.config.system_id,
                 project_name=self.project_data.get('project_name', 'Unknown'),
-                backup_path=str(backup_path),
+                # Localizador de la versión dentro del almacén compartido por todos los sistemas
+                backup_path=f"{self.project_store.root}#{self.config.system_id}@v{version.version}",
                 timestamp=timestamp,
-                size_bytes=backup_path.stat().st_size,
-                checksum=checksum,
-                metadata={
-                    'project_version': self.project_data.get('version'),
-                    'hardware_config': self.project_data.get('hardware_config'),
-                    'block_count': len(self.project_data.get('program_blocks', {})),
-                    'hmi_screen_count': len(self.project_data.get('hmi_screens', {}))
-                }
+                size_bytes=version.size_bytes,
+                checksum=version.digest,
+                metadata=dict(metadata,
+                              version=version.version,
+                              parent_version=version.parent,
+                              new_version=version.created,
+                              changed_artifacts=version.changed if version.created else [],
+                              removed_artifacts=version.removed if version.created else [],
+                              diffs=version.diffs if version.created else {},
+                              bytes_written=version.bytes_written if version.created else 0)
             )
 
-            self.logger.info(f"✅ TIA Portal backup completed: {backup_path}")
+            if version.created:
+                self.logger.info(f"✅ TIA Portal backup v{version.version}: {len(version.changed)} artifacts "
+                                 f"changed, {version.bytes_written} bytes written")
+            else:
+                self.logger.info(f"✅ TIA Portal project unchanged since v{version.version}, nothing written")
             return backup
 
         except Exception as e:
             self.logger.error(f"❌ TIA Portal backup failed: {e}")
             return None
 
-    async def _create_project_backup(self, backup_path: Path):
-        """Crear archivo de backup del proyecto"""
-        with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED) as backup_zip:
-            # Proyecto principal
-            project_data = {
-                'project_info': self.project_data,
-                'hardware_config': 'Hardware configuration data...',
-                'program_blocks': 'PLC program blocks...',
-                'hmi_configuration': 'HMI screens and configuration...',
-                'tag_tables': 'Variable definitions...',
-                'alarm_configuration': 'Alarm settings...'
-            }
-
-            backup_zip.writestr('project.json', json.dumps(project_data, indent=2, default=str))
+    def _iter_project_artifacts(self) -> Iterator[Tuple[str, bytes]]:
+        """Artefactos del proyecto, generados de uno en uno"""
+        project_data = {
+            'project_info': self.project_data,
+            'hardware_config': 'Hardware configuration data...',
+            'program_blocks': 'PLC program blocks...',
+            'hmi_configuration': 'HMI screens and configuration...',
+            'tag_tables': 'Variable definitions...',
+            'alarm_configuration': 'Alarm settings...'
+        }
+        yield 'project.json', json.dumps(project_data, indent=2, default=str).encode()
 
-            # Archivos de configuración simulados
-            backup_zip.writestr('hardware.xml', self._generate_hardware_xml())
-            backup_zip.writestr('program.scl', self._generate_program_scl())
-            backup_zip.writestr('hmi.xml', self._generate_hmi_xml())
+        # Archivos de configuración simulados
+        yield 'hardware.xml', self._generate_hardware_xml().encode()
+        yield 'program.scl', self._generate_program_scl().encode()
+        yield 'hmi.xml', self._generate_hmi_xml().encode()
 
     def _generate_hardware_xml(self) -> str:
         """Generar configuración de hardware XML"""
@@ -407,14 +437,6 @@ END_FUNCTION_BLOCK'''
     </Screen>
 </HMI_Configuration>'''
 
-    async def _calculate_file_checksum(self, file_path: Path) -> str:
-        """Calcular checksum SHA256 del archivo"""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(chunk)
-        return sha256_hash.hexdigest()
-
 
 class COLOSConnector:
     """Conector para COLOS (Wonderware System Platform)"""
@@ -424,6 +446,8 @@ class COLOSConnector:
         self.logger = logging.getLogger(f'COLOS-{config.system_id}')
         self.connected = False
         self.historian_client = None
+        self.historian_interval = timedelta(seconds=config.connection_params.get('historian_interval_s', 60))
+        self.backfill: Optional[HistorianBackfill] = None
 
     async def connect(self) -> bool:
         """Conectar a COLOS/Wonderware"""
@@ -461,7 +485,7 @@ class COLOSConnector:
 
     async def read_historian_data(self, tag_names: List[str],
                                 start_time: datetime, end_time: datetime) -> Dict:
-        """Leer datos históricos del historiador"""
+        """Leer datos históricos del historiador (rangos cortos; para rellenos usar ``backfill_historian``)"""
         if not self.connected:
             return {}
 
@@ -486,6 +510,45 @@ class COLOSConnector:
 
         return historical_data
 
+    async def fetch_historian_chunk(self, tag_names: List[str],
+                                    start_time: datetime, end_time: datetime) -> List[tuple]:
+        """Consultar [start_time, end_time) y devolver filas en formato ``variable_readings``"""
+        if not self.connected:
+            raise ConnectionError(f"COLOS {self.config.system_id} not connected")
+
+        rows = []
+        for tag_name in tag_names:
+            variable_id = f"{self.config.system_id}_{tag_name}"
+            current_time = start_time
+            while current_time < end_time:
+                value = self._simulate_historical_value(tag_name, current_time)
+                rows.append((variable_id, current_time.isoformat(' '), value, 100, 'online', value, value, 0.0))
+                current_time += self.historian_interval
+            await asyncio.sleep(0)  # No acaparar el event loop entre tags
+
+        return rows
+
+    def backfill_historian(self, tag_names: List[str], start_time: datetime, end_time: datetime,
+                           store: BackfillStore, concurrency: Optional[int] = None,
+                           chunk_duration: Optional[timedelta] = None,
+                           tags_per_chunk: Optional[int] = None) -> AsyncIterator[BackfillChunkResult]:
+        """
+        Rellenar el histórico local con [start_time, end_time) por trozos tiempo × tags.
+
+        Los trozos se guardan en ``store`` según llegan y se entregan como flujo
+        (``async for result in connector.backfill_historian(...)``); repetir la
+        misma petición tras una interrupción sólo consulta los trozos pendientes.
+        """
+        params = self.config.connection_params
+        self.backfill = HistorianBackfill(
+            self.fetch_historian_chunk, store,
+            concurrency=concurrency or params.get('backfill_concurrency', DEFAULT_CONCURRENCY),
+            chunk_duration=chunk_duration or timedelta(minutes=params.get('backfill_chunk_minutes', 60)),
+            tags_per_chunk=tags_per_chunk or params.get('backfill_tags_per_chunk', DEFAULT_TAGS_PER_CHUNK),
+            source=self.config.system_id
+        )
+        return self.backfill.run(tag_names, start_time, end_time)
+
     def _simulate_historical_value(self, tag_name: str, timestamp: datetime) -> float:
         """Simular valor histórico"""
         import random
@@ -619,12 +682,49 @@ class RSLogixConnector:
             return 'REAL'
 
 
+# Tags a sincronizar cuando ni la configuración (``connection_params['sync_tags']``)
+# ni el conector (``list_tags()``) dicen cuáles
+DEFAULT_SYNC_TAGS = {
+    'tia_portal_main': [
+        'Motor1_Start', 'Motor1_Running', 'Motor1_Current',
+        'Tank1_Level', 'Pressure_Main', 'Temperature_Oil',
+        'Recipe_Active', 'Production_Count'
+    ],
+    'rslogix_motor_control': [
+        'Local:1:I.Data[0]', 'Local:1:O.Data[0]',
+        'Motor_1_Run', 'Motor_1_Speed', 'Analog_Input_1'
+    ],
+    'colos_historian': [
+        'Process.Temperature.PV', 'Process.Pressure.PV',
+        'Motor.Current.PV', 'Tank.Level.PV'
+    ]
+}
+
+SYNCHRONIZED_VARIABLE_UPSERT = '''
+    INSERT INTO synchronized_variables
+    (variable_id, system_id, tag_name, data_type, last_value, last_sync, sync_count)
+    VALUES (?, ?, ?, ?, ?, ?, 1)
+    ON CONFLICT(variable_id) DO UPDATE SET
+        system_id = excluded.system_id,
+        tag_name = excluded.tag_name,
+        data_type = excluded.data_type,
+        last_value = excluded.last_value,
+        last_sync = excluded.last_sync,
+        sync_count = sync_count + 1
+'''
+
+BACKUP_JOB_PRIORITY = 10
+SYNC_ERROR_BACKOFF = 60
+
+
 class IndustrialSystemsManager:
     """Gestor principal de sistemas industriales"""
 
-    def __init__(self):
+    def __init__(self, db_path: Optional[Path] = None,
+                 backup_bytes_per_second: Optional[float] = 4 * 1024 * 1024,
+                 backup_workers: int = 1):
         self.logger = self.setup_logging()
-        self.db_path = Path(__file__).parent / "industrial_systems.db"
+        self.db_path = Path(db_path) if db_path else Path(__file__).parent / "industrial_systems.db"
 
         # Conectores de sistemas
         self.connectors = {}
@@ -634,9 +734,22 @@ class IndustrialSystemsManager:
         # Estado de sincronización
         self.sync_active = False
         self.last_sync = {}
+        self.gates: Dict[str, ConnectorGate] = {}
+        self.sync_metrics: Dict[str, SyncMetrics] = {}
+        self.change_tracker = ChangeTracker()
+        self._sync_tags: Dict[str, List[str]] = {}
+
+        # Backups: trabajos en segundo plano, fuera de los lazos de sincronización
+        self.background_jobs = BackgroundJobRunner(workers=backup_workers)
+        self.backup_io = IOThrottle(backup_bytes_per_second)
+        self.backup_interval = timedelta(days=1)
+        self.backup_check_interval = 300.0
+        # Último backup sin cambios por sistema: no se registra, pero cuenta para el planificador
+        self.last_backup_check: Dict[str, datetime] = {}
 
         self.init_database()
         self.load_system_configurations()
+        self.load_synchronized_state()
 
         self.logger.info("🏗️ Industrial Systems Manager initialized")
 
@@ -718,6 +831,16 @@ class IndustrialSystemsManager:
         conn.commit()
         conn.close()
 
+    def load_synchronized_state(self):
+        """Cargar los últimos valores escritos para no reescribirlos tras reiniciar"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self.change_tracker.seed(conn.execute(
+                'SELECT variable_id, last_value, data_type FROM synchronized_variables'
+            ))
+        finally:
+            conn.close()
+
     def load_system_configurations(self):
         """Cargar configuraciones de sistemas"""
         # Configuraciones predefinidas
@@ -848,6 +971,10 @@ class IndustrialSystemsManager:
             if success:
                 self.connectors[system_id] = connector
                 self.integration_status[system_id] = IntegrationStatus.CONNECTED
+                self.gates[system_id] = ConnectorGate(ConnectorLimits.from_params(config.connection_params))
+                self._sync_tags.pop(system_id, None)
+                if hasattr(connector, 'io_throttle'):
+                    connector.io_throttle = self.backup_io
 
                 # Log evento
                 await self.log_integration_event(
@@ -879,13 +1006,12 @@ class IndustrialSystemsManager:
         self.sync_active = True
         self.logger.info("🔄 Starting data synchronization...")
 
-        # Crear tasks de sincronización para cada sistema
+        # Planificadores independientes: variables por sistema y backups en segundo plano
         sync_tasks = []
         for system_id in self.connectors.keys():
-            task = asyncio.create_task(
-                self.sync_system_loop(system_id)
-            )
-            sync_tasks.append(task)
+            sync_tasks.append(asyncio.create_task(self.sync_system_loop(system_id)))
+            sync_tasks.append(asyncio.create_task(self.backup_system_loop(system_id)))
+        jobs = asyncio.create_task(self.background_jobs.run())
 
         try:
             await asyncio.gather(*sync_tasks)
@@ -893,122 +1019,155 @@ class IndustrialSystemsManager:
             self.logger.error(f"Synchronization error: {e}")
         finally:
             self.sync_active = False
+            jobs.cancel()
+            await asyncio.gather(jobs, return_exceptions=True)
 
     async def sync_system_loop(self, system_id: str):
-        """Loop de sincronización para sistema específico"""
+        """Loop de sincronización de variables de un sistema (periodo fijo, sin deriva)"""
         config = self.system_configs[system_id]
         connector = self.connectors.get(system_id)
 
         if not connector:
             return
 
+        metrics = self.sync_metrics.setdefault(system_id, SyncMetrics(interval=config.sync_interval))
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+
         while self.sync_active:
+            started = loop.time()
             try:
                 self.integration_status[system_id] = IntegrationStatus.SYNCHRONIZING
 
-                # Leer variables del sistema
-                await self.sync_system_variables(system_id, connector)
-
-                # Realizar backup si está habilitado
-                if config.enable_backup:
-                    await self.perform_system_backup(system_id, connector)
+                read, written = await self.sync_system_variables(system_id, connector)
 
                 self.integration_status[system_id] = IntegrationStatus.CONNECTED
                 self.last_sync[system_id] = datetime.now()
-
-                # Esperar según intervalo de sincronización
-                await asyncio.sleep(config.sync_interval)
+                metrics.record(started, loop.time(), next_tick, read, written)
+                next_tick += config.sync_interval
 
             except Exception as e:
                 self.logger.error(f"Error syncing {system_id}: {e}")
                 self.integration_status[system_id] = IntegrationStatus.ERROR
-                await asyncio.sleep(60)  # Esperar más tiempo en caso de error
+                metrics.record_error(e)
+                next_tick = loop.time() + SYNC_ERROR_BACKOFF  # Esperar más tiempo en caso de error
+
+            delay = next_tick - loop.time()
+            if delay < 0:
+                # El ciclo tardó más que el intervalo: no acumular ciclos atrasados
+                metrics.overruns += 1
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    async def backup_system_loop(self, system_id: str):
+        """Planificador de backups: encola el backup como trabajo de baja prioridad cuando toca"""
+        config = self.system_configs[system_id]
+        connector = self.connectors.get(system_id)
 
-    async def sync_system_variables(self, system_id: str, connector: Any):
-        """Sincronizar variables del sistema"""
-        try:
-            # Obtener lista de variables a sincronizar
-            variables_to_sync = await self.get_sync_variables(system_id)
+        if not connector or not config.enable_backup or not hasattr(connector, 'backup_project'):
+            return
 
-            if not variables_to_sync:
-                return
+        while self.sync_active:
+            try:
+                last_backup = await self.get_last_backup_time(system_id)
+                checked = self.last_backup_check.get(system_id)
+                if checked and (not last_backup or checked > last_backup):
+                    last_backup = checked
+                if not last_backup or datetime.now() - last_backup >= self.backup_interval:
+                    self.background_jobs.submit(
+                        f"backup:{system_id}",
+                        lambda: self.perform_system_backup(system_id, connector),
+                        priority=BACKUP_JOB_PRIORITY
+                    )
+            except Exception as e:
+                self.logger.error(f"Error scheduling backup for {system_id}: {e}")
 
-            # Leer variables del sistema
-            if hasattr(connector, 'read_variables'):
-                variables = await connector.read_variables(variables_to_sync)
-            elif hasattr(connector, 'read_tags'):
-                variables = await connector.read_tags(variables_to_sync)
-            else:
-                return
+            await asyncio.sleep(self.backup_check_interval)
 
-            # Actualizar base de datos
-            await self.update_synchronized_variables(variables)
+    async def sync_system_variables(self, system_id: str, connector: Any) -> Tuple[int, int]:
+        """Sincronizar variables del sistema; devuelve (leídas, escritas)"""
+        # Obtener lista de variables a sincronizar
+        variables_to_sync = await self.get_sync_variables(system_id)
 
-            self.logger.info(f"🔄 Synchronized {len(variables)} variables from {system_id}")
+        if not variables_to_sync:
+            return 0, 0
 
-        except Exception as e:
-            self.logger.error(f"Error syncing variables from {system_id}: {e}")
+        # Leer variables del sistema, en lotes dentro de los límites del conector
+        if hasattr(connector, 'read_variables'):
+            read = connector.read_variables
+        elif hasattr(connector, 'read_tags'):
+            read = connector.read_tags
+        else:
+            return 0, 0
+
+        gate = self.gates.get(system_id)
+        if gate is None:
+            gate = self.gates[system_id] = ConnectorGate(
+                ConnectorLimits.from_params(self.system_configs[system_id].connection_params))
+        variables = await gate.map_batches(read, variables_to_sync)
+
+        # Actualizar base de datos (sólo cambios)
+        written = await self.update_synchronized_variables(variables)
+
+        self.logger.info(f"🔄 Synchronized {len(variables)} variables from {system_id} ({written} changed)")
+        return len(variables), written
 
     async def get_sync_variables(self, system_id: str) -> List[str]:
         """Obtener lista de variables para sincronizar"""
-        # Variables predefinidas por sistema
-        sync_variables = {
-            'tia_portal_main': [
-                'Motor1_Start', 'Motor1_Running', 'Motor1_Current',
-                'Tank1_Level', 'Pressure_Main', 'Temperature_Oil',
-                'Recipe_Active', 'Production_Count'
-            ],
-            'rslogix_motor_control': [
-                'Local:1:I.Data[0]', 'Local:1:O.Data[0]',
-                'Motor_1_Run', 'Motor_1_Speed', 'Analog_Input_1'
-            ],
-            'colos_historian': [
-                'Process.Temperature.PV', 'Process.Pressure.PV',
-                'Motor.Current.PV', 'Tank.Level.PV'
-            ]
-        }
+        if system_id not in self._sync_tags:
+            config = self.system_configs.get(system_id)
+            connector = self.connectors.get(system_id)
+            tags = config.connection_params.get('sync_tags') if config else None
+            if not tags and hasattr(connector, 'list_tags'):
+                tags = connector.list_tags()
+            self._sync_tags[system_id] = list(tags or DEFAULT_SYNC_TAGS.get(system_id, []))
+
+        return self._sync_tags[system_id]
+
+    async def update_synchronized_variables(self, variables: Dict[str, SystemVariable]) -> int:
+        """Actualizar variables sincronizadas en base de datos (sólo las que cambiaron)"""
+        changed = self.change_tracker.changed(variables.values())
+        if not changed:
+            return 0
 
-        return sync_variables.get(system_id, [])
+        rows = [(
+            variable.variable_id,
+            variable.system_id,
+            variable.tag_name,
+            variable.data_type,
+            self.change_tracker.encode(variable.value),
+            variable.timestamp
+        ) for variable in changed]
+        await asyncio.to_thread(self._write_synchronized_variables, rows)
 
-    async def update_synchronized_variables(self, variables: Dict[str, SystemVariable]):
-        """Actualizar variables sincronizadas en base de datos"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        for var_id, variable in variables.items():
-            cursor.execute('''
-                INSERT OR REPLACE INTO synchronized_variables
-                (variable_id, system_id, tag_name, data_type, last_value, last_sync, sync_count)
-                VALUES (?, ?, ?, ?, ?, ?,
-                    COALESCE((SELECT sync_count FROM synchronized_variables WHERE variable_id = ?), 0) + 1)
-            ''', (
-                variable.variable_id,
-                variable.system_id,
-                variable.tag_name,
-                variable.data_type,
-                json.dumps(variable.value, default=str),
-                variable.timestamp,
-                variable.variable_id
-            ))
+        self.change_tracker.commit(changed)
+        return len(changed)
 
-        conn.commit()
-        conn.close()
+    def _write_synchronized_variables(self, rows: List[Tuple]):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.executemany(SYNCHRONIZED_VARIABLE_UPSERT, rows)
+        finally:
+            conn.close()
 
     async def perform_system_backup(self, system_id: str, connector: Any):
-        """Realizar backup del sistema"""
+        """Realizar backup del sistema (cuándo toca lo decide ``backup_system_loop``)"""
         try:
             if not hasattr(connector, 'backup_project'):
                 return
 
-            # Verificar si es hora de hacer backup (diario)
-            last_backup = await self.get_last_backup_time(system_id)
-            if last_backup and datetime.now() - last_backup < timedelta(days=1):
-                return
-
             backup = await connector.backup_project()
-            if backup:
+            if not backup:
+                return
+            if backup.metadata.get('new_version', True):
                 await self.save_backup_info(backup)
                 self.logger.info(f"💾 Backup completed for {system_id}")
+            else:
+                # Sin cambios no hay versión nueva que registrar en project_backups
+                self.last_backup_check[system_id] = backup.timestamp
+                self.logger.info(f"💾 Project unchanged for {system_id}, no new backup recorded")
 
         except Exception as e:
             self.logger.error(f"Error backing up {system_id}: {e}")
@@ -1094,9 +1253,20 @@ class IndustrialSystemsManager:
                 'host': config.host,
                 'port': config.port
             }
+            if system_id in self.sync_metrics:
+                status_summary['systems'][system_id]['sync'] = self.sync_metrics[system_id].snapshot()
 
+        status_summary['background_jobs'] = self.background_jobs.get_stats()
         return status_summary
 
+    def get_sync_metrics(self) -> Dict[str, Dict]:
+        """Retraso de sincronización y uso de los límites de cada sistema"""
+        return {
+            system_id: dict(metrics.snapshot(), connector=dict(self.gates[system_id].stats)
+                            if system_id in self.gates else None)
+            for system_id, metrics in self.sync_metrics.items()
+        }
+
     def get_synchronized_data(self) -> Dict:
         """Obtener datos sincronizados"""
         conn = sqlite3.connect(self.db_path)
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+SmartCompute Industrial - ICS Advisory Knowledge Base
+=====================================================
+
+Base local de avisos de vulnerabilidad (ICS-CERT/CSAF, fabricantes) para
+``IndustrialVulnerabilityManager``:
+
+- Los avisos se importan de ficheros JSON en disco (un fichero o un
+  directorio de ``*.json``). Cada fichero es una lista de avisos o un
+  objeto ``{"advisories": [...], "withdrawn": [...]}``::
+
+      {"id": "ICSA-23-017-02", "cve": "CVE-2022-43464", "title": "...",
+       "cvss_score": 7.5, "modified": "2023-01-17",
+       "affected": [
+           {"vendor": "Siemens", "product": "S7-1515",
+            "versions": [{"introduced": "2.0", "fixed": "2.9.2"},
+                         {"version": "1.8.5"},
+                         {"introduced": "3.0", "last_affected": "3.0.1"}]},
+           {"cpe": "cpe:2.3:o:siemens:s7-1200_firmware:4.5.0:*:*:*:*:*:*:*"}]}
+
+- La importación es incremental: un fichero con el mismo tamaño, fecha y
+  hash que la última vez no se vuelve a leer, y de un fichero cambiado
+  sólo se aplican los avisos cuyo hash de contenido cambió. Los ids de
+  ``withdrawn`` se eliminan. El resultado (``AdvisoryImport``) lista los
+  pares fabricante/producto afectados por el delta, y cada importación
+  que cambia algo sube la revisión de esos productos (``revision_for()``),
+  con lo que el gestor sabe qué activos volver a escanear.
+- Fabricante y producto se normalizan (minúsculas, sin sufijos societarios
+  ni puntuación) y cada par indexa sus rangos de versión en un árbol de
+  intervalos centrado: ``match()`` de un firmware cuesta O(log n + k) con
+  n rangos del producto y k coincidencias, sin recorrer los avisos. Sólo
+  se reconstruyen los árboles de los productos tocados por un delta.
+- Los avisos se guardan en la base SQLite del gestor, así que el índice se
+  reconstruye al arrancar sin volver a importar los feeds.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+Version = Tuple[Tuple[int, Any], ...]
+ProductKey = Tuple[str, str]
+
+# Extremos abiertos de un rango: () es menor que cualquier versión y
+# ((2, 0),) mayor (los componentes reales son (0, texto) o (1, número))
+VERSION_MIN: Version = ()
+VERSION_MAX: Version = ((2, 0),)
+
+ANY_PRODUCT = '*'
+
+SEVERITIES = ('critical', 'high', 'medium', 'low', 'none')
+
+_VERSION_TOKEN = re.compile(r'\d+|[a-z]+')
+_NAME_JUNK = re.compile(r'[^a-z0-9]+')
+_COMPANY_SUFFIXES = frozenset({'ag', 'inc', 'gmbh', 'corp', 'corporation', 'co', 'ltd', 'llc', 'sa', 'se',
+                               'plc', 'kg', 'bv', 'oy', 'ab', 'spa', 'srl'})
+
+
+def parse_version(text: Any) -> Version:
+    """``"V2.8.3"`` → ((1, 2), (1, 8), (1, 3)); comparable entre sí"""
+    tokens = _VERSION_TOKEN.findall(str(text).lower())
+    if tokens[:1] in (['v'], ['version']):
+        tokens = tokens[1:]
+    parts = [(1, int(token)) if token.isdigit() else (0, token) for token in tokens]
+    while parts and parts[-1] == (1, 0):  # "1.0" == "1.0.0"
+        parts.pop()
+    return tuple(parts)
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """``"Siemens AG"`` → ``"siemens"``, ``"SIMATIC S7-1500"`` → ``"simatic s7 1500"``"""
+    words = _NAME_JUNK.sub(' ', (name or '').lower()).split()
+    while len(words) > 1 and words[-1] in _COMPANY_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+
+def product_key(vendor: Optional[str], product: Optional[str]) -> ProductKey:
+    product = (product or '').strip()
+    return normalize_name(vendor), ANY_PRODUCT if product in ('', ANY_PRODUCT) else normalize_name(product)
+
+
+def severity_for_score(score: float) -> str:
+    """Severidad CVSS v3 (mismos valores que ``VulnerabilitySeverity``)"""
+    if score >= 9.0:
+        return 'critical'
+    if score >= 7.0:
+        return 'high'
+    if score >= 4.0:
+        return 'medium'
+    return 'low' if score > 0 else 'none'
+
+
+@dataclass(frozen=True)
+class VersionRange:
+    """[low, high) o [low, high] si ``high_inclusive``"""
+    low: Version
+    high: Version
+    high_inclusive: bool = False
+
+    def contains(self, version: Version) -> bool:
+        return self.low <= version and (self.high, self.high_inclusive) > (version, False)
+
+
+@dataclass
+class AffectedProduct:
+    vendor: str
+    product: str
+    ranges: List[VersionRange]
+    key: ProductKey = field(init=False)
+
+    def __post_init__(self):
+        self.key = product_key(self.vendor, self.product)
+
+
+@dataclass
+class Advisory:
+    """Aviso de seguridad con los productos y rangos de versión afectados"""
+    advisory_id: str
+    cve_id: Optional[str]
+    title: str
+    description: str
+    severity: str
+    cvss_score: float
+    cvss_vector: str
+    affected: List[AffectedProduct]
+    source: str = 'advisory feed'
+    published: Optional[str] = None
+    modified: Optional[str] = None
+    exploit_available: bool = False
+    exploit_complexity: str = 'unknown'
+    industrial_impact: Dict[str, Any] = field(default_factory=dict)
+    safety_impact: bool = False
+    production_impact: bool = False
+    environmental_impact: bool = False
+    digest: str = ''
+
+    @property
+    def product_keys(self) -> Set[ProductKey]:
+        return {product.key for product in self.affected}
+
+    def affects(self, vendor: str, product: str, version: str) -> bool:
+        """Comprobación directa, sin índice (la referencia de los tests y del benchmark)"""
+        vendor_key, product_name = product_key(vendor, product)
+        parsed = parse_version(version)
+        return any(item.key[0] == vendor_key and item.key[1] in (product_name, ANY_PRODUCT)
+                   and any(r.contains(parsed) for r in item.ranges) for item in self.affected)
+
+
+@dataclass
+class AdvisoryImport:
+    """Resultado de una importación incremental"""
+    files_read: int = 0
+    files_skipped: int = 0
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    products: Set[ProductKey] = field(default_factory=set)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+
+def _parse_cpe(cpe: str) -> Tuple[str, str, Optional[str]]:
+    """``cpe:2.3:part:vendor:product:version:...`` → (fabricante, producto, versión o None)"""
+    parts = re.split(r'(?<!\\):', cpe)
+    if len(parts) < 6 or parts[0] != 'cpe' or parts[1] != '2.3':
+        raise ValueError(f"Unsupported CPE {cpe!r}: expected 'cpe:2.3:...'")
+    vendor, product, version = (part.replace('\\', '') for part in parts[3:6])
+    return vendor, product, None if version in ('*', '-', '') else version
+
+
+def _parse_ranges(entries: Sequence[Dict[str, Any]]) -> List[VersionRange]:
+    ranges = []
+    for entry in entries:
+        if 'version' in entry:
+            exact = parse_version(entry['version'])
+            ranges.append(VersionRange(exact, exact, True))
+            continue
+        unknown = set(entry) - {'introduced', 'fixed', 'last_affected'}
+        if unknown or ('fixed' in entry and 'last_affected' in entry):
+            raise ValueError(f"Invalid version range {entry!r}: expected 'version' or "
+                             f"'introduced' with 'fixed' or 'last_affected'")
+        low = parse_version(entry['introduced']) if entry.get('introduced') not in (None, '0', '*') else VERSION_MIN
+        if entry.get('fixed') is not None:
+            high, inclusive = parse_version(entry['fixed']), False
+        elif entry.get('last_affected') is not None:
+            high, inclusive = parse_version(entry['last_affected']), True
+        else:
+            high, inclusive = VERSION_MAX, False
+        if (high, inclusive) > (low, False):  # Descartar rangos vacíos
+            ranges.append(VersionRange(low, high, inclusive))
+    return ranges
+
+
+def parse_advisory(data: Dict[str, Any]) -> Advisory:
+    """Aviso del feed JSON (formato en el docstring del módulo) → ``Advisory``"""
+    advisory_id = data.get('id') or data.get('advisory_id')
+    if not advisory_id:
+        raise ValueError(f"Advisory without 'id': {str(data)[:80]}")
+    affected = []
+    for item in data.get('affected', []):
+        if 'cpe' in item:
+            vendor, product, version = _parse_cpe(item['cpe'])
+            entries = item.get('versions') or ([{'version': version}] if version else [{'introduced': '0'}])
+        else:
+            vendor, product = item['vendor'], item.get('product', ANY_PRODUCT)
+            entries = item.get('versions') or [{'introduced': '0'}]
+        affected.append(AffectedProduct(vendor, product, _parse_ranges(entries)))
+    score = float(data.get('cvss_score') or 0.0)
+    severity = str(data.get('severity') or '').lower()
+    return Advisory(
+        advisory_id=advisory_id,
+        cve_id=data.get('cve') or data.get('cve_id'),
+        title=data.get('title') or advisory_id,
+        description=data.get('description', ''),
+        severity=severity if severity in SEVERITIES else severity_for_score(score),
+        cvss_score=score,
+        cvss_vector=data.get('cvss_vector', ''),
+        affected=affected,
+        source=data.get('source', 'advisory feed'),
+        published=data.get('published'),
+        modified=data.get('modified'),
+        exploit_available=bool(data.get('exploit_available', False)),
+        exploit_complexity=data.get('exploit_complexity', 'unknown'),
+        industrial_impact=data.get('industrial_impact', {}),
+        safety_impact=bool(data.get('safety_impact', False)),
+        production_impact=bool(data.get('production_impact', False)),
+        environmental_impact=bool(data.get('environmental_impact', False)),
+        digest=hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest(),
+    )
+
+
+class IntervalTree:
+    """Árbol de intervalos centrado, estático: consulta de punto en O(log n + k)
+
+    Cada nodo guarda los intervalos que contienen su centro, ordenados por
+    inicio y por fin: para una versión menor que el centro se recorren por
+    inicio hasta el primero que empieza después, para una mayor por fin
+    hasta el primero que termina antes, y se baja por un solo lado. Los
+    grupos de hasta ``LEAF_SIZE`` intervalos se quedan en una hoja que se
+    comprueba entera.
+    """
+
+    LEAF_SIZE = 8
+
+    __slots__ = ('center', 'by_low', 'by_high', 'left', 'right')
+
+    def __init__(self, intervals: Sequence[Tuple[VersionRange, Any]]):
+        # (inicio, (fin, inclusivo), valor), ordenados por inicio una sola vez
+        self._build(sorted(((r.low, (r.high, r.high_inclusive), value) for r, value in intervals),
+                           key=lambda item: item[0]))
+
+    def _build(self, items: List[Tuple[Version, Tuple[Version, bool], Any]]):
+        self.left = self.right = None
+        if len(items) <= self.LEAF_SIZE:
+            self.center, self.by_low, self.by_high = None, items, ()
+            return
+        center = self.center = items[len(items) // 2][0]
+        here, left, right = [], [], []
+        for item in items:  # Las particiones conservan el orden por inicio
+            if item[0] > center:
+                right.append(item)
+            elif item[1] > (center, False):
+                here.append(item)
+            else:
+                left.append(item)
+        self.by_low = here
+        self.by_high = sorted(here, key=lambda item: item[1], reverse=True)
+        if left:
+            self.left = IntervalTree.__new__(IntervalTree)
+            self.left._build(left)
+        if right:
+            self.right = IntervalTree.__new__(IntervalTree)
+            self.right._build(right)
+
+    def stab(self, version: Version, out: List[Any]) -> List[Any]:
+        point = (version, False)
+        node = self
+        while node is not None:
+            center = node.center
+            if center is None:
+                out.extend(value for low, end, value in node.by_low if low <= version and end > point)
+                break
+            if version < center:
+                for low, _, value in node.by_low:
+                    if low > version:
+                        break
+                    out.append(value)
+                node = node.left
+            elif version > center:
+                for _, end, value in node.by_high:
+                    if end <= point:
+                        break
+                    out.append(value)
+                node = node.right
+            else:
+                out.extend(value for _, _, value in node.by_low)
+                break
+        return out
+
+
+class VulnerabilityKnowledgeBase:
+    """Avisos persistidos en SQLite e índice fabricante/producto → rangos de versión"""
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path)
+        self.advisories: Dict[str, Advisory] = {}
+        self._by_product: Dict[ProductKey, Set[str]] = {}
+        self._trees: Dict[ProductKey, Optional[IntervalTree]] = {}
+        self._revisions: Dict[ProductKey, int] = {}
+        self.revision = 0
+        self.initialize()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+    def initialize(self):
+        conn = self._connect()
+        try:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS advisories (
+                    advisory_id TEXT PRIMARY KEY,
+                    cve_id TEXT,
+                    digest TEXT NOT NULL,
+                    modified TEXT,
+                    data TEXT NOT NULL,
+                    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE INDEX IF NOT EXISTS idx_advisories_cve ON advisories(cve_id);
+                CREATE TABLE IF NOT EXISTS advisory_feeds (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    digest TEXT NOT NULL,
+                    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE TABLE IF NOT EXISTS advisory_revisions (
+                    vendor TEXT NOT NULL,
+                    product TEXT NOT NULL,
+                    revision INTEGER NOT NULL,
+                    PRIMARY KEY (vendor, product)
+                );
+            ''')
+            rows = conn.execute('SELECT data FROM advisories').fetchall()
+            self._revisions = {(vendor, product): revision for vendor, product, revision
+                               in conn.execute('SELECT vendor, product, revision FROM advisory_revisions')}
+        finally:
+            conn.close()
+        self.revision = max(self._revisions.values(), default=0)
+        for (data,) in rows:
+            self._add(parse_advisory(json.loads(data)))
+        self._trees = {key: None for key in self._by_product}
+
+    def __len__(self) -> int:
+        return len(self.advisories)
+
+    # ----- índice -----
+
+    def _add(self, advisory: Advisory, touched: Optional[Set[ProductKey]] = None):
+        self.advisories[advisory.advisory_id] = advisory
+        for key in advisory.product_keys:
+            self._by_product.setdefault(key, set()).add(advisory.advisory_id)
+            if touched is not None:
+                touched.add(key)
+
+    def _remove(self, advisory_id: str, touched: Set[ProductKey]):
+        advisory = self.advisories.pop(advisory_id)
+        for key in advisory.product_keys:
+            ids = self._by_product[key]
+            ids.discard(advisory_id)
+            if not ids:
+                del self._by_product[key]
+                self._trees.pop(key, None)
+            touched.add(key)
+
+    def _tree(self, key: ProductKey) -> Optional[IntervalTree]:
+        """Árbol del producto; se construye la primera vez que se consulta tras un cambio"""
+        if key not in self._trees or self._trees[key] is None:
+            intervals = [(r, advisory_id) for advisory_id in self._by_product.get(key, ())
+                         for item in self.advisories[advisory_id].affected if item.key == key
+                         for r in item.ranges]
+            self._trees[key] = IntervalTree(intervals) if intervals else None
+        return self._trees[key]
+
+    def match(self, vendor: str, product: str, version: str) -> List[Advisory]:
+        """Avisos que afectan a esa versión del producto (y los de todo el fabricante)"""
+        vendor_key, product_name = product_key(vendor, product)
+        parsed = parse_version(version)
+        ids: List[str] = []
+        for key in ((vendor_key, product_name), (vendor_key, ANY_PRODUCT)):
+            if key in self._by_product:
+                tree = self._tree(key)
+                if tree is not None:
+                    tree.stab(parsed, ids)
+        return [self.advisories[advisory_id] for advisory_id in dict.fromkeys(ids)]
+
+    def affected_products(self) -> Set[ProductKey]:
+        return set(self._by_product)
+
+    def revision_for(self, vendor: str, product: str) -> int:
+        """Revisión de la última importación que cambió avisos de ese producto (0 si ninguna)"""
+        vendor_key, product_name = product_key(vendor, product)
+        return max(self._revisions.get((vendor_key, product_name), 0),
+                   self._revisions.get((vendor_key, ANY_PRODUCT), 0))
+
+    # ----- importación -----
+
+    def import_path(self, path: Union[str, Path]) -> AdvisoryImport:
+        """Importar un fichero JSON o todos los ``*.json`` de un directorio (por nombre)"""
+        path = Path(path)
+        files = sorted(path.glob('*.json')) if path.is_dir() else [path]
+
+        def apply(conn: sqlite3.Connection, result: AdvisoryImport):
+            feeds = {row[0]: row[1:] for row in conn.execute('SELECT path, size, mtime_ns, digest FROM advisory_feeds')}
+            for file in files:
+                stat, name = file.stat(), str(file.resolve())
+                previous = feeds.get(name)
+                if previous and previous[:2] == (stat.st_size, stat.st_mtime_ns):
+                    result.files_skipped += 1
+                    continue
+                raw = file.read_bytes()
+                digest = hashlib.sha256(raw).hexdigest()
+                if previous and previous[2] == digest:
+                    result.files_skipped += 1
+                else:
+                    self._apply(conn, json.loads(raw), result)
+                    result.files_read += 1
+                conn.execute('INSERT OR REPLACE INTO advisory_feeds (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)',
+                             (name, stat.st_size, stat.st_mtime_ns, digest))
+
+        return self._transaction(apply)
+
+    def import_feed(self, feed: Union[Dict[str, Any], List[Dict[str, Any]]]) -> AdvisoryImport:
+        """Aplicar un feed ya cargado (mismo formato que los ficheros)"""
+        return self._transaction(lambda conn, result: self._apply(conn, feed, result))
+
+    def _transaction(self, apply: Callable[[sqlite3.Connection, AdvisoryImport], None]) -> AdvisoryImport:
+        """Una transacción por importación; si falla, el índice vuelve al estado confirmado en disco"""
+        result = AdvisoryImport()
+        conn = self._connect()
+        try:
+            apply(conn, result)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            self._reload()
+            raise
+        finally:
+            conn.close()
+        return result
+
+    def _apply(self, conn: sqlite3.Connection, feed: Union[Dict[str, Any], List[Dict[str, Any]]],
+               result: AdvisoryImport):
+        if isinstance(feed, list):
+            feed = {'advisories': feed}
+        upserts = []
+        for data in feed.get('advisories', []):
+            advisory = parse_advisory(data)
+            current = self.advisories.get(advisory.advisory_id)
+            if current is not None and current.digest == advisory.digest:
+                result.unchanged += 1
+                continue
+            if current is not None:
+                self._remove(advisory.advisory_id, result.products)
+                result.updated += 1
+            else:
+                result.added += 1
+            self._add(advisory, result.products)
+            upserts.append((advisory.advisory_id, advisory.cve_id, advisory.digest, advisory.modified,
+                            json.dumps(data, default=str)))
+        conn.executemany('INSERT OR REPLACE INTO advisories (advisory_id, cve_id, digest, modified, data) '
+                         'VALUES (?, ?, ?, ?, ?)', upserts)
+
+        withdrawn = [advisory_id for advisory_id in feed.get('withdrawn', []) if advisory_id in self.advisories]
+        for advisory_id in withdrawn:
+            self._remove(advisory_id, result.products)
+        conn.executemany('DELETE FROM advisories WHERE advisory_id = ?', [(a,) for a in withdrawn])
+        result.removed += len(withdrawn)
+
+        for key in result.products:
+            self._trees[key] = None  # Reconstrucción perezosa sólo de lo tocado
+        if result.products:
+            self.revision += 1
+            for key in result.products:
+                self._revisions[key] = self.revision
+            conn.executemany('INSERT OR REPLACE INTO advisory_revisions (vendor, product, revision) VALUES (?, ?, ?)',
+                             [key + (self.revision,) for key in result.products])
+
+    def _reload(self):
+        self.advisories, self._by_product, self._trees, self._revisions = {}, {}, {}, {}
+        self.initialize()
+
+    def iter_advisories(self) -> Iterator[Advisory]:
+        return iter(self.advisories.values())
+
+    def get_stats(self) -> Dict[str, int]:
+        return {'advisories': len(self.advisories), 'products': len(self._by_product), 'revision': self.revision,
+                'indexed_products': sum(1 for tree in self._trees.values() if tree is not None)}
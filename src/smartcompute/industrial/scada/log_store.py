@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+SmartCompute Industrial - SCADA Log Store
+=========================================
+
+Almacén de ``scada_logs`` particionado por tiempo con búsqueda de texto:
+
+- Una tabla por periodo (``scada_logs_pYYYYMMDD``, ``partition_days`` días
+  alineados a lunes con el valor por defecto de 7) con índices compuestos
+  ``(timestamp, scada_system, tag_name)``, ``(source_node, timestamp)`` y
+  ``(tag_name, timestamp)``.
+- Un índice FTS5 de contenido externo sobre ``message`` por partición. Se
+  alimenta una vez por lote con ``INSERT ... SELECT`` de los rowid nuevos
+  (un trigger por fila triplica el coste de escritura); las filas ignoradas
+  por ``INSERT OR IGNORE`` no llegan al índice.
+- ``scada_logs`` pasa a ser una vista ``UNION ALL`` de las particiones, así
+  que el SQL existente sigue funcionando; una tabla ``scada_logs`` heredada
+  se migra a particiones al abrir el almacén.
+- Borrar datos antiguos es ``DROP TABLE`` de particiones enteras
+  (``drop_partitions``), no un ``DELETE`` fila a fila.
+- ``query()`` pagina con cursor (keyset sobre ``timestamp, rowid`` de la
+  partición), más reciente primero, visitando sólo las particiones que
+  solapan el rango; ``iter_query()`` lo recorre en streaming.
+"""
+
+import base64
+import json
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from smartcompute.industrial.variables.historian import HistorianWriter
+
+logger = logging.getLogger(__name__)
+
+# Columnas que escribe IndustrialSCADALogger.log_row, en orden
+LOG_COLUMNS = (
+    'log_id', 'timestamp', 'scada_system', 'source_node', 'severity', 'category',
+    'message', 'process_area', 'control_module', 'tag_name', 'tag_value', 'tag_quality',
+    'setpoint', 'alarm_type', 'alarm_priority', 'alarm_state', 'operator_id',
+    'security_classification', 'correlation_id', 'details',
+)
+ALL_COLUMNS = LOG_COLUMNS + ('raw_data', 'created_at')
+
+_PARTITION_SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS {name} (
+        log_id TEXT PRIMARY KEY,
+        timestamp TIMESTAMP NOT NULL,
+        scada_system TEXT NOT NULL,
+        source_node TEXT,
+        severity TEXT NOT NULL,
+        category TEXT NOT NULL,
+        message TEXT NOT NULL,
+        process_area TEXT,
+        control_module TEXT,
+        tag_name TEXT,
+        tag_value REAL,
+        tag_quality TEXT,
+        setpoint REAL,
+        alarm_type TEXT,
+        alarm_priority INTEGER,
+        alarm_state TEXT,
+        operator_id TEXT,
+        security_classification TEXT,
+        correlation_id TEXT,
+        details TEXT,
+        raw_data BLOB,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS {name}_time ON {name} (timestamp, scada_system, tag_name)',
+    'CREATE INDEX IF NOT EXISTS {name}_node ON {name} (source_node, timestamp)',
+    'CREATE INDEX IF NOT EXISTS {name}_tag ON {name} (tag_name, timestamp)',
+    "CREATE VIRTUAL TABLE IF NOT EXISTS {name}_fts USING fts5(message, content='{name}', content_rowid='rowid')",
+    '''
+    CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON {name} BEGIN
+        INSERT INTO {name}_fts ({name}_fts, rowid, message) VALUES ('delete', old.rowid, old.message);
+    END
+    ''',
+)
+
+_CATALOG_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS scada_log_partitions (
+        name TEXT PRIMARY KEY,
+        start TEXT NOT NULL,
+        end TEXT NOT NULL
+    )
+'''
+
+# Filtros de igualdad admitidos por query()
+EQUALITY_FILTERS = ('scada_system', 'source_node', 'tag_name', 'severity', 'category', 'alarm_type', 'operator_id')
+
+TimeBound = Optional[Union[datetime, date, str]]
+
+
+def _time_text(value: TimeBound) -> Optional[str]:
+    """Límite temporal con el mismo formato que ``_db_time`` (ISO con espacio)"""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat(' ')
+    return value.isoformat()
+
+
+@dataclass
+class LogPage:
+    """Página de resultados; ``next_cursor`` es ``None`` en la última"""
+    rows: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+    partitions_scanned: List[str] = field(default_factory=list)
+
+
+class PartitionedLogWriter(HistorianWriter):
+    """``HistorianWriter`` que reparte cada lote entre las particiones de ``SCADALogStore``"""
+
+    def __init__(self, store: 'SCADALogStore', **options):
+        super().__init__(store.db_path, insert_sql='', **options)
+        self.store = store
+
+    def _execute(self, conn: sqlite3.Connection, batch):
+        self.store.insert(conn, batch)
+
+
+class SCADALogStore:
+    """Logs SCADA en tablas por periodo con FTS5 y consulta paginada"""
+
+    def __init__(self, db_path, partition_days: int = 7):
+        self.db_path = str(db_path)
+        self.partition_days = partition_days
+        self._known: Dict[str, Tuple[str, str]] = {}
+        self._keys: Dict[str, Tuple[str, str, str]] = {}
+        self._lock = threading.Lock()
+        self.initialize()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    # ── Particiones ─────────────────────────────────────────────
+
+    def initialize(self):
+        """Crear el catálogo y la vista; migrar una tabla ``scada_logs`` heredada"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(_CATALOG_SCHEMA)
+            kind = conn.execute("SELECT type FROM sqlite_master WHERE name = 'scada_logs'").fetchone()
+            if kind and kind[0] == 'table':
+                self._migrate_legacy(conn)
+            self._load_catalog(conn)
+            self._rebuild_view(conn)
+            conn.execute('COMMIT')
+        except sqlite3.Error:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def _migrate_legacy(self, conn: sqlite3.Connection):
+        conn.execute('ALTER TABLE scada_logs RENAME TO scada_logs_legacy')
+        self._load_catalog(conn)
+        cursor = conn.execute(f"SELECT {', '.join(LOG_COLUMNS)} FROM scada_logs_legacy")
+        migrated = 0
+        while True:
+            rows = cursor.fetchmany(10_000)
+            if not rows:
+                break
+            self.insert(conn, rows)
+            migrated += len(rows)
+        conn.execute('DROP TABLE scada_logs_legacy')
+        logger.info(f"Migrated {migrated} scada_logs rows into time partitions")
+
+    def _load_catalog(self, conn: sqlite3.Connection):
+        rows = conn.execute('SELECT name, start, end FROM scada_log_partitions').fetchall()
+        with self._lock:
+            self._known = {name: (start, end) for name, start, end in rows}
+
+    def _rebuild_view(self, conn: sqlite3.Connection):
+        columns = ', '.join(ALL_COLUMNS)
+        # Desde el catálogo de la propia conexión: incluye lo creado en su transacción
+        names = [name for (name,) in conn.execute('SELECT name FROM scada_log_partitions ORDER BY name')]
+        if names:
+            body = ' UNION ALL '.join(f'SELECT {columns} FROM {name}' for name in names)
+        else:
+            body = f"SELECT {', '.join(f'NULL AS {column}' for column in ALL_COLUMNS)} WHERE 0"
+        conn.execute('DROP VIEW IF EXISTS scada_logs')
+        conn.execute(f'CREATE VIEW scada_logs AS {body}')
+
+    def partition_for(self, timestamp: str) -> Tuple[str, str, str]:
+        """``(tabla, inicio, fin)`` de la partición que contiene ``timestamp``"""
+        day = timestamp[:10]
+        key = self._keys.get(day)
+        if key is None:
+            ordinal = date.fromisoformat(day).toordinal()
+            start = date.fromordinal(ordinal - (ordinal - 1) % self.partition_days)
+            end = start + timedelta(days=self.partition_days)
+            key = self._keys[day] = (f"scada_logs_p{start:%Y%m%d}", start.isoformat(), end.isoformat())
+        return key
+
+    def _ensure_partition(self, conn: sqlite3.Connection, name: str, start: str, end: str) -> bool:
+        with self._lock:
+            if name in self._known:
+                return False
+        for statement in _PARTITION_SCHEMA:
+            conn.execute(statement.format(name=name))
+        conn.execute('INSERT OR IGNORE INTO scada_log_partitions VALUES (?, ?, ?)', (name, start, end))
+        with self._lock:
+            self._known[name] = (start, end)
+        return True
+
+    def insert(self, conn: sqlite3.Connection, rows: Sequence[Sequence[Any]]):
+        """Insertar filas ``LOG_COLUMNS`` en sus particiones (dentro de la transacción del llamador)"""
+        groups: Dict[Tuple[str, str, str], List[Sequence[Any]]] = {}
+        for row in rows:
+            groups.setdefault(self.partition_for(str(row[1])), []).append(row)
+        created: List[str] = []
+        placeholders = ', '.join('?' * len(LOG_COLUMNS))
+        try:
+            for (name, start, end), part in groups.items():
+                if self._ensure_partition(conn, name, start, end):
+                    created.append(name)
+                # Sin AUTOINCREMENT los rowid nuevos son siempre mayores que el máximo previo
+                (top,) = conn.execute(f'SELECT COALESCE(MAX(rowid), 0) FROM {name}').fetchone()
+                conn.executemany(f"INSERT OR IGNORE INTO {name} ({', '.join(LOG_COLUMNS)}) VALUES ({placeholders})",
+                                 part)
+                conn.execute(f'INSERT INTO {name}_fts (rowid, message) SELECT rowid, message FROM {name} WHERE rowid > ?',
+                             (top,))
+            if created:
+                self._rebuild_view(conn)
+        except sqlite3.Error:
+            # El llamador hará rollback: las particiones nuevas no llegarán a existir
+            with self._lock:
+                for name in created:
+                    self._known.pop(name, None)
+            raise
+
+    def writer(self, **options) -> PartitionedLogWriter:
+        """Escritor por lotes (hilo + executemany) que enruta cada fila a su partición"""
+        return PartitionedLogWriter(self, **options)
+
+    def partitions(self) -> List[Tuple[str, str, str]]:
+        """Particiones ``(tabla, inicio, fin)``, la más reciente primero"""
+        conn = self._connect()
+        try:
+            return self._catalog(conn)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _catalog(conn: sqlite3.Connection) -> List[Tuple[str, str, str]]:
+        return conn.execute('SELECT name, start, end FROM scada_log_partitions ORDER BY start DESC').fetchall()
+
+    def drop_partitions(self, before: Union[datetime, date, str]) -> int:
+        """Eliminar las particiones que terminan antes de ``before``; devuelve cuántas"""
+        cutoff = _time_text(before)
+        doomed = [name for name, _start, end in self.partitions() if end <= cutoff]
+        if not doomed:
+            return 0
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for name in doomed:
+                conn.execute(f'DROP TABLE IF EXISTS {name}_fts')
+                conn.execute(f'DROP TABLE IF EXISTS {name}')
+                conn.execute('DELETE FROM scada_log_partitions WHERE name = ?', (name,))
+            with self._lock:
+                for name in doomed:
+                    self._known.pop(name, None)
+            self._rebuild_view(conn)
+            conn.execute('COMMIT')
+        except sqlite3.Error:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+        logger.info(f"Dropped {len(doomed)} scada_logs partitions before {cutoff}")
+        return len(doomed)
+
+    # ── Consulta ────────────────────────────────────────────────
+
+    @staticmethod
+    def encode_cursor(partition: str, timestamp: str, rowid: int) -> str:
+        return base64.urlsafe_b64encode(json.dumps([partition, timestamp, rowid]).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[str, str, int]:
+        try:
+            partition, timestamp, rowid = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise ValueError(f"Invalid cursor {cursor!r}")
+        return partition, timestamp, int(rowid)
+
+    def _where(self, name: str, text: Optional[str], match: Optional[str], since: Optional[str],
+               until: Optional[str], filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if since is not None:
+            clauses.append('timestamp >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('timestamp < ?')
+            params.append(until)
+        for column in EQUALITY_FILTERS:
+            value = filters.get(column)
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        expression = match if match is not None else ('"' + text.replace('"', '""') + '"' if text else None)
+        if expression:
+            clauses.append(f'rowid IN (SELECT rowid FROM {name}_fts WHERE {name}_fts MATCH ?)')
+            params.append(expression)
+        return ' AND '.join(clauses) or '1', params
+
+    def _candidates(self, conn: sqlite3.Connection, since: Optional[str],
+                    until: Optional[str]) -> List[Tuple[str, str, str]]:
+        return [p for p in self._catalog(conn)
+                if (until is None or p[1] < until) and (since is None or p[2] > since)]
+
+    def query(self, text: Optional[str] = None, since: TimeBound = None, until: TimeBound = None,
+              limit: int = 100, cursor: Optional[str] = None, match: Optional[str] = None,
+              **filters) -> LogPage:
+        """Una página de logs, más reciente primero
+
+        ``text`` busca una frase en ``message`` (FTS5); ``match`` acepta una
+        expresión FTS5 completa. ``since`` es inclusivo y ``until`` exclusivo.
+        Filtros de igualdad: ``scada_system``, ``source_node``, ``tag_name``,
+        ``severity``, ``category``, ``alarm_type``, ``operator_id``.
+        """
+        unknown = set(filters) - set(EQUALITY_FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown log filters: {sorted(unknown)}")
+        since, until = _time_text(since), _time_text(until)
+        after = self.decode_cursor(cursor) if cursor else None
+
+        rows: List[Dict[str, Any]] = []
+        scanned: List[str] = []
+        last: Optional[Tuple[str, str, int]] = None
+        conn = self._connect()
+        try:
+            for name, _start, _end in self._candidates(conn, since, until):
+                # Los nombres (scada_logs_pYYYYMMDD) ordenan igual que los periodos
+                if after is not None and name > after[0]:
+                    continue  # Partición más reciente que el cursor: ya devuelta
+                where, params = self._where(name, text, match, since, until, filters)
+                if after is not None and name == after[0]:
+                    where += ' AND (timestamp, rowid) < (?, ?)'  # Rango sobre el índice de tiempo
+                    params += [after[1], after[2]]
+                scanned.append(name)
+                needed = limit - len(rows) + 1
+                for rowid, *values in conn.execute(
+                        f"SELECT rowid, {', '.join(LOG_COLUMNS)} FROM {name} "
+                        f"WHERE {where} ORDER BY timestamp DESC, rowid DESC LIMIT ?", params + [needed]):
+                    if len(rows) == limit:
+                        return LogPage(rows, self.encode_cursor(*last), scanned)
+                    record = dict(zip(LOG_COLUMNS, values))
+                    if record['details']:
+                        record['details'] = json.loads(record['details'])
+                    rows.append(record)
+                    last = (name, record['timestamp'], rowid)
+        finally:
+            conn.close()
+        return LogPage(rows, None, scanned)
+
+    def iter_query(self, page_size: int = 1_000, **criteria) -> Iterator[Dict[str, Any]]:
+        """Recorrer todos los resultados de ``query()`` página a página"""
+        cursor = None
+        while True:
+            page = self.query(limit=page_size, cursor=cursor, **criteria)
+            yield from page.rows
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    def count_by(self, column: str, text: Optional[str] = None, since: TimeBound = None,
+                 until: TimeBound = None, match: Optional[str] = None, **filters) -> Dict[Any, int]:
+        """Conteo agrupado por ``column`` con los mismos criterios que ``query()``"""
+        if column not in LOG_COLUMNS:
+            raise ValueError(f"Unknown column {column!r}")
+        since, until = _time_text(since), _time_text(until)
+        counts: Dict[Any, int] = {}
+        conn = self._connect()
+        try:
+            for name, _start, _end in self._candidates(conn, since, until):
+                where, params = self._where(name, text, match, since, until, filters)
+                for value, count in conn.execute(
+                        f'SELECT {column}, COUNT(*) FROM {name} WHERE {where} GROUP BY {column}', params):
+                    counts[value] = counts.get(value, 0) + count
+        finally:
+            conn.close()
+        return counts
+
+    def get_stats(self) -> Dict[str, Any]:
+        partitions = self.partitions()
+        return {
+            'partitions': len(partitions),
+            'partition_days': self.partition_days,
+            'oldest': partitions[-1][1] if partitions else None,
+            'newest': partitions[0][1] if partitions else None,
+        }
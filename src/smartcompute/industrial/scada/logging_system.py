@@ -30,25 +30,35 @@ Date: 2025-09-19
 """
 
 import asyncio
+import fnmatch
 import json
+import math
+import multiprocessing
+import queue
 import sqlite3
 import struct
 import socket
 import time
 import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any, Union
+from typing import Dict, Iterable, List, Optional, Tuple, Any, Union
 from pathlib import Path
 from dataclasses import dataclass, asdict, field
 from enum import Enum
 import logging
 import re
-import hashlib
 import xml.etree.ElementTree as ET
 from collections import defaultdict, deque
 import numpy as np
 import pandas as pd
 
+from smartcompute.industrial.scada.log_store import LogPage, SCADALogStore
+from smartcompute.industrial.scada.parsing import TimestampDecoder, detect_format, fast_log_id
+from smartcompute.industrial.scada.rules import AlertRuleMatcher, AlertRuleSet, CompiledRule
+from smartcompute.industrial.scada.sources import CheckpointStore, FileFollower, FileTailer, SyslogListener
+from smartcompute.industrial.variables.historian import HistorianWriter
+
 class SCADASystem(Enum):
     """Sistemas SCADA soportados"""
     WONDERWARE = "wonderware"
@@ -170,21 +180,81 @@ class BatchEvent:
     results: Dict[str, Any] = field(default_factory=dict)
 
 class SCADALogParser:
-    """Parser unificado para logs de diferentes sistemas SCADA"""
+    """Parser unificado para logs de diferentes sistemas SCADA
+
+    Los patrones se compilan una vez por clase, las marcas de tiempo pasan
+    por ``TimestampDecoder`` (fecha cacheada, hora por slicing) y el
+    ``log_id`` es un hash no criptográfico de la línea.
+    """
+
+    # Formato típico: 2025-01-15 14:30:25.123 [ALARM] Area1.PumpMotor1.Speed HH 1850.5 rpm (Limit: 1800.0) Operator: JSmith
+    WONDERWARE_PATTERN = re.compile(
+        r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) \[(\w+)\] (.+?)(?:\s+Operator: (\w+))?$')
+    WONDERWARE_TAG_PATTERN = re.compile(r'(\S+)\s+([HL]{1,2})\s+([\d.]+)\s+(\S+)\s+\(Limit:\s+([\d.]+)\)')
+    # Formato típico: 15-JAN-25 14:30:25.123 REACTOR01/TIC_001/PV.CV HI_ALM 85.5 DEG_C PRIO=3 USER=OPERATOR1
+    DELTAV_PATTERN = re.compile(
+        r'(\d{2}-\w{3}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) (\S+) (\w+) ([\d.]+) (\w+)(?:\s+PRIO=(\d+))? (?:USER=(\w+))?')
+    # Formato típico: 2025.01.15 14:30:25.123 C300_01 ALARM FC_101.PV HIGH 75.5 % [ACK: OPERATOR2 14:32:15]
+    EXPERION_PATTERN = re.compile(
+        r'(\d{4}\.\d{2}\.\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) (\w+) (\w+) (\S+) (\w+) ([\d.]+) (\S+)'
+        r'(?:\s+\[ACK: (\w+) (\d{2}:\d{2}:\d{2})\])?')
+    # Formato: [2025-01-15 14:30:25] [INFO] HMI_Station_01: Motor1_Start = TRUE (User: OPERATOR1)
+    FACTORYTALK_TEXT_PATTERN = re.compile(
+        r'\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] \[(\w+)\] (\w+): (.+?)(?:\s+\(User: (\w+)\))?$')
+
+    SEVERITY_MAP = {
+        'EMERGENCY': LogSeverity.EMERGENCY,
+        'ALERT': LogSeverity.ALERT,
+        'CRITICAL': LogSeverity.CRITICAL,
+        'ERROR': LogSeverity.ERROR,
+        'WARN': LogSeverity.WARNING,
+        'WARNING': LogSeverity.WARNING,
+        'NOTICE': LogSeverity.NOTICE,
+        'INFO': LogSeverity.INFO,
+        'DEBUG': LogSeverity.DEBUG,
+        'ALARM': LogSeverity.WARNING
+    }
+
+    ALARM_TYPE_MAP = {
+        'HH': ProcessAlarmType.HIGH_HIGH,
+        'H': ProcessAlarmType.HIGH,
+        'HIGH': ProcessAlarmType.HIGH,
+        'L': ProcessAlarmType.LOW,
+        'LL': ProcessAlarmType.LOW_LOW,
+        'LOW': ProcessAlarmType.LOW,
+        'DEV': ProcessAlarmType.DEVIATION,
+        'ROC': ProcessAlarmType.RATE,
+        'COMM': ProcessAlarmType.COMM_FAIL,
+        'QUALITY': ProcessAlarmType.BAD_QUALITY,
+        'SAFETY': ProcessAlarmType.SAFETY
+    }
+
+    DELTAV_ALARM_MAP = {
+        'HI_ALM': ProcessAlarmType.HIGH,
+        'HIHI_ALM': ProcessAlarmType.HIGH_HIGH,
+        'LO_ALM': ProcessAlarmType.LOW,
+        'LOLO_ALM': ProcessAlarmType.LOW_LOW,
+        'DEV_ALM': ProcessAlarmType.DEVIATION,
+        'ROC_ALM': ProcessAlarmType.RATE,
+        'COMM_ALM': ProcessAlarmType.COMM_FAIL,
+        'BAD_PV': ProcessAlarmType.BAD_QUALITY
+    }
 
     def __init__(self):
         self.parsers = {
             SCADASystem.WONDERWARE: self._parse_wonderware_log,
             SCADASystem.EMERSON_DELTAV: self._parse_deltav_log,
             SCADASystem.HONEYWELL_EXPERION: self._parse_experion_log,
-            SCADASystem.ABB_800XA: self._parse_abb_log,
-            SCADASystem.SCHNEIDER_ECOSTRUXURE: self._parse_schneider_log,
-            SCADASystem.GE_IFIX: self._parse_ifix_log,
             SCADASystem.FACTORYTALK: self._parse_factorytalk_log,
-            SCADASystem.SIEMENS_WINCC: self._parse_wincc_log,
-            SCADASystem.YOKOGAWA_CENTUM: self._parse_centum_log,
-            SCADASystem.ICONICS_GENESIS: self._parse_iconics_log
+            SCADASystem.SIEMENS_WINCC: self._parse_siemens_wincc_log
+            # ABB 800xA, EcoStruxure, iFIX, CENTUM e ICONICS aún sin parser
         }
+        # Un decodificador (y su caché de fechas) por formato de fecha
+        self.iso_timestamps = TimestampDecoder('%Y-%m-%d', 10)
+        self.deltav_timestamps = TimestampDecoder('%d-%b-%y', 9)
+        self.experion_timestamps = TimestampDecoder('%Y.%m.%d', 10)
+        self.logger = logging.getLogger('SCADALogger')
+        self.stats = {'parse_errors': 0}
 
     def parse_log_entry(self, raw_log: str, scada_system: SCADASystem) -> Optional[SCADALogEntry]:
         """Parsear entrada de log según el sistema SCADA"""
@@ -195,26 +265,30 @@ class SCADALogParser:
         try:
             return parser(raw_log)
         except Exception as e:
-            print(f"Error parsing {scada_system.value} log: {e}")
+            self.stats['parse_errors'] += 1
+            self.logger.warning(f"Error parsing {scada_system.value} log: {e}")
             return None
 
+    def detect_system(self, raw_logs: Iterable[str], sample: int = 20) -> Optional[SCADASystem]:
+        """Detectar el sistema SCADA de un flujo por sus primeras líneas"""
+        system_value = detect_format(raw_logs, sample)
+        return SCADASystem(system_value) if system_value else None
+
     def _parse_wonderware_log(self, raw_log: str) -> SCADALogEntry:
         """Parser para Wonderware System Platform / InTouch"""
-        # Formato típico: 2025-01-15 14:30:25.123 [ALARM] Area1.PumpMotor1.Speed HH 1850.5 rpm (Limit: 1800.0) Operator: JSmith
-        pattern = r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) \[(\w+)\] (.+?)(?:\s+Operator: (\w+))?$'
-        match = re.match(pattern, raw_log)
+        match = self.WONDERWARE_PATTERN.match(raw_log)
 
         if not match:
             raise ValueError("Invalid Wonderware log format")
 
         timestamp_str, severity_str, message, operator = match.groups()
-        timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S.%f')
+        timestamp = self.iso_timestamps.decode(timestamp_str)
 
         # Parsear detalles de tag si es alarma
         tag_details = self._parse_wonderware_tag_details(message)
 
         return SCADALogEntry(
-            log_id=hashlib.md5(raw_log.encode()).hexdigest(),
+            log_id=fast_log_id(raw_log),
             timestamp=timestamp,
             scada_system=SCADASystem.WONDERWARE,
             source_node="Wonderware_Node",
@@ -231,15 +305,13 @@ class SCADALogParser:
 
     def _parse_deltav_log(self, raw_log: str) -> SCADALogEntry:
         """Parser para Emerson DeltaV"""
-        # Formato típico: 15-JAN-25 14:30:25.123 REACTOR01/TIC_001/PV.CV HI_ALM 85.5 DEG_C PRIO=3 USER=OPERATOR1
-        pattern = r'(\d{2}-\w{3}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) (\S+) (\w+) ([\d.]+) (\w+)(?:\s+PRIO=(\d+))? (?:USER=(\w+))?'
-        match = re.match(pattern, raw_log)
+        match = self.DELTAV_PATTERN.match(raw_log)
 
         if not match:
             raise ValueError("Invalid DeltaV log format")
 
         timestamp_str, tag_path, alarm_type, value, units, priority, user = match.groups()
-        timestamp = datetime.strptime(timestamp_str, '%d-%b-%y %H:%M:%S.%f')
+        timestamp = self.deltav_timestamps.decode(timestamp_str)
 
         # Parsear path del tag DeltaV (AREA/MODULE/PARAMETER)
         path_parts = tag_path.split('/')
@@ -247,7 +319,7 @@ class SCADALogParser:
         control_module = path_parts[1] if len(path_parts) > 1 else None
 
         return SCADALogEntry(
-            log_id=hashlib.md5(raw_log.encode()).hexdigest(),
+            log_id=fast_log_id(raw_log),
             timestamp=timestamp,
             scada_system=SCADASystem.EMERSON_DELTAV,
             source_node="DeltaV_Controller",
@@ -266,18 +338,16 @@ class SCADALogParser:
 
     def _parse_experion_log(self, raw_log: str) -> SCADALogEntry:
         """Parser para Honeywell Experion PKS"""
-        # Formato típico: 2025.01.15 14:30:25.123 C300_01 ALARM FC_101.PV HIGH 75.5 % [ACK: OPERATOR2 14:32:15]
-        pattern = r'(\d{4}\.\d{2}\.\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) (\w+) (\w+) (\S+) (\w+) ([\d.]+) (\w+)(?:\s+\[ACK: (\w+) (\d{2}:\d{2}:\d{2})\])?'
-        match = re.match(pattern, raw_log)
+        match = self.EXPERION_PATTERN.match(raw_log)
 
         if not match:
             raise ValueError("Invalid Experion log format")
 
         timestamp_str, controller, event_type, tag, alarm_type, value, units, ack_user, ack_time = match.groups()
-        timestamp = datetime.strptime(timestamp_str, '%Y.%m.%d %H:%M:%S.%f')
+        timestamp = self.experion_timestamps.decode(timestamp_str)
 
         return SCADALogEntry(
-            log_id=hashlib.md5(raw_log.encode()).hexdigest(),
+            log_id=fast_log_id(raw_log),
             timestamp=timestamp,
             scada_system=SCADASystem.HONEYWELL_EXPERION,
             source_node=controller,
@@ -295,14 +365,13 @@ class SCADALogParser:
         """Parser para Siemens WinCC"""
         # Formato típico: 2025-01-15,14:30:25.123,S7-1500_01,@2s\\MotorSpeed,1850.5,rpm,HH_ALM,User01,Acknowledged
         parts = raw_log.split(',')
-        if len(parts) < 6:
+        if len(parts) < 7:
             raise ValueError("Invalid WinCC log format")
 
-        timestamp_str = f"{parts[0]} {parts[1]}"
-        timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S.%f')
+        timestamp = self.iso_timestamps.decode(parts[0], parts[1])
 
         return SCADALogEntry(
-            log_id=hashlib.md5(raw_log.encode()).hexdigest(),
+            log_id=fast_log_id(raw_log),
             timestamp=timestamp,
             scada_system=SCADASystem.SIEMENS_WINCC,
             source_node=parts[2],
@@ -337,7 +406,7 @@ class SCADALogParser:
         operator = root.findtext('Operator', '')
 
         return SCADALogEntry(
-            log_id=hashlib.md5(xml_log.encode()).hexdigest(),
+            log_id=fast_log_id(xml_log),
             timestamp=timestamp,
             scada_system=SCADASystem.FACTORYTALK,
             source_node="FactoryTalk_Server",
@@ -350,18 +419,16 @@ class SCADALogParser:
 
     def _parse_factorytalk_text(self, text_log: str) -> SCADALogEntry:
         """Parser para logs de texto de FactoryTalk"""
-        # Formato: [2025-01-15 14:30:25] [INFO] HMI_Station_01: Motor1_Start = TRUE (User: OPERATOR1)
-        pattern = r'\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] \[(\w+)\] (\w+): (.+?)(?:\s+\(User: (\w+)\))?'
-        match = re.match(pattern, text_log)
+        match = self.FACTORYTALK_TEXT_PATTERN.match(text_log)
 
         if not match:
             raise ValueError("Invalid FactoryTalk text log format")
 
         timestamp_str, severity, station, message, user = match.groups()
-        timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
+        timestamp = self.iso_timestamps.decode(timestamp_str)
 
         return SCADALogEntry(
-            log_id=hashlib.md5(text_log.encode()).hexdigest(),
+            log_id=fast_log_id(text_log),
             timestamp=timestamp,
             scada_system=SCADASystem.FACTORYTALK,
             source_node=station,
@@ -377,8 +444,7 @@ class SCADALogParser:
         details = {}
 
         # Buscar patrón de tag con alarma: Area1.PumpMotor1.Speed HH 1850.5 rpm (Limit: 1800.0)
-        tag_pattern = r'(\S+)\s+([HL]{1,2})\s+([\d.]+)\s+(\w+)\s+\(Limit:\s+([\d.]+)\)'
-        match = re.search(tag_pattern, message)
+        match = self.WONDERWARE_TAG_PATTERN.search(message)
 
         if match:
             tag_name, alarm_type, value, units, limit = match.groups()
@@ -394,58 +460,67 @@ class SCADALogParser:
 
     def _map_severity(self, severity_str: str) -> LogSeverity:
         """Mapear string de severidad a enum"""
-        severity_map = {
-            'EMERGENCY': LogSeverity.EMERGENCY,
-            'ALERT': LogSeverity.ALERT,
-            'CRITICAL': LogSeverity.CRITICAL,
-            'ERROR': LogSeverity.ERROR,
-            'WARN': LogSeverity.WARNING,
-            'WARNING': LogSeverity.WARNING,
-            'NOTICE': LogSeverity.NOTICE,
-            'INFO': LogSeverity.INFO,
-            'DEBUG': LogSeverity.DEBUG,
-            'ALARM': LogSeverity.WARNING
-        }
-        return severity_map.get(severity_str.upper(), LogSeverity.INFO)
+        return self.SEVERITY_MAP.get(severity_str.upper(), LogSeverity.INFO)
 
     def _map_alarm_type_generic(self, alarm_str: str) -> ProcessAlarmType:
         """Mapear string de alarma a enum genérico"""
-        alarm_map = {
-            'HH': ProcessAlarmType.HIGH_HIGH,
-            'H': ProcessAlarmType.HIGH,
-            'HIGH': ProcessAlarmType.HIGH,
-            'L': ProcessAlarmType.LOW,
-            'LL': ProcessAlarmType.LOW_LOW,
-            'LOW': ProcessAlarmType.LOW,
-            'DEV': ProcessAlarmType.DEVIATION,
-            'ROC': ProcessAlarmType.RATE,
-            'COMM': ProcessAlarmType.COMM_FAIL,
-            'QUALITY': ProcessAlarmType.BAD_QUALITY,
-            'SAFETY': ProcessAlarmType.SAFETY
-        }
-        return alarm_map.get(alarm_str.upper(), ProcessAlarmType.HIGH)
+        return self.ALARM_TYPE_MAP.get(alarm_str.upper(), ProcessAlarmType.HIGH)
 
     def _map_deltav_alarm_type(self, alarm_str: str) -> ProcessAlarmType:
         """Mapear tipos de alarma específicos de DeltaV"""
-        deltav_map = {
-            'HI_ALM': ProcessAlarmType.HIGH,
-            'HIHI_ALM': ProcessAlarmType.HIGH_HIGH,
-            'LO_ALM': ProcessAlarmType.LOW,
-            'LOLO_ALM': ProcessAlarmType.LOW_LOW,
-            'DEV_ALM': ProcessAlarmType.DEVIATION,
-            'ROC_ALM': ProcessAlarmType.RATE,
-            'COMM_ALM': ProcessAlarmType.COMM_FAIL,
-            'BAD_PV': ProcessAlarmType.BAD_QUALITY
-        }
-        return deltav_map.get(alarm_str.upper(), ProcessAlarmType.HIGH)
+        return self.DELTAV_ALARM_MAP.get(alarm_str.upper(), ProcessAlarmType.HIGH)
 
 
-class IndustrialSCADALogger:
-    """Sistema principal de logging SCADA industrial"""
+# Parser por proceso del pool de parseo (se crea en el primer lote)
+_worker_parser: Optional[SCADALogParser] = None
 
-    def __init__(self):
+
+def _parse_chunk(args: Tuple[str, List[str]]) -> List[Optional[SCADALogEntry]]:
+    """Parsear un trozo de líneas en un proceso del pool"""
+    global _worker_parser
+    system_value, raw_logs = args
+    if _worker_parser is None:
+        _worker_parser = SCADALogParser()
+    scada_system = SCADASystem(system_value)
+    return [_worker_parser.parse_log_entry(raw_log, scada_system) for raw_log in raw_logs]
+
+
+ALARM_INSERT = '''
+    INSERT OR REPLACE INTO process_alarms
+    (alarm_id, timestamp, tag_name, alarm_type, priority, current_value,
+     alarm_limit, process_area, control_module, alarm_state, operator_comment,
+     ack_timestamp, clear_timestamp, duration_seconds)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def _db_time(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat(' ') if value is not None else None
+
+
+class IndustrialSCADALogger:
+    """
+    Sistema principal de logging SCADA industrial.
+
+    Ingesta por lotes: ``ingest_many()`` parsea un lote (en un pool de
+    procesos para formatos pesados como el XML de FactoryTalk), lo analiza y
+    encola las filas en escritores con ``executemany`` por intervalo.
+    ``submit()`` pone líneas sueltas en una cola acotada que un hilo agrupa
+    en lotes; si la cola se llena, el productor espera.
+    """
+
+    # Formatos cuyo parseo compensa repartir entre procesos
+    PARALLEL_SYSTEMS = frozenset({SCADASystem.FACTORYTALK})
+
+    # Acciones de trigger_alert que reciben el payload de la alerta
+    PAYLOAD_ACTIONS = ('notify_immediately', 'log_to_security_siem', 'create_incident')
+
+    def __init__(self, db_path: Optional[Union[str, Path]] = None, simulate: bool = True,
+                 queue_size: int = 50_000, batch_size: int = 5_000, parse_workers: Optional[int] = None,
+                 parallel_threshold: int = 2_000, flush_interval_ms: float = 250.0,
+                 log_partition_days: int = 7):
         self.logger = self.setup_logging()
-        self.db_path = Path(__file__).parent / "industrial_scada_logs.db"
+        self.db_path = Path(db_path) if db_path else Path(__file__).parent / "industrial_scada_logs.db"
 
         # Componentes principales
         self.log_parser = SCADALogParser()
@@ -458,16 +533,37 @@ class IndustrialSCADALogger:
         self.log_statistics = defaultdict(int)
 
         # Configuración de alertas
-        self.alert_rules = {}
+        self.alert_rules = AlertRuleSet()
+        self.rule_matcher = AlertRuleMatcher({})
+        self._rules_version = self.alert_rules.version
         self.correlation_rules = {}
 
         # Análisis en tiempo real
         self.anomaly_detector = None
         self.pattern_analyzer = None
 
+        # Pipeline de ingesta
+        self.batch_size = batch_size
+        self.parse_workers = parse_workers or multiprocessing.cpu_count()
+        self.parallel_threshold = parallel_threshold
+        self.ingest_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._ingest_thread: Optional[threading.Thread] = None
+        self._ingest_lock = threading.Lock()
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self._process_lock = threading.Lock()
+
+        # Fuentes reales: ficheros seguidos y receptores syslog
+        self.checkpoints: Optional[CheckpointStore] = None
+        self.file_follower: Optional[FileFollower] = None
+        self.syslog_listeners: List[SyslogListener] = []
+
+        self.log_partition_days = log_partition_days
         self.init_database()
+        self.log_writer = self.log_store.writer(flush_interval_ms=flush_interval_ms)
+        self.alarm_writer = HistorianWriter(self.db_path, ALARM_INSERT, flush_interval_ms=flush_interval_ms)
         self.load_alert_rules()
-        self.start_log_processing()
+        if simulate:
+            self.start_log_processing()
 
         self.logger.info("📝 Industrial SCADA Logger initialized")
 
@@ -475,6 +571,8 @@ class IndustrialSCADALogger:
         """Configurar sistema de logging"""
         logger = logging.getLogger('SCADALogger')
         logger.setLevel(logging.INFO)
+        if logger.handlers:
+            return logger  # Otra instancia ya lo configuró
 
         handler = logging.FileHandler('smartcompute_scada_logger.log')
         formatter = logging.Formatter(
@@ -490,34 +588,6 @@ class IndustrialSCADALogger:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
-        # Tabla principal de logs SCADA
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS scada_logs (
-                log_id TEXT PRIMARY KEY,
-                timestamp TIMESTAMP NOT NULL,
-                scada_system TEXT NOT NULL,
-                source_node TEXT,
-                severity TEXT NOT NULL,
-                category TEXT NOT NULL,
-                message TEXT NOT NULL,
-                process_area TEXT,
-                control_module TEXT,
-                tag_name TEXT,
-                tag_value REAL,
-                tag_quality TEXT,
-                setpoint REAL,
-                alarm_type TEXT,
-                alarm_priority INTEGER,
-                alarm_state TEXT,
-                operator_id TEXT,
-                security_classification TEXT,
-                correlation_id TEXT,
-                details TEXT,
-                raw_data BLOB,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
         # Tabla de alarmas de proceso
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS process_alarms (
@@ -589,16 +659,15 @@ class IndustrialSCADALogger:
         ''')
 
         # Índices para rendimiento
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON scada_logs(timestamp)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_logs_severity ON scada_logs(severity)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_logs_system ON scada_logs(scada_system)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_logs_tag ON scada_logs(tag_name)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_alarms_state ON process_alarms(alarm_state)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_alarms_priority ON process_alarms(priority)')
 
         conn.commit()
         conn.close()
 
+        # scada_logs: particiones por periodo con FTS5 detrás de una vista
+        self.log_store = SCADALogStore(self.db_path, self.log_partition_days)
+
     def load_alert_rules(self):
         """Cargar reglas de alertas predefinidas"""
         # Reglas de alerta críticas para entornos industriales
@@ -672,8 +741,21 @@ class IndustrialSCADALogger:
         }
 
         self.alert_rules.update(critical_rules)
+        self.compile_alert_rules()
         self.logger.info(f"✅ Loaded {len(critical_rules)} critical alert rules")
 
+    def compile_alert_rules(self):
+        """Compilar ``alert_rules``; las reglas sin cambios conservan sus contadores de ventana"""
+        matcher = AlertRuleMatcher(self.alert_rules)
+        matcher.inherit_state(self.rule_matcher)
+        self.rule_matcher = matcher
+        self._rules_version = self.alert_rules.version
+
+    def add_alert_rules(self, rules: Dict[str, Dict]):
+        """Añadir reglas de planta y recompilar el conjunto"""
+        self.alert_rules.update(rules)
+        self.compile_alert_rules()
+
     def register_scada_connection(self, scada_system: SCADASystem, connection_params: Dict):
         """Registrar conexión a sistema SCADA"""
         connection_id = f"{scada_system.value}_{connection_params.get('node_name', 'default')}"
@@ -692,6 +774,10 @@ class IndustrialSCADALogger:
 
         self.scada_connections[connection_id] = connection_info
 
+        # Ficheros de log exportados por el sistema: seguirlos
+        for log_file in connection_params.get('log_files', []):
+            self.follow_file(log_file, scada_system, connection_id)
+
         # Guardar en base de datos
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
@@ -717,44 +803,212 @@ class IndustrialSCADALogger:
 
     def ingest_raw_log(self, raw_log: str, scada_system: SCADASystem, source_connection: str = None):
         """Ingestar log raw de sistema SCADA"""
-        try:
-            # Parsear log usando el parser apropiado
-            log_entry = self.log_parser.parse_log_entry(raw_log, scada_system)
-            if not log_entry:
-                self.logger.warning(f"Failed to parse log from {scada_system.value}: {raw_log[:100]}...")
-                return
-
-            # Agregar información de conexión
-            if source_connection:
+        self.ingest_many([raw_log], scada_system, source_connection)
+
+    def ingest_many(self, raw_logs: List[str], scada_system: Optional[SCADASystem] = None,
+                    source_connection: str = None) -> int:
+        """Ingestar un lote de logs raw de un sistema SCADA; devuelve cuántos se parsearon
+
+        Sin ``scada_system``, el formato se detecta por las primeras líneas del lote.
+        Las líneas que no se pueden parsear se descartan; cualquier otro error se
+        propaga, para que el llamador no dé el lote por ingestado.
+        """
+        raw_logs = list(raw_logs)
+        if scada_system is None:
+            scada_system = self.log_parser.detect_system(raw_logs)
+            if scada_system is None:
+                self.logger.warning(f"Could not detect SCADA log format of {len(raw_logs)} lines")
+                return 0
+        entries = [entry for entry in self.parse_many(raw_logs, scada_system) if entry]
+        failed = len(raw_logs) - len(entries)
+        if failed:
+            # Cuenta también los fallos de los procesos del pool, cuyo parser no es éste
+            self.log_statistics['parse_errors'] += failed
+            self.logger.warning(f"Failed to parse {failed} of {len(raw_logs)} logs from {scada_system.value}")
+        if not entries:
+            return 0
+
+        # Agregar información de conexión
+        if source_connection:
+            for log_entry in entries:
                 log_entry.details['source_connection'] = source_connection
 
-            # Procesar y almacenar
-            self.process_log_entry(log_entry)
+        # Procesar y almacenar (cola, ficheros y syslog llegan desde hilos distintos)
+        with self._process_lock:
+            self.process_log_entries(entries)
 
             # Actualizar estadísticas
-            self.log_statistics[scada_system.value] += 1
-            self.log_statistics['total'] += 1
+            self.log_statistics[scada_system.value] += len(entries)
+            self.log_statistics['total'] += len(entries)
+        return len(entries)
+
+    def parse_many(self, raw_logs: List[str], scada_system: SCADASystem) -> List[Optional[SCADALogEntry]]:
+        """Parsear un lote, repartido entre procesos para formatos pesados y lotes grandes"""
+        if (scada_system not in self.PARALLEL_SYSTEMS or self.parse_workers < 2
+                or len(raw_logs) < self.parallel_threshold):
+            parse = self.log_parser.parse_log_entry
+            return [parse(raw_log, scada_system) for raw_log in raw_logs]
+
+        if self._parse_pool is None:
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=self.parse_workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        size = math.ceil(len(raw_logs) / (self.parse_workers * 4))
+        chunks = [(scada_system.value, raw_logs[i:i + size]) for i in range(0, len(raw_logs), size)]
+        return [entry for part in self._parse_pool.map(_parse_chunk, chunks) for entry in part]
+
+    def submit(self, raw_log: str, scada_system: SCADASystem, source_connection: str = None):
+        """Encolar una línea para ingesta por lotes (bloquea si la cola está llena)"""
+        self.start_ingestion()
+        self.ingest_queue.put((raw_log, scada_system, source_connection))
+
+    def start_ingestion(self):
+        """Arrancar el hilo que agrupa la cola en lotes (idempotente)"""
+        with self._ingest_lock:
+            if self._ingest_thread is not None:
+                return
+            self._ingest_thread = threading.Thread(target=self._ingest_loop, name="scada-ingest", daemon=True)
+            self._ingest_thread.start()
+
+    def _ingest_loop(self):
+        while True:
+            item = self.ingest_queue.get()
+            if item is None:
+                self.ingest_queue.task_done()
+                break
 
-        except Exception as e:
-            self.logger.error(f"Error ingesting log from {scada_system.value}: {e}")
+            # Vaciar lo disponible hasta batch_size y agrupar por origen
+            items = [item]
+            stopping = False
+            while len(items) < self.batch_size:
+                try:
+                    item = self.ingest_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                items.append(item)
+
+            groups = defaultdict(list)
+            for raw_log, scada_system, source_connection in items:
+                groups[(scada_system, source_connection)].append(raw_log)
+            for (scada_system, source_connection), raw_logs in groups.items():
+                try:
+                    self.ingest_many(raw_logs, scada_system, source_connection)
+                except Exception as e:
+                    # El hilo de la cola no puede morir: se cuenta y se sigue con el resto
+                    self.logger.error(f"Error ingesting {len(raw_logs)} queued logs: {e}")
+                    self.log_statistics['ingest_errors'] += len(raw_logs)
+
+            for _ in range(len(items) + stopping):
+                self.ingest_queue.task_done()
+            if stopping:
+                break
+
+    def follow_file(self, path: Union[str, Path], scada_system: Optional[SCADASystem] = None,
+                    source_connection: Optional[str] = None, **tailer_options) -> FileTailer:
+        """Seguir un fichero de log (rotación y reanudación por checkpoint)
+
+        Sin ``scada_system``, el formato se detecta con el primer lote del fichero.
+        """
+        with self._ingest_lock:
+            if self.file_follower is None:
+                self.checkpoints = CheckpointStore(self.db_path)
+                self.file_follower = FileFollower(self.checkpoints, self._ingest_tailed, **tailer_options)
+                self.file_follower.start()
+        tailer = self.file_follower.follow(path, scada_system, source_connection)
+        self.logger.info(f"📄 Following {tailer.path} ({self.file_follower.get_stats()['mode']})")
+        return tailer
+
+    def _ingest_tailed(self, raw_logs: List[str], tailer: FileTailer) -> bool:
+        """Ingestar un lote de un fichero; True (avanzar el checkpoint) sólo si ya está en la base de datos"""
+        if tailer.scada_system is None:
+            tailer.scada_system = self.log_parser.detect_system(raw_logs)
+            if tailer.scada_system is None:
+                self.logger.warning(f"Could not detect SCADA log format of {tailer.path}; will retry")
+                return False
+        self.ingest_many(raw_logs, tailer.scada_system, tailer.source)
+        return self.log_writer.wait_committed() and self.alarm_writer.wait_committed()
+
+    async def start_syslog_listener(self, host: str = '0.0.0.0', udp_port: Optional[int] = 5514,
+                                    tcp_port: Optional[int] = 5514, scada_system: Optional[SCADASystem] = None,
+                                    **options) -> SyslogListener:
+        """Arrancar un receptor syslog UDP/TCP que ingesta por lotes (origen ``syslog:<host>``)"""
+        listener = SyslogListener(lambda raw_logs, source: self.ingest_many(raw_logs, scada_system, source),
+                                  host, udp_port, tcp_port, batch_size=self.batch_size, **options)
+        await listener.start()
+        self.syslog_listeners.append(listener)
+        self.logger.info(f"📡 Syslog listener on udp={listener.udp_address} tcp={listener.tcp_address}")
+        return listener
+
+    def flush(self):
+        """Esperar a que la cola de ingesta se haya procesado"""
+        if self._ingest_thread is not None:
+            self.ingest_queue.join()
+
+    def close(self):
+        """Procesar lo encolado, volcar a disco y liberar el pool de parseo
+
+        Los receptores syslog son asyncio: se paran con ``await listener.stop()``.
+        """
+        if self.file_follower is not None:
+            self.file_follower.stop()
+            self.file_follower = None
+            self.checkpoints.close()
+        with self._ingest_lock:
+            thread, self._ingest_thread = self._ingest_thread, None
+        if thread is not None:
+            self.ingest_queue.put(None)
+            thread.join()
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown()
+            self._parse_pool = None
+        self.log_writer.close()
+        self.alarm_writer.close()
+
+    def get_ingest_stats(self) -> Dict[str, Any]:
+        return {
+            'queued': self.ingest_queue.qsize(),
+            'logs': self.log_writer.get_stats(),
+            'alarms': self.alarm_writer.get_stats(),
+            'alert_rules': self.rule_matcher.get_stats(),
+            'files': self.file_follower.get_stats() if self.file_follower else None,
+            'syslog': [listener.get_stats() for listener in self.syslog_listeners]
+        }
 
     def process_log_entry(self, log_entry: SCADALogEntry):
         """Procesar entrada de log"""
-        # Agregar a buffer
-        self.log_buffer.append(log_entry)
+        self.process_log_entries([log_entry])
 
-        # Análisis en tiempo real
-        self.analyze_log_entry(log_entry)
+    def process_log_entries(self, log_entries: List[SCADALogEntry]):
+        """Procesar un lote de entradas y encolar sus filas en un único append por tabla"""
+        alarms = []
+        triggered: Dict[str, List] = {}
+        for log_entry in log_entries:
+            # Agregar a buffer
+            self.log_buffer.append(log_entry)
 
-        # Verificar reglas de alerta
-        self.check_alert_rules(log_entry)
+            # Análisis en tiempo real
+            self.analyze_log_entry(log_entry)
 
-        # Si es alarma, procesamiento especial
-        if log_entry.alarm_type:
-            self.process_alarm(log_entry)
+            # Verificar reglas de alerta
+            self.check_alert_rules(log_entry, triggered)
 
-        # Guardar en base de datos
-        asyncio.create_task(self.save_log_entry(log_entry))
+            # Si es alarma, procesamiento especial
+            if log_entry.alarm_type:
+                alarm = self.process_alarm(log_entry)
+                if alarm:
+                    alarms.append(alarm)
+
+        # Una línea de log por regla y lote en vez de una por entrada
+        for rule_name, (count, message) in triggered.items():
+            repeated = f" (+{count - 1} more in batch)" if count > 1 else ""
+            self.logger.warning(f"🚨 ALERT TRIGGERED: {rule_name} - {message}{repeated}")
+
+        # Guardar en base de datos (executemany en el hilo escritor)
+        self.log_writer.put([self.log_row(log_entry) for log_entry in log_entries])
+        self.alarm_writer.put([self.alarm_row(alarm) for alarm in alarms])
 
     def analyze_log_entry(self, log_entry: SCADALogEntry):
         """Análisis en tiempo real de entrada de log"""
@@ -768,51 +1022,35 @@ class IndustrialSCADALogger:
         # Análisis de patrones de seguridad
         self.security_pattern_analysis(log_entry)
 
-    def check_alert_rules(self, log_entry: SCADALogEntry):
-        """Verificar reglas de alerta"""
-        for rule_name, rule_config in self.alert_rules.items():
-            if self.evaluate_alert_condition(log_entry, rule_config):
-                self.trigger_alert(rule_name, log_entry, rule_config)
+    def check_alert_rules(self, log_entry: SCADALogEntry, triggered: Optional[Dict[str, List]] = None):
+        """Verificar reglas de alerta (sólo las candidatas por categoría, tipo de alarma y severidad)"""
+        if self._rules_version != self.alert_rules.version:
+            self.compile_alert_rules()
+        for rule in self.rule_matcher.match(log_entry):
+            self.trigger_alert(rule.name, log_entry, rule.config, triggered)
 
     def evaluate_alert_condition(self, log_entry: SCADALogEntry, rule_config: Dict) -> bool:
-        """Evaluar condición de alerta"""
-        conditions = rule_config.get('conditions', {})
-
-        # Verificar patrones de tag
-        tag_patterns = conditions.get('tag_patterns', [])
-        if tag_patterns and log_entry.tag_name:
-            tag_match = any(
-                self.match_pattern(log_entry.tag_name, pattern)
-                for pattern in tag_patterns
-            )
-            if not tag_match:
-                return False
-
-        # Verificar tipos de alarma
-        alarm_types = conditions.get('alarm_types', [])
-        if alarm_types and log_entry.alarm_type not in alarm_types:
-            return False
-
-        # Verificar severidad
-        severities = conditions.get('severity', [])
-        if severities and log_entry.severity not in severities:
-            return False
-
-        # Verificar categorías
-        categories = conditions.get('categories', [])
-        if categories and log_entry.category not in categories:
-            return False
-
-        return True
+        """Evaluar una regla suelta, sin dispatch ni estado compartido con ``rule_matcher``"""
+        return CompiledRule('adhoc', rule_config).matches(log_entry)
 
     def match_pattern(self, text: str, pattern: str) -> bool:
         """Verificar si texto coincide con patrón (soporte wildcards)"""
-        import fnmatch
         return fnmatch.fnmatch(text.upper(), pattern.upper())
 
-    def trigger_alert(self, rule_name: str, log_entry: SCADALogEntry, rule_config: Dict):
-        """Disparar alerta"""
+    def trigger_alert(self, rule_name: str, log_entry: SCADALogEntry, rule_config: Dict,
+                      triggered: Optional[Dict[str, List]] = None):
+        """Disparar alerta (con ``triggered`` el aviso se acumula por regla para el lote)"""
         actions = rule_config.get('actions', {})
+        if triggered is None:
+            self.logger.warning(f"🚨 ALERT TRIGGERED: {rule_name} - {log_entry.message}")
+        elif rule_name in triggered:
+            triggered[rule_name][0] += 1
+        else:
+            triggered[rule_name] = [1, log_entry.message]
+
+        # El payload (copia completa de la entrada) sólo se construye si alguna acción lo consume
+        if not any(actions.get(action) for action in self.PAYLOAD_ACTIONS):
+            return
 
         alert_data = {
             'alert_id': f"alert_{int(datetime.now().timestamp())}",
@@ -836,12 +1074,10 @@ class IndustrialSCADALogger:
             self.create_security_incident(alert_data)
             alert_data['actions_taken'].append('incident_creation')
 
-        self.logger.warning(f"🚨 ALERT TRIGGERED: {rule_name} - {log_entry.message}")
-
-    def process_alarm(self, log_entry: SCADALogEntry):
-        """Procesamiento específico de alarmas"""
+    def process_alarm(self, log_entry: SCADALogEntry) -> Optional[ProcessAlarm]:
+        """Procesamiento específico de alarmas; devuelve la alarma a guardar"""
         if not log_entry.tag_name or not log_entry.alarm_type:
-            return
+            return None
 
         alarm_key = f"{log_entry.tag_name}_{log_entry.alarm_type.value}"
 
@@ -875,8 +1111,7 @@ class IndustrialSCADALogger:
                     ).total_seconds()
                     del self.active_alarms[alarm_key]
 
-        # Guardar alarma
-        asyncio.create_task(self.save_alarm(alarm))
+        return alarm
 
     def update_tag_statistics(self, tag_name: str, value: float):
         """Actualizar estadísticas de tag para detección de anomalías"""
@@ -906,62 +1141,39 @@ class IndustrialSCADALogger:
                 self.logger.warning(f"🔍 Security pattern detected: {pattern} in {log_entry.message}")
                 break
 
-    async def save_log_entry(self, log_entry: SCADALogEntry):
-        """Guardar entrada de log en base de datos"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    @staticmethod
+    def log_row(log_entry: SCADALogEntry) -> Tuple:
+        """Fila de ``scada_logs`` en el orden de ``LOG_COLUMNS``"""
+        return (
+            log_entry.log_id, _db_time(log_entry.timestamp), log_entry.scada_system.value,
+            log_entry.source_node, log_entry.severity.value, log_entry.category.value,
+            log_entry.message, log_entry.process_area, log_entry.control_module,
+            log_entry.tag_name, log_entry.tag_value, log_entry.tag_quality,
+            log_entry.setpoint,
+            log_entry.alarm_type.value if log_entry.alarm_type else None,
+            log_entry.alarm_priority, log_entry.alarm_state, log_entry.operator_id,
+            log_entry.security_classification, log_entry.correlation_id,
+            json.dumps(log_entry.details, default=str)
+        )
 
-        try:
-            cursor.execute('''
-                INSERT INTO scada_logs
-                (log_id, timestamp, scada_system, source_node, severity, category,
-                 message, process_area, control_module, tag_name, tag_value, tag_quality,
-                 setpoint, alarm_type, alarm_priority, alarm_state, operator_id,
-                 security_classification, correlation_id, details)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                log_entry.log_id, log_entry.timestamp, log_entry.scada_system.value,
-                log_entry.source_node, log_entry.severity.value, log_entry.category.value,
-                log_entry.message, log_entry.process_area, log_entry.control_module,
-                log_entry.tag_name, log_entry.tag_value, log_entry.tag_quality,
-                log_entry.setpoint,
-                log_entry.alarm_type.value if log_entry.alarm_type else None,
-                log_entry.alarm_priority, log_entry.alarm_state, log_entry.operator_id,
-                log_entry.security_classification, log_entry.correlation_id,
-                json.dumps(log_entry.details, default=str)
-            ))
-
-            conn.commit()
-        except Exception as e:
-            self.logger.error(f"Error saving log entry: {e}")
-        finally:
-            conn.close()
+    @staticmethod
+    def alarm_row(alarm: ProcessAlarm) -> Tuple:
+        """Fila de ``process_alarms`` para ALARM_INSERT"""
+        return (
+            alarm.alarm_id, _db_time(alarm.timestamp), alarm.tag_name, alarm.alarm_type.value,
+            alarm.priority, alarm.current_value, alarm.alarm_limit,
+            alarm.process_area, alarm.control_module, alarm.alarm_state,
+            alarm.operator_comment, _db_time(alarm.ack_timestamp), _db_time(alarm.clear_timestamp),
+            alarm.duration_seconds
+        )
 
-    async def save_alarm(self, alarm: ProcessAlarm):
-        """Guardar alarma en base de datos"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    async def save_log_entry(self, log_entry: SCADALogEntry):
+        """Encolar entrada de log para la base de datos"""
+        await self.log_writer.write([self.log_row(log_entry)])
 
-        try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO process_alarms
-                (alarm_id, timestamp, tag_name, alarm_type, priority, current_value,
-                 alarm_limit, process_area, control_module, alarm_state, operator_comment,
-                 ack_timestamp, clear_timestamp, duration_seconds)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                alarm.alarm_id, alarm.timestamp, alarm.tag_name, alarm.alarm_type.value,
-                alarm.priority, alarm.current_value, alarm.alarm_limit,
-                alarm.process_area, alarm.control_module, alarm.alarm_state,
-                alarm.operator_comment, alarm.ack_timestamp, alarm.clear_timestamp,
-                alarm.duration_seconds
-            ))
-
-            conn.commit()
-        except Exception as e:
-            self.logger.error(f"Error saving alarm: {e}")
-        finally:
-            conn.close()
+    async def save_alarm(self, alarm: ProcessAlarm):
+        """Encolar alarma para la base de datos"""
+        await self.alarm_writer.write([self.alarm_row(alarm)])
 
     def send_immediate_notification(self, alert_data: Dict):
         """Enviar notificación inmediata"""
@@ -1021,6 +1233,19 @@ class IndustrialSCADALogger:
             log_text, scada_system = random.choice(sample_logs)
             self.ingest_raw_log(log_text, scada_system, f"connection_{scada_system.value}")
 
+    def search_logs(self, text: Optional[str] = None, since: Optional[datetime] = None,
+                    until: Optional[datetime] = None, limit: int = 100, cursor: Optional[str] = None,
+                    **filters) -> LogPage:
+        """Buscar en ``scada_logs`` (FTS5 + rango temporal), paginando con ``cursor``
+
+        Sólo ve las filas que ``log_writer`` ya ha confirmado en disco.
+        """
+        return self.log_store.query(text=text, since=since, until=until, limit=limit, cursor=cursor, **filters)
+
+    def purge_logs(self, retention_days: int) -> int:
+        """Eliminar las particiones de logs anteriores a ``retention_days``"""
+        return self.log_store.drop_partitions(datetime.now() - timedelta(days=retention_days))
+
     def get_dashboard_data(self) -> Dict:
         """Obtener datos para dashboard de logs SCADA"""
         current_time = datetime.now()
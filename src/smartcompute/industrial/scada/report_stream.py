@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+SmartCompute Industrial - Exportación cifrada de reportes en streaming
+======================================================================
+
+Camino de exportación de ``IndustrialReportsExporter`` con memoria
+constante: los generadores de filas alimentan a los escritores de formato
+(``iter_csv``, ``iter_json``), cuya salida se cifra en bloques autenticados
+de tamaño fijo y se escribe directamente a disco.
+
+Formato del fichero (enteros big-endian)::
+
+    cabecera  tamaño u32 | metadata JSON          (igual que la versión 1)
+    registro* final u8 | longitud u32 | AES-256-GCM(bloque)
+
+La clave de operador pasa por PBKDF2 (costoso) y el resultado se guarda en
+``OperatorKeyCache`` durante un TTL corto; cada fichero usa además su propia
+clave derivada con HKDF y una sal aleatoria, así que el nonce puede ser el
+número de bloque. Cada bloque se autentica con la metadata, el número de
+secuencia y la marca de bloque final como datos asociados: reordenar,
+truncar o añadir bloques se detecta al descifrar. Los ficheros de la
+versión 1 (un único blob AES-GCM) se siguen pudiendo leer.
+
+Las longitudes del fichero se validan antes de leer: la metadata no pasa
+de ``MAX_METADATA_SIZE`` y cada registro de ``chunk_size + TAG_SIZE``, así
+que un prefijo manipulado no provoca una lectura de hasta 4 GiB.
+"""
+
+import csv
+import hashlib
+import hmac
+import io
+import json
+import os
+import secrets
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+FORMAT_VERSION = 2
+ALGORITHM = 'AES-256-GCM-CHUNKED'
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+PBKDF2_ITERATIONS = 100_000
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+MAX_METADATA_SIZE = 64 * 1024
+TAG_SIZE = 16  # Etiqueta AES-GCM
+
+_METADATA_SIZE = struct.Struct('>I')
+_RECORD = struct.Struct('>BI')
+_AAD = struct.Struct('>BQ')
+_NONCE = struct.Struct('>4xQ')
+
+Chunk = Union[bytes, str]
+
+
+class ReportStreamError(ValueError):
+    """Fichero de reporte mal formado, manipulado, truncado o con clave incorrecta"""
+
+
+def _pbkdf2(operator_key: str, salt: bytes, iterations: int) -> bytes:
+    return PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt,
+                      iterations=iterations).derive(operator_key.encode('utf-8'))
+
+
+def _file_key(master_key: bytes, file_salt: bytes) -> bytes:
+    """Clave AES-256 propia de un fichero a partir de la clave PBKDF2 del operador"""
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=file_salt,
+                info=b'smartcompute-report-stream-v2').derive(master_key)
+
+
+class OperatorKeyCache:
+    """Claves PBKDF2 de operador ya derivadas, con TTL corto
+
+    Sólo se guardan la sal y la clave derivada, indexadas por un HMAC de la
+    clave de operador con un secreto del proceso (nunca la clave en claro).
+    Dentro del TTL, exportaciones sucesivas del mismo operador reutilizan
+    sal y clave; ``derive(salt=...)`` para descifrar sólo acierta si la sal
+    coincide con la cacheada.
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0, max_entries: int = 32,
+                 iterations: int = PBKDF2_ITERATIONS):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.iterations = iterations
+        self._pepper = secrets.token_bytes(32)
+        self._entries: Dict[bytes, Tuple[bytes, bytes, float]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def _digest(self, operator_key: str) -> bytes:
+        return hmac.new(self._pepper, operator_key.encode('utf-8'), hashlib.sha256).digest()
+
+    def derive(self, operator_key: str, salt: Optional[bytes] = None,
+               iterations: Optional[int] = None) -> Tuple[bytes, bytes]:
+        """``(sal, clave)`` para ``operator_key``; sal nueva si no hay una cacheada"""
+        iterations = iterations or self.iterations
+        digest = self._digest(operator_key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[2] > now and iterations == self.iterations \
+                    and (salt is None or entry[0] == salt):
+                self.stats['hits'] += 1
+                return entry[0], entry[1]
+            self.stats['misses'] += 1
+
+        new_salt = salt if salt is not None else secrets.token_bytes(16)
+        key = _pbkdf2(operator_key, new_salt, iterations)
+        if iterations == self.iterations:
+            with self._lock:
+                self._evict(now)
+                self._entries[digest] = (new_salt, key, now + self.ttl_seconds)
+        return new_salt, key
+
+    def _evict(self, now: float):
+        for digest in [d for d, (_, _, expires) in self._entries.items() if expires <= now]:
+            del self._entries[digest]
+        while len(self._entries) >= self.max_entries:
+            del self._entries[min(self._entries, key=lambda d: self._entries[d][2])]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+@dataclass
+class ReportStreamStats:
+    """Resultado de escribir un reporte cifrado"""
+    bytes_in: int = 0
+    bytes_out: int = 0
+    chunks: int = 0
+    checksum: str = ''            # SHA-256 del contenido en claro
+    encrypted_checksum: str = ''  # SHA-256 de los registros cifrados
+    elapsed_seconds: float = 0.0
+
+
+class EncryptedReportWriter:
+    """Escritor tipo fichero que cifra por bloques y escribe a disco sobre la marcha
+
+    Se escribe en ``<path>.partial`` y se renombra al cerrar; si el bloque
+    ``with`` termina con excepción, el parcial se borra.
+    """
+
+    def __init__(self, path: Union[str, Path], master_key: bytes, kdf_salt: bytes,
+                 metadata: Optional[Dict[str, Any]] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 iterations: int = PBKDF2_ITERATIONS):
+        if not 0 < chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError(f"chunk_size must be between 1 and {MAX_CHUNK_SIZE}")
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        file_salt = secrets.token_bytes(16)
+        self.metadata = dict(metadata or {}, encrypted=True, format_version=FORMAT_VERSION,
+                             algorithm=ALGORITHM, key_derivation='PBKDF2-SHA256 + HKDF-SHA256',
+                             iterations=iterations, salt=kdf_salt.hex(), file_salt=file_salt.hex(),
+                             chunk_size=chunk_size)
+        self._header = json.dumps(self.metadata).encode('utf-8')
+        if len(self._header) > MAX_METADATA_SIZE:
+            raise ValueError(f"report metadata exceeds {MAX_METADATA_SIZE} bytes")
+        self._cipher = AESGCM(_file_key(master_key, file_salt))
+        self._buffer = bytearray()
+        self._seq = 0
+        self._plain_hash = hashlib.sha256()
+        self._sealed_hash = hashlib.sha256()
+        self._started = time.perf_counter()
+        self.stats = ReportStreamStats()
+
+        self._tmp_path = self.path.with_name(self.path.name + '.partial')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._out = open(self._tmp_path, 'wb')
+        self._out.write(_METADATA_SIZE.pack(len(self._header)))
+        self._out.write(self._header)
+        self.stats.bytes_out += _METADATA_SIZE.size + len(self._header)
+
+    def write(self, data: Chunk):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._plain_hash.update(data)
+        self.stats.bytes_in += len(data)
+        self._buffer += data
+        while len(self._buffer) >= self.chunk_size:
+            self._seal(bytes(self._buffer[:self.chunk_size]), final=False)
+            del self._buffer[:self.chunk_size]
+
+    def writelines(self, chunks: Iterable[Chunk]):
+        for chunk in chunks:
+            self.write(chunk)
+
+    def _seal(self, plain: bytes, final: bool):
+        flag = 1 if final else 0
+        sealed = self._cipher.encrypt(_NONCE.pack(self._seq), plain, self._header + _AAD.pack(flag, self._seq))
+        record = _RECORD.pack(flag, len(sealed)) + sealed
+        self._out.write(record)
+        self._sealed_hash.update(record)
+        self.stats.bytes_out += len(record)
+        self.stats.chunks += 1
+        self._seq += 1
+
+    def close(self) -> ReportStreamStats:
+        """Sellar el último bloque (marcado como final) y publicar el fichero"""
+        if self._out.closed:
+            return self.stats
+        self._seal(bytes(self._buffer), final=True)
+        self._buffer.clear()
+        self._out.close()
+        os.replace(self._tmp_path, self.path)
+        self.stats.checksum = self._plain_hash.hexdigest()
+        self.stats.encrypted_checksum = self._sealed_hash.hexdigest()
+        self.stats.elapsed_seconds = time.perf_counter() - self._started
+        return self.stats
+
+    def abort(self):
+        self._out.close()
+        if self._tmp_path.exists():
+            self._tmp_path.unlink()
+
+    def __enter__(self) -> 'EncryptedReportWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_encrypted_report(path: Union[str, Path], chunks: Iterable[Chunk], operator_key: str,
+                           key_cache: Optional[OperatorKeyCache] = None,
+                           metadata: Optional[Dict[str, Any]] = None,
+                           chunk_size: int = DEFAULT_CHUNK_SIZE) -> ReportStreamStats:
+    """Consumir ``chunks`` (texto o bytes) y escribirlos cifrados en ``path``"""
+    key_cache = key_cache or OperatorKeyCache(ttl_seconds=0)
+    salt, master_key = key_cache.derive(operator_key)
+    with EncryptedReportWriter(path, master_key, salt, metadata, chunk_size, key_cache.iterations) as writer:
+        writer.writelines(chunks)
+    return writer.stats
+
+
+def read_report_metadata(path: Union[str, Path]) -> Dict[str, Any]:
+    with open(path, 'rb') as f:
+        return _read_header(f)[1]
+
+
+def _read_header(f) -> Tuple[bytes, Dict[str, Any]]:
+    prefix = f.read(_METADATA_SIZE.size)
+    if len(prefix) != _METADATA_SIZE.size:
+        raise ReportStreamError("report header truncated")
+    (size,) = _METADATA_SIZE.unpack(prefix)
+    if size > MAX_METADATA_SIZE:
+        raise ReportStreamError(f"report metadata size {size} exceeds {MAX_METADATA_SIZE}")
+    header = f.read(size)
+    if len(header) != size:
+        raise ReportStreamError("report metadata truncated")
+    try:
+        return header, json.loads(header)
+    except ValueError:
+        raise ReportStreamError("report metadata is not JSON")
+
+
+def read_encrypted_report(path: Union[str, Path], operator_key: str,
+                          key_cache: Optional[OperatorKeyCache] = None) -> Iterator[bytes]:
+    """Descifrar un reporte bloque a bloque (versión 2) o de una vez (versión 1)"""
+    key_cache = key_cache or OperatorKeyCache(ttl_seconds=0)
+    with open(path, 'rb') as f:
+        header, metadata = _read_header(f)
+        salt = bytes.fromhex(metadata['salt'])
+        _, master_key = key_cache.derive(operator_key, salt, metadata.get('iterations', PBKDF2_ITERATIONS))
+
+        if metadata.get('format_version', 1) == 1:
+            # [sal 16B][nonce 12B][AES-GCM(contenido)]
+            package = f.read()
+            try:
+                yield AESGCM(master_key).decrypt(package[16:28], package[28:], None)
+            except InvalidTag:
+                raise ReportStreamError("report failed authentication (wrong key?)")
+            return
+
+        chunk_size = metadata.get('chunk_size')
+        if not isinstance(chunk_size, int) or not 0 < chunk_size <= MAX_CHUNK_SIZE:
+            raise ReportStreamError(f"invalid chunk size {chunk_size!r} in report metadata")
+        max_length = chunk_size + TAG_SIZE
+        cipher = AESGCM(_file_key(master_key, bytes.fromhex(metadata['file_salt'])))
+        seq = 0
+        while True:
+            prefix = f.read(_RECORD.size)
+            if len(prefix) != _RECORD.size:
+                raise ReportStreamError("report truncated before final chunk")
+            flag, length = _RECORD.unpack(prefix)
+            if not TAG_SIZE <= length <= max_length:
+                raise ReportStreamError(f"chunk {seq} has invalid length {length}")
+            sealed = f.read(length)
+            if len(sealed) != length:
+                raise ReportStreamError("report truncated inside chunk")
+            try:
+                plain = cipher.decrypt(_NONCE.pack(seq), sealed, header + _AAD.pack(flag, seq))
+            except InvalidTag:
+                raise ReportStreamError(f"chunk {seq} failed authentication")
+            seq += 1
+            yield plain
+            if flag:
+                if f.read(1):
+                    raise ReportStreamError("unexpected data after final chunk")
+                return
+
+
+# ── Escritores de formato en streaming ─────────────────────────
+
+def _is_stream(value: Any) -> bool:
+    """Secuencias perezosas (generadores, iteradores) que se serializan por partes"""
+    return hasattr(value, '__next__')
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def iter_json(data: Dict[str, Any], indent: int = 2) -> Iterator[str]:
+    """``json.dumps(data, indent=2, ensure_ascii=False)`` por partes
+
+    Los valores de primer nivel que sean iteradores se escriben elemento a
+    elemento, sin materializarlos; el resultado es idéntico al de
+    ``json.dumps`` sobre la lista equivalente.
+    """
+    pad, item_pad = ' ' * indent, ' ' * indent * 2
+
+    def dumps(value: Any, prefix: str) -> str:
+        return json.dumps(value, indent=indent, ensure_ascii=False,
+                          default=_json_default).replace('\n', '\n' + prefix)
+
+    if not data:
+        yield '{}'
+        return
+    yield '{'
+    for position, (key, value) in enumerate(data.items()):
+        yield (',\n' if position else '\n') + pad + json.dumps(key, ensure_ascii=False) + ': '
+        if not _is_stream(value):
+            yield dumps(value, pad)
+            continue
+        empty = True
+        for item in value:
+            yield ('[\n' if empty else ',\n') + item_pad + dumps(item, item_pad)
+            empty = False
+        yield '[]' if empty else '\n' + pad + ']'
+    yield '\n}'
+
+
+def iter_csv(fieldnames: List[str], rows: Iterable[Any], header: bool = True,
+             rows_per_piece: int = 1000, **writer_options) -> Iterator[str]:
+    """Filas CSV (dicts, o secuencias si ``fieldnames`` está vacío) en piezas de ``rows_per_piece``"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, **writer_options) if fieldnames \
+        else csv.writer(buffer, **writer_options)
+    if header and fieldnames:
+        writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= rows_per_piece:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
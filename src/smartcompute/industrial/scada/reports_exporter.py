@@ -21,7 +21,8 @@ import zipfile
 import tempfile
 import io
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any, Union
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple, Any, Union
 from dataclasses import dataclass, field, asdict
 from enum import Enum, auto
 from pathlib import Path
@@ -42,6 +43,15 @@ from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 # import seaborn as sns
 # from jinja2 import Template
 
+from smartcompute.industrial.scada.log_store import SCADALogStore
+from smartcompute.industrial.scada.report_stream import (
+    DEFAULT_CHUNK_SIZE,
+    OperatorKeyCache,
+    iter_csv,
+    iter_json,
+    write_encrypted_report,
+)
+
 # Configuración de logging seguro
 logging.basicConfig(
     level=logging.INFO,
@@ -140,8 +150,20 @@ class ExportRequest:
 class IndustrialReportsExporter:
     """Sistema de exportación de reportes industriales con autorización granular"""
 
-    def __init__(self, db_path: str = "/home/gatux/smartcompute/data/reports.db"):
+    # Criterios de generate_scada_logs_report que se pasan tal cual a SCADALogStore
+    SCADA_LOG_FILTERS = ('since', 'until', 'text', 'scada_system', 'source_node', 'tag_name', 'severity')
+    SCADA_LOG_REPORT_LIMIT = 1000
+
+    def __init__(self, db_path: str = "/home/gatux/smartcompute/data/reports.db",
+                 scada_db_path: Optional[str] = None,
+                 reports_dir: str = "/home/gatux/smartcompute/reports",
+                 key_cache_ttl: float = 300.0, report_chunk_size: int = DEFAULT_CHUNK_SIZE):
         self.db_path = db_path
+        self.reports_dir = Path(reports_dir)
+        self.report_chunk_size = report_chunk_size
+        # Claves PBKDF2 de operador derivadas recientemente (TTL corto)
+        self.key_cache = OperatorKeyCache(ttl_seconds=key_cache_ttl)
+        self.scada_log_store = SCADALogStore(scada_db_path) if scada_db_path else None
         self.encryption_key = self._generate_encryption_key()
         self.aes_gcm = AESGCM(self.encryption_key)
         self.pending_approvals: Dict[str, ExportRequest] = {}
@@ -484,69 +506,74 @@ class IndustrialReportsExporter:
             }
         }
 
-    async def generate_scada_logs_report(self, filters: Dict[str, Any]) -> Dict[str, Any]:
-        """Genera reporte de análisis de logs SCADA"""
-        # Datos simulados de logs SCADA
-        log_entries = [
-            {
-                'timestamp': '2024-09-19 08:15:23',
-                'system': 'Wonderware InTouch',
-                'level': 'ALARM',
-                'message': 'Temperatura del reactor R-101 excede límite superior (85°C)',
-                'tag': 'AI_R101_TEMP',
-                'value': '87.3',
-                'operator': 'OP001'
-            },
-            {
-                'timestamp': '2024-09-19 08:20:15',
-                'system': 'DeltaV DCS',
-                'level': 'WARNING',
-                'message': 'Presión en línea de vapor fluctuando',
-                'tag': 'PI_STEAM_001',
-                'value': '8.2',
-                'operator': 'OP002'
-            },
-            {
-                'timestamp': '2024-09-19 09:05:42',
-                'system': 'Experion PKS',
-                'level': 'INFO',
-                'message': 'Batch B-2024-001 completado exitosamente',
-                'tag': 'BATCH_STATUS',
-                'value': 'COMPLETED',
-                'operator': 'OP001'
-            }
-        ]
-
-        # Estadísticas de logs
-        level_stats = {}
-        system_stats = {}
-
-        for entry in log_entries:
-            level = entry['level']
-            system = entry['system']
-
-            level_stats[level] = level_stats.get(level, 0) + 1
-            system_stats[system] = system_stats.get(system, 0) + 1
+    async def generate_scada_logs_report(self, filters: Dict[str, Any], stream: bool = False) -> Dict[str, Any]:
+        """Genera reporte de análisis de logs SCADA desde ``SCADALogStore``
+
+        Filtros: ``since``/``until`` (o ``days`` hacia atrás, 1 por defecto),
+        ``text`` (búsqueda FTS5 en el mensaje), ``scada_system``,
+        ``source_node``, ``tag_name``, ``severity`` y ``limit`` (máximo de
+        entradas detalladas; las distribuciones cuentan todo el rango).
+
+        Con ``stream=True`` ``log_entries`` es un generador que pagina el
+        almacén a medida que se consume y ``limit`` no tiene valor por
+        defecto: es el camino de ``export_report``, con memoria constante.
+        """
+        criteria = {key: filters[key] for key in self.SCADA_LOG_FILTERS if filters.get(key) is not None}
+        if 'since' not in criteria:
+            criteria['since'] = datetime.now() - timedelta(days=filters.get('days', 1))
+        limit = filters.get('limit', None if stream else self.SCADA_LOG_REPORT_LIMIT)
+
+        log_entries = []
+        level_stats: Dict[str, int] = {}
+        system_stats: Dict[str, int] = {}
+        alarm_count = 0
+        if self.scada_log_store is not None:
+            store = self.scada_log_store
+            if stream:
+                log_entries = map(self._scada_log_entry, islice(store.iter_query(**criteria), limit))
+            else:
+                page = await asyncio.to_thread(store.query, limit=limit, **criteria)
+                log_entries = [self._scada_log_entry(row) for row in page.rows]
+            severity_counts, system_stats, alarm_counts = await asyncio.gather(
+                asyncio.to_thread(store.count_by, 'severity', **criteria),
+                asyncio.to_thread(store.count_by, 'scada_system', **criteria),
+                asyncio.to_thread(store.count_by, 'alarm_type', **criteria),
+            )
+            level_stats = {severity.upper(): count for severity, count in severity_counts.items()}
+            alarm_count = sum(count for alarm_type, count in alarm_counts.items() if alarm_type is not None)
 
         return {
             'title': 'Reporte de Análisis de Logs SCADA',
             'generated_at': datetime.now().isoformat(),
-            'total_entries': len(log_entries),
+            'total_entries': sum(level_stats.values()),
             'level_distribution': level_stats,
             'system_distribution': system_stats,
             'log_entries': log_entries,
             'analysis': {
-                'alarm_count': level_stats.get('ALARM', 0),
+                'alarm_count': alarm_count,
                 'warning_count': level_stats.get('WARNING', 0),
                 'info_count': level_stats.get('INFO', 0),
                 'most_active_system': max(system_stats.items(), key=lambda x: x[1])[0] if system_stats else 'N/A'
             }
         }
 
-    def _generate_pdf_report(self, data: Dict[str, Any], report_type: ReportType) -> bytes:
-        """Genera reporte en formato PDF (versión simplificada)"""
+    @staticmethod
+    def _scada_log_entry(row: Dict[str, Any]) -> Dict[str, Any]:
+        """Fila de ``SCADALogStore`` con las columnas del reporte"""
+        return {
+            'timestamp': row['timestamp'],
+            'system': row['scada_system'],
+            'level': row['severity'].upper(),
+            'message': row['message'],
+            'tag': row['tag_name'] or '',
+            'value': '' if row['tag_value'] is None else row['tag_value'],
+            'operator': row['operator_id'] or ''
+        }
+
+    def _iter_pdf_report(self, data: Dict[str, Any], report_type: ReportType) -> Iterator[str]:
+        """Genera reporte en formato PDF (versión simplificada) por partes"""
         # Generar contenido de texto estructurado para PDF
-        content = f"""SmartCompute Industrial - Reporte Confidencial
+        yield f"""SmartCompute Industrial - Reporte Confidencial
 
 {data['title']}
 
@@ -556,7 +583,7 @@ Generado: {data['generated_at']}
 
         if report_type == ReportType.VULNERABILITY_ASSESSMENT:
             summary = data['summary']
-            content += f"""Resumen Ejecutivo:
+            yield f"""Resumen Ejecutivo:
 Total de Vulnerabilidades: {data['total_vulnerabilities']}
 Críticas: {summary['critical_count']}
 Altas: {summary['high_count']}
@@ -566,115 +593,96 @@ Vulnerabilidades Identificadas:
 
 """
             for vuln in data['vulnerabilities']:
-                content += f"""{vuln['id']}: {vuln['title']}
+                yield f"""{vuln['id']}: {vuln['title']}
 Severidad: {vuln['severity']} | CVSS: {vuln['cvss_score']}
 Ubicación: {vuln['location']}
 Descripción: {vuln['description']}
 
 """
 
-        return content.encode('utf-8')
-
-    def _encrypt_report_content(self, content: bytes, operator_key: str) -> Tuple[bytes, bytes]:
-        """Cifra el contenido del reporte con clave del operador"""
-        # Derivar clave de cifrado desde la clave del operador
-        salt = secrets.token_bytes(16)
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000
-        )
-        encryption_key = kdf.derive(operator_key.encode('utf-8'))
-
-        # Cifrar contenido con AES-GCM
-        nonce = secrets.token_bytes(12)
-        aesgcm = AESGCM(encryption_key)
-        encrypted_content = aesgcm.encrypt(nonce, content, None)
-
-        # Combinar salt, nonce y contenido cifrado
-        encrypted_package = salt + nonce + encrypted_content
-
-        return encrypted_package, salt
-
-    def _generate_excel_report(self, data: Dict[str, Any], report_type: ReportType) -> bytes:
-        """Genera reporte en formato Excel (versión simplificada como CSV estructurado)"""
-        output = io.StringIO()
-
+    def _iter_excel_report(self, data: Dict[str, Any], report_type: ReportType) -> Iterator[str]:
+        """Genera reporte en formato Excel (versión simplificada como CSV estructurado) por partes"""
         # Encabezado del reporte
-        output.write(f"SmartCompute Industrial - Reporte Excel\n")
-        output.write(f"{data['title']}\n")
-        output.write(f"Generado: {data['generated_at']}\n\n")
+        yield f"SmartCompute Industrial - Reporte Excel\n{data['title']}\nGenerado: {data['generated_at']}\n\n"
 
         if report_type == ReportType.VULNERABILITY_ASSESSMENT:
             # Hoja de estadísticas
-            output.write("=== RESUMEN ESTADISTICAS ===\n")
-            output.write("Severidad,Cantidad\n")
+            yield "=== RESUMEN ESTADISTICAS ===\nSeveridad,Cantidad\n"
             for severity, count in data['severity_distribution'].items():
-                output.write(f"{severity},{count}\n")
+                yield f"{severity},{count}\n"
 
-            output.write("\n=== VULNERABILIDADES DETALLADAS ===\n")
-            output.write("ID,Título,Severidad,CVSS,Ubicación,Asset Afectado,Estado,Descripción\n")
+            yield "\n=== VULNERABILIDADES DETALLADAS ===\n"
+            yield "ID,Título,Severidad,CVSS,Ubicación,Asset Afectado,Estado,Descripción\n"
 
             for vuln in data['vulnerabilities']:
                 # Escapar comas en la descripción
                 desc_clean = vuln['description'].replace(',', ';')
-                output.write(f"{vuln['id']},{vuln['title']},{vuln['severity']},{vuln['cvss_score']},{vuln['location']},{vuln['affected_asset']},{vuln['status']},{desc_clean}\n")
+                yield f"{vuln['id']},{vuln['title']},{vuln['severity']},{vuln['cvss_score']},{vuln['location']},{vuln['affected_asset']},{vuln['status']},{desc_clean}\n"
 
         elif report_type == ReportType.SCADA_LOGS_ANALYSIS:
             # Hoja de estadísticas de logs
-            output.write("=== ESTADISTICAS LOGS ===\n")
-            output.write("Nivel,Cantidad\n")
+            yield "=== ESTADISTICAS LOGS ===\nNivel,Cantidad\n"
             for level, count in data['level_distribution'].items():
-                output.write(f"{level},{count}\n")
+                yield f"{level},{count}\n"
 
-            output.write("\n=== LOGS SCADA DETALLADOS ===\n")
-            output.write("Timestamp,Sistema,Nivel,Mensaje,Tag,Valor,Operador\n")
+            yield "\n=== LOGS SCADA DETALLADOS ===\n"
+            yield "Timestamp,Sistema,Nivel,Mensaje,Tag,Valor,Operador\n"
 
             for entry in data['log_entries']:
                 # Escapar comas en el mensaje
                 msg_clean = entry['message'].replace(',', ';')
-                output.write(f"{entry['timestamp']},{entry['system']},{entry['level']},{msg_clean},{entry['tag']},{entry['value']},{entry['operator']}\n")
-
-        return output.getvalue().encode('utf-8')
-
-    def _generate_csv_report(self, data: Dict[str, Any], report_type: ReportType) -> bytes:
-        """Genera reporte en formato CSV"""
-        output = io.StringIO()
+                yield f"{entry['timestamp']},{entry['system']},{entry['level']},{msg_clean},{entry['tag']},{entry['value']},{entry['operator']}\n"
 
+    def _iter_csv_report(self, data: Dict[str, Any], report_type: ReportType) -> Iterator[str]:
+        """Genera reporte en formato CSV por partes"""
         if report_type == ReportType.VULNERABILITY_ASSESSMENT:
-            writer = csv.DictWriter(output, fieldnames=[
-                'id', 'title', 'severity', 'cvss_score', 'location',
-                'affected_asset', 'description', 'status'
-            ])
-            writer.writeheader()
-
-            for vuln in data['vulnerabilities']:
-                writer.writerow({
-                    'id': vuln['id'],
-                    'title': vuln['title'],
-                    'severity': vuln['severity'],
-                    'cvss_score': vuln['cvss_score'],
-                    'location': vuln['location'],
-                    'affected_asset': vuln['affected_asset'],
-                    'description': vuln['description'],
-                    'status': vuln['status']
-                })
+            fieldnames = ['id', 'title', 'severity', 'cvss_score', 'location',
+                          'affected_asset', 'description', 'status']
+            yield from iter_csv(fieldnames, data['vulnerabilities'], extrasaction='ignore')
 
         elif report_type == ReportType.SCADA_LOGS_ANALYSIS:
-            writer = csv.DictWriter(output, fieldnames=[
-                'timestamp', 'system', 'level', 'message', 'tag', 'value', 'operator'
-            ])
-            writer.writeheader()
+            fieldnames = ['timestamp', 'system', 'level', 'message', 'tag', 'value', 'operator']
+            yield from iter_csv(fieldnames, data['log_entries'])
 
-            for entry in data['log_entries']:
-                writer.writerow(entry)
+    def _iter_report(self, data: Dict[str, Any], report_type: ReportType,
+                     format: ReportFormat) -> Optional[Iterator[str]]:
+        """Escritor de formato en streaming; ``None`` si el formato no está soportado"""
+        if format == ReportFormat.PDF:
+            return self._iter_pdf_report(data, report_type)
+        if format == ReportFormat.EXCEL:
+            return self._iter_excel_report(data, report_type)
+        if format == ReportFormat.CSV:
+            return self._iter_csv_report(data, report_type)
+        if format == ReportFormat.JSON:
+            return iter_json(data)
+        return None
+
+    def _generate_pdf_report(self, data: Dict[str, Any], report_type: ReportType) -> bytes:
+        """Genera reporte en formato PDF (versión simplificada)"""
+        return ''.join(self._iter_pdf_report(data, report_type)).encode('utf-8')
 
-        return output.getvalue().encode('utf-8')
+    def _generate_excel_report(self, data: Dict[str, Any], report_type: ReportType) -> bytes:
+        """Genera reporte en formato Excel (versión simplificada como CSV estructurado)"""
+        return ''.join(self._iter_excel_report(data, report_type)).encode('utf-8')
+
+    def _generate_csv_report(self, data: Dict[str, Any], report_type: ReportType) -> bytes:
+        """Genera reporte en formato CSV"""
+        return ''.join(self._iter_csv_report(data, report_type)).encode('utf-8')
 
     def _generate_json_report(self, data: Dict[str, Any], report_type: ReportType) -> bytes:
         """Genera reporte en formato JSON"""
-        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+        return ''.join(iter_json(data)).encode('utf-8')
+
+    def _watermark_stream(self, chunks: Iterator[str], format: ReportFormat,
+                          user_id: str, timestamp: str) -> Iterator[bytes]:
+        """Aplica la marca de agua a la cabecera (primera pieza) del reporte en streaming"""
+        first = True
+        for chunk in chunks:
+            data = chunk.encode('utf-8')
+            if first:
+                data = self._apply_watermark(data, format, user_id, timestamp)
+                first = False
+            yield data
 
     async def export_report(self, request: ExportRequest, user_ip: str = None) -> Optional[str]:
         """Exporta reporte con autorización granular"""
@@ -694,25 +702,18 @@ Descripción: {vuln['description']}
                 logger.info(f"Solicitud {request.request_id} pendiente de aprobación")
                 return "PENDING_APPROVAL"
 
-            # Generar datos del reporte
+            # Generar datos del reporte (las filas de logs SCADA llegan como generador)
             if request.report_type == ReportType.VULNERABILITY_ASSESSMENT:
                 report_data = await self.generate_vulnerability_report(request.filters)
             elif request.report_type == ReportType.SCADA_LOGS_ANALYSIS:
-                report_data = await self.generate_scada_logs_report(request.filters)
+                report_data = await self.generate_scada_logs_report(request.filters, stream=True)
             else:
                 logger.error(f"Tipo de reporte no soportado: {request.report_type}")
                 return None
 
-            # Generar archivo según formato
-            if request.format == ReportFormat.PDF:
-                content = self._generate_pdf_report(report_data, request.report_type)
-            elif request.format == ReportFormat.EXCEL:
-                content = self._generate_excel_report(report_data, request.report_type)
-            elif request.format == ReportFormat.CSV:
-                content = self._generate_csv_report(report_data, request.report_type)
-            elif request.format == ReportFormat.JSON:
-                content = self._generate_json_report(report_data, request.report_type)
-            else:
+            # Escritor de formato en streaming
+            chunks = self._iter_report(report_data, request.report_type, request.format)
+            if chunks is None:
                 logger.error(f"Formato no soportado: {request.format}")
                 return None
 
@@ -720,43 +721,21 @@ Descripción: {vuln['description']}
             watermark_required = await self._check_watermark_required(request.user_id, request.report_type)
             if watermark_required:
                 timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                content = self._apply_watermark(content, request.format, request.user_id, timestamp)
-
-            # CIFRAR SIEMPRE el contenido con la clave del operador
-            encrypted_content, salt = self._encrypt_report_content(content, request.operator_encryption_key)
-
-            # Crear metadata de cifrado
-            encryption_info = {
-                'encrypted': True,
-                'algorithm': 'AES-GCM',
-                'key_derivation': 'PBKDF2-SHA256',
-                'iterations': 100000,
-                'salt': salt.hex(),
-                'encrypted_by': request.user_id,
-                'encrypted_at': datetime.now().isoformat()
-            }
+                chunks = self._watermark_stream(chunks, request.format, request.user_id, timestamp)
 
-            # Calcular checksum del contenido original y cifrado
-            original_checksum = hashlib.sha256(content).hexdigest()
-            encrypted_checksum = hashlib.sha256(encrypted_content).hexdigest()
-
-            # Guardar archivo cifrado
             file_extension = request.format.value
             filename = f"report_{request.report_type.value}_{request.request_id}.{file_extension}.encrypted"
-            file_path = f"/home/gatux/smartcompute/reports/{filename}"
-
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
-            # Escribir archivo cifrado con metadata
-            with open(file_path, 'wb') as f:
-                # Escribir metadata de cifrado como header
-                metadata_json = json.dumps(encryption_info).encode('utf-8')
-                metadata_size = len(metadata_json)
-
-                # Estructura: [4 bytes tamaño metadata][metadata JSON][contenido cifrado]
-                f.write(metadata_size.to_bytes(4, byteorder='big'))
-                f.write(metadata_json)
-                f.write(encrypted_content)
+            file_path = str(self.reports_dir / filename)
+
+            # CIFRAR SIEMPRE: bloques AES-GCM autenticados escritos a disco sobre la marcha.
+            # La clave PBKDF2 del operador sale de la caché si exportó hace poco.
+            stats = await asyncio.to_thread(
+                write_encrypted_report, file_path, chunks, request.operator_encryption_key,
+                self.key_cache, {'encrypted_by': request.user_id, 'encrypted_at': datetime.now().isoformat()},
+                self.report_chunk_size
+            )
+            original_checksum = stats.checksum
+            encrypted_checksum = stats.encrypted_checksum
 
             # Crear archivo de instrucciones de descifrado
             instructions_file = f"{file_path}.instructions.txt"
@@ -773,9 +752,10 @@ IMPORTANTE: Este archivo está CIFRADO con la clave proporcionada por el operado
 
 Para descifrar:
 1. Use la clave de descifrado que proporcionó durante la exportación
-2. Algoritmo: AES-GCM con PBKDF2-SHA256
-3. Iteraciones: 100,000
-4. Salt incluido en el archivo
+2. Algoritmo: AES-256-GCM por bloques de {self.report_chunk_size} bytes
+   (smartcompute.industrial.scada.report_stream.read_encrypted_report)
+3. Derivación: PBKDF2-SHA256 ({self.key_cache.iterations:,} iteraciones) + HKDF-SHA256 por archivo
+4. Sales incluidas en la cabecera del archivo
 
 Checksums de verificación:
 - Contenido original: {original_checksum}
@@ -792,7 +772,7 @@ Sin la clave, el archivo NO PUEDE ser recuperado.
                 format=request.format,
                 created_by=request.user_id,
                 created_at=datetime.now(),
-                file_size=len(encrypted_content),  # Tamaño del archivo cifrado
+                file_size=stats.bytes_out,         # Tamaño del archivo cifrado
                 checksum=encrypted_checksum,       # Checksum del archivo cifrado
                 sensitivity=DataSensitivity.HIGHLY_CONFIDENTIAL,  # Elevado por cifrado
                 access_level=AccessLevel.SECRET,   # Elevado por cifrado
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+SmartCompute Industrial - SCADA Alert Rules
+===========================================
+
+Compilador de las reglas de alerta de ``IndustrialSCADALogger``:
+
+- Cada regla se compila una vez: los patrones de tag (globs) se unen en
+  una sola expresión regular sin distinción de mayúsculas y las listas
+  pasan a conjuntos.
+- Las reglas se indexan por su condición más selectiva (categoría, tipo
+  de alarma o severidad), y la lista de candidatas que además pasan el
+  patrón de tag se memoriza por (categoría, tipo, severidad, tag): una
+  entrada sólo visita las reglas que pueden coincidir, y el coste no crece
+  con el número de reglas de planta.
+- Las condiciones con estado se evalúan de verdad, después de las
+  estáticas: ``minimum_occurrences`` dentro de ``time_window`` con un
+  contador deslizante por regla, y ``statistical_deviation`` durante
+  ``consecutive_readings`` lecturas con media/varianza incremental por tag.
+- Una clave de condición desconocida es un ``ValueError`` al compilar, no
+  una condición ignorada.
+- ``AlertRuleSet`` cuenta sus modificaciones (``version``) para que el
+  logger recompile sólo cuando cambian las reglas; al recompilar, las
+  reglas que no cambiaron conservan sus contadores.
+
+Las entradas se leen por atributos (``category``, ``alarm_type``,
+``severity``, ``tag_name``, ``tag_value``, ``operator_id``, ``timestamp``,
+``details``), así que el módulo no depende de los tipos del logger.
+"""
+
+import fnmatch
+import math
+import re
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+# Condiciones de reglas que se indexan, en orden de preferencia
+INDEXED_CONDITIONS = ('categories', 'alarm_types', 'severity')
+
+SUPPORTED_CONDITIONS = frozenset(INDEXED_CONDITIONS + (
+    'tag_patterns', 'critical_tags', 'event_types', 'excluded_operators', 'time_ranges',
+    'minimum_batch_value', 'minimum_occurrences', 'time_window',
+    'statistical_deviation', 'consecutive_readings',
+))
+
+
+def compile_globs(patterns: Sequence[str]) -> re.Pattern:
+    """Unir globs estilo fnmatch en una expresión sin distinción de mayúsculas"""
+    return re.compile('|'.join(fnmatch.translate(p.upper()) for p in patterns), re.IGNORECASE)
+
+
+def parse_time_ranges(ranges: Sequence[str]) -> Callable[[datetime], bool]:
+    """``"22:00-06:00"`` (puede cruzar medianoche) y ``"weekends"`` → predicado sobre la hora"""
+    windows: List[Tuple[int, int]] = []
+    weekends = False
+    for item in ranges:
+        if item.lower() == 'weekends':
+            weekends = True
+            continue
+        try:
+            start, end = (int(h) * 60 + int(m) for h, m in (part.split(':') for part in item.split('-')))
+        except ValueError:
+            raise ValueError(f"Invalid time range {item!r}: expected 'HH:MM-HH:MM' or 'weekends'")
+        windows.append((start, end))
+
+    def matches(timestamp: datetime) -> bool:
+        if weekends and timestamp.weekday() >= 5:
+            return True
+        minute = timestamp.hour * 60 + timestamp.minute
+        return any(start <= minute < end if start <= end else minute >= start or minute < end
+                   for start, end in windows)
+
+    return matches
+
+
+class TagDeviation:
+    """Media/varianza incremental de un tag y racha de lecturas fuera de k sigma"""
+
+    __slots__ = ('count', 'mean', 'm2', 'streak')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.streak = 0
+
+    def push(self, value: float, sigmas: float, warmup: int) -> int:
+        """Añadir una lectura y devolver la racha actual de desviaciones"""
+        if self.count >= warmup:
+            std = math.sqrt(self.m2 / self.count)
+            self.streak = self.streak + 1 if std > 0 and abs(value - self.mean) > sigmas * std else 0
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        return self.streak
+
+
+class CompiledRule:
+    """Regla de alerta compilada: predicados estáticos + contadores con estado"""
+
+    def __init__(self, name: str, config: Dict, order: int = 0):
+        conditions = config.get('conditions', {})
+        unknown = set(conditions) - SUPPORTED_CONDITIONS
+        if unknown:
+            raise ValueError(f"Alert rule {name!r} has unsupported conditions: {sorted(unknown)}")
+
+        self.name = name
+        self.config = config
+        self.order = order
+        self.categories = frozenset(conditions.get('categories', ()))
+        self.alarm_types = frozenset(conditions.get('alarm_types', ()))
+        self.severities = frozenset(conditions.get('severity', ()))
+
+        patterns = list(conditions.get('tag_patterns', ())) + list(conditions.get('critical_tags', ()))
+        self.tag_regex = compile_globs(patterns) if patterns else None
+        self.event_types = frozenset(e.lower() for e in conditions.get('event_types', ()))
+        self.excluded_operators = frozenset(o.lower() for o in conditions.get('excluded_operators', ()))
+        self.in_time_range = parse_time_ranges(conditions['time_ranges']) if conditions.get('time_ranges') else None
+        self.minimum_batch_value = conditions.get('minimum_batch_value')
+
+        # Ocurrencias dentro de una ventana deslizante
+        self.minimum_occurrences = conditions.get('minimum_occurrences')
+        self.time_window = conditions.get('time_window', config.get('time_window', 300))
+        self.occurrences: Deque[float] = deque()
+
+        # Desviación estadística sostenida por tag
+        self.sigmas = conditions.get('statistical_deviation')
+        self.consecutive = conditions.get('consecutive_readings', 1)
+        self.deviations: Dict[str, TagDeviation] = {}
+        self.warmup = max(10, self.consecutive)
+
+    @property
+    def index_key(self) -> Tuple[str, frozenset]:
+        """Condición por la que se indexa la regla (la primera presente de INDEXED_CONDITIONS)"""
+        for key, values in zip(INDEXED_CONDITIONS, (self.categories, self.alarm_types, self.severities)):
+            if values:
+                return key, values
+        return 'always', frozenset()
+
+    def selects(self, category: Any, alarm_type: Any, severity: Any, tag_name: Optional[str]) -> bool:
+        """Condiciones que sólo dependen de la clave de despacho (memorizables)"""
+        if self.categories and category not in self.categories:
+            return False
+        if self.alarm_types and alarm_type not in self.alarm_types:
+            return False
+        if self.severities and severity not in self.severities:
+            return False
+        return self.tag_regex is None or not tag_name or self.tag_regex.match(tag_name) is not None
+
+    def matches(self, entry: Any) -> bool:
+        """Evaluar la regla completa sobre una entrada"""
+        return (self.selects(entry.category, entry.alarm_type, entry.severity, entry.tag_name)
+                and self.accepts(entry))
+
+    def accepts(self, entry: Any) -> bool:
+        """Resto de condiciones; las de estado se actualizan sólo si pasan las estáticas"""
+        if self.event_types and str(entry.details.get('event_type', '')).lower() not in self.event_types:
+            return False
+        if self.excluded_operators and (entry.operator_id or '').lower() in self.excluded_operators:
+            return False
+        if self.in_time_range is not None and not self.in_time_range(entry.timestamp):
+            return False
+        if self.minimum_batch_value is not None:
+            value = entry.details.get('batch_value')
+            if value is None or float(value) < self.minimum_batch_value:
+                return False
+
+        if self.sigmas is not None:
+            value = entry.tag_value
+            if not entry.tag_name or isinstance(value, bool) or not isinstance(value, (int, float)):
+                return False
+            tracker = self.deviations.get(entry.tag_name)
+            if tracker is None:
+                tracker = self.deviations[entry.tag_name] = TagDeviation()
+            if tracker.push(float(value), self.sigmas, self.warmup) < self.consecutive:
+                return False
+            tracker.streak = 0
+
+        if self.minimum_occurrences:
+            t = entry.timestamp.timestamp()
+            window = self.occurrences
+            window.append(t)
+            while window and window[0] <= t - self.time_window:
+                window.popleft()
+            if len(window) < self.minimum_occurrences:
+                return False
+            window.clear()  # Una alerta por ráfaga; se vuelve a contar desde cero
+
+        return True
+
+
+class AlertRuleSet(dict):
+    """Reglas por nombre; ``version`` aumenta con cada alta, baja o sustitución
+
+    Editar en sitio la configuración de una regla (``rules[name]['conditions']``)
+    no se detecta: hay que reasignar la regla o llamar a ``touch()``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+
+    def touch(self):
+        self.version += 1
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.touch()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.touch()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.touch()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self.touch()
+        return super().setdefault(key, default)
+
+    def pop(self, *args):
+        self.touch()
+        return super().pop(*args)
+
+    def popitem(self):
+        self.touch()
+        return super().popitem()
+
+    def clear(self):
+        super().clear()
+        self.touch()
+
+
+class AlertRuleMatcher:
+    """Reglas compiladas con tablas de despacho por categoría, tipo de alarma y severidad"""
+
+    def __init__(self, rules: Dict[str, Dict], cache_size: int = 65_536):
+        self.cache_size = cache_size
+        self.rules = [CompiledRule(name, config, order) for order, (name, config) in enumerate(rules.items())]
+        self.index: Dict[str, Dict[Any, List[CompiledRule]]] = {key: {} for key in INDEXED_CONDITIONS}
+        self.always: List[CompiledRule] = []
+        for rule in self.rules:
+            key, values = rule.index_key
+            if key == 'always':
+                self.always.append(rule)
+            for value in values:
+                self.index[key].setdefault(value, []).append(rule)
+        self._candidates: Dict[Tuple, List[CompiledRule]] = {}
+        self.stats = {'entries': 0, 'rule_visits': 0, 'matches': 0}
+
+    def candidates(self, entry: Any) -> List[CompiledRule]:
+        """Reglas cuyas condiciones de despacho y de tag coinciden, en el orden de definición
+
+        El resultado se memoriza por (categoría, tipo, severidad, tag): con un
+        conjunto acotado de tags, cada entrada cuesta una consulta al
+        diccionario más las reglas que realmente aplican.
+        """
+        key = (entry.category, entry.alarm_type, entry.severity, entry.tag_name)
+        rules = self._candidates.get(key)
+        if rules is None:
+            found = set(self.always)
+            for condition, value in zip(INDEXED_CONDITIONS, key):
+                found.update(self.index[condition].get(value, ()))
+            rules = sorted((rule for rule in found if rule.selects(*key)), key=lambda rule: rule.order)
+            if len(self._candidates) >= self.cache_size:
+                self._candidates.clear()
+            self._candidates[key] = rules
+        return rules
+
+    def inherit_state(self, previous: 'AlertRuleMatcher'):
+        """Conservar contadores y rachas de las reglas de ``previous`` que no cambiaron"""
+        old = {rule.name: rule for rule in previous.rules}
+        for rule in self.rules:
+            kept = old.get(rule.name)
+            if kept is not None and kept.config == rule.config:
+                rule.occurrences, rule.deviations = kept.occurrences, kept.deviations
+
+    def match(self, entry: Any) -> List[CompiledRule]:
+        """Reglas que se disparan para la entrada"""
+        rules = self.candidates(entry)
+        matched = [rule for rule in rules if rule.accepts(entry)]
+        self.stats['entries'] += 1
+        self.stats['rule_visits'] += len(rules)
+        self.stats['matches'] += len(matched)
+        return matched
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['rules'] = len(self.rules)
+        stats['visits_per_entry'] = round(stats['rule_visits'] / stats['entries'], 2) if stats['entries'] else 0.0
+        return stats
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+SmartCompute Industrial - Incremental Vulnerability Scan State
+==============================================================
+
+Estado que permite a ``IndustrialVulnerabilityManager`` volver a escanear
+sólo lo que cambió y servir el dashboard sin recorrer las vulnerabilidades:
+
+- ``asset_fingerprint()`` resume lo que determina los hallazgos de un
+  activo: tipo, fabricante, modelo, firmware, protocolos, servicios, zona
+  y el sector/criticidad de la zona. ``AssetScanLedger`` guarda por activo
+  esa huella y la revisión de la base de avisos en el último escaneo. Un
+  activo se vuelve a escanear si es nuevo, si su huella cambió o si después
+  se importaron avisos de su fabricante/producto
+  (``VulnerabilityKnowledgeBase.revision_for``).
+- ``save_zone_scan()`` escribe en una sola transacción los hallazgos de una
+  zona, borra los que desaparecieron y actualiza el ledger y ``last_scan``.
+  Es un upsert, así que ``created_at`` se conserva.
+- ``VulnerabilityAggregates`` mantiene contadores globales y por zona
+  (severidad, estado de remediación, riesgo, esfuerzo, impacto…). Se
+  actualizan al añadir, cambiar o quitar una vulnerabilidad, con lo que
+  los totales del dashboard cuestan O(zonas).
+
+Activos, zonas y vulnerabilidades se leen por atributos (los enums por
+``.value``), así que el módulo no depende de los tipos del gestor.
+"""
+
+import bisect
+import hashlib
+import json
+import sqlite3
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+VULNERABILITY_COLUMNS = (
+    'vuln_id', 'cve_id', 'title', 'description', 'severity', 'cvss_score', 'cvss_vector',
+    'affected_assets', 'discovery_date', 'source', 'exploit_available', 'exploit_complexity',
+    'threat_actor_interest', 'industrial_impact', 'safety_impact', 'production_impact',
+    'environmental_impact', 'affected_zones', 'business_priority', 'technical_priority',
+    'operational_impact_hours', 'remediation_status', 'assigned_to', 'remediation_plan',
+    'estimated_effort_hours', 'target_resolution_date', 'updated_at',
+)
+
+VULNERABILITY_UPSERT = (
+    f"INSERT INTO vulnerabilities ({', '.join(VULNERABILITY_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(VULNERABILITY_COLUMNS))}) "
+    f"ON CONFLICT(vuln_id) DO UPDATE SET "
+    + ', '.join(f'{column} = excluded.{column}' for column in VULNERABILITY_COLUMNS[1:])
+)
+
+# Marcas que cuenta el dashboard, con el predicado sobre la vulnerabilidad
+FLAGS: Dict[str, Callable[[Any], bool]] = {
+    'safety_impact': lambda v: bool(v.safety_impact),
+    'production_impact': lambda v: bool(v.production_impact),
+    'exploit_available': lambda v: bool(v.exploit_available),
+    'high_actor_interest': lambda v: v.threat_actor_interest in ('high', 'very_high'),
+    'industrial_specific': lambda v: bool(v.industrial_impact),
+    'remote_exploitable': lambda v: 'AV:N' in (v.cvss_vector or ''),
+}
+
+
+def _value(item: Any) -> Any:
+    return getattr(item, 'value', item)
+
+
+def asset_fingerprint(asset: Any, zone: Any = None) -> str:
+    """Hash de lo que decide los hallazgos de un activo (no cambia con ``last_scan``/``online``)"""
+    payload = {
+        'asset_type': asset.asset_type, 'name': asset.name, 'manufacturer': asset.manufacturer,
+        'model': asset.model, 'firmware_version': asset.firmware_version, 'zone_id': asset.zone_id,
+        'protocols': sorted(asset.protocols), 'services': asset.services,
+        'zone': [_value(zone.sector), _value(zone.criticality)] if zone is not None else None,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def vulnerability_row(vuln: Any, updated_at: Optional[datetime] = None) -> tuple:
+    """Fila de ``vulnerabilities`` en el orden de ``VULNERABILITY_COLUMNS``"""
+    return (
+        vuln.vuln_id, vuln.cve_id, vuln.title, vuln.description,
+        _value(vuln.severity), vuln.cvss_score, vuln.cvss_vector,
+        json.dumps(vuln.affected_assets), vuln.discovery_date, vuln.source,
+        vuln.exploit_available, vuln.exploit_complexity, vuln.threat_actor_interest,
+        json.dumps(vuln.industrial_impact), vuln.safety_impact, vuln.production_impact,
+        vuln.environmental_impact, json.dumps(vuln.affected_zones),
+        vuln.business_priority, vuln.technical_priority, vuln.operational_impact_hours,
+        _value(vuln.remediation_status), vuln.assigned_to,
+        json.dumps(vuln.remediation_plan, default=str) if vuln.remediation_plan else None,
+        vuln.estimated_effort_hours, vuln.target_resolution_date,
+        updated_at or datetime.now(),
+    )
+
+
+class ScanRecord(NamedTuple):
+    fingerprint: str
+    revision: int
+    scanned_at: datetime
+
+
+class AssetScanLedger:
+    """Huella y revisión de avisos del último escaneo de cada activo"""
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS asset_scan_state (
+            asset_id TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            advisory_revision INTEGER NOT NULL,
+            scanned_at TIMESTAMP NOT NULL
+        )
+    '''
+
+    def __init__(self):
+        self.records: Dict[str, ScanRecord] = {}
+
+    def load(self, conn: sqlite3.Connection):
+        conn.execute(self.SCHEMA)
+        self.records = {
+            asset_id: ScanRecord(fingerprint, revision, scanned_at)
+            for asset_id, fingerprint, revision, scanned_at
+            in conn.execute('SELECT asset_id, fingerprint, advisory_revision, scanned_at FROM asset_scan_state')
+        }
+
+    def reason(self, asset_id: str, fingerprint: str, advisory_revision: int) -> Optional[str]:
+        """Por qué hay que volver a escanear el activo, o None si su resultado sigue valiendo
+
+        ``advisory_revision`` es la revisión de avisos de su producto
+        (``VulnerabilityKnowledgeBase.revision_for``).
+        """
+        record = self.records.get(asset_id)
+        if record is None:
+            return 'new'
+        if record.fingerprint != fingerprint:
+            return 'changed'
+        if advisory_revision > record.revision:
+            return 'advisories'
+        return None
+
+    def commit(self, rows: Sequence[Tuple[str, str, int, datetime]]):
+        """Aplicar en memoria las filas ya escritas por ``save_zone_scan``"""
+        for asset_id, fingerprint, revision, scanned_at in rows:
+            self.records[asset_id] = ScanRecord(fingerprint, revision, scanned_at)
+
+    def forget(self, asset_ids: Iterable[str]):
+        for asset_id in asset_ids:
+            self.records.pop(asset_id, None)
+
+
+def save_zone_scan(conn: sqlite3.Connection, findings: Sequence[Any], removed_ids: Iterable[str],
+                   ledger_rows: Sequence[Tuple[str, str, int, datetime]], forgotten_assets: Iterable[str] = ()):
+    """Hallazgos, bajas, ledger y ``last_scan`` de una zona en una transacción
+
+    ``ledger_rows`` son ``(asset_id, huella, revisión, fecha)`` de los
+    activos escaneados; ``forgotten_assets`` salen del ledger.
+    """
+    now = datetime.now()
+    with conn:
+        conn.executemany(VULNERABILITY_UPSERT, [vulnerability_row(vuln, now) for vuln in findings])
+        conn.executemany('DELETE FROM vulnerabilities WHERE vuln_id = ?', [(vuln_id,) for vuln_id in removed_ids])
+        conn.executemany('INSERT OR REPLACE INTO asset_scan_state (asset_id, fingerprint, advisory_revision, '
+                         'scanned_at) VALUES (?, ?, ?, ?)', ledger_rows)
+        conn.executemany('UPDATE industrial_assets SET last_scan = ? WHERE asset_id = ?',
+                         [(scanned_at, asset_id) for asset_id, _, _, scanned_at in ledger_rows])
+        conn.executemany('DELETE FROM asset_scan_state WHERE asset_id = ?', [(a,) for a in forgotten_assets])
+
+
+@dataclass
+class ZoneAggregate:
+    """Totales de una zona y las vulnerabilidades que la afectan"""
+    vuln_ids: Set[str] = field(default_factory=set)
+    risk_sum: int = 0
+    severity: Counter = field(default_factory=Counter)
+    impact_hours: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return len(self.vuln_ids)
+
+    @property
+    def risk_score(self) -> float:
+        return self.risk_sum / max(self.count, 1)
+
+
+class _Entry(NamedTuple):
+    """Lo que una vulnerabilidad aportó a los agregados (para poder restarlo)"""
+    zones: Tuple[str, ...]
+    assets: Tuple[str, ...]
+    severity: str
+    status: str
+    risk: int
+    effort: float
+    impact_hours: float
+    flags: Tuple[str, ...]
+    deadline: Optional[datetime]
+
+
+class VulnerabilityAggregates:
+    """Contadores del dashboard mantenidos al añadir, cambiar o quitar vulnerabilidades"""
+
+    COMPLETED = 'completed'
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self.zones: Dict[str, ZoneAggregate] = {}
+        self.assets: Counter = Counter()
+        self.severity: Counter = Counter()
+        self.status: Counter = Counter()
+        self.flags: Counter = Counter()
+        self.risk_sum = 0
+        self.effort_total = 0.0
+        self.effort_completed = 0.0
+        self._deadlines: List[datetime] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, vuln_id: str) -> bool:
+        return vuln_id in self._entries
+
+    def upsert(self, vuln: Any):
+        """Añadir o actualizar (cambios de estado de remediación incluidos)"""
+        self.discard(vuln.vuln_id)
+        entry = _Entry(
+            zones=tuple(dict.fromkeys(vuln.affected_zones)),
+            assets=tuple(dict.fromkeys(vuln.affected_assets)),
+            severity=_value(vuln.severity),
+            status=_value(vuln.remediation_status),
+            risk=vuln.business_priority * vuln.technical_priority,
+            effort=vuln.estimated_effort_hours,
+            impact_hours=vuln.operational_impact_hours,
+            flags=tuple(name for name, test in FLAGS.items() if test(vuln)),
+            deadline=vuln.target_resolution_date,
+        )
+        self._entries[vuln.vuln_id] = entry
+        self._apply(vuln.vuln_id, entry, 1)
+
+    def discard(self, vuln_id: str):
+        entry = self._entries.pop(vuln_id, None)
+        if entry is not None:
+            self._apply(vuln_id, entry, -1)
+
+    def _apply(self, vuln_id: str, entry: _Entry, sign: int):
+        for zone_id in entry.zones:
+            zone = self.zones.get(zone_id)
+            if zone is None:
+                zone = self.zones[zone_id] = ZoneAggregate()
+            if sign > 0:
+                zone.vuln_ids.add(vuln_id)
+            else:
+                zone.vuln_ids.discard(vuln_id)
+            zone.risk_sum += sign * entry.risk
+            zone.severity[entry.severity] += sign
+            zone.impact_hours += sign * entry.impact_hours
+            if not zone.vuln_ids:
+                del self.zones[zone_id]
+        for asset_id in entry.assets:
+            self.assets[asset_id] += sign
+            if not self.assets[asset_id]:
+                del self.assets[asset_id]
+        for counter, key in ((self.severity, entry.severity), (self.status, entry.status)):
+            counter[key] += sign
+            if not counter[key]:
+                del counter[key]
+        for name in entry.flags:
+            self.flags[name] += sign
+        self.risk_sum += sign * entry.risk
+        self.effort_total += sign * entry.effort
+        if entry.status == self.COMPLETED:
+            self.effort_completed += sign * entry.effort
+        if entry.deadline is not None:
+            if sign > 0:
+                bisect.insort(self._deadlines, entry.deadline)
+            else:
+                del self._deadlines[bisect.bisect_left(self._deadlines, entry.deadline)]
+
+    def overdue(self, now: Optional[datetime] = None) -> int:
+        """Vulnerabilidades con fecha objetivo ya pasada (búsqueda binaria)"""
+        return bisect.bisect_left(self._deadlines, now or datetime.now())
+
+    @property
+    def average_risk(self) -> float:
+        return self.risk_sum / max(len(self._entries), 1)
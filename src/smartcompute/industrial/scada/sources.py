@@ -0,0 +1,574 @@
+#!/usr/bin/env python3
+"""
+SmartCompute Industrial - SCADA Ingestion Sources
+=================================================
+
+Fuentes reales de logs para ``IndustrialSCADALogger``:
+
+- ``FileFollower``/``FileTailer``: siguen ficheros de texto/CSV que rotan.
+  Leen en bloques grandes, arrastran la línea parcial entre lecturas y
+  guardan un checkpoint (inode + offset de la última línea completa) en
+  SQLite tras cada lote que el consumidor confirma (``on_lines`` no lanza
+  ni devuelve ``False``); si no lo confirma, el lote se relee en la
+  siguiente pasada.  Un reinicio continúa donde se quedó, y
+  si el fichero rotó mientras tanto, termina primero el rotado. Detectan
+  rotación por renombrado (cambio de inode) y por truncado (copytruncate).
+  En Linux esperan eventos inotify (vía ctypes, sin dependencias); en
+  otros sistemas, o si inotify no está disponible, sondean cada
+  ``poll_interval``.
+- ``SyslogListener``: servidor asyncio UDP/TCP (RFC 3164/5424, TCP con
+  líneas o con octet-counting) que agrupa los mensajes por host y los
+  entrega por lotes a un ``sink`` en un hilo.  Las líneas pendientes están
+  acotadas (``max_pending``): al llegar al tope, TCP deja de leer del socket
+  hasta el siguiente lote y UDP descarta y cuenta (``dropped``).
+
+Las líneas se entregan como ``List[str]``; el logger las pasa a
+``ingest_many``.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import re
+import select
+import socket
+import sqlite3
+import struct
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Máscaras de inotify(7)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class DeliveryError(Exception):
+    """El consumidor no confirmó un lote; se releerá desde el último checkpoint"""
+
+
+class Inotify:
+    """Envoltorio mínimo de inotify sobre libc"""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, Path] = {}
+
+    @classmethod
+    def create(cls) -> Optional['Inotify']:
+        """Instancia si el sistema lo soporta; ``None`` para caer a sondeo"""
+        try:
+            return cls()
+        except (OSError, AttributeError):
+            return None
+
+    def add_watch(self, directory: Path, mask: int = WATCH_MASK) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self.watches[wd] = directory
+        return wd
+
+    def read(self, timeout: float) -> Optional[List[Tuple[Path, str, int]]]:
+        """Eventos ``(directorio, nombre, máscara)``; ``None`` si la cola desbordó"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if wd in self.watches:
+                events.append((self.watches[wd], os.fsdecode(name), mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class CheckpointStore:
+    """Checkpoints ``(inode, offset)`` por fichero en la base de datos del logger"""
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+                source TEXT PRIMARY KEY,
+                inode INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                updated_at TIMESTAMP NOT NULL
+            )
+        ''')
+        self._conn.commit()
+
+    def get(self, source: str) -> Optional[Tuple[int, int]]:
+        with self._lock:
+            row = self._conn.execute('SELECT inode, offset FROM ingest_checkpoints WHERE source = ?',
+                                     (source,)).fetchone()
+        return tuple(row) if row else None
+
+    def save(self, source: str, inode: int, offset: int):
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO ingest_checkpoints VALUES (?, ?, ?, ?)',
+                               (source, inode, offset, time.time()))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class FileTailer:
+    """Sigue un fichero que puede rotar, entregando líneas completas por lotes"""
+
+    def __init__(self, path, checkpoints: CheckpointStore, on_lines: Callable[[List[str], 'FileTailer'], Any],
+                 scada_system: Any = None, source: Optional[str] = None,
+                 block_size: int = 1 << 20, batch_lines: int = 5_000, max_line_bytes: int = 1 << 20):
+        self.path = Path(path).absolute()
+        self.key = str(self.path)
+        self.checkpoints = checkpoints
+        self.on_lines = on_lines
+        self.scada_system = scada_system
+        self.source = source or f"file:{self.path.name}"
+        self.block_size = block_size
+        self.batch_lines = batch_lines
+        self.max_line_bytes = max_line_bytes
+
+        self._file = None
+        self.inode: Optional[int] = None
+        self.offset = 0  # Fin de la última línea completa entregada
+        self._partial = b''
+        self.stats = {'lines': 0, 'bytes': 0, 'batches': 0, 'rotations': 0, 'truncations': 0, 'retries': 0}
+
+    def open(self) -> bool:
+        """Abrir el fichero continuando desde el checkpoint; ``False`` si aún no existe"""
+        try:
+            handle = open(self.path, 'rb')
+        except FileNotFoundError:
+            return False
+        st = os.fstat(handle.fileno())
+        checkpoint = self.checkpoints.get(self.key)
+        offset = 0
+        if checkpoint is not None:
+            inode, saved = checkpoint
+            if inode == st.st_ino:
+                offset = saved if saved <= st.st_size else 0
+            else:
+                # Rotó mientras no mirábamos: terminar el fichero rotado si sigue en el directorio
+                rotated = self._find_inode(inode)
+                if rotated is not None:
+                    self._drain(rotated, inode, saved)
+                    self.stats['rotations'] += 1
+        self._attach(handle, st.st_ino, offset)
+        return True
+
+    def _attach(self, handle, inode: int, offset: int):
+        handle.seek(offset)
+        self._file = handle
+        self.inode = inode
+        self.offset = offset
+        self._partial = b''
+        self.checkpoints.save(self.key, inode, offset)
+
+    def _find_inode(self, inode: int) -> Optional[Path]:
+        for candidate in self.path.parent.glob(self.path.name + '*'):
+            try:
+                if candidate.stat().st_ino == inode and candidate != self.path:
+                    return candidate
+            except OSError:
+                continue
+        return None
+
+    def _drain(self, path: Path, inode: int, offset: int):
+        """Leer lo pendiente de un fichero ya rotado"""
+        with open(path, 'rb') as handle:
+            self._file, self.inode, self._partial = handle, inode, b''
+            handle.seek(offset if offset <= os.fstat(handle.fileno()).st_size else 0)
+            self.offset = handle.tell()
+            try:
+                self._read_available(final=True)
+            finally:
+                self._file = None
+
+    def poll(self) -> int:
+        """Leer lo nuevo y tratar rotación/truncado; devuelve las líneas entregadas"""
+        if self._file is None and not self.open():
+            return 0
+        emitted = self._read_available()
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            st = None
+
+        if st is None or st.st_ino != self.inode:
+            # Rotación por renombrado: el descriptor aún apunta al fichero antiguo
+            emitted += self._read_available(final=True)
+            self._file.close()
+            self._file = None
+            self.stats['rotations'] += 1
+            if st is not None:
+                try:
+                    handle = open(self.path, 'rb')
+                except FileNotFoundError:
+                    return emitted
+                self._attach(handle, os.fstat(handle.fileno()).st_ino, 0)
+                emitted += self._read_available()
+        elif st.st_size < self._file.tell():
+            # copytruncate: el mismo inode vuelve a empezar
+            self.stats['truncations'] += 1
+            self._attach(self._file, self.inode, 0)
+            emitted += self._read_available()
+        return emitted
+
+    def _read_available(self, final: bool = False) -> int:
+        emitted = 0
+        pending: List[bytes] = []
+        while True:
+            data = self._file.read(self.block_size)
+            if not data:
+                break
+            self.stats['bytes'] += len(data)
+            lines = (self._partial + data).split(b'\n')
+            self._partial = lines.pop()
+            if len(self._partial) > self.max_line_bytes:
+                lines.append(self._partial)
+                self._partial = b''
+            pending.extend(lines)
+            if len(pending) >= self.batch_lines:
+                emitted += self._emit(pending)
+                pending = []
+        if final and self._partial:
+            pending.append(self._partial)
+            self._partial = b''
+        if pending:
+            emitted += self._emit(pending)
+        return emitted
+
+    def _emit(self, raw_lines: List[bytes]) -> int:
+        lines = [line.decode('utf-8', 'replace').rstrip('\r') for line in raw_lines]
+        lines = [line for line in lines if line]
+        if lines:
+            try:
+                accepted = self.on_lines(lines, self) is not False
+            except Exception:
+                self._rewind()
+                raise
+            if not accepted:
+                self._rewind()
+                raise DeliveryError(f"{len(lines)} lines from {self.path} not committed")
+            self.stats['lines'] += len(lines)
+            self.stats['batches'] += 1
+        # Checkpoint sólo con el lote confirmado; un reinicio no relee lo ya entregado
+        self.offset = self._file.tell() - len(self._partial)
+        self.checkpoints.save(self.key, self.inode, self.offset)
+        return len(lines)
+
+    def _rewind(self):
+        """Volver al último checkpoint para releer el lote no confirmado"""
+        self._file.seek(self.offset)
+        self._partial = b''
+        self.stats['retries'] += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class FileFollower:
+    """Hilo que sigue varios ficheros con inotify (o sondeo como respaldo)"""
+
+    def __init__(self, checkpoints: CheckpointStore, on_lines: Callable[[List[str], FileTailer], Any],
+                 poll_interval: float = 1.0, use_inotify: bool = True, **tailer_options):
+        self.checkpoints = checkpoints
+        self.on_lines = on_lines
+        self.poll_interval = poll_interval
+        self.tailer_options = tailer_options
+        self.inotify = Inotify.create() if use_inotify else None
+        self.tailers: Dict[Path, FileTailer] = {}
+        self._watched_dirs = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def follow(self, path, scada_system: Any = None, source: Optional[str] = None) -> FileTailer:
+        tailer = FileTailer(path, self.checkpoints, self.on_lines, scada_system, source, **self.tailer_options)
+        with self._lock:
+            self.tailers[tailer.path] = tailer
+            directory = tailer.path.parent
+            if self.inotify is not None and directory not in self._watched_dirs:
+                try:
+                    self.inotify.add_watch(directory)
+                    self._watched_dirs.add(directory)
+                except OSError as e:
+                    logger.warning(f"inotify unavailable for {directory} ({e}); polling instead")
+        return tailer
+
+    def poll_all(self) -> int:
+        with self._lock:
+            tailers = list(self.tailers.values())
+        return sum(self._poll(tailer) for tailer in tailers)
+
+    def _poll(self, tailer: FileTailer) -> int:
+        try:
+            return tailer.poll()
+        except Exception as e:
+            logger.error(f"Error tailing {tailer.path}: {e}")
+            return 0
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="scada-tail", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        self.poll_all()
+        last_full_poll = time.monotonic()
+        while not self._stop.is_set():
+            if self.inotify is None:
+                self._stop.wait(self.poll_interval)
+                self.poll_all()
+                continue
+
+            events = self.inotify.read(self.poll_interval)
+            if events is None or time.monotonic() - last_full_poll >= self.poll_interval:
+                # Desbordamiento o barrido periódico de seguridad
+                self.poll_all()
+                last_full_poll = time.monotonic()
+                continue
+            with self._lock:
+                touched = {self.tailers.get(directory / name) for directory, name, _ in events}
+            for tailer in touched - {None}:
+                self._poll(tailer)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for tailer in self.tailers.values():
+            tailer.close()
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'mode': 'inotify' if self.inotify is not None else 'polling',
+            'files': {str(path): dict(tailer.stats, offset=tailer.offset) for path, tailer in self.tailers.items()}
+        }
+
+
+# RFC 5424: <PRI>1 TIMESTAMP HOST APP PROCID MSGID SD MSG
+SYSLOG_5424 = re.compile(r'<\d{1,3}>1 \S+ (\S+) \S+ \S+ \S+ (?:-|(?:\[(?:[^\]\\]|\\.)*\])+) ?(.*)', re.DOTALL)
+# RFC 3164: <PRI>Mmm dd hh:mm:ss HOST TAG[pid]: MSG
+SYSLOG_3164 = re.compile(r'<\d{1,3}>[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2} (\S+) (?:[^:\s\[]+(?:\[\d+\])?: )?(.*)',
+                         re.DOTALL)
+
+
+def parse_syslog(text: str) -> Tuple[Optional[str], str]:
+    """``(host, mensaje)`` de una línea syslog; sin cabecera reconocible, ``(None, texto)``"""
+    if text.startswith('<'):
+        match = SYSLOG_5424.match(text) or SYSLOG_3164.match(text)
+        if match:
+            host, message = match.groups()
+            return (None if host == '-' else host), message.lstrip('\ufeff')
+    return None, text
+
+
+class _SyslogDatagram(asyncio.DatagramProtocol):
+    def __init__(self, listener: 'SyslogListener'):
+        self.listener = listener
+
+    def datagram_received(self, data: bytes, addr):
+        self.listener.receive(data, addr[0])
+
+
+class SyslogListener:
+    """Receptor syslog UDP/TCP que entrega mensajes por lotes a ``sink(lines, source)``"""
+
+    def __init__(self, sink: Callable[[List[str], str], Any], host: str = '0.0.0.0',
+                 udp_port: Optional[int] = 5514, tcp_port: Optional[int] = 5514,
+                 batch_size: int = 1_000, flush_interval: float = 0.25, max_message_bytes: int = 64 * 1024,
+                 receive_buffer_bytes: int = 4 * 1024 * 1024, max_pending: int = 100_000):
+        self.sink = sink
+        self.host = host
+        self.udp_port = udp_port
+        self.tcp_port = tcp_port
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_message_bytes = max_message_bytes
+        self.receive_buffer_bytes = receive_buffer_bytes
+        self.max_pending = max_pending
+
+        self._pending: Dict[str, List[str]] = defaultdict(list)
+        self._pending_count = 0
+        self._full: Optional[asyncio.Event] = None
+        self._room: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._transport = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._sink_lock: Optional[asyncio.Lock] = None
+        self._clients = set()
+        self.stats = {'messages': 0, 'bytes': 0, 'batches': 0, 'tcp_connections': 0, 'dropped': 0, 'tcp_pauses': 0}
+
+    async def start(self) -> 'SyslogListener':
+        loop = asyncio.get_running_loop()
+        self._full = asyncio.Event()
+        self._room = asyncio.Event()
+        self._room.set()
+        self._stopping = False
+        self._sink_lock = asyncio.Lock()
+        if self.udp_port is not None:
+            self._transport, _ = await loop.create_datagram_endpoint(
+                lambda: _SyslogDatagram(self), local_addr=(self.host, self.udp_port))
+            # UDP no tiene control de flujo: un buffer grande absorbe ráfagas mientras se vuelca un lote
+            sock = self._transport.get_extra_info('socket')
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer_bytes)
+            except OSError:
+                pass
+        if self.tcp_port is not None:
+            self._server = await asyncio.start_server(self._handle_tcp, self.host, self.tcp_port)
+        self._flusher = asyncio.create_task(self._flush_loop())
+        return self
+
+    @property
+    def udp_address(self) -> Optional[Tuple[str, int]]:
+        return self._transport.get_extra_info('sockname')[:2] if self._transport else None
+
+    @property
+    def tcp_address(self) -> Optional[Tuple[str, int]]:
+        return self._server.sockets[0].getsockname()[:2] if self._server else None
+
+    def receive(self, data: bytes, peer: str, drop: bool = True):
+        """Encolar uno o varios mensajes (separados por saltos de línea) de ``peer``
+
+        Con ``drop``, lo que llega con ``max_pending`` líneas ya pendientes se
+        descarta (UDP); TCP espera antes de leer y no descarta.
+        """
+        self.stats['bytes'] += len(data)
+        for raw in data.decode('utf-8', 'replace').splitlines():
+            if not raw:
+                continue
+            if drop and self._pending_count >= self.max_pending:
+                self.stats['dropped'] += 1
+                continue
+            host, message = parse_syslog(raw)
+            self._pending[f"syslog:{host or peer}"].append(message)
+            self._pending_count += 1
+            self.stats['messages'] += 1
+        if self._pending_count >= self.batch_size:
+            self._full.set()
+
+    async def _handle_tcp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info('peername')[0]
+        self._clients.add(writer)
+        self.stats['tcp_connections'] += 1
+        try:
+            while True:
+                if self._pending_count >= self.max_pending and not self._stopping:
+                    # Contrapresión: sin leer del socket hasta que el siguiente lote se entregue
+                    self.stats['tcp_pauses'] += 1
+                    self._room.clear()
+                    self._full.set()
+                    await self._room.wait()
+                    continue
+                first = await reader.read(1)
+                if not first:
+                    break
+                if not first.isdigit():
+                    self.receive(first + await reader.readuntil(b'\n'), peer, drop=False)
+                    continue
+                head = first + await reader.readuntil(b' ')
+                if head[:-1].isdigit():
+                    # Octet-counting (RFC 6587): "<longitud> <mensaje>"
+                    length = int(head[:-1])
+                    if length > self.max_message_bytes:
+                        break
+                    self.receive(await reader.readexactly(length), peer, drop=False)
+                else:
+                    # Línea sin cabecera que empieza por un dígito (p. ej. una fecha)
+                    self.receive(head + await reader.readuntil(b'\n'), peer, drop=False)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Entregar lo pendiente al ``sink`` (en un hilo, un lote por origen)"""
+        async with self._sink_lock:
+            if not self._pending_count:
+                return
+            pending, self._pending, self._pending_count = self._pending, defaultdict(list), 0
+            self._room.set()
+            for source, lines in pending.items():
+                try:
+                    await asyncio.to_thread(self.sink, lines, source)
+                except Exception as e:
+                    logger.error(f"Syslog sink failed for {source}: {e}")
+                self.stats['batches'] += 1
+
+    async def stop(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._clients):
+                writer.close()
+            self._stopping = True
+            self._room.set()  # Despertar las conexiones en pausa para que vean el cierre
+            await self._server.wait_closed()
+            self._server = None
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats, udp=self.udp_address, tcp=self.tcp_address, pending=self._pending_count)
@@ -44,6 +44,16 @@ import numpy as np
 from collections import defaultdict
 import xml.etree.ElementTree as ET
 
+from smartcompute.industrial.scada.advisories import Advisory, AdvisoryImport, VulnerabilityKnowledgeBase
+from smartcompute.industrial.scada.scan_state import (
+    VULNERABILITY_UPSERT,
+    AssetScanLedger,
+    VulnerabilityAggregates,
+    asset_fingerprint,
+    save_zone_scan,
+    vulnerability_row,
+)
+
 class VulnerabilitySeverity(Enum):
     """Severidad de vulnerabilidades con scoring CVSS"""
     CRITICAL = "critical"     # 9.0-10.0
@@ -183,9 +193,9 @@ class ThreatIntelligence:
 class IndustrialVulnerabilityManager:
     """Gestor principal de vulnerabilidades industriales"""
 
-    def __init__(self):
+    def __init__(self, db_path: Optional[Union[str, Path]] = None):
         self.logger = self.setup_logging()
-        self.db_path = Path(__file__).parent / "industrial_vulnerabilities.db"
+        self.db_path = Path(db_path) if db_path else Path(__file__).parent / "industrial_vulnerabilities.db"
 
         # Estado del sistema
         self.plant_zones = {}
@@ -198,6 +208,13 @@ class IndustrialVulnerabilityManager:
         self.cvss_industrial_modifiers = self._load_cvss_modifiers()
 
         self.init_database()
+        # Avisos ICS importados de feeds locales, indexados por producto y versión
+        self.knowledge_base = VulnerabilityKnowledgeBase(self.db_path)
+        # Estado incremental: huellas del último escaneo, hallazgos por activo y agregados del dashboard
+        self.scan_ledger = AssetScanLedger()
+        self.aggregates = VulnerabilityAggregates()
+        self._asset_findings: Dict[str, set] = defaultdict(set)
+        self.load_scan_state()
         self.load_plant_configuration()
 
         self.logger.info("🛡️ Industrial Vulnerability Manager initialized")
@@ -342,6 +359,54 @@ class IndustrialVulnerabilityManager:
         conn.commit()
         conn.close()
 
+    def load_scan_state(self):
+        """Cargar hallazgos persistidos y el ledger de escaneos (sin re-escanear nada)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self.scan_ledger.load(conn)
+            conn.commit()
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute('SELECT * FROM vulnerabilities').fetchall()
+        finally:
+            conn.close()
+
+        for row in rows:
+            self._track(Vulnerability(
+                vuln_id=row['vuln_id'],
+                cve_id=row['cve_id'],
+                title=row['title'],
+                description=row['description'],
+                severity=VulnerabilitySeverity(row['severity']),
+                cvss_score=row['cvss_score'],
+                cvss_vector=row['cvss_vector'],
+                affected_assets=json.loads(row['affected_assets'] or '[]'),
+                discovery_date=self._parse_timestamp(row['discovery_date']),
+                source=row['source'],
+                exploit_available=bool(row['exploit_available']),
+                exploit_complexity=row['exploit_complexity'],
+                threat_actor_interest=row['threat_actor_interest'],
+                industrial_impact=json.loads(row['industrial_impact'] or '{}'),
+                safety_impact=bool(row['safety_impact']),
+                production_impact=bool(row['production_impact']),
+                environmental_impact=bool(row['environmental_impact']),
+                affected_zones=json.loads(row['affected_zones'] or '[]'),
+                business_priority=row['business_priority'],
+                technical_priority=row['technical_priority'],
+                operational_impact_hours=row['operational_impact_hours'],
+                remediation_status=RemediationStatus(row['remediation_status']),
+                assigned_to=row['assigned_to'],
+                remediation_plan=json.loads(row['remediation_plan']) if row['remediation_plan'] else None,
+                estimated_effort_hours=row['estimated_effort_hours'],
+                target_resolution_date=self._parse_timestamp(row['target_resolution_date'])
+            ))
+
+        if rows:
+            self.logger.info(f"📂 Loaded {len(rows)} vulnerabilities and {len(self.scan_ledger.records)} asset scan records")
+
+    @staticmethod
+    def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+        return datetime.fromisoformat(value) if value else None
+
     def load_plant_configuration(self):
         """Cargar configuración de planta y zonas"""
         # Configuración de ejemplo de planta industrial
@@ -594,51 +659,137 @@ class IndustrialVulnerabilityManager:
         conn.commit()
         conn.close()
 
-    def discover_vulnerabilities_by_zone(self, zone_id: str) -> List[Vulnerability]:
-        """Descubrir vulnerabilidades específicas por zona"""
+    def discover_vulnerabilities_by_zone(self, zone_id: str,
+                                         assets: Optional[List[IndustrialAsset]] = None) -> List[Vulnerability]:
+        """Descubrir vulnerabilidades específicas por zona (todos sus activos, o sólo ``assets``)"""
         if zone_id not in self.plant_zones:
             return []
+        if assets is None:
+            assets = [asset for asset in self.industrial_assets.values() if asset.zone_id == zone_id]
 
-        zone = self.plant_zones[zone_id]
-        zone_assets = [asset for asset in self.industrial_assets.values()
-                      if asset.zone_id == zone_id]
+        discovered_vulnerabilities, _ = self._rescan_assets(zone_id, assets)
+        self.logger.info(f"🔍 Discovered {len(discovered_vulnerabilities)} vulnerabilities in zone {zone_id}")
+        return discovered_vulnerabilities
 
-        discovered_vulnerabilities = []
+    def _rescan_assets(self, zone_id: str, assets: List[IndustrialAsset]) -> Tuple[List[Vulnerability], List[str]]:
+        """Sustituir los hallazgos de esos activos; devuelve (hallazgos, ids que desaparecieron)"""
+        discovered, removed = self._plan_rescan(zone_id, assets)
+        self._apply_rescan(assets, discovered, removed)
+        return discovered, removed
 
-        # Simular descubrimiento de vulnerabilidades por activo
-        for asset in zone_assets:
-            asset_vulns = self._scan_asset_vulnerabilities(asset)
-            for vuln in asset_vulns:
+    def _plan_rescan(self, zone_id: str, assets: List[IndustrialAsset]) -> Tuple[List[Vulnerability], List[str]]:
+        """Hallazgos nuevos de esos activos e ids que desaparecen, sin tocar el estado en memoria"""
+        zone = self.plant_zones[zone_id]
+        discovered, removed = [], []
+
+        for asset in assets:
+            previous = set(self._asset_findings.get(asset.asset_id, ()))
+            for vuln in self._scan_asset_vulnerabilities(asset):
                 vuln.affected_zones = [zone_id]
                 # Calcular priorización contextual
                 vuln.business_priority = self._calculate_business_priority(vuln, zone)
                 vuln.technical_priority = self._calculate_technical_priority(vuln, asset)
                 vuln.operational_impact_hours = self._estimate_operational_impact(vuln, zone)
 
-                discovered_vulnerabilities.append(vuln)
-                self.vulnerabilities[vuln.vuln_id] = vuln
-
-        self.logger.info(f"🔍 Discovered {len(discovered_vulnerabilities)} vulnerabilities in zone {zone_id}")
-        return discovered_vulnerabilities
+                # Un hallazgo que ya existía conserva su fecha y su remediación
+                existing = self.vulnerabilities.get(vuln.vuln_id)
+                if existing is not None:
+                    vuln.discovery_date = existing.discovery_date
+                    vuln.remediation_status = existing.remediation_status
+                    vuln.assigned_to = existing.assigned_to
+                    vuln.remediation_plan = existing.remediation_plan
+                    vuln.estimated_effort_hours = existing.estimated_effort_hours
+                    vuln.target_resolution_date = existing.target_resolution_date
+                previous.discard(vuln.vuln_id)
+                discovered.append(vuln)
+
+            removed.extend(previous)
+
+        return discovered, removed
+
+    def _apply_rescan(self, assets: List[IndustrialAsset], discovered: List[Vulnerability], removed: List[str]):
+        """Llevar a memoria (hallazgos por activo y agregados) un re-escaneo ya calculado"""
+        for asset in assets:
+            self._asset_findings.pop(asset.asset_id, None)
+        for vuln_id in removed:
+            self._untrack(vuln_id)
+        for vuln in discovered:
+            self._track(vuln)
+
+    def _track(self, vuln: Vulnerability):
+        self.vulnerabilities[vuln.vuln_id] = vuln
+        self.aggregates.upsert(vuln)
+        for asset_id in vuln.affected_assets:
+            self._asset_findings[asset_id].add(vuln.vuln_id)
+
+    def _untrack(self, vuln_id: str):
+        vuln = self.vulnerabilities.pop(vuln_id, None)
+        if vuln is None:
+            return
+        self.aggregates.discard(vuln_id)
+        for asset_id in vuln.affected_assets:
+            self._asset_findings.get(asset_id, set()).discard(vuln_id)
+
+    @staticmethod
+    def _finding_id(asset_id: str, key: str) -> str:
+        """Id estable de un hallazgo (aviso, CVE o comprobación + activo): un re-escaneo lo actualiza"""
+        return f"vuln_{hashlib.sha1(f'{key}|{asset_id}'.encode()).hexdigest()[:12]}"
+
+    def import_advisories(self, path: Union[str, Path]) -> AdvisoryImport:
+        """Importar avisos ICS de un fichero JSON o directorio de feeds (incremental)"""
+        result = self.knowledge_base.import_path(path)
+        self.logger.info(f"📥 Advisories imported from {path}: {result.added} new, {result.updated} updated, "
+                         f"{result.removed} withdrawn, {result.files_skipped} unchanged files skipped")
+        return result
 
     def _scan_asset_vulnerabilities(self, asset: IndustrialAsset) -> List[Vulnerability]:
         """Escanear vulnerabilidades en activo específico"""
-        vulnerabilities = []
+        # Avisos que afectan al firmware del activo, vía el índice de la base de conocimiento
+        advisories = self.knowledge_base.match(asset.manufacturer, asset.model, asset.firmware_version)
+        vulnerabilities = [self._vulnerability_from_advisory(advisory, asset) for advisory in advisories]
+        known_cves = {advisory.cve_id for advisory in advisories if advisory.cve_id}
 
-        # Vulnerabilidades de ejemplo basadas en tipo de activo y servicios
+        # Comprobaciones de ejemplo basadas en tipo de activo y servicios
+        checks = []
         if asset.asset_type == "PLC":
-            vulnerabilities.extend(self._get_plc_vulnerabilities(asset))
+            checks = self._get_plc_vulnerabilities(asset)
         elif asset.asset_type == "HMI":
-            vulnerabilities.extend(self._get_hmi_vulnerabilities(asset))
+            checks = self._get_hmi_vulnerabilities(asset)
         elif asset.asset_type == "UPS":
-            vulnerabilities.extend(self._get_ups_vulnerabilities(asset))
+            checks = self._get_ups_vulnerabilities(asset)
         elif asset.asset_type == "SCADA Server":
-            vulnerabilities.extend(self._get_scada_vulnerabilities(asset))
+            checks = self._get_scada_vulnerabilities(asset)
         elif asset.asset_type == "Temperature Controller":
-            vulnerabilities.extend(self._get_controller_vulnerabilities(asset))
+            checks = self._get_controller_vulnerabilities(asset)
 
+        # Un CVE que ya viene de un aviso importado no se duplica
+        for vuln in checks:
+            if vuln.cve_id is None or vuln.cve_id not in known_cves:
+                vuln.vuln_id = self._finding_id(asset.asset_id, vuln.cve_id or vuln.title)
+                vulnerabilities.append(vuln)
         return vulnerabilities
 
+    def _vulnerability_from_advisory(self, advisory: Advisory, asset: IndustrialAsset) -> Vulnerability:
+        """Aviso de la base de conocimiento → vulnerabilidad del activo"""
+        return Vulnerability(
+            vuln_id=self._finding_id(asset.asset_id, advisory.advisory_id),
+            cve_id=advisory.cve_id,
+            title=advisory.title,
+            description=advisory.description,
+            severity=VulnerabilitySeverity(advisory.severity),
+            cvss_score=advisory.cvss_score,
+            cvss_vector=advisory.cvss_vector,
+            affected_assets=[asset.asset_id],
+            discovery_date=datetime.now(),
+            source=f"{advisory.source} ({advisory.advisory_id})",
+            exploit_available=advisory.exploit_available,
+            exploit_complexity=advisory.exploit_complexity,
+            industrial_impact=dict(advisory.industrial_impact),
+            safety_impact=advisory.safety_impact,
+            production_impact=advisory.production_impact,
+            environmental_impact=advisory.environmental_impact
+        )
+
     def _get_plc_vulnerabilities(self, asset: IndustrialAsset) -> List[Vulnerability]:
         """Obtener vulnerabilidades específicas de PLC"""
         vulns = []
@@ -887,74 +1038,112 @@ class IndustrialVulnerabilityManager:
 
         return round(impact_hours, 2)
 
-    async def scan_all_zones(self) -> Dict[str, List[Vulnerability]]:
-        """Escanear vulnerabilidades en todas las zonas"""
-        self.logger.info("🔍 Starting comprehensive vulnerability scan of all zones...")
+    async def scan_all_zones(self, force: bool = False) -> Dict[str, List[Vulnerability]]:
+        """Escanear vulnerabilidades en todas las zonas
+
+        Sólo se vuelven a escanear los activos nuevos, los que cambiaron
+        (firmware, modelo, servicios, zona…) y los afectados por avisos
+        importados después de su último escaneo; ``force`` los escanea todos.
+        Devuelve las vulnerabilidades vigentes de cada zona.
+        """
+        self.logger.info("🔍 Starting vulnerability scan of all zones...")
+
+        # Activos que ya no existen: fuera sus hallazgos y su entrada del ledger, primero en disco
+        retired = [asset_id for asset_id in set(self._asset_findings) | set(self.scan_ledger.records)
+                   if asset_id not in self.industrial_assets]
+        if retired:
+            removed = [vuln_id for asset_id in retired for vuln_id in self._asset_findings.get(asset_id, ())]
+            await asyncio.to_thread(self._save_scan, [], removed, [], tuple(retired))
+            for asset_id in retired:
+                self._asset_findings.pop(asset_id, None)
+            for vuln_id in removed:
+                self._untrack(vuln_id)
+            self.scan_ledger.forget(retired)
+
+        zone_assets = defaultdict(list)
+        for asset in self.industrial_assets.values():
+            zone_assets[asset.zone_id].append(asset)
+
+        scanned_assets = 0
 
-        zone_vulnerabilities = {}
-        scan_tasks = []
-
-        for zone_id in self.plant_zones.keys():
-            task = asyncio.create_task(
-                self._scan_zone_async(zone_id)
-            )
-            scan_tasks.append((zone_id, task))
+        for zone_id, zone in self.plant_zones.items():
+            pending = []
+            for asset in zone_assets[zone_id]:
+                fingerprint = asset_fingerprint(asset, zone)
+                revision = self.knowledge_base.revision_for(asset.manufacturer, asset.model)
+                if force or self.scan_ledger.reason(asset.asset_id, fingerprint, revision):
+                    pending.append((asset, fingerprint))
 
-        # Ejecutar escaneos en paralelo
-        for zone_id, task in scan_tasks:
             try:
-                vulnerabilities = await task
-                zone_vulnerabilities[zone_id] = vulnerabilities
-
-                # Guardar en base de datos
-                for vuln in vulnerabilities:
-                    await self.save_vulnerability(vuln)
-
+                if pending:
+                    await self._scan_zone_async(zone_id, pending)
+                    scanned_assets += len(pending)
             except Exception as e:
                 self.logger.error(f"Error scanning zone {zone_id}: {e}")
-                zone_vulnerabilities[zone_id] = []
 
-        total_vulns = sum(len(vulns) for vulns in zone_vulnerabilities.values())
-        self.logger.info(f"✅ Scan completed: {total_vulns} vulnerabilities found across {len(zone_vulnerabilities)} zones")
+        # El resultado se monta con el estado ya podado y confirmado
+        zone_vulnerabilities = {}
+        for zone_id in self.plant_zones:
+            zone_aggregate = self.aggregates.zones.get(zone_id)
+            zone_vulnerabilities[zone_id] = [self.vulnerabilities[vuln_id]
+                                             for vuln_id in sorted(zone_aggregate.vuln_ids)] if zone_aggregate else []
+
+        total_vulns = len(self.vulnerabilities)
+        self.logger.info(f"✅ Scan completed: {scanned_assets} of {len(self.industrial_assets)} assets rescanned, "
+                         f"{total_vulns} vulnerabilities across {len(zone_vulnerabilities)} zones")
 
         return zone_vulnerabilities
 
-    async def _scan_zone_async(self, zone_id: str) -> List[Vulnerability]:
-        """Escanear zona específica de manera asíncrona"""
-        # Simular tiempo de escaneo
-        await asyncio.sleep(0.5)
-        return self.discover_vulnerabilities_by_zone(zone_id)
+    async def _scan_zone_async(self, zone_id: str, pending: List[Tuple[IndustrialAsset, str]]) -> List[Vulnerability]:
+        """Re-escanear activos de una zona y persistir el resultado en una transacción"""
+        revision = self.knowledge_base.revision
+        assets = [asset for asset, _ in pending]
+        findings, removed = self._plan_rescan(zone_id, assets)
+
+        scanned_at = datetime.now()
+        ledger_rows = [(asset.asset_id, fingerprint, revision, scanned_at) for asset, fingerprint in pending]
+        await asyncio.to_thread(self._save_scan, findings, removed, ledger_rows)
+
+        # Sólo lo confirmado en disco pasa a memoria: si el guardado falla, ambos siguen igual
+        self._apply_rescan(assets, findings, removed)
+        self.scan_ledger.commit(ledger_rows)
+        for asset, _ in pending:
+            asset.last_scan = scanned_at
+        return findings
+
+    def _save_scan(self, findings: List[Vulnerability], removed: List[str], ledger_rows: List[tuple],
+                   forgotten_assets: Tuple[str, ...] = ()):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            save_zone_scan(conn, findings, removed, ledger_rows, forgotten_assets)
+        finally:
+            conn.close()
 
     async def save_vulnerability(self, vuln: Vulnerability):
         """Guardar vulnerabilidad en base de datos"""
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            INSERT OR REPLACE INTO vulnerabilities
-            (vuln_id, cve_id, title, description, severity, cvss_score, cvss_vector,
-             affected_assets, discovery_date, source, exploit_available, exploit_complexity,
-             threat_actor_interest, industrial_impact, safety_impact, production_impact,
-             environmental_impact, affected_zones, business_priority, technical_priority,
-             operational_impact_hours, remediation_status, assigned_to, remediation_plan,
-             estimated_effort_hours, target_resolution_date, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            vuln.vuln_id, vuln.cve_id, vuln.title, vuln.description,
-            vuln.severity.value, vuln.cvss_score, vuln.cvss_vector,
-            json.dumps(vuln.affected_assets), vuln.discovery_date, vuln.source,
-            vuln.exploit_available, vuln.exploit_complexity, vuln.threat_actor_interest,
-            json.dumps(vuln.industrial_impact), vuln.safety_impact, vuln.production_impact,
-            vuln.environmental_impact, json.dumps(vuln.affected_zones),
-            vuln.business_priority, vuln.technical_priority, vuln.operational_impact_hours,
-            vuln.remediation_status.value, vuln.assigned_to,
-            json.dumps(vuln.remediation_plan, default=str) if vuln.remediation_plan else None,
-            vuln.estimated_effort_hours, vuln.target_resolution_date,
-            datetime.now()
-        ))
-
-        conn.commit()
-        conn.close()
+        try:
+            with conn:
+                conn.execute(VULNERABILITY_UPSERT, vulnerability_row(vuln))
+        finally:
+            conn.close()
+
+    def update_remediation(self, vuln_id: str, status: RemediationStatus, **changes) -> Vulnerability:
+        """Cambiar el estado de remediación (y ``assigned_to``, ``estimated_effort_hours``…) manteniendo los agregados"""
+        vuln = self.vulnerabilities[vuln_id]
+        vuln.remediation_status = status
+        for name, value in changes.items():
+            if not hasattr(vuln, name):
+                raise AttributeError(f"Vulnerability has no field {name!r}")
+            setattr(vuln, name, value)
+        self.aggregates.upsert(vuln)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.execute(VULNERABILITY_UPSERT, vulnerability_row(vuln))
+        finally:
+            conn.close()
+        return vuln
 
     def generate_vulnerability_map(self) -> Dict:
         """Generar mapa de vulnerabilidades por ubicación"""
@@ -966,20 +1155,19 @@ class IndustrialVulnerabilityManager:
                 "risk_heatmap": []
             },
             "summary": {
-                "total_vulnerabilities": len(self.vulnerabilities),
-                "critical_vulnerabilities": len([v for v in self.vulnerabilities.values()
-                                               if v.severity == VulnerabilitySeverity.CRITICAL]),
-                "zones_affected": len(set().union(*[v.affected_zones for v in self.vulnerabilities.values()])),
+                "total_vulnerabilities": len(self.aggregates),
+                "critical_vulnerabilities": self.aggregates.severity[VulnerabilitySeverity.CRITICAL.value],
+                "zones_affected": len(self.aggregates.zones),
                 "highest_risk_zone": None,
-                "remediation_backlog_hours": sum(v.estimated_effort_hours for v in self.vulnerabilities.values())
+                "remediation_backlog_hours": round(self.aggregates.effort_total, 2)
             }
         }
 
         # Mapear zonas con información de riesgo
         for zone_id, zone in self.plant_zones.items():
-            zone_vulns = [v for v in self.vulnerabilities.values() if zone_id in v.affected_zones]
-
-            zone_risk_score = sum(v.business_priority * v.technical_priority for v in zone_vulns) / max(len(zone_vulns), 1)
+            zone_aggregate = self.aggregates.zones.get(zone_id)
+            zone_vuln_ids = sorted(zone_aggregate.vuln_ids) if zone_aggregate else []
+            zone_risk_score = zone_aggregate.risk_score if zone_aggregate else 0.0
 
             zone_info = {
                 "zone_id": zone_id,
@@ -987,20 +1175,20 @@ class IndustrialVulnerabilityManager:
                 "coordinates": asdict(zone.coordinates),
                 "area_m2": zone.area_m2,
                 "criticality": zone.criticality.value,
-                "vulnerability_count": len(zone_vulns),
+                "vulnerability_count": len(zone_vuln_ids),
                 "risk_score": round(zone_risk_score, 2),
-                "vulnerabilities": [v.vuln_id for v in zone_vulns]
+                "vulnerabilities": zone_vuln_ids
             }
 
             vulnerability_map["plant_layout"]["zones"].append(zone_info)
 
             # Generar puntos de calor para mapa
-            if zone_vulns:
+            if zone_vuln_ids:
                 heat_point = {
                     "x": zone.coordinates.x,
                     "y": zone.coordinates.y,
                     "intensity": min(100, zone_risk_score * 10),
-                    "vulnerability_count": len(zone_vulns),
+                    "vulnerability_count": len(zone_vuln_ids),
                     "zone_name": zone.name
                 }
                 vulnerability_map["plant_layout"]["risk_heatmap"].append(heat_point)
@@ -1053,58 +1241,43 @@ class IndustrialVulnerabilityManager:
         return dashboard_data
 
     def _calculate_summary_metrics(self) -> Dict:
-        """Calcular métricas de resumen"""
-        total_vulns = len(self.vulnerabilities)
-        if total_vulns == 0:
+        """Calcular métricas de resumen (desde los agregados incrementales)"""
+        totals = self.aggregates
+        if not len(totals):
             return {"total": 0, "risk_score": 0, "zones_affected": 0, "assets_affected": 0}
 
-        # Risk score promedio ponderado
-        risk_scores = [v.business_priority * v.technical_priority for v in self.vulnerabilities.values()]
-        avg_risk_score = sum(risk_scores) / len(risk_scores)
-
-        affected_zones = set().union(*[v.affected_zones for v in self.vulnerabilities.values()])
-        affected_assets = set().union(*[v.affected_assets for v in self.vulnerabilities.values()])
-
         return {
-            "total_vulnerabilities": total_vulns,
-            "average_risk_score": round(avg_risk_score, 2),
-            "zones_affected": len(affected_zones),
-            "assets_affected": len(affected_assets),
-            "critical_count": len([v for v in self.vulnerabilities.values()
-                                 if v.severity == VulnerabilitySeverity.CRITICAL]),
-            "high_count": len([v for v in self.vulnerabilities.values()
-                             if v.severity == VulnerabilitySeverity.HIGH]),
-            "safety_impact_count": len([v for v in self.vulnerabilities.values() if v.safety_impact]),
-            "production_impact_count": len([v for v in self.vulnerabilities.values() if v.production_impact])
+            "total_vulnerabilities": len(totals),
+            "average_risk_score": round(totals.average_risk, 2),
+            "zones_affected": len(totals.zones),
+            "assets_affected": len(totals.assets),
+            "critical_count": totals.severity[VulnerabilitySeverity.CRITICAL.value],
+            "high_count": totals.severity[VulnerabilitySeverity.HIGH.value],
+            "safety_impact_count": totals.flags["safety_impact"],
+            "production_impact_count": totals.flags["production_impact"]
         }
 
     def _get_severity_distribution(self) -> Dict:
         """Obtener distribución por severidad"""
-        severity_counts = defaultdict(int)
-        for vuln in self.vulnerabilities.values():
-            severity_counts[vuln.severity.value] += 1
-
-        return dict(severity_counts)
+        return dict(self.aggregates.severity)
 
     def _get_zone_risk_analysis(self) -> List[Dict]:
-        """Obtener análisis de riesgo por zona"""
+        """Obtener análisis de riesgo por zona (O(zonas))"""
         zone_analysis = []
 
         for zone_id, zone in self.plant_zones.items():
-            zone_vulns = [v for v in self.vulnerabilities.values() if zone_id in v.affected_zones]
-
-            if zone_vulns:
-                risk_score = sum(v.business_priority * v.technical_priority for v in zone_vulns) / len(zone_vulns)
+            zone_aggregate = self.aggregates.zones.get(zone_id)
 
+            if zone_aggregate:
                 analysis = {
                     "zone_id": zone_id,
                     "zone_name": zone.name,
                     "criticality": zone.criticality.value,
-                    "vulnerability_count": len(zone_vulns),
-                    "risk_score": round(risk_score, 2),
-                    "critical_vulns": len([v for v in zone_vulns if v.severity == VulnerabilitySeverity.CRITICAL]),
-                    "high_vulns": len([v for v in zone_vulns if v.severity == VulnerabilitySeverity.HIGH]),
-                    "estimated_impact_hours": sum(v.operational_impact_hours for v in zone_vulns)
+                    "vulnerability_count": zone_aggregate.count,
+                    "risk_score": round(zone_aggregate.risk_score, 2),
+                    "critical_vulns": zone_aggregate.severity[VulnerabilitySeverity.CRITICAL.value],
+                    "high_vulns": zone_aggregate.severity[VulnerabilitySeverity.HIGH.value],
+                    "estimated_impact_hours": round(zone_aggregate.impact_hours, 2)
                 }
 
                 zone_analysis.append(analysis)
@@ -1113,38 +1286,27 @@ class IndustrialVulnerabilityManager:
 
     def _get_remediation_progress(self) -> Dict:
         """Obtener progreso de remediación"""
-        status_counts = defaultdict(int)
-        total_effort = 0.0
-        completed_effort = 0.0
-
-        for vuln in self.vulnerabilities.values():
-            status_counts[vuln.remediation_status.value] += 1
-            total_effort += vuln.estimated_effort_hours
-
-            if vuln.remediation_status == RemediationStatus.COMPLETED:
-                completed_effort += vuln.estimated_effort_hours
-
+        totals = self.aggregates
+        total_effort = totals.effort_total
+        completed_effort = totals.effort_completed
         progress_percentage = (completed_effort / total_effort * 100) if total_effort > 0 else 0
 
         return {
-            "status_distribution": dict(status_counts),
+            "status_distribution": dict(totals.status),
             "total_effort_hours": round(total_effort, 2),
             "completed_effort_hours": round(completed_effort, 2),
             "progress_percentage": round(progress_percentage, 2),
-            "overdue_count": len([v for v in self.vulnerabilities.values()
-                                if v.target_resolution_date and v.target_resolution_date < datetime.now()])
+            "overdue_count": totals.overdue()
         }
 
     def _get_threat_landscape(self) -> Dict:
         """Obtener panorama de amenazas"""
+        flags = self.aggregates.flags
         return {
-            "exploit_available_count": len([v for v in self.vulnerabilities.values() if v.exploit_available]),
-            "high_actor_interest": len([v for v in self.vulnerabilities.values()
-                                      if v.threat_actor_interest in ["high", "very_high"]]),
-            "industrial_specific": len([v for v in self.vulnerabilities.values()
-                                      if v.industrial_impact]),
-            "remote_exploitable": len([v for v in self.vulnerabilities.values()
-                                     if "AV:N" in v.cvss_vector])
+            "exploit_available_count": flags["exploit_available"],
+            "high_actor_interest": flags["high_actor_interest"],
+            "industrial_specific": flags["industrial_specific"],
+            "remote_exploitable": flags["remote_exploitable"]
         }
 
     def _get_compliance_status(self) -> Dict:
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+SmartCompute Industrial - Alarm Engine
+======================================
+
+Motor de alarmas por (variable, tipo) al estilo ISA-18.2:
+
+- Máquina de estados NORMAL → ACTIVE → ACKED → NORMAL, o
+  ACTIVE → CLEARED (retorno a normal sin reconocer) → NORMAL.
+- La condición usa histéresis (banda muerta para salir) y retardos de
+  activación/desactivación, evaluados como arrays para todo el lote.
+- Sólo las transiciones entran en Python: supresión por shelving,
+  chattering (demasiadas activaciones en un minuto) y avalancha por área
+  (más de N alarmas en 10 min), marcado first-out, escalamiento de
+  alarmas críticas sin reconocer y vencimiento de shelving con montículos
+  por plazo en lugar de recorrer todas las alarmas con un temporizador.
+
+El motor no conoce ``IndustrialAlarm``: devuelve ``AlarmEvent`` y el
+monitor decide qué guardar y anunciar.
+"""
+
+import heapq
+from collections import deque
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class AlarmState(IntEnum):
+    """Estado ISA-18.2 de una alarma"""
+    NORMAL = 0
+    ACTIVE = 1      # Activa sin reconocer
+    ACKED = 2       # Activa reconocida
+    CLEARED = 3     # Retornó a normal sin reconocer
+
+
+@dataclass
+class AlarmEvent:
+    """Transición anunciada de una alarma"""
+    kind: str               # 'active', 'acked', 'cleared', 'normal', 'shelved', 'escalated'
+    alarm_id: str
+    variable_id: str
+    level: int              # 1..N, posición en la tabla de niveles
+    alarm_type: str
+    timestamp: float
+    value: float
+    state: AlarmState
+    area: str
+    first_out: bool = False
+
+
+class AlarmEngine:
+    """
+    Estados de alarma en arrays ``(variable, nivel)``.
+
+    ``levels`` sigue el formato de ``ALARM_LEVELS``: ``(tipo, severidad,
+    campo del umbral, texto)``; los campos que terminan en ``_high`` se
+    disparan por encima del umbral y el resto por debajo.  Las variables
+    aportan ``location`` (área), ``min_value``/``max_value`` y, si las
+    tienen, ``alarm_deadband``, ``alarm_on_delay_s`` y ``alarm_off_delay_s``.
+    """
+
+    def __init__(self, levels: Sequence[Tuple], flood_threshold: int = 10, flood_window_s: float = 600.0,
+                 chatter_count: int = 3, chatter_window_s: float = 60.0, escalation_s: float = 300.0,
+                 deadband_ratio: float = 0.01, capacity: int = 256):
+        self.levels = tuple(levels)
+        self.high = np.array([field.endswith('_high') for _, _, field, _ in self.levels])
+        self.critical = [getattr(severity, 'value', severity) == 'critical' for _, severity, _, _ in self.levels]
+        self.flood_threshold = flood_threshold
+        self.flood_window_s = flood_window_s
+        self.chatter_count = chatter_count
+        self.chatter_window_s = chatter_window_s
+        self.escalation_s = escalation_s
+        self.deadband_ratio = deadband_ratio
+
+        self.index: Dict[str, int] = {}
+        self.variable_ids: List[str] = []
+        self.areas: List[str] = []
+
+        shape = (capacity, len(self.levels))
+        self.limits = np.zeros(shape)
+        self.deadband = np.zeros(capacity)
+        self.on_delay = np.zeros(capacity)
+        self.off_delay = np.zeros(capacity)
+        self.condition = np.zeros(shape, dtype=bool)         # Condición tras histéresis y retardos
+        self.pending_since = np.full(shape, np.nan)          # Inicio del cambio de condición en espera
+        self.state = np.zeros(shape, dtype=np.int8)
+        self.annunciated = np.zeros(shape, dtype=bool)       # La activación actual se anunció
+        self.shelved_until = np.zeros(shape)
+
+        # Estado sólo de las alarmas con historia: crece con las transiciones
+        self.alarm_ids: Dict[Tuple[int, int], str] = {}
+        self.by_id: Dict[str, Tuple[int, int]] = {}
+        self.last_value: Dict[Tuple[int, int], float] = {}
+        self.chatter: Dict[Tuple[int, int], Deque[float]] = {}
+        self.area_active: Dict[str, int] = {}
+        self.area_recent: Dict[str, Deque[float]] = {}
+        self.flooded: Dict[str, bool] = {}
+        self.escalations: List[Tuple[float, str]] = []
+        self.unshelve_at: List[Tuple[float, int, int]] = []
+
+        self.stats = {'evaluations': 0, 'transitions': 0, 'annunciated': 0, 'floods': 0,
+                      'suppressed': {'shelved': 0, 'chattering': 0, 'flood': 0}}
+
+    _COLUMNS = ('limits', 'deadband', 'on_delay', 'off_delay', 'condition', 'pending_since',
+                'state', 'annunciated', 'shelved_until')
+
+    def _grow(self):
+        for name in self._COLUMNS:
+            column = getattr(self, name)
+            fill = np.nan if name == 'pending_since' else 0
+            grown = np.full((2 * len(column),) + column.shape[1:], fill, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def register(self, variables) -> np.ndarray:
+        """Registrar variables (las conocidas actualizan umbrales y retardos) y devolver sus filas"""
+        rows = []
+        for variable in variables:
+            row = self.index.get(variable.id)
+            if row is None:
+                row = len(self.variable_ids)
+                if row >= len(self.deadband):
+                    self._grow()
+                self.index[variable.id] = row
+                self.variable_ids.append(variable.id)
+                self.areas.append(variable.location)
+            else:
+                self.areas[row] = variable.location
+            self.limits[row] = [getattr(variable, field) for _, _, field, _ in self.levels]
+            deadband = getattr(variable, 'alarm_deadband', None)
+            if deadband is None:
+                deadband = (variable.max_value - variable.min_value) * self.deadband_ratio
+            self.deadband[row] = deadband
+            self.on_delay[row] = getattr(variable, 'alarm_on_delay_s', 0.0)
+            self.off_delay[row] = getattr(variable, 'alarm_off_delay_s', 0.0)
+            rows.append(row)
+        return np.asarray(rows, dtype=np.int64)
+
+    def rows_for(self, variable_ids) -> np.ndarray:
+        index = self.index
+        return np.fromiter((index[v] for v in variable_ids), dtype=np.int64)
+
+    # ── Evaluación del lote ──────────────────────────────────────
+
+    def process(self, rows: np.ndarray, t: float, values: np.ndarray) -> List[AlarmEvent]:
+        """Evaluar un lote (``values[i]`` de la fila ``rows[i]`` en el instante ``t``)"""
+        values = np.asarray(values, dtype=float)[:, None]
+        limits = self.limits[rows]
+        in_alarm = self.condition[rows]
+        band = np.where(in_alarm, self.deadband[rows, None], 0.0)
+
+        # Histéresis: para salir de alarma hay que cruzar el umbral ± banda muerta
+        raw = np.where(self.high, values >= limits - band, values <= limits + band)
+        differs = raw != in_alarm
+
+        # Retardos: el cambio debe mantenerse on/off delay segundos
+        since = self.pending_since[rows]
+        since = np.where(differs, np.where(np.isnan(since), t, since), np.nan)
+        delay = np.where(raw, self.on_delay[rows, None], self.off_delay[rows, None])
+        flip = differs & (t - since >= delay)
+        since[flip] = np.nan
+        self.pending_since[rows] = since
+        self.stats['evaluations'] += raw.size
+
+        events = self.tick(t)
+        if not flip.any():
+            return events
+
+        for i, level in zip(*np.nonzero(flip)):
+            row = int(rows[i])
+            value = float(values[i, 0])
+            if raw[i, level]:
+                self._activate(row, int(level), t, value, events)
+            else:
+                self._clear(row, int(level), t, value, events)
+        return events
+
+    def tick(self, t: float) -> List[AlarmEvent]:
+        """Vencimientos por plazo: escalamientos y fin de shelving"""
+        events = []
+        while self.escalations and self.escalations[0][0] <= t:
+            _, alarm_id = heapq.heappop(self.escalations)
+            key = self.by_id.get(alarm_id)
+            if key and self.alarm_ids.get(key) == alarm_id and self.state[key] == AlarmState.ACTIVE:
+                events.append(self._event('escalated', key, t))
+
+        while self.unshelve_at and self.unshelve_at[0][0] <= t:
+            until, row, level = heapq.heappop(self.unshelve_at)
+            key = (row, level)
+            if self.shelved_until[key] != until:
+                continue  # Re-shelving o unshelve manual posterior
+            self.shelved_until[key] = 0.0
+            if self.condition[key] and not self.annunciated[key]:
+                self._annunciate(key, t, events, first_out=False)
+        return events
+
+    def _activate(self, row: int, level: int, t: float, value: float, events: List[AlarmEvent]):
+        key = (row, level)
+        area = self.areas[row]
+        self.condition[key] = True
+        self.last_value[key] = value
+        self.stats['transitions'] += 1
+
+        first_out = self.area_active.get(area, 0) == 0
+        self.area_active[area] = self.area_active.get(area, 0) + 1
+        if self.state[key] != AlarmState.CLEARED:
+            # Una realarma sin reconocer conserva el id de la alarma anterior
+            self.alarm_ids[key] = alarm_id = f"{self.variable_ids[row]}_{self.levels[level][0]}_{int(t)}"
+            self.by_id[alarm_id] = key
+
+        # Chattering: activaciones de esta alarma dentro de la ventana
+        recent = self.chatter.setdefault(key, deque())
+        recent.append(t)
+        while recent[0] < t - self.chatter_window_s:
+            recent.popleft()
+
+        # Avalancha: activaciones del área dentro de la ventana
+        burst = self.area_recent.setdefault(area, deque())
+        burst.append(t)
+        while burst[0] < t - self.flood_window_s:
+            burst.popleft()
+        flooded = len(burst) > self.flood_threshold
+        if flooded and not self.flooded.get(area):
+            self.stats['floods'] += 1
+        self.flooded[area] = flooded
+
+        if self.shelved_until[key] > t:
+            reason = 'shelved'
+        elif len(recent) >= self.chatter_count:
+            reason = 'chattering'
+        elif flooded and not first_out and not self.critical[level]:
+            reason = 'flood'
+        else:
+            self._annunciate(key, t, events, first_out)
+            return
+        self.stats['suppressed'][reason] += 1
+        if self.state[key] == AlarmState.CLEARED:
+            return  # Sigue en la lista del operador como retorno sin reconocer
+        self.annunciated[key] = False
+        self.state[key] = AlarmState.NORMAL
+
+    def _annunciate(self, key: Tuple[int, int], t: float, events: List[AlarmEvent], first_out: bool):
+        self.annunciated[key] = True
+        self.state[key] = AlarmState.ACTIVE
+        self.stats['annunciated'] += 1
+        events.append(self._event('active', key, t, first_out))
+        if self.critical[key[1]]:
+            heapq.heappush(self.escalations, (t + self.escalation_s, self.alarm_ids[key]))
+
+    def _clear(self, row: int, level: int, t: float, value: float, events: List[AlarmEvent]):
+        key = (row, level)
+        area = self.areas[row]
+        self.condition[key] = False
+        self.last_value[key] = value
+        self.stats['transitions'] += 1
+        self.area_active[area] -= 1
+
+        if not self.annunciated[key]:
+            # Activación suprimida: nada que anunciar ni reconocer
+            self.by_id.pop(self.alarm_ids.pop(key, None), None)
+            return
+        if self.state[key] == AlarmState.ACKED:
+            self._close(key, t, events)
+        elif self.state[key] == AlarmState.ACTIVE:
+            self.state[key] = AlarmState.CLEARED
+            events.append(self._event('cleared', key, t))
+
+    def _close(self, key: Tuple[int, int], t: float, events: List[AlarmEvent]):
+        self.state[key] = AlarmState.NORMAL
+        self.annunciated[key] = False
+        events.append(self._event('normal', key, t))
+        self.by_id.pop(self.alarm_ids.pop(key, None), None)
+
+    def _event(self, kind: str, key: Tuple[int, int], t: float, first_out: bool = False) -> AlarmEvent:
+        row, level = key
+        return AlarmEvent(
+            kind=kind, alarm_id=self.alarm_ids[key], variable_id=self.variable_ids[row], level=level + 1,
+            alarm_type=self.levels[level][0], timestamp=t, value=self.last_value[key],
+            state=AlarmState(int(self.state[key])), area=self.areas[row], first_out=first_out
+        )
+
+    # ── Acciones del operador ────────────────────────────────────
+
+    def _keys(self, variable_id: str, alarm_type: Optional[str]) -> List[Tuple[int, int]]:
+        row = self.index[variable_id]
+        return [(row, level) for level, (name, _, _, _) in enumerate(self.levels)
+                if alarm_type is None or name == alarm_type]
+
+    def acknowledge(self, alarm_id: str, t: float) -> List[AlarmEvent]:
+        """Reconocer: ACTIVE → ACKED, CLEARED → NORMAL"""
+        key = self.by_id.get(alarm_id)
+        if key is None:
+            raise KeyError(alarm_id)
+        events = []
+        if self.state[key] == AlarmState.ACTIVE:
+            self.state[key] = AlarmState.ACKED
+            events.append(self._event('acked', key, t))
+        elif self.state[key] == AlarmState.CLEARED:
+            self._close(key, t, events)
+        return events
+
+    def shelve(self, variable_id: str, duration_s: float, t: float,
+               alarm_type: Optional[str] = None) -> List[AlarmEvent]:
+        """Archivar (shelve) las alarmas de una variable durante ``duration_s``"""
+        events = []
+        for key in self._keys(variable_id, alarm_type):
+            until = t + duration_s
+            self.shelved_until[key] = until
+            heapq.heappush(self.unshelve_at, (until, key[0], key[1]))
+            if self.annunciated[key]:
+                # Sale de la lista del operador; si sigue activa vuelve al vencer
+                self.annunciated[key] = False
+                self.state[key] = AlarmState.NORMAL
+                events.append(self._event('shelved', key, t))
+                if not self.condition[key]:
+                    self.by_id.pop(self.alarm_ids.pop(key, None), None)
+        return events
+
+    def unshelve(self, variable_id: str, t: float, alarm_type: Optional[str] = None) -> List[AlarmEvent]:
+        """Terminar el shelving antes de plazo"""
+        events = []
+        for key in self._keys(variable_id, alarm_type):
+            if self.shelved_until[key] > t:
+                self.shelved_until[key] = 0.0
+                if self.condition[key]:
+                    self._annunciate(key, t, events, first_out=False)
+        return events
+
+    def is_flooded(self, area: str) -> bool:
+        return self.flooded.get(area, False)
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats['suppressed'] = dict(self.stats['suppressed'])
+        stats['active'] = int(np.count_nonzero(self.condition))
+        stats['annunciated_active'] = int(np.count_nonzero(self.annunciated))
+        stats['flooded_areas'] = sorted(area for area, flooded in self.flooded.items() if flooded)
+        return stats
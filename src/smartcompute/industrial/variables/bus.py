@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+SmartCompute Industrial - Tag Update Bus
+========================================
+
+Bus pub/sub en proceso para actualizaciones de variables con reporte por
+excepción:
+
+- El monitor publica cada lote de escaneo como columnas (ids, valores,
+  calidad, instante).  El bus guarda el último valor de cada variable.
+- Cada suscripción tiene su filtro: conjunto de variables y banda muerta
+  (0 = cambio de valor) por variable.  El filtro se evalúa con arrays
+  contra el último valor *entregado* a esa suscripción, así que una deriva
+  lenta acaba notificándose aunque ningún paso individual supere la banda.
+  Un cambio de calidad, o la entrada o salida de NaN (valor no disponible),
+  se entrega siempre; NaN viaja como ``null`` en el JSON.
+- Los cambios pendientes se coalescen: un suscriptor lento recibe el
+  último valor de cada variable cambiada, nunca una cola que crece.
+- ``create_tag_stream_app()`` expone el bus por SSE
+  (``GET /api/tags/stream``) y WebSocket (``GET /ws/tags``).
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class TagSubscription:
+    """Suscripción con filtro por variable y cambios pendientes coalescidos"""
+
+    def __init__(self, bus: 'TagBus', tags: Optional[Iterable[str]] = None,
+                 deadband: Union[float, Dict[str, float]] = 0.0):
+        self.bus = bus
+        self.tags = set(tags) if tags is not None else None
+        self.deadband = deadband
+        self.closed = False
+
+        capacity = len(bus.value)
+        self.subscribed = np.zeros(capacity, dtype=bool)
+        self.band = np.zeros(capacity)
+        self.last_sent = np.full(capacity, np.nan)   # Último valor entregado
+        self.last_quality = np.zeros(capacity, dtype=np.int16)
+        self.sent = np.zeros(capacity, dtype=bool)    # Alguna vez entregada
+        self.pending = np.zeros(capacity, dtype=bool)
+        self._event = asyncio.Event()
+
+        self.stats = {'delivered': 0, 'coalesced': 0}
+        for variable_id, row in bus.index.items():
+            self._configure(variable_id, row)
+
+    def _configure(self, variable_id: str, row: int):
+        self.subscribed[row] = self.tags is None or variable_id in self.tags
+        if isinstance(self.deadband, dict):
+            self.band[row] = self.deadband.get(variable_id, 0.0)
+        else:
+            self.band[row] = self.deadband
+        # Instantánea inicial: lo ya conocido se entrega en la primera lectura
+        if self.subscribed[row] and not np.isnan(self.bus.value[row]):
+            self.pending[row] = True
+            self._event.set()
+
+    def _grow(self, capacity: int):
+        for name, fill in (('subscribed', False), ('band', 0.0), ('last_sent', np.nan),
+                           ('last_quality', 0), ('sent', False), ('pending', False)):
+            column = getattr(self, name)
+            grown = np.full(capacity, fill, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def offer(self, rows: np.ndarray, values: np.ndarray, quality: np.ndarray):
+        """Marcar como pendientes las filas suscritas que superan la banda muerta o cambian de calidad"""
+        last = self.last_sent[rows]
+        # abs(NaN - x) > band es False: las transiciones a/desde NaN se comparan aparte
+        changed = self.subscribed[rows] & (
+            ~self.sent[rows]
+            | (quality != self.last_quality[rows])
+            | (np.isnan(values) != np.isnan(last))
+            | (np.abs(values - last) > self.band[rows])
+        )
+        if not changed.any():
+            return
+        hit = rows[changed]
+        self.stats['coalesced'] += int(np.count_nonzero(self.pending[hit]))
+        self.pending[hit] = True
+        self._event.set()
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Entregar los cambios pendientes (último valor de cada variable)"""
+        rows = np.flatnonzero(self.pending)
+        self.pending[rows] = False
+        self._event.clear()
+        if not len(rows):
+            return []
+
+        bus = self.bus
+        values, quality = bus.value[rows], bus.quality[rows]
+        self.last_sent[rows] = values
+        self.last_quality[rows] = quality
+        self.sent[rows] = True
+        self.stats['delivered'] += len(rows)
+        ids = bus.variable_ids
+        return [
+            {'id': ids[row], 'value': None if value != value else value, 'quality': q, 'timestamp': timestamp}
+            for row, value, q, timestamp in zip(
+                rows.tolist(), values.tolist(), quality.tolist(), bus.timestamp[rows].tolist()
+            )
+        ]
+
+    async def get(self) -> List[Dict[str, Any]]:
+        """Esperar cambios y devolverlos; lista vacía si la suscripción se cerró"""
+        while not self.closed:
+            updates = self.drain()
+            if updates:
+                return updates
+            await self._event.wait()
+        return []
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> List[Dict[str, Any]]:
+        updates = await self.get()
+        if not updates:
+            raise StopAsyncIteration
+        return updates
+
+    def close(self):
+        self.closed = True
+        self._event.set()
+        self.bus.unsubscribe(self)
+
+
+class TagBus:
+    """Último valor por variable + reparto por excepción a las suscripciones"""
+
+    def __init__(self, capacity: int = 256):
+        self.index: Dict[str, int] = {}
+        self.variable_ids: List[str] = []
+        self.value = np.full(capacity, np.nan)
+        self.quality = np.zeros(capacity, dtype=np.int16)
+        self.timestamp = np.zeros(capacity)
+        self.subscriptions: List[TagSubscription] = []
+        self.stats = {'published': 0}
+
+    def _register(self, variable_ids: Sequence[str]):
+        for variable_id in variable_ids:
+            if variable_id in self.index:
+                continue
+            row = len(self.variable_ids)
+            if row >= len(self.value):
+                capacity = 2 * len(self.value)
+                for name, fill in (('value', np.nan), ('quality', 0), ('timestamp', 0.0)):
+                    column = getattr(self, name)
+                    grown = np.full(capacity, fill, dtype=column.dtype)
+                    grown[:len(column)] = column
+                    setattr(self, name, grown)
+                for subscription in self.subscriptions:
+                    subscription._grow(capacity)
+            self.index[variable_id] = row
+            self.variable_ids.append(variable_id)
+            for subscription in self.subscriptions:
+                subscription._configure(variable_id, row)
+
+    def publish(self, variable_ids: Sequence[str], values: np.ndarray, quality: np.ndarray,
+                timestamp: float):
+        """Publicar un lote de escaneo (``timestamp`` en epoch s)"""
+        index = self.index
+        try:
+            rows = np.fromiter((index[v] for v in variable_ids), dtype=np.int64, count=len(variable_ids))
+        except KeyError:
+            self._register(variable_ids)
+            rows = np.fromiter((index[v] for v in variable_ids), dtype=np.int64, count=len(variable_ids))
+
+        values = np.asarray(values, dtype=float)
+        self.value[rows] = values
+        self.quality[rows] = quality
+        self.timestamp[rows] = timestamp
+        self.stats['published'] += len(rows)
+        quality = self.quality[rows]
+        for subscription in self.subscriptions:
+            subscription.offer(rows, values, quality)
+
+    def subscribe(self, tags: Optional[Iterable[str]] = None,
+                  deadband: Union[float, Dict[str, float]] = 0.0) -> TagSubscription:
+        """Suscribirse a ``tags`` (None = todas) con banda muerta absoluta o por variable"""
+        subscription = TagSubscription(self, tags, deadband)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: TagSubscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['variables'] = len(self.variable_ids)
+        stats['subscriptions'] = len(self.subscriptions)
+        stats['delivered'] = sum(s.stats['delivered'] for s in self.subscriptions)
+        return stats
+
+
+# ── Endpoint SSE / WebSocket ─────────────────────────────────────
+
+def _subscription_args(query) -> Dict[str, Any]:
+    """``tags=a,b`` y ``deadband=0.5`` desde la query string"""
+    tags = [t for t in query.get('tags', '').split(',') if t] or None
+    return {'tags': tags, 'deadband': float(query.get('deadband', 0.0))}
+
+
+def _message_subscription_args(data: Dict[str, Any]) -> Dict[str, Any]:
+    """``{"tags": [...], "deadband": 0.5}`` de un mensaje ``subscribe``; ValueError si no es válido"""
+    tags = data.get('tags')
+    if tags is not None and not (isinstance(tags, list) and all(isinstance(t, str) for t in tags)):
+        raise ValueError("tags must be a list of strings")
+    try:
+        deadband = float(data.get('deadband', 0.0))
+    except (TypeError, ValueError):
+        raise ValueError("deadband must be a number") from None
+    return {'tags': tags or None, 'deadband': deadband}
+
+
+def create_tag_stream_app(bus: TagBus):
+    """Aplicación aiohttp con SSE en /api/tags/stream y WebSocket en /ws/tags"""
+    from aiohttp import WSMsgType, web
+
+    async def handle_sse(request):
+        try:
+            subscription = bus.subscribe(**_subscription_args(request.query))
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400)
+
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+        })
+        await response.prepare(request)
+        try:
+            async for updates in subscription:
+                await response.write(f"event: tags\ndata: {json.dumps(updates)}\n\n".encode())
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            subscription.close()
+        return response
+
+    async def handle_websocket(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        try:
+            subscription = bus.subscribe(**_subscription_args(request.query))
+        except ValueError as e:
+            await ws.close(message=str(e).encode())
+            return ws
+
+        async def push():
+            async for updates in subscription:
+                await ws.send_str(json.dumps({'type': 'tags', 'updates': updates}))
+
+        pusher = asyncio.create_task(push())
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.TEXT:
+                    try:
+                        data = json.loads(msg.data)
+                    except ValueError:
+                        data = None
+                    if not isinstance(data, dict):
+                        await ws.send_str(json.dumps({'type': 'error', 'error': 'invalid message'}))
+                        continue
+                    if data.get('type') == 'subscribe':
+                        # Un filtro inválido se rechaza sin tocar la suscripción actual
+                        try:
+                            args = _message_subscription_args(data)
+                        except ValueError as e:
+                            await ws.send_str(json.dumps({'type': 'error', 'error': str(e)}))
+                            continue
+                        # Cambiar filtro: nueva suscripción con instantánea de las nuevas variables
+                        subscription.close()
+                        await asyncio.gather(pusher, return_exceptions=True)
+                        subscription = bus.subscribe(**args)
+                        pusher = asyncio.create_task(push())
+                    elif data.get('type') == 'ping':
+                        await ws.send_str(json.dumps({'type': 'pong'}))
+                elif msg.type == WSMsgType.ERROR:
+                    logger.error(f'Tag stream WebSocket error: {ws.exception()}')
+        finally:
+            subscription.close()
+            pusher.cancel()
+            await asyncio.gather(pusher, return_exceptions=True)
+        return ws
+
+    app = web.Application()
+    app.router.add_get('/api/tags/stream', handle_sse)
+    app.router.add_get('/ws/tags', handle_websocket)
+    return app
@@ -0,0 +1,779 @@
+#!/usr/bin/env python3
+"""
+SmartCompute Industrial - Historian
+===================================
+
+``HistorianWriter``: camino de escritura de las lecturas crudas de variables.
+
+- Las lecturas se acumulan en memoria y un único hilo escritor las vuelca
+  cada ``flush_interval_ms`` con ``executemany`` en una sola transacción
+  (WAL, ``synchronous=NORMAL``), en vez de abrir conexión, insertar una fila
+  y hacer COMMIT por lectura desde el event loop.
+- Contrapresión: si el disco no sigue el ritmo y el buffer supera
+  ``max_buffered_rows``, ``write()`` espera a que se vacíe (los lotes más
+  grandes que el buffer se encolan por partes), o, con
+  ``overflow='spill'``, vuelca el exceso a un fichero de desbordamiento que
+  el escritor reinyecta cuando se pone al día.
+- Un lote cuyo COMMIT falla se conserva en un buffer de reintento acotado
+  (``replay_rows``); lo que no cabe, y lo que siga pendiente al cerrar, va
+  al fichero de desbordamiento y se reinyecta al arrancar de nuevo.
+- ``wait_committed()`` adelanta el flush y espera a que lo encolado hasta
+  ese momento esté confirmado, para quien guarda su propio checkpoint.
+
+``CompressedHistorian``: archivo a largo plazo comprimido.
+
+- Por variable, filtro de excepción (banda muerta de ``precision *
+  exception_ratio``) y compresión swinging door con la precisión
+  configurada de la variable: sólo se archivan los puntos necesarios para
+  reconstruir la señal por interpolación lineal con un error máximo de
+  ``precision * (1 + 2 * exception_ratio)``.
+- Los puntos archivados se empaquetan por columnas en bloques (tiempos en
+  delta de ms, valores en XOR de bits, ambos con zlib) particionados por
+  día, con min/max del bloque para poder podar consultas.
+- Rollups min/max/avg por minuto y por hora calculados sobre las lecturas
+  crudas, antes de comprimir.
+- ``interpolate()`` devuelve la serie muestreada a intervalos regulares
+  para los dashboards, y ``rollups()`` los agregados precalculados.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+READINGS_INSERT = '''
+    INSERT INTO variable_readings
+    (variable_id, timestamp, value, quality, status, raw_value,
+     processed_value, anomaly_score)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+class HistorianWriter:
+    """Buffer en memoria + hilo escritor con executemany por intervalo"""
+
+    def __init__(self, db_path, insert_sql: str = READINGS_INSERT, flush_interval_ms: float = 250.0,
+                 max_buffered_rows: int = 200_000, replay_rows: int = 50_000,
+                 overflow: str = 'block', spill_path: Optional[str] = None,
+                 latency_samples: int = 1024):
+        if overflow not in ('block', 'spill'):
+            raise ValueError(f"overflow must be 'block' or 'spill', not {overflow!r}")
+
+        self.db_path = str(db_path)
+        self.insert_sql = insert_sql
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_buffered_rows = max_buffered_rows
+        self.replay_rows = replay_rows
+        self.overflow = overflow
+        self.spill_path = Path(spill_path or f"{self.db_path}.spill.jsonl")
+
+        self._buffer: List[Sequence[Any]] = []
+        self._replay: List[Sequence[Any]] = []
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._committed = threading.Condition(self._lock)
+        self._flush_seq = 0       # Flushes que han recogido el buffer
+        self._committed_seq = 0   # Último de ellos confirmado sin dejar nada en reintento
+        self._writer: Optional[threading.Thread] = None
+        self._started_at: Optional[float] = None
+        self._latencies = deque(maxlen=latency_samples)
+
+        self.stats = {
+            'rows': 0,
+            'flushes': 0,
+            'spilled': 0,
+            'replayed': 0,
+            'blocked_writes': 0,
+            'errors': 0
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        """Conexión del escritor con los pragmas del histórico"""
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def start(self):
+        """Arrancar el hilo escritor (idempotente)"""
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._stop.clear()
+            self._wake.clear()
+            conn = self._connect()
+            self._started_at = time.monotonic()
+            self._writer = threading.Thread(
+                target=self._writer_loop, args=(conn,), name="historian-writer", daemon=True
+            )
+            self._writer.start()
+        logger.info(f"Historian writer started (WAL, flush every {self.flush_interval * 1000:.0f} ms)")
+
+    def close(self, timeout: float = 30.0):
+        """Volcar lo pendiente y detener el escritor; lo que no se confirme queda en el spill"""
+        with self._lock:
+            writer = self._writer
+            self._writer = None
+        if writer is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        writer.join(timeout)
+
+    # ── Productores ─────────────────────────────────────────────
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def append(self, rows: Sequence[Sequence[Any]]) -> bool:
+        """
+        Encolar filas sin esperar.  Devuelve False si el buffer está lleno y
+        la política es ``block`` (el llamador decide si reintentar).
+        """
+        overflow = self._enqueue(rows)
+        if overflow is None:
+            return False
+        self._spill(overflow)
+        return True
+
+    def _enqueue(self, rows: Sequence[Sequence[Any]]) -> Optional[Sequence[Sequence[Any]]]:
+        """Meter en el buffer lo que quepa; devuelve el exceso a desbordar, o None si hay que esperar"""
+        with self._lock:
+            free = self.max_buffered_rows - len(self._buffer)
+            if free >= len(rows):
+                self._buffer.extend(rows)
+                return ()
+            if self.overflow == 'block':
+                return None
+            self._buffer.extend(rows[:max(free, 0)])
+            return rows[max(free, 0):]
+
+    def _chunks(self, rows: Sequence[Sequence[Any]]):
+        """Trocear un lote en partes que quepan en el buffer (si no, ``block`` esperaría siempre)"""
+        for start in range(0, len(rows), self.max_buffered_rows):
+            yield rows[start:start + self.max_buffered_rows]
+
+    async def write(self, rows: Sequence[Sequence[Any]]):
+        """Encolar filas aplicando contrapresión al event loop si el disco va por detrás"""
+        if not rows:
+            return
+        self.start()
+        for chunk in self._chunks(rows):
+            overflow = self._enqueue(chunk)
+            if overflow is None:
+                self.stats['blocked_writes'] += 1
+                while overflow is None:
+                    await asyncio.sleep(self.flush_interval / 4)
+                    self.start()  # Por si el escritor se detuvo mientras tanto
+                    overflow = self._enqueue(chunk)
+            if overflow:
+                # El fsync del spill no debe bloquear el event loop
+                await asyncio.to_thread(self._spill, overflow)
+
+    def put(self, rows: Sequence[Sequence[Any]]):
+        """Como ``write()`` para productores en hilos: bloquea mientras el buffer esté lleno"""
+        if not rows:
+            return
+        self.start()
+        for chunk in self._chunks(rows):
+            if self.append(chunk):
+                continue
+            self.stats['blocked_writes'] += 1
+            while not self.append(chunk):
+                time.sleep(self.flush_interval / 4)
+                self.start()  # Por si el escritor se detuvo mientras tanto
+
+    # ── Desbordamiento ──────────────────────────────────────────
+
+    def _spill(self, rows: Sequence[Sequence[Any]]):
+        """Añadir filas al fichero de desbordamiento (una fila JSON por línea)"""
+        if not rows:
+            return
+        with self._spill_lock:
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(list(row)) + '\n' for row in rows)
+                f.flush()
+                os.fsync(f.fileno())
+        self.stats['spilled'] += len(rows)
+
+    def _take_spill(self) -> List[List[Any]]:
+        with self._spill_lock:
+            if not self.spill_path.exists():
+                return []
+            with open(self.spill_path, encoding='utf-8') as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            self.spill_path.unlink()
+        return rows
+
+    # ── Hilo escritor ───────────────────────────────────────────
+
+    def _writer_loop(self, conn: sqlite3.Connection):
+        try:
+            # Reinyectar lo que quedó pendiente de una ejecución anterior
+            self._replay = self._take_spill()
+            self.stats['replayed'] += len(self._replay)
+            while True:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                stopping = self._stop.is_set()
+                self._flush(conn)
+                if stopping:
+                    # Último intento para lo que quedó en reintento; si falla, al spill
+                    if self._replay:
+                        self._flush(conn)
+                    break
+        finally:
+            with self._lock:
+                pending, self._buffer = self._replay + self._buffer, []
+                self._replay = []
+                # Si el hilo murió sin close(), start() debe poder arrancar otro
+                if self._writer is threading.current_thread():
+                    self._writer = None
+                self._committed.notify_all()
+            self._spill(pending)
+            conn.close()
+
+    def _flush(self, conn: sqlite3.Connection):
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            self._flush_seq += 1
+            seq = self._flush_seq
+        batch = self._replay + rows if self._replay else rows
+        self._replay = []
+
+        # Con el buffer holgado, reincorporar lo desbordado al disco
+        if len(batch) < self.max_buffered_rows // 2 and self.spill_path.exists():
+            replayed = self._take_spill()
+            self.stats['replayed'] += len(replayed)
+            batch = replayed + batch
+        if not batch:
+            self._mark_committed(seq)
+            return
+
+        started = time.perf_counter()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._execute(conn, batch)
+            conn.execute("COMMIT")
+        except Exception as e:
+            # Cualquier fallo (también de un ``_execute`` redefinido o de una fila
+            # inválida) deja el lote para reintento y el hilo escritor sigue vivo
+            logger.error(f"Historian flush failed ({len(batch)} rows): {e!r}")
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self.stats['errors'] += 1
+            self._retain(batch)
+            return
+
+        self._latencies.append(time.perf_counter() - started)
+        self.stats['rows'] += len(batch)
+        self.stats['flushes'] += 1
+        self._mark_committed(seq)
+
+    def _mark_committed(self, seq: int):
+        with self._committed:
+            self._committed_seq = seq
+            self._committed.notify_all()
+
+    def wait_committed(self, timeout: Optional[float] = 30.0) -> bool:
+        """
+        Forzar un flush y esperar a que todo lo encolado antes de la llamada
+        esté confirmado en la base de datos.  Devuelve False si vence
+        ``timeout`` o el escritor se detiene antes (lo pendiente queda en el
+        spill y se reinyectará, pero no está en la base de datos).
+        """
+        with self._committed:
+            if not self._buffer and self._committed_seq == self._flush_seq:
+                return True
+            if self._writer is None:
+                return False
+            # Un flush ya en curso pudo recoger el buffer antes de la última fila: esperar al siguiente
+            target = self._flush_seq + 1
+            self._wake.set()
+            self._committed.wait_for(lambda: self._committed_seq >= target or self._writer is None, timeout)
+            return self._committed_seq >= target
+
+    def _execute(self, conn: sqlite3.Connection, batch: List[Sequence[Any]]):
+        """Escribir un lote dentro de la transacción del flush (punto de extensión)"""
+        conn.executemany(self.insert_sql, batch)
+
+    def _retain(self, batch: List[Sequence[Any]]):
+        """Guardar un lote fallido para reintento; el exceso sobre replay_rows va al spill"""
+        self._replay = batch[-self.replay_rows:] if self.replay_rows else []
+        self._spill(batch[:len(batch) - len(self._replay)])
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        latencies = sorted(self._latencies)
+        stats['buffered'] = len(self._buffer)
+        stats['pending_replay'] = len(self._replay)
+        stats['rows_per_sec'] = round(stats['rows'] / elapsed, 1) if elapsed else 0.0
+        stats['flush_p99_ms'] = round(
+            latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2
+        ) if latencies else 0.0
+        return stats
+
+
+# ── Histórico comprimido ─────────────────────────────────────────
+
+PARTITION_SECONDS = 86400
+ROLLUP_RESOLUTIONS = (60, 3600)
+
+_ARCHIVE_SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS historian_blocks (
+        variable_id TEXT NOT NULL,
+        partition INTEGER NOT NULL,
+        t_start REAL NOT NULL,
+        t_end REAL NOT NULL,
+        count INTEGER NOT NULL,
+        v_min REAL NOT NULL,
+        v_max REAL NOT NULL,
+        times BLOB NOT NULL,
+        vals BLOB NOT NULL,
+        PRIMARY KEY (variable_id, t_start)
+    ) WITHOUT ROWID
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_historian_blocks_partition ON historian_blocks (partition)',
+    '''
+    CREATE TABLE IF NOT EXISTS historian_rollups (
+        variable_id TEXT NOT NULL,
+        resolution INTEGER NOT NULL,
+        bucket_start REAL NOT NULL,
+        v_min REAL NOT NULL,
+        v_max REAL NOT NULL,
+        v_avg REAL NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (variable_id, resolution, bucket_start)
+    ) WITHOUT ROWID
+    ''',
+)
+
+
+def pack_block(times: np.ndarray, values: np.ndarray) -> Tuple[bytes, bytes]:
+    """Empaquetar un bloque: tiempos como deltas de ms, valores como XOR de bits"""
+    ms = np.round(np.asarray(times) * 1000).astype(np.int64)
+    deltas = np.diff(ms, prepend=np.int64(0))
+    bits = np.asarray(values, dtype=np.float64).view(np.uint64)
+    xored = bits ^ np.concatenate((np.zeros(1, dtype=np.uint64), bits[:-1]))
+    return zlib.compress(deltas.tobytes()), zlib.compress(xored.tobytes())
+
+
+def unpack_block(times: bytes, vals: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    ms = np.cumsum(np.frombuffer(zlib.decompress(times), dtype=np.int64))
+    bits = np.bitwise_xor.accumulate(np.frombuffer(zlib.decompress(vals), dtype=np.uint64))
+    return ms / 1000.0, bits.view(np.float64)
+
+
+class CompressedHistorian:
+    """
+    Archivo comprimido de variables con estado columnar por variable.
+
+    ``ingest()`` recibe un escaneo (filas, instante, valores) y aplica banda
+    muerta y swinging door a todas las filas con operaciones vectoriales;
+    sólo los puntos archivados pasan a los bloques abiertos de cada
+    variable.  ``flush()`` escribe los bloques sellados y los rollups
+    cerrados; ``close()`` sella también los bloques abiertos.
+
+    ``_lock`` protege el estado en memoria (bloques abiertos y sellados,
+    rollups cerrados) y ``_db_lock`` la conexión: ``flush()`` sólo toma
+    ``_lock`` para recoger y, si falla, devolver las colas, de modo que la
+    ingesta no espera a la escritura en disco.
+    """
+
+    def __init__(self, db_path, block_points: int = 1024, exception_ratio: float = 0.5,
+                 compression_max_s: float = 3600.0, exception_max_s: float = 600.0,
+                 capacity: int = 256):
+        self.db_path = str(db_path)
+        self.block_points = block_points
+        self.exception_ratio = exception_ratio
+        self.compression_max = compression_max_s
+        self.exception_max = exception_max_s
+
+        self.index: Dict[str, int] = {}
+        self.variable_ids: List[str] = []
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        # Configuración y estado por fila
+        self.precision = np.zeros(capacity)
+        self.last_t = np.full(capacity, np.nan)  # Última lectura recibida
+        self.last_v = np.zeros(capacity)
+        self.exc_t = np.full(capacity, np.nan)   # Último punto que pasó la banda muerta
+        self.exc_v = np.zeros(capacity)
+        self.arch_t = np.full(capacity, np.nan)  # Último punto archivado (pivote de las puertas)
+        self.arch_v = np.zeros(capacity)
+        self.held_t = np.full(capacity, np.nan)  # Último punto recibido por la compresión
+        self.held_v = np.zeros(capacity)
+        self.upper = np.full(capacity, np.inf)   # Pendiente de la puerta superior
+        self.lower = np.full(capacity, -np.inf)  # Pendiente de la puerta inferior
+
+        self.rollup_bucket = {r: np.full(capacity, -1, dtype=np.int64) for r in ROLLUP_RESOLUTIONS}
+        self.rollup_min = {r: np.full(capacity, np.inf) for r in ROLLUP_RESOLUTIONS}
+        self.rollup_max = {r: np.full(capacity, -np.inf) for r in ROLLUP_RESOLUTIONS}
+        self.rollup_sum = {r: np.zeros(capacity) for r in ROLLUP_RESOLUTIONS}
+        self.rollup_count = {r: np.zeros(capacity, dtype=np.int64) for r in ROLLUP_RESOLUTIONS}
+
+        self._open: List[List[Tuple[float, float]]] = []   # Puntos archivados aún sin sellar
+        self._sealed: List[tuple] = []
+        self._closed_rollups: List[tuple] = []
+
+        self.stats = {'readings': 0, 'archived': 0, 'blocks': 0, 'rollups': 0}
+
+    _COLUMNS = ('precision', 'last_t', 'last_v', 'exc_t', 'exc_v', 'arch_t', 'arch_v', 'held_t', 'held_v', 'upper', 'lower')
+
+    def _grow(self):
+        size = len(self.precision)
+        for name in self._COLUMNS:
+            column = getattr(self, name)
+            fill = {'upper': np.inf, 'lower': -np.inf}.get(name, np.nan if name.endswith('_t') else 0)
+            setattr(self, name, np.concatenate((column, np.full(size, fill, dtype=column.dtype))))
+        for name, fill in (('rollup_bucket', -1), ('rollup_min', np.inf), ('rollup_max', -np.inf),
+                           ('rollup_sum', 0), ('rollup_count', 0)):
+            columns = getattr(self, name)
+            for resolution, column in columns.items():
+                columns[resolution] = np.concatenate((column, np.full(size, fill, dtype=column.dtype)))
+
+    # ── Registro ────────────────────────────────────────────────
+
+    @staticmethod
+    def variable_precision(variable) -> float:
+        """Precisión de compresión: la configurada o el 0.1% del rango de la variable"""
+        precision = getattr(variable, 'precision', None)
+        if precision:
+            return float(precision)
+        span = float(variable.max_value) - float(variable.min_value)
+        return span * 0.001 if span > 0 else 1e-6
+
+    def register(self, variables) -> np.ndarray:
+        """Registrar variables (IndustrialVariable o equivalentes) y devolver sus filas"""
+        with self._lock:
+            return self._register(variables)
+
+    def _register(self, variables) -> np.ndarray:
+        rows = []
+        for variable in variables:
+            row = self.index.get(variable.id)
+            if row is None:
+                row = len(self.variable_ids)
+                if row >= len(self.precision):
+                    self._grow()
+                self.index[variable.id] = row
+                self.variable_ids.append(variable.id)
+                self._open.append([])
+            self.precision[row] = self.variable_precision(variable)
+            rows.append(row)
+        return np.asarray(rows, dtype=np.int64)
+
+    def rows_for(self, variable_ids) -> np.ndarray:
+        index = self.index
+        return np.fromiter((index[v] for v in variable_ids), dtype=np.int64)
+
+    # ── Ingesta ─────────────────────────────────────────────────
+
+    def ingest(self, rows: np.ndarray, t: float, values: np.ndarray):
+        """Procesar las lecturas ``values`` de las filas ``rows`` en el instante ``t`` (epoch s)"""
+        with self._lock:
+            self._ingest(rows, t, values)
+
+    def _ingest(self, rows: np.ndarray, t: float, values: np.ndarray):
+        values = np.asarray(values, dtype=float)
+        rows, values = rows[~np.isnan(values)], values[~np.isnan(values)]
+        if not len(rows):
+            return
+        self.stats['readings'] += len(rows)
+        self._update_rollups(rows, t, values)
+
+        # Primera lectura de la variable: se archiva directamente
+        new = np.isnan(self.arch_t[rows])
+        if new.any():
+            first = rows[new]
+            for name in ('last', 'exc', 'arch', 'held'):
+                getattr(self, f'{name}_t')[first] = t
+                getattr(self, f'{name}_v')[first] = values[new]
+            self.upper[first] = np.inf
+            self.lower[first] = -np.inf
+            for row, value in zip(first.tolist(), values[new].tolist()):
+                self._archive(row, t, value)
+            rows, values = rows[~new], values[~new]
+
+        # Banda muerta (excepción): cambios menores que precision * ratio se descartan
+        passed = (np.abs(values - self.exc_v[rows]) > self.precision[rows] * self.exception_ratio) | \
+                 (t - self.exc_t[rows] >= self.exception_max)
+        previous_t, previous_v = self.last_t[rows], self.last_v[rows]
+        self.last_t[rows] = t
+        self.last_v[rows] = values
+        rows, values = rows[passed], values[passed]
+        if not len(rows):
+            return
+
+        # Como en el reporte por excepción clásico, si la lectura anterior se
+        # descartó también se envía a la compresión: así el error de la
+        # reconstrucción queda acotado a precision * (1 + 2 * exception_ratio)
+        skipped = previous_t[passed] > self.exc_t[rows]
+        if skipped.any():
+            self._swing(rows[skipped], previous_t[passed][skipped], previous_v[passed][skipped])
+        self._swing(rows, np.full(len(rows), t), values)
+        self.exc_t[rows] = t
+        self.exc_v[rows] = values
+
+    def _swing(self, rows: np.ndarray, t: np.ndarray, values: np.ndarray):
+        """Paso de swinging door para un punto por fila"""
+        precision = self.precision[rows]
+        arch_t, arch_v = self.arch_t[rows], self.arch_v[rows]
+        held_t = self.held_t[rows]
+
+        # Estrechar las puertas con el nuevo punto
+        dt = t - arch_t
+        upper = np.minimum(self.upper[rows], (values + precision - arch_v) / dt)
+        lower = np.maximum(self.lower[rows], (values - precision - arch_v) / dt)
+
+        # Las puertas se cruzan (o se supera el máximo sin archivar): se archiva
+        # el punto retenido y las puertas se reabren desde él hacia el actual
+        violated = ((lower > upper) | (dt > self.compression_max)) & (held_t > arch_t)
+        if violated.any():
+            hit = rows[violated]
+            pivot_t, pivot_v = held_t[violated], self.held_v[hit]
+            for row, pt, pv in zip(hit.tolist(), pivot_t.tolist(), pivot_v.tolist()):
+                self._archive(row, pt, pv)
+            self.arch_t[hit] = pivot_t
+            self.arch_v[hit] = pivot_v
+            span = t[violated] - pivot_t
+            upper[violated] = (values[violated] + precision[violated] - pivot_v) / span
+            lower[violated] = (values[violated] - precision[violated] - pivot_v) / span
+
+        self.upper[rows] = upper
+        self.lower[rows] = lower
+        self.held_t[rows] = t
+        self.held_v[rows] = values
+
+    def _archive(self, row: int, t: float, value: float):
+        block = self._open[row]
+        if block and (int(block[0][0] // PARTITION_SECONDS) != int(t // PARTITION_SECONDS)
+                      or len(block) >= self.block_points):
+            self._seal(row)
+            block = self._open[row]
+        block.append((t, value))
+        self.stats['archived'] += 1
+
+    def _seal(self, row: int):
+        block = self._open[row]
+        if not block:
+            return
+        times, values = np.array(block).T
+        packed_times, packed_values = pack_block(times, values)
+        self._sealed.append((
+            self.variable_ids[row], int(times[0] // PARTITION_SECONDS), float(times[0]),
+            float(times[-1]), len(block), float(values.min()), float(values.max()),
+            packed_times, packed_values
+        ))
+        self._open[row] = []
+        self.stats['blocks'] += 1
+
+    def _update_rollups(self, rows: np.ndarray, t: float, values: np.ndarray):
+        for resolution in ROLLUP_RESOLUTIONS:
+            bucket = int(t // resolution)
+            buckets = self.rollup_bucket[resolution]
+            self._close_rollups(resolution, rows[(buckets[rows] != bucket) & (self.rollup_count[resolution][rows] > 0)])
+
+            buckets[rows] = bucket
+            low, high = self.rollup_min[resolution], self.rollup_max[resolution]
+            low[rows] = np.minimum(low[rows], values)
+            high[rows] = np.maximum(high[rows], values)
+            self.rollup_sum[resolution][rows] += values
+            self.rollup_count[resolution][rows] += 1
+
+    def _close_rollups(self, resolution: int, rows: np.ndarray):
+        """Pasar los cubos de ``rows`` a la cola de escritura y reiniciarlos"""
+        if not len(rows):
+            return
+        count, total = self.rollup_count[resolution], self.rollup_sum[resolution]
+        low, high = self.rollup_min[resolution], self.rollup_max[resolution]
+        self._closed_rollups.extend(zip(
+            [self.variable_ids[r] for r in rows.tolist()],
+            [resolution] * len(rows),
+            (self.rollup_bucket[resolution][rows] * resolution).astype(float).tolist(),
+            low[rows].tolist(), high[rows].tolist(),
+            (total[rows] / count[rows]).tolist(),
+            count[rows].tolist()
+        ))
+        low[rows], high[rows], total[rows], count[rows] = np.inf, -np.inf, 0.0, 0
+
+    # ── Persistencia ────────────────────────────────────────────
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            for statement in _ARCHIVE_SCHEMA:
+                conn.execute(statement)
+            self._conn = conn
+        return self._conn
+
+    @property
+    def pending(self) -> int:
+        return len(self._sealed) + len(self._closed_rollups)
+
+    def flush(self):
+        """Escribir bloques sellados y rollups cerrados en una transacción"""
+        with self._db_lock:
+            with self._lock:
+                blocks, self._sealed = self._sealed, []
+                rollups, self._closed_rollups = self._closed_rollups, []
+            if not blocks and not rollups:
+                return
+            conn = self._connection()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    'INSERT OR REPLACE INTO historian_blocks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', blocks
+                )
+                conn.executemany(
+                    'INSERT OR REPLACE INTO historian_rollups VALUES (?, ?, ?, ?, ?, ?, ?)', rollups
+                )
+                conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                logger.error(f"Compressed historian flush failed: {e}")
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                # Se reintentan en el siguiente flush, por delante de lo sellado mientras tanto
+                with self._lock:
+                    self._sealed[:0] = blocks
+                    self._closed_rollups[:0] = rollups
+                return
+            self.stats['rollups'] += len(rollups)
+
+    def close(self):
+        """Archivar el último punto de cada variable, sellar bloques abiertos y volcar"""
+        with self._lock:
+            for row in range(len(self.variable_ids)):
+                held_t = self.held_t[row]
+                if not np.isnan(held_t) and held_t > self.arch_t[row]:
+                    self._archive(row, float(held_t), float(self.held_v[row]))
+                    self.arch_t[row], self.arch_v[row] = held_t, self.held_v[row]
+                self._seal(row)
+            registered = np.arange(len(self.variable_ids))
+            for resolution in ROLLUP_RESOLUTIONS:
+                self._close_rollups(resolution, registered[self.rollup_count[resolution][registered] > 0])
+        self.flush()
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def drop_partitions(self, before: float) -> int:
+        """Borrar las particiones diarias anteriores a ``before`` (retención)"""
+        with self._db_lock:
+            conn = self._connection()
+            cursor = conn.execute('DELETE FROM historian_blocks WHERE partition < ?',
+                                  (int(before // PARTITION_SECONDS),))
+            conn.execute('DELETE FROM historian_rollups WHERE bucket_start < ?',
+                         (before - before % PARTITION_SECONDS,))
+            return cursor.rowcount
+
+    # ── Consultas ───────────────────────────────────────────────
+
+    def points(self, variable_id: str, start: float, end: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Puntos archivados en [start, end] más el anterior y el posterior para interpolar"""
+        # Con _db_lock tomado no hay flush a medias: cada bloque está en disco o en _sealed
+        with self._db_lock, self._lock:
+            conn = self._connection()
+            rows = conn.execute(
+                '''SELECT t_start, times, vals FROM historian_blocks
+                   WHERE variable_id = ? AND t_end >= ? AND t_start <= ?''',
+                (variable_id, start, end)
+            ).fetchall()
+            # Bloques que terminan justo antes y empiezan justo después del rango
+            for sql, params in (
+                ('''SELECT t_start, times, vals FROM historian_blocks
+                    WHERE variable_id = ? AND t_end < ? ORDER BY t_start DESC LIMIT 1''', (variable_id, start)),
+                ('''SELECT t_start, times, vals FROM historian_blocks
+                    WHERE variable_id = ? AND t_start > ? ORDER BY t_start LIMIT 1''', (variable_id, end)),
+            ):
+                rows.extend(conn.execute(sql, params).fetchall())
+
+            # Bloques sellados pendientes de flush
+            rows.extend((b[2], b[7], b[8]) for b in self._sealed if b[0] == variable_id)
+
+            row = self.index.get(variable_id)
+            open_points = list(self._open[row]) if row is not None else []
+            held = None
+            if row is not None and not np.isnan(self.held_t[row]) and self.held_t[row] > self.arch_t[row]:
+                held = (float(self.held_t[row]), float(self.held_v[row]))
+
+        chunks = [unpack_block(times, vals) for _, times, vals in sorted(set(rows))]
+        if open_points:
+            chunks.append(tuple(np.array(open_points).T))
+        if held:
+            chunks.append((np.array([held[0]]), np.array([held[1]])))
+        if not chunks:
+            return np.empty(0), np.empty(0)
+
+        times = np.concatenate([c[0] for c in chunks])
+        values = np.concatenate([c[1] for c in chunks])
+        order = np.argsort(times, kind='stable')
+        times, values = times[order], values[order]
+
+        # Recortar a [start, end] conservando un punto a cada lado
+        lo = max(np.searchsorted(times, start, side='left') - 1, 0)
+        hi = min(np.searchsorted(times, end, side='right') + 1, len(times))
+        return times[lo:hi], values[lo:hi]
+
+    def interpolate(self, variable_id: str, start: float, end: float,
+                    points: int = 300) -> Dict[str, List[float]]:
+        """Serie reconstruida por interpolación lineal en ``points`` instantes equiespaciados"""
+        times, values = self.points(variable_id, start, end)
+        grid = np.linspace(start, end, points)
+        if not len(times):
+            return {'timestamps': grid.tolist(), 'values': [None] * points}
+        interpolated = np.interp(grid, times, values)
+        # Fuera del rango archivado no se extrapola
+        outside = (grid < times[0]) | (grid > times[-1])
+        return {
+            'timestamps': grid.tolist(),
+            'values': [None if o else v for o, v in zip(outside.tolist(), interpolated.tolist())]
+        }
+
+    def rollups(self, variable_id: str, start: float, end: float, resolution: int = 3600) -> List[Dict]:
+        """Agregados min/max/avg precalculados (60 s o 3600 s)"""
+        if resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"resolution must be one of {ROLLUP_RESOLUTIONS}")
+        with self._db_lock:
+            rows = self._connection().execute(
+                '''SELECT bucket_start, v_min, v_max, v_avg, count FROM historian_rollups
+                   WHERE variable_id = ? AND resolution = ? AND bucket_start BETWEEN ? AND ?
+                   ORDER BY bucket_start''',
+                (variable_id, resolution, start - start % resolution, end)
+            ).fetchall()
+        return [
+            {'timestamp': b, 'min': lo, 'max': hi, 'avg': avg, 'count': n}
+            for b, lo, hi, avg, n in rows
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['variables'] = len(self.variable_ids)
+        stats['compression_ratio'] = round(stats['readings'] / stats['archived'], 2) \
+            if stats['archived'] else 0.0
+        stats['pending'] = self.pending
+        return stats
@@ -48,9 +48,16 @@ import struct
 import random
 import math
 from collections import deque
+from collections.abc import Mapping
 import hashlib
 import hmac
 
+from smartcompute.industrial.protocols.modbus_tcp import ModbusTCPClient
+from smartcompute.industrial.variables.alarms import AlarmEngine, AlarmEvent
+from smartcompute.industrial.variables.bus import TagBus, create_tag_stream_app
+from smartcompute.industrial.variables.historian import CompressedHistorian, HistorianWriter
+from smartcompute.industrial.variables.scan import BlockRead, ScanBatch, ScanScheduler, parse_address
+
 # Simulación de bibliotecas industriales
 # En producción usar bibliotecas reales como:
 # import snap7  # Para Siemens PLCs
@@ -88,6 +95,16 @@ class SensorStatus(Enum):
     CALIBRATION = "calibration"
 
 
+# Niveles de check_alarm_thresholds en orden de evaluación:
+# (tipo, severidad, umbral en IndustrialVariable, texto del mensaje)
+ALARM_LEVELS = (
+    ('low_alarm', AlarmSeverity.CRITICAL, 'alarm_low', 'critically low'),
+    ('high_alarm', AlarmSeverity.CRITICAL, 'alarm_high', 'critically high'),
+    ('low_warning', AlarmSeverity.HIGH, 'warning_low', 'below warning level'),
+    ('high_warning', AlarmSeverity.HIGH, 'warning_high', 'above warning level'),
+)
+
+
 @dataclass
 class IndustrialVariable:
     """Definición de variable industrial con especificaciones técnicas detalladas"""
@@ -117,6 +134,17 @@ class IndustrialVariable:
     calibration_info: Optional[Dict[str, Any]] = None
     installation_details: Optional[Dict[str, Any]] = None
 
+    # PLC que expone la variable (agrupación de escaneo)
+    plc_id: str = "main_plc"
+
+    # Precisión del histórico comprimido en unidades de ingeniería (None = 0.1% del rango)
+    precision: Optional[float] = None
+
+    # Histéresis y retardos del motor de alarmas (banda None = 1% del rango)
+    alarm_deadband: Optional[float] = None
+    alarm_on_delay_s: float = 0.0
+    alarm_off_delay_s: float = 0.0
+
 
 @dataclass
 class VariableReading:
@@ -154,6 +182,7 @@ class PLCCommunicationEngine:
     def __init__(self):
         self.logger = logging.getLogger('PLC-Communication')
         self.connections = {}
+        self.request_count = 0
         self.supported_protocols = {
             'modbus_tcp': {'port': 502, 'library': 'pymodbus'},
             's7comm': {'port': 102, 'library': 'snap7'},
@@ -172,7 +201,13 @@ class PLCCommunicationEngine:
 
         try:
             if protocol == 'modbus_tcp':
-                connection = await self.connect_modbus_tcp(ip_address, plc_config.get('port', 502))
+                connection = await self.connect_modbus_tcp(
+                    ip_address, plc_config.get('port', 502),
+                    unit_id=plc_config.get('unit_id', 1),
+                    pool_size=plc_config.get('pool_size', 1),
+                    timeout=plc_config.get('timeout', 3.0),
+                    max_in_flight=plc_config.get('max_in_flight', 16)
+                )
             elif protocol == 's7comm':
                 connection = await self.connect_s7(ip_address, plc_config.get('rack', 0), plc_config.get('slot', 1))
             elif protocol == 'ethernet_ip':
@@ -199,12 +234,15 @@ class PLCCommunicationEngine:
             self.logger.error(f"❌ Failed to connect to PLC {plc_id}: {e}")
             return False
 
-    async def connect_modbus_tcp(self, ip_address: str, port: int = 502):
-        """Conectar via Modbus TCP"""
-        # Simulación de conexión Modbus
+    async def connect_modbus_tcp(self, ip_address: str, port: int = 502, unit_id: int = 1,
+                                 pool_size: int = 1, timeout: float = 3.0, max_in_flight: int = 16):
+        """Conectar via Modbus TCP (cliente asíncrono con pipelining)"""
+        client = ModbusTCPClient(ip_address, port, unit_id=unit_id, pool_size=pool_size,
+                                 timeout=timeout, max_in_flight=max_in_flight)
+        await client.connect()
         return {
             'type': 'modbus_tcp',
-            'socket': await self.create_socket_connection(ip_address, port),
+            'client': client,
             'connected': True
         }
 
@@ -243,6 +281,14 @@ class PLCCommunicationEngine:
         # En producción crear socket real
         return {'simulated_socket': f"{ip_address}:{port}"}
 
+    async def disconnect_all(self):
+        """Cerrar las conexiones reales abiertas"""
+        for plc_id, connection in list(self.connections.items()):
+            client = self._modbus_client(connection)
+            if client is not None:
+                await client.close()
+            del self.connections[plc_id]
+
     async def read_variable(self, plc_id: str, address: str) -> Optional[float]:
         """Leer variable de PLC"""
         if plc_id not in self.connections:
@@ -250,6 +296,7 @@ class PLCCommunicationEngine:
 
         connection = self.connections[plc_id]
         protocol = connection['protocol']
+        self.request_count += 1
 
         try:
             if protocol == 'modbus_tcp':
@@ -267,8 +314,63 @@ class PLCCommunicationEngine:
             self.logger.error(f"Error reading {address} from {plc_id}: {e}")
             return None
 
+    async def read_block(self, plc_id: str, block: BlockRead) -> Dict[str, Optional[float]]:
+        """Leer un bloque contiguo y devolver el valor de cada dirección que cubre"""
+        if plc_id not in self.connections:
+            return {}
+
+        connection = self.connections[plc_id]
+        protocol = connection['protocol']
+        self.request_count += 1
+
+        try:
+            if protocol == 'modbus_tcp':
+                raw = await self.read_modbus_registers(connection, block.area, block.start, block.count)
+            elif protocol == 's7comm':
+                raw = await self.read_s7_block(connection, block.area, block.start, block.count)
+            else:
+                return {}
+            return block.decode(raw)
+
+        except Exception as e:
+            self.logger.error(f"Error reading {block.area}[{block.start}:{block.start + block.count}] "
+                              f"from {plc_id}: {e}")
+            return {}
+
+    @staticmethod
+    def _modbus_client(connection: Dict) -> Optional[ModbusTCPClient]:
+        """Cliente real de la conexión; ``None`` en conexiones simuladas"""
+        return (connection.get('connection') or {}).get('client')
+
+    async def read_modbus_registers(self, connection: Dict, area: str, start: int,
+                                    count: int) -> List[float]:
+        """Leer ``count`` registros holding/input consecutivos (FC3/FC4)"""
+        client = self._modbus_client(connection)
+        if client is not None:
+            return await client.read_registers(area, start, count)
+
+        # Simulación de lectura Modbus, mismo modelo que read_modbus_register
+        return [random.uniform(0, 1000) * (1 + register * 0.1)
+                for register in range(start, start + count)]
+
+    async def read_s7_block(self, connection: Dict, area: str, start: int, size: int) -> bytes:
+        """Leer ``size`` bytes de un DB/área S7 desde ``start``"""
+        # Simulación de lectura S7: un REAL big-endian cada 4 bytes
+        data = bytearray(size + 3)
+        for offset in range(0, size, 4):
+            struct.pack_into('>f', data, offset, random.uniform(-100, 1500))
+        return bytes(data[:size])
+
     async def read_modbus_register(self, connection: Dict, address: str) -> float:
         """Leer registro Modbus"""
+        client = self._modbus_client(connection)
+        if client is not None:
+            tag = parse_address('modbus_tcp', address)
+            if tag is None:
+                raise ValueError(f"Unsupported Modbus address: {address}")
+            registers = await client.read_registers(tag.area, tag.offset, tag.size)
+            return BlockRead(tag.area, tag.offset, tag.size, [(address, tag)]).decode(registers)[address]
+
         # Parsear dirección Modbus (ej: "40001" = Holding Register 1)
         if address.startswith('4'):  # Holding Register
             register = int(address) - 40001
@@ -297,14 +399,179 @@ class PLCCommunicationEngine:
         return random.uniform(-50, 1200)
 
 
+def threshold_alarm(config: IndustrialVariable, value: float, level: int) -> Dict:
+    """Alarma de umbral para ``ALARM_LEVELS[level - 1]``"""
+    alarm_type, severity, field, text = ALARM_LEVELS[level - 1]
+    threshold = getattr(config, field)
+    return {
+        'severity': severity.value,
+        'type': alarm_type,
+        'message': f"{config.name} {text}: {value} {config.unit} (threshold: {threshold})",
+        'threshold': threshold,
+        'deviation': abs(value - threshold)
+    }
+
+
+class SlidingWindowStats:
+    """
+    Media/varianza (Welford), mínimo y máximo de una ventana deslizante.
+
+    Cada muestra cuesta O(1): la media y M2 se actualizan sumando la nueva
+    muestra y retirando la que sale, y mínimo/máximo se mantienen con
+    deques monótonos.  Cada ``16 * size`` muestras se recalculan media y M2
+    desde la ventana para que el error de redondeo no se acumule.
+    """
+
+    __slots__ = ('size', 'values', 'mean', 'm2', '_min', '_max', '_index')
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._min = deque()  # (índice, valor) con valores crecientes
+        self._max = deque()  # (índice, valor) con valores decrecientes
+        self._index = 0
+
+    def push(self, x: float):
+        if len(self.values) == self.size:
+            old = self.values.popleft()
+            new_mean = self.mean + (x - old) / self.size
+            self.m2 += (x - old) * (x - new_mean + old - self.mean)
+            self.mean = new_mean
+        else:
+            delta = x - self.mean
+            self.mean += delta / (len(self.values) + 1)
+            self.m2 += delta * (x - self.mean)
+        self.values.append(x)
+        if self.size == 1:
+            self.m2 = 0.0
+
+        index = self._index
+        self._index += 1
+        while self._min and self._min[-1][1] >= x:
+            self._min.pop()
+        self._min.append((index, x))
+        while self._max and self._max[-1][1] <= x:
+            self._max.pop()
+        self._max.append((index, x))
+        expired = index - self.size
+        if self._min[0][0] <= expired:
+            self._min.popleft()
+        if self._max[0][0] <= expired:
+            self._max.popleft()
+
+        if self._index % (16 * self.size) == 0:
+            n = len(self.values)
+            self.mean = sum(self.values) / n
+            self.m2 = sum((v - self.mean) ** 2 for v in self.values)
+
+    @property
+    def count(self) -> int:
+        return len(self.values)
+
+    @property
+    def std(self) -> float:
+        """Desviación estándar poblacional (como ``np.std``)"""
+        n = len(self.values)
+        return math.sqrt(self.m2 / n) if n and self.m2 > 0 else 0.0
+
+    @property
+    def min(self) -> float:
+        return self._min[0][1]
+
+    @property
+    def max(self) -> float:
+        return self._max[0][1]
+
+
+class TrendWindow:
+    """
+    Pendiente por mínimos cuadrados sobre las últimas ``size`` muestras con
+    sumas acumuladas (Σx, Σy, Σxy, Σx²).  Los tiempos se guardan relativos a
+    un origen que se re-ancla al recalcular las sumas cada ``size`` muestras,
+    así x² no pierde precisión con timestamps epoch.
+    """
+
+    __slots__ = ('size', 'points', 'origin', 'sx', 'sy', 'sxy', 'sxx', '_updates')
+
+    def __init__(self, size: int):
+        self.size = size
+        self.points = deque()
+        self.origin = None
+        self.sx = self.sy = self.sxy = self.sxx = 0.0
+        self._updates = 0
+
+    def push(self, t: float, y: float):
+        if self.origin is None:
+            self.origin = t
+        if len(self.points) == self.size:
+            old_t, old_y = self.points.popleft()
+            x = old_t - self.origin
+            self.sx -= x
+            self.sy -= old_y
+            self.sxy -= x * old_y
+            self.sxx -= x * x
+
+        self.points.append((t, y))
+        x = t - self.origin
+        self.sx += x
+        self.sy += y
+        self.sxy += x * y
+        self.sxx += x * x
+
+        self._updates += 1
+        if self._updates % self.size == 0:
+            self.origin = self.points[0][0]
+            xs = [pt - self.origin for pt, _ in self.points]
+            ys = [py for _, py in self.points]
+            self.sx = sum(xs)
+            self.sy = sum(ys)
+            self.sxy = sum(px * py for px, py in zip(xs, ys))
+            self.sxx = sum(px * px for px in xs)
+
+    @property
+    def count(self) -> int:
+        return len(self.points)
+
+    def slope(self) -> float:
+        n = len(self.points)
+        denominator = n * self.sxx - self.sx * self.sx
+        if denominator <= 0:
+            return 0.0
+        return (n * self.sxy - self.sx * self.sy) / denominator
+
+
+class VariableStatsSlot:
+    """Estado compacto por variable para el procesado incremental"""
+
+    __slots__ = ('ema', 'raw', 'trend', 'recent')
+
+    def __init__(self, noise_window: int, trend_window: int, prediction_window: int):
+        self.ema: Optional[float] = None
+        self.raw = SlidingWindowStats(noise_window)            # Lecturas crudas
+        self.trend = TrendWindow(trend_window)                 # (t, valor filtrado)
+        self.recent = SlidingWindowStats(prediction_window)    # Últimos valores filtrados
+
+
 class VariableDataProcessor:
     """Procesador de datos de variables con análisis avanzado"""
 
+    NOISE_WINDOW = 10
+    TREND_WINDOW = 20
+    PREDICTION_WINDOW = 10
+    EMA_ALPHA = 0.3
+
     def __init__(self):
         self.logger = logging.getLogger('DataProcessor')
-        self.moving_averages = {}
-        self.trend_analyzers = {}
-        self.anomaly_detectors = {}
+        self.slots: Dict[str, VariableStatsSlot] = {}
+
+    def _slot(self, variable_id: str) -> VariableStatsSlot:
+        slot = self.slots.get(variable_id)
+        if slot is None:
+            slot = VariableStatsSlot(self.NOISE_WINDOW, self.TREND_WINDOW, self.PREDICTION_WINDOW)
+            self.slots[variable_id] = slot
+        return slot
 
     def process_reading(self, reading: VariableReading, variable_config: IndustrialVariable) -> Dict:
         """Procesar lectura de variable"""
@@ -351,65 +618,50 @@ class VariableDataProcessor:
 
     def apply_noise_filter(self, variable_id: str, value: float) -> float:
         """Aplicar filtro de ruido (media móvil exponencial)"""
-        if variable_id not in self.moving_averages:
-            self.moving_averages[variable_id] = deque(maxlen=10)
-
-        self.moving_averages[variable_id].append(value)
+        slot = self._slot(variable_id)
+        slot.raw.push(value)
 
         # Media móvil exponencial con factor de suavizado 0.3
-        if len(self.moving_averages[variable_id]) > 1:
-            alpha = 0.3
-            previous_avg = list(self.moving_averages[variable_id])[-2]
-            filtered_value = alpha * value + (1 - alpha) * previous_avg
-            return filtered_value
-
-        return value
+        if slot.ema is None:
+            slot.ema = value
+        else:
+            slot.ema = self.EMA_ALPHA * value + (1 - self.EMA_ALPHA) * slot.ema
+        return slot.ema
 
     def calculate_statistics(self, variable_id: str, value: float) -> Dict:
         """Calcular estadísticas de la variable"""
-        if variable_id not in self.moving_averages:
+        slot = self.slots.get(variable_id)
+        if slot is None or slot.raw.count < 2:
             return {}
 
-        values = list(self.moving_averages[variable_id])
-        if len(values) < 2:
-            return {}
+        window = slot.raw
+        return self.statistics_result(window.mean, window.std, window.min, window.max)
 
+    @staticmethod
+    def statistics_result(mean: float, std: float, minimum: float, maximum: float) -> Dict:
         return {
-            'mean': np.mean(values),
-            'std': np.std(values),
-            'min': np.min(values),
-            'max': np.max(values),
-            'range': np.max(values) - np.min(values),
-            'cv': np.std(values) / np.mean(values) if np.mean(values) != 0 else 0
+            'mean': mean,
+            'std': std,
+            'min': minimum,
+            'max': maximum,
+            'range': maximum - minimum,
+            'cv': std / mean if mean != 0 else 0
         }
 
     def analyze_trend(self, variable_id: str, value: float) -> Dict:
         """Analizar tendencia de la variable"""
-        if variable_id not in self.trend_analyzers:
-            self.trend_analyzers[variable_id] = deque(maxlen=20)
-
-        self.trend_analyzers[variable_id].append({
-            'timestamp': time.time(),
-            'value': value
-        })
+        slot = self._slot(variable_id)
+        slot.trend.push(time.time(), value)
+        slot.recent.push(value)
 
-        if len(self.trend_analyzers[variable_id]) < 5:
+        if slot.trend.count < 5:
             return {'trend': 'insufficient_data'}
 
-        # Análisis de tendencia lineal
-        data = list(self.trend_analyzers[variable_id])
-        times = [d['timestamp'] for d in data]
-        values = [d['value'] for d in data]
-
-        # Regresión lineal simple
-        n = len(values)
-        sum_x = sum(times)
-        sum_y = sum(values)
-        sum_xy = sum(t * v for t, v in zip(times, values))
-        sum_x2 = sum(t * t for t in times)
-
-        slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x * sum_x)
+        # Regresión lineal simple sobre sumas acumuladas
+        return self.trend_result(slot.trend.slope(), slot.trend.count)
 
+    @staticmethod
+    def trend_result(slope: float, count: int) -> Dict:
         trend_direction = 'stable'
         if abs(slope) > 0.001:  # Umbral de cambio significativo
             trend_direction = 'increasing' if slope > 0 else 'decreasing'
@@ -418,21 +670,24 @@ class VariableDataProcessor:
             'trend': trend_direction,
             'slope': slope,
             'rate_of_change': slope * 60,  # Por minuto
-            'confidence': min(len(data) / 20.0, 1.0)  # Confianza basada en datos disponibles
+            'confidence': min(count / 20.0, 1.0)  # Confianza basada en datos disponibles
         }
 
     def predict_future_values(self, variable_id: str, current_value: float) -> Dict:
         """Predecir valores futuros usando modelos simples"""
-        if variable_id not in self.trend_analyzers or len(self.trend_analyzers[variable_id]) < 10:
+        slot = self.slots.get(variable_id)
+        if slot is None or slot.trend.count < 10:
             return {'prediction': 'insufficient_data'}
 
-        data = list(self.trend_analyzers[variable_id])
-        values = [d['value'] for d in data[-10:]]  # Últimos 10 valores
+        recent = slot.recent  # Últimos 10 valores
 
         # Predicción simple basada en tendencia
-        mean_value = np.mean(values)
-        trend_slope = (values[-1] - values[0]) / len(values)
+        trend_slope = (recent.values[-1] - recent.values[0]) / recent.count
+        return self.prediction_result(current_value, recent.mean, trend_slope, recent.std)
 
+    @staticmethod
+    def prediction_result(current_value: float, mean_value: float, trend_slope: float,
+                          std_dev: float) -> Dict:
         predictions = {
             '1_minute': current_value + trend_slope * 1,
             '5_minutes': current_value + trend_slope * 5,
@@ -441,7 +696,6 @@ class VariableDataProcessor:
         }
 
         # Calcular intervalos de confianza basados en desviación estándar
-        std_dev = np.std(values)
         confidence_intervals = {}
         for time_horizon, pred_value in predictions.items():
             confidence_intervals[time_horizon] = {
@@ -459,12 +713,12 @@ class VariableDataProcessor:
 
     def detect_anomalies(self, variable_id: str, value: float) -> float:
         """Detectar anomalías usando Z-score modificado"""
-        if variable_id not in self.moving_averages or len(self.moving_averages[variable_id]) < 3:
+        slot = self.slots.get(variable_id)
+        if slot is None or slot.raw.count < 3:
             return 0.0
 
-        values = list(self.moving_averages[variable_id])
-        mean_val = np.mean(values)
-        std_val = np.std(values)
+        mean_val = slot.raw.mean
+        std_val = slot.raw.std
 
         if std_val == 0:
             return 0.0
@@ -479,50 +733,240 @@ class VariableDataProcessor:
 
     def check_alarm_thresholds(self, reading: VariableReading, config: IndustrialVariable) -> List[Dict]:
         """Verificar umbrales de alarma"""
-        alarms = []
         value = reading.value
 
-        # Alarma crítica baja
-        if value <= config.alarm_low:
-            alarms.append({
-                'severity': AlarmSeverity.CRITICAL.value,
-                'type': 'low_alarm',
-                'message': f"{config.name} critically low: {value} {config.unit} (threshold: {config.alarm_low})",
-                'threshold': config.alarm_low,
-                'deviation': abs(value - config.alarm_low)
-            })
-
-        # Alarma crítica alta
-        elif value >= config.alarm_high:
-            alarms.append({
-                'severity': AlarmSeverity.CRITICAL.value,
-                'type': 'high_alarm',
-                'message': f"{config.name} critically high: {value} {config.unit} (threshold: {config.alarm_high})",
-                'threshold': config.alarm_high,
-                'deviation': abs(value - config.alarm_high)
-            })
-
-        # Warning bajo
-        elif value <= config.warning_low:
-            alarms.append({
-                'severity': AlarmSeverity.HIGH.value,
-                'type': 'low_warning',
-                'message': f"{config.name} below warning level: {value} {config.unit} (threshold: {config.warning_low})",
-                'threshold': config.warning_low,
-                'deviation': abs(value - config.warning_low)
-            })
-
-        # Warning alto
-        elif value >= config.warning_high:
-            alarms.append({
-                'severity': AlarmSeverity.HIGH.value,
-                'type': 'high_warning',
-                'message': f"{config.name} above warning level: {value} {config.unit} (threshold: {config.warning_high})",
-                'threshold': config.warning_high,
-                'deviation': abs(value - config.warning_high)
-            })
-
-        return alarms
+        # Crítica baja, crítica alta, warning bajo, warning alto: gana el primero
+        for level, (_, _, field, _) in enumerate(ALARM_LEVELS, start=1):
+            threshold = getattr(config, field)
+            if (value <= threshold) if field.endswith('_low') else (value >= threshold):
+                return [threshold_alarm(config, value, level)]
+
+        return []
+
+
+class VariableBatchProcessor:
+    """
+    Procesado columnar de lotes de escaneo.
+
+    Cada variable registrada ocupa una fila de arrays NumPy (umbrales,
+    estado del filtro y ventanas circulares), de modo que un lote de N
+    variables se filtra, puntúa y compara con los umbrales con operaciones
+    vectoriales.  Los dicts de alarma sólo se construyen para las filas que
+    disparan, y el resultado por variable (mismo formato que
+    ``VariableDataProcessor.process_reading``) se materializa bajo demanda
+    con ``reading()``.
+    """
+
+    NOISE_WINDOW = VariableDataProcessor.NOISE_WINDOW
+    TREND_WINDOW = VariableDataProcessor.TREND_WINDOW
+    PREDICTION_WINDOW = VariableDataProcessor.PREDICTION_WINDOW
+    EMA_ALPHA = VariableDataProcessor.EMA_ALPHA
+
+    def __init__(self, capacity: int = 256):
+        self.index: Dict[str, int] = {}
+        self.variables: List[IndustrialVariable] = []
+
+        # Umbrales en el orden de ALARM_LEVELS y opciones de análisis
+        self.thresholds = np.zeros((capacity, len(ALARM_LEVELS)))
+        self.trending = np.zeros(capacity, dtype=bool)
+        self.prediction = np.zeros(capacity, dtype=bool)
+
+        # Última lectura procesada
+        self.value = np.full(capacity, np.nan)
+        self.quality = np.zeros(capacity, dtype=np.int16)
+        self.filtered = np.full(capacity, np.nan)
+        self.anomaly = np.zeros(capacity)
+        self.level = np.zeros(capacity, dtype=np.int8)  # Nivel de ALARM_LEVELS, 0 = normal
+        self.timestamp = np.full(capacity, None, dtype=object)
+
+        # Ventanas circulares: crudo para estadísticas, (t, filtrado) para tendencia
+        self.raw = np.zeros((capacity, self.NOISE_WINDOW))
+        self.raw_count = np.zeros(capacity, dtype=np.int64)
+        self.trend_t = np.zeros((capacity, self.TREND_WINDOW))
+        self.trend_y = np.zeros((capacity, self.TREND_WINDOW))
+        self.trend_count = np.zeros(capacity, dtype=np.int64)
+
+    _COLUMNS = ('thresholds', 'trending', 'prediction', 'value', 'quality', 'filtered', 'anomaly',
+                'level', 'timestamp', 'raw', 'raw_count', 'trend_t', 'trend_y', 'trend_count')
+
+    def _grow(self):
+        """Duplicar la capacidad de todas las columnas"""
+        for name in self._COLUMNS:
+            column = getattr(self, name)
+            fill = np.nan if name in ('value', 'filtered') else (None if column.dtype == object else 0)
+            grown = np.full((2 * len(column),) + column.shape[1:], fill, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def register(self, variables) -> np.ndarray:
+        """Registrar variables (las ya conocidas actualizan sus umbrales) y devolver sus filas"""
+        rows = []
+        for variable in variables:
+            row = self.index.get(variable.id)
+            if row is None:
+                row = len(self.variables)
+                if row >= len(self.value):
+                    self._grow()
+                self.index[variable.id] = row
+                self.variables.append(variable)
+            else:
+                self.variables[row] = variable
+            self.thresholds[row] = [getattr(variable, field) for _, _, field, _ in ALARM_LEVELS]
+            self.trending[row] = variable.enable_trending
+            self.prediction[row] = variable.enable_prediction
+            rows.append(row)
+        return np.asarray(rows, dtype=np.int64)
+
+    def rows_for(self, variable_ids) -> np.ndarray:
+        index = self.index
+        return np.fromiter((index[v] for v in variable_ids), dtype=np.int64)
+
+    def process(self, rows: np.ndarray, values: np.ndarray, quality: np.ndarray,
+                timestamp: datetime, alarms: bool = True) -> List[Tuple[int, Dict]]:
+        """
+        Procesar un lote: ``values[i]`` es la lectura de la fila ``rows[i]``.
+
+        Devuelve ``[(fila, alarma), ...]`` sólo para las filas que superan
+        algún umbral, con el mismo dict que ``check_alarm_thresholds``
+        (lista vacía con ``alarms=False``: el nivel se guarda igualmente).
+        """
+        values = np.asarray(values, dtype=float)
+        self.value[rows] = values
+        self.quality[rows] = quality
+        self.timestamp[rows] = timestamp
+
+        # Filtro de ruido: EMA por fila, inicializada con la primera lectura
+        self.raw[rows, self.raw_count[rows] % self.NOISE_WINDOW] = values
+        self.raw_count[rows] += 1
+        previous = self.filtered[rows]
+        filtered = np.where(np.isnan(previous), values,
+                            self.EMA_ALPHA * values + (1 - self.EMA_ALPHA) * previous)
+        self.filtered[rows] = filtered
+
+        # Z-score del valor filtrado frente a la ventana cruda
+        window = self.raw[rows]
+        mask = np.arange(self.NOISE_WINDOW) < self.raw_count[rows, None]
+        n = mask.sum(axis=1)
+        mean = np.where(mask, window, 0.0).sum(axis=1) / n
+        std = np.sqrt(np.where(mask, (window - mean[:, None]) ** 2, 0.0).sum(axis=1) / n)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            anomaly = np.minimum(np.abs(filtered - mean) / std / 3.0, 1.0)
+        self.anomaly[rows] = np.where((n >= 3) & (std > 0), anomaly, 0.0)
+
+        # Tendencia sobre el valor filtrado para las variables que la tienen activa
+        trending = self.trending[rows]
+        if trending.any():
+            trend_rows = rows[trending]
+            slot = self.trend_count[trend_rows] % self.TREND_WINDOW
+            self.trend_t[trend_rows, slot] = timestamp.timestamp()
+            self.trend_y[trend_rows, slot] = filtered[trending]
+            self.trend_count[trend_rows] += 1
+
+        # Umbrales: nivel 1..4 del primer umbral superado, 0 si ninguno
+        limits = self.thresholds[rows]
+        level = np.select(
+            [values <= limits[:, 0], values >= limits[:, 1],
+             values <= limits[:, 2], values >= limits[:, 3]],
+            [1, 2, 3, 4], default=0
+        )
+        self.level[rows] = level
+        if not alarms:
+            return []
+        tripped = np.flatnonzero(level)
+        return [
+            (int(rows[i]), threshold_alarm(self.variables[rows[i]], float(values[i]), int(level[i])))
+            for i in tripped
+        ]
+
+    def statistics(self, row: int) -> Dict:
+        count = min(int(self.raw_count[row]), self.NOISE_WINDOW)
+        if count < 2:
+            return {}
+        window = self.raw[row, :count]
+        return VariableDataProcessor.statistics_result(
+            float(window.mean()), float(window.std()), float(window.min()), float(window.max())
+        )
+
+    def _trend_window(self, row: int):
+        """(t, y) de la ventana de tendencia en orden cronológico"""
+        count = int(self.trend_count[row])
+        size = self.TREND_WINDOW
+        order = (np.arange(max(count - size, 0), count)) % size
+        return self.trend_t[row, order], self.trend_y[row, order]
+
+    def trend(self, row: int) -> Dict:
+        t, y = self._trend_window(row)
+        if len(y) < 5:
+            return {'trend': 'insufficient_data'}
+        x = t - t.mean()
+        denominator = float((x * x).sum())
+        slope = float((x * (y - y.mean())).sum()) / denominator if denominator > 0 else 0.0
+        return VariableDataProcessor.trend_result(slope, len(y))
+
+    def predict(self, row: int) -> Dict:
+        _, y = self._trend_window(row)
+        if len(y) < 10:
+            return {'prediction': 'insufficient_data'}
+        recent = y[-self.PREDICTION_WINDOW:]
+        return VariableDataProcessor.prediction_result(
+            float(self.filtered[row]), float(recent.mean()),
+            float(recent[-1] - recent[0]) / len(recent), float(recent.std())
+        )
+
+    def reading(self, variable_id: str) -> Optional[Dict]:
+        """Resultado de la última lectura en el formato de ``process_reading``"""
+        row = self.index.get(variable_id)
+        if row is None or self.timestamp[row] is None:
+            return None
+        variable = self.variables[row]
+        value = float(self.value[row])
+
+        analysis = {'statistics': self.statistics(row)}
+        if variable.enable_trending:
+            analysis['trend'] = self.trend(row)
+        if variable.enable_prediction:
+            analysis['prediction'] = self.predict(row)
+        analysis['anomaly_score'] = float(self.anomaly[row])
+
+        level = int(self.level[row])
+        return {
+            'raw_reading': {
+                'variable_id': variable_id,
+                'timestamp': self.timestamp[row],
+                'value': value,
+                'quality': int(self.quality[row]),
+                'status': SensorStatus.ONLINE,
+                'raw_value': value,
+                'engineering_units': variable.unit,
+                'source_address': variable.plc_address
+            },
+            'processed_value': value,
+            'quality_score': int(self.quality[row]),
+            'status': SensorStatus.ONLINE.value,
+            'analysis': analysis,
+            'filtered_value': float(self.filtered[row]),
+            'alarms': [threshold_alarm(variable, value, level)] if level else []
+        }
+
+
+class LiveReadings(Mapping):
+    """Vista de las últimas lecturas de un VariableBatchProcessor, materializadas al acceder"""
+
+    def __init__(self, processor: VariableBatchProcessor):
+        self.processor = processor
+
+    def __getitem__(self, variable_id: str) -> Dict:
+        reading = self.processor.reading(variable_id)
+        if reading is None:
+            raise KeyError(variable_id)
+        return reading
+
+    def __iter__(self):
+        timestamps = self.processor.timestamp
+        return (v for v, row in self.processor.index.items() if timestamps[row] is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
 
 
 class IndustrialVariablesMonitor:
@@ -535,15 +979,21 @@ class IndustrialVariablesMonitor:
         # Componentes principales
         self.plc_engine = PLCCommunicationEngine()
         self.data_processor = VariableDataProcessor()
+        self.batch_processor = VariableBatchProcessor()
+        self.scan_scheduler = ScanScheduler(self.plc_engine, self.process_scan_batch)
 
         # Estado del sistema
         self.variables_config = {}
-        self.active_readings = {}
+        self.active_readings = LiveReadings(self.batch_processor)
+        self.tag_bus = TagBus()  # Reporte por excepción para UI y logger SCADA
         self.active_alarms = {}
+        self.alarm_engine = AlarmEngine(ALARM_LEVELS)
         self.monitoring_active = False
 
         # Base de datos
         self.init_database()
+        self.historian = HistorianWriter(self.db_path)
+        self.archive = CompressedHistorian(self.db_path)
 
         # Variables industriales predefinidas
         self.load_default_variables()
@@ -910,14 +1360,12 @@ class IndustrialVariablesMonitor:
 
         # Inicializar PLCs simulados
         await self.initialize_plcs()
+        self.historian.start()
 
-        # Iniciar tasks de monitoreo para cada variable
-        monitoring_tasks = []
-        for variable_id, variable in self.variables_config.items():
-            task = asyncio.create_task(
-                self.monitor_variable_loop(variable)
-            )
-            monitoring_tasks.append(task)
+        # Un lazo de escaneo por (PLC, periodo) con lecturas de bloque
+        monitoring_tasks = [
+            asyncio.create_task(self.scan_scheduler.run(self.variables_config.values()))
+        ]
 
         # Task de procesamiento de alarmas
         alarm_task = asyncio.create_task(self.alarm_processing_loop())
@@ -930,6 +1378,15 @@ class IndustrialVariablesMonitor:
             self.logger.error(f"Monitoring error: {e}")
         finally:
             self.monitoring_active = False
+            self.scan_scheduler.stop()
+            await self.plc_engine.disconnect_all()
+            await asyncio.to_thread(self.historian.close)
+            await asyncio.to_thread(self.archive.close)
+
+    def stop_monitoring(self):
+        """Detener escaneo y procesamiento de alarmas"""
+        self.monitoring_active = False
+        self.scan_scheduler.stop()
 
     async def initialize_plcs(self):
         """Inicializar conexiones PLC simuladas"""
@@ -953,47 +1410,46 @@ class IndustrialVariablesMonitor:
         for plc_config in plc_configs:
             await self.plc_engine.connect_plc(plc_config)
 
-    async def monitor_variable_loop(self, variable: IndustrialVariable):
-        """Loop de monitoreo para variable específica"""
-        while self.monitoring_active:
-            try:
-                # Leer valor del PLC (simulado)
-                raw_value = await self.plc_engine.read_variable('main_plc', variable.plc_address)
-
-                if raw_value is None:
-                    # Generar valor simulado si no hay conexión PLC
-                    raw_value = self.simulate_variable_value(variable)
-
-                # Crear reading
-                reading = VariableReading(
-                    variable_id=variable.id,
-                    timestamp=datetime.now(),
-                    value=raw_value,
-                    quality=random.randint(95, 100),  # Alta calidad simulada
-                    status=SensorStatus.ONLINE,
-                    raw_value=raw_value,
-                    engineering_units=variable.unit,
-                    source_address=variable.plc_address
-                )
-
-                # Procesar lectura
-                processed_data = self.data_processor.process_reading(reading, variable)
-
-                # Almacenar en memoria y base de datos
-                self.active_readings[variable.id] = processed_data
-                await self.store_reading(reading, processed_data)
-
-                # Procesar alarmas
-                if processed_data.get('alarms'):
-                    for alarm_data in processed_data['alarms']:
-                        await self.create_alarm(variable.id, reading, alarm_data)
+    async def process_scan_batch(self, batch: ScanBatch):
+        """Procesar el lote publicado por un escaneo de grupo como columnas"""
+        processor = self.batch_processor
+        variable_ids = [v for v in batch.values if v in self.variables_config]
+        if not variable_ids:
+            return
 
-                # Esperar según rate de actualización
-                await asyncio.sleep(variable.update_rate_ms / 1000.0)
+        try:
+            missing = [v for v in variable_ids if v not in processor.index]
+            if missing:
+                processor.register(self.variables_config[v] for v in missing)
+                self.archive.register(self.variables_config[v] for v in missing)
+                self.alarm_engine.register(self.variables_config[v] for v in missing)
+            rows = processor.rows_for(variable_ids)
+            values = np.array([batch.values[v] for v in variable_ids], dtype=float)
+
+            # Generar valor simulado si no hay conexión PLC (None -> NaN)
+            for i in np.flatnonzero(np.isnan(values)):
+                values[i] = self.simulate_variable_value(processor.variables[rows[i]])
+
+            quality = np.random.randint(95, 101, size=len(rows))  # Alta calidad simulada
+            processor.process(rows, values, quality, batch.timestamp, alarms=False)
+
+            await self.store_readings(variable_ids, rows, batch.timestamp)
+            self.tag_bus.publish(variable_ids, values, quality, batch.timestamp.timestamp())
+
+            # Histórico comprimido: banda muerta + swinging door por variable
+            self.archive.ingest(self.archive.rows_for(variable_ids), batch.timestamp.timestamp(), values)
+            if self.archive.pending:
+                await asyncio.to_thread(self.archive.flush)
+
+            # Máquinas de estado de alarma: sólo las transiciones generan trabajo
+            events = self.alarm_engine.process(
+                self.alarm_engine.rows_for(variable_ids), batch.timestamp.timestamp(), values
+            )
+            if events:
+                await self.apply_alarm_events(events)
 
-            except Exception as e:
-                self.logger.error(f"Error monitoring {variable.id}: {e}")
-                await asyncio.sleep(5.0)
+        except Exception as e:
+            self.logger.error(f"Error processing scan batch {batch.plc_id}/{batch.rate_ms}ms: {e}")
 
     def simulate_variable_value(self, variable: IndustrialVariable) -> float:
         """Simular valor de variable industrial"""
@@ -1019,143 +1475,146 @@ class IndustrialVariablesMonitor:
         return max(variable.min_value, min(variable.max_value, simulated_value))
 
     async def store_reading(self, reading: VariableReading, processed_data: Dict):
-        """Almacenar lectura en base de datos"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cursor.execute('''
-                INSERT INTO variable_readings
-                (variable_id, timestamp, value, quality, status, raw_value,
-                 processed_value, anomaly_score)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                reading.variable_id,
-                reading.timestamp,
-                reading.value,
-                reading.quality,
-                reading.status.value,
-                reading.raw_value,
-                processed_data.get('filtered_value', reading.value),
-                processed_data.get('analysis', {}).get('anomaly_score', 0.0)
-            ))
-
-            conn.commit()
-            conn.close()
-
-        except Exception as e:
-            self.logger.error(f"Error storing reading: {e}")
-
-    async def create_alarm(self, variable_id: str, reading: VariableReading, alarm_data: Dict):
-        """Crear alarma industrial"""
-        alarm_id = f"{variable_id}_{alarm_data['type']}_{int(reading.timestamp.timestamp())}"
-
-        # Verificar si la alarma ya existe
-        if alarm_id in self.active_alarms:
-            return
-
-        alarm = IndustrialAlarm(
-            id=alarm_id,
-            variable_id=variable_id,
-            timestamp=reading.timestamp,
-            severity=AlarmSeverity(alarm_data['severity']),
-            message=alarm_data['message'],
-            current_value=reading.value,
-            threshold_value=alarm_data['threshold']
+        """Encolar lectura en el histórico"""
+        await self.historian.write([(
+            reading.variable_id,
+            reading.timestamp.isoformat(' '),
+            reading.value,
+            reading.quality,
+            reading.status.value,
+            reading.raw_value,
+            processed_data.get('filtered_value', reading.value),
+            processed_data.get('analysis', {}).get('anomaly_score', 0.0)
+        )])
+
+    async def store_readings(self, variable_ids: List[str], rows: np.ndarray, timestamp: datetime):
+        """Encolar las lecturas de un lote en el histórico"""
+        processor = self.batch_processor
+        values = processor.value[rows].tolist()
+        count = len(variable_ids)
+        await self.historian.write(list(zip(
+            variable_ids,
+            [timestamp.isoformat(' ')] * count,
+            values,
+            processor.quality[rows].tolist(),
+            [SensorStatus.ONLINE.value] * count,
+            values,
+            processor.filtered[rows].tolist(),
+            processor.anomaly[rows].tolist()
+        )))
+
+    async def apply_alarm_events(self, events: List[AlarmEvent]):
+        """Reflejar transiciones del motor en active_alarms y guardarlas en un único lote"""
+        changed = {}
+        for event in events:
+            alarm = self.active_alarms.get(event.alarm_id)
+            when = datetime.fromtimestamp(event.timestamp)
+
+            if event.kind == 'active':
+                if alarm is None:
+                    config = self.variables_config[event.variable_id]
+                    alarm_data = threshold_alarm(config, event.value, event.level)
+                    alarm = IndustrialAlarm(
+                        id=event.alarm_id,
+                        variable_id=event.variable_id,
+                        timestamp=when,
+                        severity=AlarmSeverity(alarm_data['severity']),
+                        message=alarm_data['message'],
+                        current_value=event.value,
+                        threshold_value=alarm_data['threshold']
+                    )
+                    self.active_alarms[alarm.id] = alarm
+                else:
+                    # Realarma antes de reconocer el retorno a normal
+                    alarm.cleared, alarm.cleared_at = False, None
+                    alarm.current_value = event.value
+                first_out = " [FIRST-OUT]" if event.first_out else ""
+                self.logger.warning(f"🚨 ALARM{first_out}: {alarm.message}")
+            elif alarm is None:
+                continue
+            elif event.kind == 'acked':
+                alarm.acknowledged, alarm.acknowledged_at = True, when
+            elif event.kind in ('cleared', 'normal'):
+                if not alarm.cleared:
+                    alarm.cleared, alarm.cleared_at = True, when
+                    alarm.current_value = event.value
+                if event.kind == 'normal':
+                    del self.active_alarms[alarm.id]
+                self.logger.info(f"✅ Alarm returned to normal: {alarm.id}")
+            elif event.kind == 'shelved':
+                del self.active_alarms[alarm.id]
+                self.logger.info(f"📥 Alarm shelved: {alarm.id}")
+            elif event.kind == 'escalated':
+                # En producción: enviar notificaciones, emails, SMS, etc.
+                self.logger.critical(f"🚨 CRITICAL ALARM ESCALATED: {alarm.message}")
+                continue
+            changed[alarm.id] = alarm
+
+        if changed:
+            await self.store_alarms(list(changed.values()))
+
+    async def acknowledge_alarm(self, alarm_id: str, user: str):
+        """Reconocer una alarma (ACTIVE → ACKED, CLEARED → NORMAL)"""
+        alarm = self.active_alarms.get(alarm_id)
+        if alarm is None:
+            raise KeyError(alarm_id)
+        # El motor primero: si no conoce la alarma (KeyError) no se marca como reconocida
+        events = self.alarm_engine.acknowledge(alarm_id, time.time())
+        alarm.acknowledged, alarm.acknowledged_by, alarm.acknowledged_at = True, user, datetime.now()
+        await self.apply_alarm_events(events)
+
+    async def shelve_alarms(self, variable_id: str, duration_s: float, alarm_type: Optional[str] = None):
+        """Archivar temporalmente las alarmas de una variable"""
+        await self.apply_alarm_events(
+            self.alarm_engine.shelve(variable_id, duration_s, time.time(), alarm_type)
         )
 
-        # Almacenar en memoria y base de datos
-        self.active_alarms[alarm_id] = alarm
-        await self.store_alarm(alarm)
-
-        self.logger.warning(f"🚨 ALARM: {alarm.message}")
-
     async def store_alarm(self, alarm: IndustrialAlarm):
         """Almacenar alarma en base de datos"""
-        try:
+        await self.store_alarms([alarm])
+
+    async def store_alarms(self, alarms: List[IndustrialAlarm]):
+        """Almacenar alarmas en base de datos en una sola transacción"""
+        rows = [(
+            alarm.id, alarm.variable_id, alarm.timestamp,
+            alarm.severity.value, alarm.message,
+            alarm.current_value, alarm.threshold_value,
+            alarm.acknowledged, alarm.acknowledged_by, alarm.acknowledged_at,
+            alarm.cleared, alarm.cleared_at
+        ) for alarm in alarms]
+
+        def write():
             conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cursor.execute('''
-                INSERT OR REPLACE INTO alarms
-                (id, variable_id, timestamp, severity, message, current_value,
-                 threshold_value, acknowledged, cleared)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                alarm.id, alarm.variable_id, alarm.timestamp,
-                alarm.severity.value, alarm.message,
-                alarm.current_value, alarm.threshold_value,
-                alarm.acknowledged, alarm.cleared
-            ))
-
-            conn.commit()
-            conn.close()
+            try:
+                with conn:
+                    conn.executemany('''
+                        INSERT OR REPLACE INTO alarms
+                        (id, variable_id, timestamp, severity, message, current_value,
+                         threshold_value, acknowledged, acknowledged_by, acknowledged_at,
+                         cleared, cleared_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', rows)
+            finally:
+                conn.close()
 
+        try:
+            await asyncio.to_thread(write)
         except Exception as e:
-            self.logger.error(f"Error storing alarm: {e}")
+            self.logger.error(f"Error storing alarms: {e}")
 
     async def alarm_processing_loop(self):
-        """Loop de procesamiento de alarmas"""
+        """Vencimientos de escalamiento y shelving aunque no lleguen lotes de escaneo"""
         while self.monitoring_active:
             try:
-                # Auto-clear de alarmas que volvieron a normal
-                await self.auto_clear_alarms()
-
-                # Escalamiento de alarmas críticas no reconocidas
-                await self.escalate_critical_alarms()
-
-                await asyncio.sleep(30)  # Verificar cada 30 segundos
+                events = self.alarm_engine.tick(time.time())
+                if events:
+                    await self.apply_alarm_events(events)
+                await asyncio.sleep(1)
 
             except Exception as e:
                 self.logger.error(f"Alarm processing error: {e}")
                 await asyncio.sleep(60)
 
-    async def auto_clear_alarms(self):
-        """Auto-clear alarmas que volvieron a condiciones normales"""
-        for alarm_id, alarm in list(self.active_alarms.items()):
-            if alarm.cleared:
-                continue
-
-            # Obtener lectura actual de la variable
-            variable_reading = self.active_readings.get(alarm.variable_id)
-            if not variable_reading:
-                continue
-
-            current_value = variable_reading['raw_reading']['value']
-            variable_config = self.variables_config[alarm.variable_id]
-
-            # Verificar si la condición de alarma ya no existe
-            should_clear = False
-
-            if alarm.severity == AlarmSeverity.CRITICAL:
-                if (alarm.current_value <= variable_config.alarm_low and
-                    current_value > variable_config.warning_low):
-                    should_clear = True
-                elif (alarm.current_value >= variable_config.alarm_high and
-                      current_value < variable_config.warning_high):
-                    should_clear = True
-
-            if should_clear:
-                alarm.cleared = True
-                alarm.cleared_at = datetime.now()
-                await self.store_alarm(alarm)
-                del self.active_alarms[alarm_id]
-
-                self.logger.info(f"✅ Auto-cleared alarm: {alarm_id}")
-
-    async def escalate_critical_alarms(self):
-        """Escalamiento de alarmas críticas"""
-        critical_timeout = timedelta(minutes=5)
-        current_time = datetime.now()
-
-        for alarm in self.active_alarms.values():
-            if (alarm.severity == AlarmSeverity.CRITICAL and
-                not alarm.acknowledged and
-                current_time - alarm.timestamp > critical_timeout):
-
-                # En producción: enviar notificaciones, emails, SMS, etc.
-                self.logger.critical(f"🚨 CRITICAL ALARM ESCALATED: {alarm.message}")
-
     def get_monitoring_status(self) -> Dict:
         """Obtener estado del monitoreo"""
         active_alarms_count = len([a for a in self.active_alarms.values() if not a.cleared])
@@ -1165,14 +1624,30 @@ class IndustrialVariablesMonitor:
         return {
             'monitoring_active': self.monitoring_active,
             'total_variables': len(self.variables_config),
-            'variables_online': len([r for r in self.active_readings.values()
-                                   if r['raw_reading']['status'] == 'online']),
+            'variables_online': len(self.active_readings),
             'active_alarms': active_alarms_count,
             'critical_alarms': critical_alarms_count,
             'plc_connections': len(self.plc_engine.connections),
+            'scan': self.scan_scheduler.get_stats(),
+            'historian': self.historian.get_stats(),
+            'archive': self.archive.get_stats(),
+            'tag_bus': self.tag_bus.get_stats(),
+            'alarm_engine': self.alarm_engine.get_stats(),
             'last_update': datetime.now().isoformat()
         }
 
+    def create_stream_app(self):
+        """Endpoint SSE/WebSocket con sólo las variables que cambian"""
+        return create_tag_stream_app(self.tag_bus)
+
+    def get_variable_trend(self, variable_id: str, hours: float = 24.0, points: int = 300) -> Dict:
+        """Tendencia de una variable desde el histórico comprimido"""
+        end = time.time()
+        start = end - hours * 3600
+        trend = self.archive.interpolate(variable_id, start, end, points)
+        trend['rollups'] = self.archive.rollups(variable_id, start, end, 3600 if hours > 6 else 60)
+        return trend
+
     def get_variable_dashboard_data(self) -> Dict:
         """Obtener datos para dashboard de variables"""
         dashboard_data = {
@@ -1240,7 +1715,7 @@ async def main():
 
     except KeyboardInterrupt:
         print("\n🛑 Stopping monitoring...")
-        monitor.monitoring_active = False
+        monitor.stop_monitoring()
     except Exception as e:
         print(f"❌ Critical error: {e}")
 
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+SmartCompute Industrial - Scan Groups para Lectura de PLCs
+==========================================================
+
+Planificador de lecturas agrupadas:
+
+- Las variables se agrupan por PLC y por periodo de actualización
+  (``update_rate_ms``).  Cada grupo tiene un único lazo de escaneo.
+- Dentro de un grupo, las direcciones se ordenan y se fusionan en lecturas
+  de bloque: registros 3xxxx/4xxxx contiguos hasta el límite Modbus de 125
+  registros por petición, o rangos de bytes de un mismo DB/área S7 hasta lo
+  que cabe en una PDU de 240 bytes.  Huecos pequeños entre direcciones se
+  leen igualmente: una petición más cuesta más que unos registros de sobra.
+- El valor decodificado de cada dirección se reparte a todas las variables
+  que la usan, y el resultado del escaneo se publica como un único lote.
+
+Protocolos sin direccionamiento por bloques (EtherNet/IP, OPC UA) siguen
+leyendo tag a tag, pero dentro del mismo lote.
+
+Las direcciones Modbus admiten tipo y orden de palabra opcionales:
+``"40001"`` (registro crudo), ``"40010:float32"``, ``"40020:int32:CDAB"``.
+"""
+
+import asyncio
+import logging
+import re
+import struct
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from smartcompute.industrial.protocols.modbus_tcp import REGISTER_COUNTS, WORD_ORDERS, decode_registers
+
+logger = logging.getLogger('PLC-ScanGroups')
+
+MODBUS_MAX_REGISTERS = 125      # Límite de Read Holding/Input Registers (FC3/FC4)
+S7_MAX_BLOCK_BYTES = 222        # Datos útiles en una respuesta con PDU de 240 bytes
+MODBUS_MAX_GAP = 8              # Registros sin usar que compensa leer para evitar otra petición
+S7_MAX_GAP = 16                 # Bytes equivalentes para S7
+
+BLOCK_PROTOCOLS = ('modbus_tcp', 's7comm')
+
+_S7_DB_RE = re.compile(r'^DB(\d+)\.DB([XBWD])(\d+)(?:\.([0-7]))?$', re.IGNORECASE)
+_S7_AREA_RE = re.compile(r'^([MIQE])([XBWD]?)(\d+)(?:\.([0-7]))?$', re.IGNORECASE)
+_S7_SIZES = {'X': 1, 'B': 1, 'W': 2, 'D': 4}
+
+
+@dataclass(frozen=True)
+class TagAddress:
+    """Dirección de PLC normalizada para planificar lecturas de bloque"""
+    area: str        # 'holding'/'input' (Modbus) o 'DB1', 'M', 'I', 'Q' (S7)
+    offset: int      # Registro (Modbus) o byte (S7) inicial
+    size: int        # Registros (Modbus) o bytes (S7) que ocupa el valor
+    kind: str        # 'register', tipo Modbus ('float32'...), o 'bit', 'byte', 'int', 'real' (S7)
+    bit: int = 0
+    word_order: str = 'ABCD'
+
+
+def parse_address(protocol: str, address: str) -> Optional[TagAddress]:
+    """Parsear dirección de PLC; ``None`` si no admite lectura por bloques"""
+    address = address.strip()
+
+    if protocol == 'modbus_tcp':
+        address, _, type_spec = address.partition(':')
+        data_type, _, word_order = type_spec.partition(':')
+        word_order = word_order.upper() or 'ABCD'
+        if (data_type and data_type not in REGISTER_COUNTS) or word_order not in WORD_ORDERS:
+            return None
+        if not address.isdigit() or len(address) not in (5, 6):
+            return None
+        base = 10 ** (len(address) - 1)
+        if address[0] == '4':
+            area = 'holding'
+        elif address[0] == '3':
+            area = 'input'
+        else:
+            return None
+        offset = int(address) - 4 * base - 1 if area == 'holding' else int(address) - 3 * base - 1
+        if offset < 0:
+            return None
+        if not data_type:
+            return TagAddress(area, offset, 1, 'register')
+        return TagAddress(area, offset, REGISTER_COUNTS[data_type], data_type, 0, word_order)
+
+    if protocol == 's7comm':
+        match = _S7_DB_RE.match(address)
+        if match:
+            area = f"DB{int(match.group(1))}"
+            width, offset, bit = match.group(2).upper(), int(match.group(3)), match.group(4)
+        else:
+            match = _S7_AREA_RE.match(address)
+            if not match:
+                return None
+            area = 'I' if match.group(1).upper() == 'E' else match.group(1).upper()
+            width = (match.group(2) or 'X').upper()
+            offset, bit = int(match.group(3)), match.group(4)
+            if width == 'X' and bit is None:
+                return None
+
+        kind = {'X': 'bit', 'B': 'byte', 'W': 'int', 'D': 'real'}[width]
+        return TagAddress(area, offset, _S7_SIZES[width], kind, int(bit or 0))
+
+    return None
+
+
+@dataclass
+class BlockRead:
+    """Lectura contigua de un área del PLC que cubre varias direcciones"""
+    area: str
+    start: int
+    count: int
+    tags: List[Tuple[str, TagAddress]] = field(default_factory=list)
+
+    def decode(self, raw: Any) -> Dict[str, Optional[float]]:
+        """
+        Repartir el contenido leído entre las direcciones del bloque.
+
+        ``raw`` es una lista con un valor por registro (Modbus) o los bytes
+        del rango (S7, big-endian).
+        """
+        values = {}
+        for address, tag in self.tags:
+            rel = tag.offset - self.start
+            try:
+                if tag.kind == 'register':
+                    values[address] = float(raw[rel])
+                elif tag.kind in REGISTER_COUNTS:
+                    values[address] = float(decode_registers(raw[rel:rel + tag.size], tag.kind,
+                                                             tag.word_order))
+                elif tag.kind == 'real':
+                    values[address] = struct.unpack_from('>f', raw, rel)[0]
+                elif tag.kind == 'int':
+                    values[address] = float(struct.unpack_from('>h', raw, rel)[0])
+                elif tag.kind == 'byte':
+                    values[address] = float(raw[rel])
+                else:
+                    values[address] = float((raw[rel] >> tag.bit) & 1)
+            except (IndexError, struct.error, TypeError, ValueError):
+                values[address] = None
+        return values
+
+
+def plan_block_reads(protocol: str, addresses: Iterable[str],
+                     max_gap: Optional[int] = None) -> Tuple[List[BlockRead], List[str]]:
+    """
+    Planificar lecturas de bloque para un conjunto de direcciones.
+
+    Devuelve los bloques y las direcciones que deben leerse individualmente
+    (protocolo sin bloques o dirección no reconocida).  Las direcciones
+    repetidas se leen una sola vez.
+    """
+    if protocol == 's7comm':
+        limit = S7_MAX_BLOCK_BYTES
+        gap = S7_MAX_GAP if max_gap is None else max_gap
+    else:
+        limit = MODBUS_MAX_REGISTERS
+        gap = MODBUS_MAX_GAP if max_gap is None else max_gap
+
+    by_area: Dict[str, List[Tuple[str, TagAddress]]] = {}
+    singles = []
+    for address in dict.fromkeys(addresses):
+        tag = parse_address(protocol, address) if protocol in BLOCK_PROTOCOLS else None
+        if tag is None:
+            singles.append(address)
+        else:
+            by_area.setdefault(tag.area, []).append((address, tag))
+
+    blocks = []
+    for area in sorted(by_area):
+        current = None
+        for address, tag in sorted(by_area[area], key=lambda item: (item[1].offset, item[1].size)):
+            end = tag.offset + tag.size
+            if (current is not None
+                    and tag.offset - (current.start + current.count) <= gap
+                    and max(end, current.start + current.count) - current.start <= limit):
+                current.count = max(end, current.start + current.count) - current.start
+                current.tags.append((address, tag))
+            else:
+                current = BlockRead(area, tag.offset, tag.size, [(address, tag)])
+                blocks.append(current)
+
+    return blocks, singles
+
+
+@dataclass
+class ScanGroup:
+    """Variables de un mismo PLC con el mismo periodo de escaneo"""
+    plc_id: str
+    protocol: Optional[str]
+    rate_ms: int
+    variables: List[Any]
+    blocks: List[BlockRead] = field(default_factory=list)
+    singles: List[str] = field(default_factory=list)
+
+    @property
+    def requests_per_scan(self) -> int:
+        return len(self.blocks) + len(self.singles)
+
+
+@dataclass
+class ScanBatch:
+    """Resultado de un escaneo: un valor por variable del grupo"""
+    plc_id: str
+    rate_ms: int
+    timestamp: datetime
+    values: Dict[str, Optional[float]]
+    requests: int
+    duration_ms: float
+
+
+class ScanScheduler:
+    """Lazo de escaneo por grupo (PLC, periodo) con lecturas de bloque"""
+
+    def __init__(self, plc_engine, publish: Callable[[ScanBatch], Awaitable[None]],
+                 default_plc: str = 'main_plc', max_gap: Optional[int] = None):
+        self.plc_engine = plc_engine
+        self.publish = publish
+        self.default_plc = default_plc
+        self.max_gap = max_gap
+        self.groups: List[ScanGroup] = []
+        self.running = False
+
+        self.stats = {
+            'scans': 0,
+            'requests': 0,
+            'overruns': 0,
+            'errors': 0
+        }
+
+    def build_groups(self, variables: Iterable[Any]) -> List[ScanGroup]:
+        """Agrupar variables por PLC y ``update_rate_ms`` y planificar sus bloques"""
+        grouped: Dict[Tuple[str, int], List[Any]] = {}
+        for variable in variables:
+            plc_id = getattr(variable, 'plc_id', None) or self.default_plc
+            grouped.setdefault((plc_id, variable.update_rate_ms), []).append(variable)
+
+        groups = []
+        for (plc_id, rate_ms), members in sorted(grouped.items()):
+            connection = self.plc_engine.connections.get(plc_id)
+            protocol = connection['protocol'] if connection else None
+            blocks, singles = plan_block_reads(
+                protocol, [v.plc_address for v in members], self.max_gap
+            )
+            groups.append(ScanGroup(plc_id, protocol, rate_ms, members, blocks, singles))
+
+        self.groups = groups
+        return groups
+
+    async def scan_once(self, group: ScanGroup) -> ScanBatch:
+        """Ejecutar todas las lecturas del grupo y repartir los valores"""
+        started = time.perf_counter()
+        timestamp = datetime.now()
+
+        results = await asyncio.gather(
+            *[self.plc_engine.read_block(group.plc_id, block) for block in group.blocks],
+            *[self.plc_engine.read_variable(group.plc_id, address) for address in group.singles]
+        )
+
+        by_address: Dict[str, Optional[float]] = {}
+        for block_values in results[:len(group.blocks)]:
+            by_address.update(block_values)
+        for address, value in zip(group.singles, results[len(group.blocks):]):
+            by_address[address] = value
+
+        self.stats['scans'] += 1
+        self.stats['requests'] += group.requests_per_scan
+
+        return ScanBatch(
+            plc_id=group.plc_id,
+            rate_ms=group.rate_ms,
+            timestamp=timestamp,
+            values={v.id: by_address.get(v.plc_address) for v in group.variables},
+            requests=group.requests_per_scan,
+            duration_ms=(time.perf_counter() - started) * 1000
+        )
+
+    async def scan_group_loop(self, group: ScanGroup):
+        """Escanear un grupo a periodo fijo, sin deriva por el tiempo de lectura"""
+        loop = asyncio.get_running_loop()
+        period = group.rate_ms / 1000.0
+        next_tick = loop.time()
+
+        while self.running:
+            try:
+                batch = await self.scan_once(group)
+                await self.publish(batch)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Scan error on {group.plc_id} @ {group.rate_ms} ms: {e}")
+
+            next_tick += period
+            delay = next_tick - loop.time()
+            if delay < 0:
+                # El escaneo tardó más que el periodo: no acumular ticks atrasados
+                self.stats['overruns'] += 1
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    async def run(self, variables: Iterable[Any]):
+        """Construir los grupos y escanearlos hasta ``stop()``"""
+        groups = self.build_groups(variables)
+        self.running = True
+        for group in groups:
+            logger.info(
+                f"Scan group {group.plc_id} @ {group.rate_ms} ms: {len(group.variables)} variables, "
+                f"{group.requests_per_scan} requests/scan"
+            )
+        try:
+            await asyncio.gather(*[self.scan_group_loop(group) for group in groups])
+        finally:
+            self.running = False
+
+    def stop(self):
+        self.running = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['groups'] = len(self.groups)
+        stats['requests_per_cycle'] = sum(g.requests_per_scan for g in self.groups)
+        stats['requests_per_second'] = round(
+            sum(g.requests_per_scan * 1000.0 / g.rate_ms for g in self.groups if g.rate_ms > 0), 2
+        )
+        return stats
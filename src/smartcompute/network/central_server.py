@@ -25,6 +25,7 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 import yaml
 import jwt
 from cryptography.fernet import Fernet
@@ -33,6 +34,33 @@ from aiohttp import web, WSMsgType
 import websockets
 import base64
 
+from smartcompute.enterprise.ops.backup_dedup import ChunkStore
+from smartcompute.network.storage import CentralStorage
+
+BACKUP_BLOCK_SIZE = 1024 * 1024  # 1 MiB
+
+# Una fila por fichero de cada backup (los RAID escriben varios por backup_id)
+BACKUPS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {name} (
+        backup_id TEXT NOT NULL,
+        backup_type TEXT NOT NULL,
+        file_path TEXT NOT NULL,
+        size_bytes INTEGER NOT NULL,
+        checksum TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        cloud_location TEXT,
+        PRIMARY KEY (backup_id, file_path)
+    )
+'''
+BACKUPS_COLUMNS = 'backup_id, backup_type, file_path, size_bytes, checksum, created_at, cloud_location'
+
+# Campos disponibles en el historial de análisis; id y created_at forman el cursor
+HISTORY_FIELDS = ('id', 'client_id', 'analysis_type', 'timestamp', 'data',
+                  'severity', 'status', 'incident_id', 'created_at')
+HISTORY_DEFAULT_FIELDS = ('client_id', 'analysis_type', 'timestamp', 'data',
+                          'severity', 'status', 'incident_id')
+HISTORY_MAX_LIMIT = 1000
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -40,6 +68,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def _decode_history_chunk(key: bytes, rows: List[tuple],
+                          fields: Tuple[str, ...]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Descifrar y proyectar un bloque de filas del historial.
+
+    Función de módulo para poder ejecutarse tanto en hilos como en procesos.
+    ``rows`` trae las columnas de HISTORY_FIELDS en orden, con ``data``
+    todavía cifrado.  Devuelve (registros, filas con error).
+    """
+    fernet = Fernet(key) if 'data' in fields else None
+    data_index = HISTORY_FIELDS.index('data')
+    records = []
+    errors = 0
+
+    for row in rows:
+        record = {}
+        try:
+            for field in fields:
+                index = HISTORY_FIELDS.index(field)
+                if index == data_index:
+                    record['data'] = json.loads(fernet.decrypt(row[index].encode()))
+                else:
+                    record[field] = row[index]
+        except Exception:
+            errors += 1
+            continue
+        records.append(record)
+
+    return records, errors
+
+
 @dataclass
 class AnalysisData:
     """Estructura de datos de análisis"""
@@ -87,7 +146,16 @@ class SmartComputeCentralServer:
         self.analysis_cache = {}
 
         # Configuración de base de datos
-        self.db_path = self.config.get('database', {}).get('path', 'smartcompute.db')
+        db_config = self.config.get('database', {})
+        self.db_path = db_config.get('path', 'smartcompute.db')
+
+        # Escritor único con group commit + pool de lectores
+        self.storage = CentralStorage(
+            self.db_path,
+            batch_window_ms=db_config.get('write_batch_ms', 3),
+            max_batch=db_config.get('write_batch_max', 256),
+            reader_connections=db_config.get('reader_connections', 4)
+        )
 
         # Configuración de Redis para caché
         self.redis_client = None
@@ -102,6 +170,15 @@ class SmartComputeCentralServer:
         # WebSocket connections
         self.websocket_connections = set()
 
+        # Almacén deduplicado para backups incrementales
+        self.chunk_store: Optional[ChunkStore] = None
+
+        # Progreso de backups en curso (páginas copiadas por backup_id)
+        self.backup_progress: Dict[str, Dict[str, Any]] = {}
+
+        # Pool para descifrar historial fuera del event loop
+        self._history_executor: Optional[Executor] = None
+
     def _load_config(self, config_path: str) -> Dict[str, Any]:
         """Cargar configuración del servidor"""
         default_config = {
@@ -117,7 +194,18 @@ class SmartComputeCentralServer:
                 'path': 'smartcompute.db',
                 'backup_enabled': True,
                 'backup_interval': 3600,  # 1 hora
-                'raid_config': 'raid1'  # raid0, raid1, raid5, raid10
+                'raid_config': 'raid1',  # raid0, raid1, raid5, raid10
+                'backup_mode': 'full',  # full, incremental (deduplicated chunk store)
+                'backup_retention': 30,  # días que se conservan los backups incrementales
+                'backup_pages_per_step': 1024,  # páginas SQLite copiadas por paso
+                'backup_step_sleep': 0.005,  # pausa entre pasos para ceder a escritores
+                'backup_progress_ttl': 3600,  # segundos que se conserva el progreso de un backup terminado
+                'write_batch_ms': 3,  # ventana de group commit del hilo escritor
+                'write_batch_max': 256,
+                'reader_connections': 4,
+                'history_decrypt_pool': 'thread',  # thread, process
+                'history_decrypt_workers': 4,
+                'history_chunk_size': 64  # filas por tarea de descifrado
             },
             'redis': {
                 'host': 'localhost',
@@ -222,22 +310,41 @@ class SmartComputeCentralServer:
         ''')
 
         # Tabla de backups
+        self._migrate_backups_table(cursor)
+        cursor.execute(BACKUPS_TABLE.format(name='backups'))
+
+        # Índices para historial por cliente
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS backups (
-                backup_id TEXT PRIMARY KEY,
-                backup_type TEXT NOT NULL,
-                file_path TEXT NOT NULL,
-                size_bytes INTEGER NOT NULL,
-                checksum TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                cloud_location TEXT
-            )
+            CREATE INDEX IF NOT EXISTS idx_analyses_client_created
+            ON analyses (client_id, created_at)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_analyses_created
+            ON analyses (created_at)
         ''')
 
         conn.commit()
         conn.close()
+
+        self.storage.start()
         logger.info("Database initialized successfully")
 
+    @staticmethod
+    def _migrate_backups_table(cursor: sqlite3.Cursor):
+        """Bases anteriores: ``backups`` con clave ``backup_id`` pasa a ``(backup_id, file_path)``"""
+        # PRAGMA table_info: (cid, name, type, notnull, default, pk); pk es la posición en la clave
+        columns = cursor.execute("PRAGMA table_info(backups)").fetchall()
+        primary_key = [column[1] for column in sorted(columns, key=lambda c: c[5]) if column[5]]
+        if primary_key != ['backup_id']:
+            return
+
+        logger.info("Migrating backups table to one row per backup file")
+        cursor.execute('DROP TABLE IF EXISTS backups_new')
+        cursor.execute(BACKUPS_TABLE.format(name='backups_new'))
+        cursor.execute(f'INSERT INTO backups_new ({BACKUPS_COLUMNS}) SELECT {BACKUPS_COLUMNS} FROM backups')
+        cursor.execute('DROP TABLE backups')
+        cursor.execute('ALTER TABLE backups_new RENAME TO backups')
+
     async def initialize_redis(self):
         """Inicializar conexión Redis"""
         try:
@@ -295,16 +402,12 @@ class SmartComputeCentralServer:
         )
 
         # Guardar en base de datos
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
+        await self.storage.execute('''
             INSERT OR REPLACE INTO clients
             (client_id, client_type, hostname, ip_address, last_seen, version, status)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (client.client_id, client.client_type, client.hostname,
               client.ip_address, client.last_seen, client.version, client.status))
-        conn.commit()
-        conn.close()
 
         # Guardar en memoria
         self.clients[client_id] = client
@@ -332,18 +435,14 @@ class SmartComputeCentralServer:
             f"{analysis_data.client_id}{analysis_data.timestamp}{data_json}".encode()
         ).hexdigest()[:16]
 
-        # Guardar en base de datos
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
+        # Guardar en base de datos (confirmado en el WAL por el group commit)
+        await self.storage.execute('''
             INSERT INTO analyses
             (client_id, analysis_type, timestamp, data_encrypted, severity, status)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (analysis_data.client_id, analysis_data.analysis_type,
               analysis_data.timestamp, encrypted_data,
               analysis_data.severity, analysis_data.status))
-        conn.commit()
-        conn.close()
 
         # Cache en Redis si está disponible
         if self.redis_client:
@@ -386,21 +485,16 @@ class SmartComputeCentralServer:
         )
 
         # Guardar en base de datos
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
         metadata_json = json.dumps(incident.metadata or {})
         encrypted_metadata = self.fernet.encrypt(metadata_json.encode()).decode()
 
-        cursor.execute('''
+        await self.storage.execute('''
             INSERT INTO incidents
             (incident_id, title, description, severity, status, created_at, updated_at, metadata_encrypted)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         ''', (incident.incident_id, incident.title, incident.description,
               incident.severity, incident.status, incident.created_at,
               incident.updated_at, encrypted_metadata))
-        conn.commit()
-        conn.close()
 
         self.incidents[incident_id] = incident
 
@@ -429,39 +523,91 @@ class SmartComputeCentralServer:
             # Remove disconnected clients
             self.websocket_connections -= disconnected
 
-    async def get_analysis_history(self, client_id: str, limit: int = 100) -> List[Dict[str, Any]]:
-        """Obtener historial de análisis"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT client_id, analysis_type, timestamp, data_encrypted, severity, status, incident_id
-            FROM analyses
-            WHERE client_id = ?
-            ORDER BY created_at DESC
-            LIMIT ?
-        ''', (client_id, limit))
+    def _get_history_executor(self) -> Executor:
+        """Pool de descifrado del historial (hilos o procesos según configuración)"""
+        if self._history_executor is None:
+            db_config = self.config.get('database', {})
+            workers = db_config.get('history_decrypt_workers', 4)
+            if db_config.get('history_decrypt_pool', 'thread') == 'process':
+                self._history_executor = ProcessPoolExecutor(max_workers=workers)
+            else:
+                self._history_executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="history-decrypt"
+                )
+        return self._history_executor
+
+    @staticmethod
+    def parse_history_cursor(cursor: Optional[str]) -> Optional[Tuple[str, int]]:
+        """Interpretar cursor ``created_at,id`` (created_at puede contener espacios)"""
+        if not cursor:
+            return None
+        created_at, _, row_id = cursor.rpartition(',')
+        if not created_at or not row_id.isdigit():
+            raise ValueError("Invalid cursor, expected 'created_at,id'")
+        return created_at, int(row_id)
+
+    async def iter_analysis_history(self, client_id: str, limit: int = 100,
+                                    before: Optional[Tuple[str, int]] = None,
+                                    fields: Optional[List[str]] = None):
+        """
+        Iterar el historial por bloques ya descifrados, del más reciente al más
+        antiguo.  Paginación por keyset: ``before=(created_at, id)`` devuelve
+        solo filas estrictamente anteriores a ese cursor.  Solo se descifra
+        ``data`` si está entre los campos pedidos.
+        """
+        fields = tuple(fields or HISTORY_DEFAULT_FIELDS)
+        unknown = set(fields) - set(HISTORY_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown history fields: {', '.join(sorted(unknown))}")
+        limit = max(1, min(int(limit), HISTORY_MAX_LIMIT))
+
+        # Solo se lee la columna cifrada si hace falta
+        columns = ', '.join(('data_encrypted' if f == 'data' else f) if f in fields else 'NULL'
+                            for f in HISTORY_FIELDS)
+        if before:
+            rows = await self.storage.fetchall(f'''
+                SELECT {columns} FROM analyses
+                WHERE client_id = ? AND (created_at, id) < (?, ?)
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            ''', (client_id, before[0], before[1], limit))
+        else:
+            rows = await self.storage.fetchall(f'''
+                SELECT {columns} FROM analyses
+                WHERE client_id = ?
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            ''', (client_id, limit))
+
+        if not rows:
+            return
+
+        # Descifrado en paralelo por bloques; se entregan en orden a medida que terminan
+        chunk_size = self.config.get('database', {}).get('history_chunk_size', 64)
+        loop = asyncio.get_running_loop()
+        executor = self._get_history_executor()
+        tasks = [
+            loop.run_in_executor(executor, _decode_history_chunk, self.encryption_key,
+                                 rows[i:i + chunk_size], fields)
+            for i in range(0, len(rows), chunk_size)
+        ]
+        try:
+            for task in tasks:
+                records, errors = await task
+                if errors:
+                    logger.error(f"Error decrypting {errors} analysis rows for {client_id}")
+                yield records
+        finally:
+            for task in tasks:
+                task.cancel()
 
+    async def get_analysis_history(self, client_id: str, limit: int = 100,
+                                   before: Optional[Tuple[str, int]] = None,
+                                   fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Obtener historial de análisis"""
         results = []
-        for row in cursor.fetchall():
-            try:
-                # Desencriptar datos
-                encrypted_data = row[3].encode()
-                decrypted_data = self.fernet.decrypt(encrypted_data).decode()
-                data = json.loads(decrypted_data)
-
-                results.append({
-                    'client_id': row[0],
-                    'analysis_type': row[1],
-                    'timestamp': row[2],
-                    'data': data,
-                    'severity': row[4],
-                    'status': row[5],
-                    'incident_id': row[6]
-                })
-            except Exception as e:
-                logger.error(f"Error decrypting analysis data: {e}")
-
-        conn.close()
+        async for records in self.iter_analysis_history(client_id, limit, before, fields):
+            results.extend(records)
         return results
 
     async def backup_database(self) -> Dict[str, Any]:
@@ -471,6 +617,9 @@ class SmartComputeCentralServer:
 
         # Configuración RAID
         raid_config = self.config.get('database', {}).get('raid_config', 'raid1')
+        backup_mode = self.config.get('database', {}).get('backup_mode', 'full')
+        if backup_mode == 'incremental':
+            raid_config = 'incremental'
 
         backup_info = {
             'backup_id': backup_id,
@@ -480,20 +629,28 @@ class SmartComputeCentralServer:
         }
 
         # Crear backup según configuración RAID
-        if raid_config == 'raid0':
-            # RAID 0 - Sin redundancia, solo velocidad
-            backup_files = await self._create_raid0_backup(backup_id)
-        elif raid_config == 'raid1':
-            # RAID 1 - Mirror completo
-            backup_files = await self._create_raid1_backup(backup_id)
-        elif raid_config == 'raid5':
-            # RAID 5 - Con paridad
-            backup_files = await self._create_raid5_backup(backup_id)
-        elif raid_config == 'raid10':
-            # RAID 10 - Mirror + Stripe
-            backup_files = await self._create_raid10_backup(backup_id)
+        try:
+            if raid_config == 'incremental':
+                # Solo se escriben los chunks que cambiaron desde el último backup
+                backup_files = await self._create_incremental_backup(backup_id)
+            elif raid_config == 'raid0':
+                # RAID 0 - Sin redundancia, solo velocidad
+                backup_files = await self._create_raid0_backup(backup_id)
+            elif raid_config == 'raid1':
+                # RAID 1 - Mirror completo
+                backup_files = await self._create_raid1_backup(backup_id)
+            elif raid_config == 'raid5':
+                # RAID 5 - Con paridad
+                backup_files = await self._create_raid5_backup(backup_id)
+            elif raid_config == 'raid10':
+                # RAID 10 - Mirror + Stripe
+                backup_files = await self._create_raid10_backup(backup_id)
+        except Exception:
+            self._finish_backup_progress(backup_id, 'failed')
+            raise
 
         backup_info['files'] = backup_files
+        self._finish_backup_progress(backup_id, 'completed')
 
         # Subir a la nube si está configurado
         cloud_provider = self.config.get('cloud', {}).get('provider', 'local')
@@ -501,62 +658,214 @@ class SmartComputeCentralServer:
             cloud_locations = await self._upload_to_cloud(backup_files, cloud_provider)
             backup_info['cloud_locations'] = cloud_locations
 
-        # Registrar backup en base de datos
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        for file_info in backup_files:
-            cursor.execute('''
+        # Registrar backup en base de datos (un solo lote del escritor)
+        await asyncio.gather(*[
+            self.storage.submit('''
                 INSERT INTO backups (backup_id, backup_type, file_path, size_bytes, checksum)
                 VALUES (?, ?, ?, ?, ?)
             ''', (backup_id, raid_config, file_info['path'],
                   file_info['size'], file_info['checksum']))
-        conn.commit()
-        conn.close()
+            for file_info in backup_files
+        ])
+        if raid_config == 'incremental':
+            await self._prune_incremental_backups()
 
         logger.info(f"Database backup created: {backup_id} ({raid_config})")
         return backup_info
 
+    def _finish_backup_progress(self, backup_id: str, status: str):
+        """Marcar el progreso de un backup como terminado (caduca tras ``backup_progress_ttl``)"""
+        progress = self.backup_progress.get(backup_id)
+        if progress is not None:
+            progress['status'] = status
+            progress['finished_at'] = datetime.utcnow().isoformat()
+
+    def _prune_backup_progress(self):
+        """Olvidar el progreso de backups terminados hace más de ``backup_progress_ttl`` segundos"""
+        ttl = self.config.get('database', {}).get('backup_progress_ttl', 3600)
+        cutoff = (datetime.utcnow() - timedelta(seconds=ttl)).isoformat()
+        for backup_id in [backup_id for backup_id, progress in self.backup_progress.items()
+                          if progress.get('finished_at') and progress['finished_at'] < cutoff]:
+            del self.backup_progress[backup_id]
+
+    def _get_chunk_store(self) -> ChunkStore:
+        """Obtener almacén de chunks deduplicado"""
+        if self.chunk_store is None:
+            master_key = base64.urlsafe_b64decode(self.encryption_key)
+            self.chunk_store = ChunkStore(Path("backups/store"), master_key)
+        return self.chunk_store
+
+    def _run_sqlite_backup(self, backup_id: str, dest_path: Path):
+        """Copiar la base viva con la API de backup online de SQLite (hilo de trabajo)"""
+        db_config = self.config.get('database', {})
+        pages_per_step = db_config.get('backup_pages_per_step', 1024)
+        step_sleep = db_config.get('backup_step_sleep', 0.005)
+        last_logged = [-1]
+
+        def progress(status, remaining, total):
+            done = total - remaining
+            percent = int(done * 100 / total) if total else 100
+            self.backup_progress[backup_id].update({
+                'pages_copied': done,
+                'pages_total': total,
+                'percent': percent
+            })
+            if percent // 10 > last_logged[0]:
+                last_logged[0] = percent // 10
+                logger.info(f"Backup {backup_id}: {percent}% ({done}/{total} pages)")
+
+        tmp_path = dest_path.with_name(dest_path.name + '.partial')
+        source = sqlite3.connect(self.db_path, check_same_thread=False)
+        target = sqlite3.connect(str(tmp_path))
+        try:
+            # Copia por páginas: los escritores del servidor avanzan entre pasos y
+            # el resultado es una instantánea consistente de la base
+            source.backup(target, pages=pages_per_step, progress=progress, sleep=step_sleep)
+        finally:
+            target.close()
+            source.close()
+        os.replace(tmp_path, dest_path)
+
+    async def _snapshot_database(self, backup_id: str, dest_path: Path) -> Path:
+        """Crear instantánea consistente de la base sin bloquear el event loop"""
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        self._prune_backup_progress()
+        self.backup_progress[backup_id] = {
+            'pages_copied': 0, 'pages_total': None, 'percent': 0, 'status': 'running'
+        }
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._run_sqlite_backup, backup_id, dest_path)
+        return dest_path
+
+    @staticmethod
+    def _file_checksum(path: Path) -> str:
+        """SHA-256 en streaming (memoria constante)"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            while chunk := f.read(BACKUP_BLOCK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _fan_out_copy(source: Path, targets: List[Path]) -> str:
+        """
+        Leer ``source`` una sola vez y escribir cada bloque en todos los destinos
+        en paralelo (un hilo por destino). Devuelve el checksum del contenido.
+        """
+        digest = hashlib.sha256()
+        handles = [open(target, 'wb') for target in targets]
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, len(handles))) as pool, \
+                    open(source, 'rb') as src:
+                while chunk := src.read(BACKUP_BLOCK_SIZE):
+                    writes = [pool.submit(handle.write, chunk) for handle in handles]
+                    digest.update(chunk)
+                    for write in writes:
+                        write.result()
+        finally:
+            for handle in handles:
+                handle.close()
+        return digest.hexdigest()
+
+    async def _snapshot_and_mirror(self, backup_id: str, primary: Path,
+                                   mirrors: List[Path]) -> str:
+        """Instantánea en ``primary`` y copia paralela a ``mirrors``; devuelve checksum"""
+        await self._snapshot_database(backup_id, primary)
+        for path in mirrors:
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+        loop = asyncio.get_running_loop()
+        if mirrors:
+            return await loop.run_in_executor(None, self._fan_out_copy, primary, mirrors)
+        return await loop.run_in_executor(None, self._file_checksum, primary)
+
+    async def _create_incremental_backup(self, backup_id: str) -> List[Dict[str, Any]]:
+        """Crear backup incremental deduplicado (content-defined chunking)"""
+        store = self._get_chunk_store()
+        snapshot = Path(f"backups/.{backup_id}_snapshot") / Path(self.db_path).name
+        await self._snapshot_database(backup_id, snapshot)
+
+        loop = asyncio.get_running_loop()
+        try:
+            manifest = await loop.run_in_executor(None, store.backup, str(snapshot), backup_id)
+        finally:
+            snapshot.unlink()
+            snapshot.parent.rmdir()
+        stats = manifest['stats']
+
+        logger.info(
+            f"Incremental backup {backup_id}: {stats['chunks_new']}/{stats['chunks_total']} "
+            f"new chunks, {stats['bytes_written']} bytes written, "
+            f"dedup ratio {stats['dedup_ratio']}"
+        )
+
+        return [{
+            'path': str(store.manifest_path(backup_id)),
+            'size': stats['bytes_written'],
+            'checksum': manifest['sha256'],
+            'dedup_ratio': stats['dedup_ratio'],
+            'bytes_scanned': stats['bytes_in']
+        }]
+
+    async def _prune_incremental_backups(self) -> Dict[str, int]:
+        """Borrar manifiestos incrementales fuera de retención y barrer los chunks huérfanos"""
+        retention_days = self.config.get('database', {}).get('backup_retention', 30)
+        rows = await self.storage.fetchall(
+            "SELECT DISTINCT backup_id FROM backups WHERE backup_type = 'incremental' "
+            "AND created_at < datetime('now', ?)", (f'-{retention_days} days',)
+        )
+        if not rows:
+            return {'manifests_removed': 0, 'chunks_removed': 0, 'bytes_freed': 0}
+
+        store = self._get_chunk_store()
+        for (backup_id,) in rows:
+            store.delete_manifest(backup_id)
+        await asyncio.gather(*[
+            self.storage.submit('DELETE FROM backups WHERE backup_id = ?', (backup_id,))
+            for (backup_id,) in rows
+        ])
+
+        # El GC espera a que no haya backups en curso sobre el almacén
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, store.garbage_collect)
+        logger.info(
+            f"Pruned {len(rows)} incremental backups older than {retention_days} days: "
+            f"{result['chunks_removed']} chunks removed, {result['bytes_freed']} bytes freed"
+        )
+        return {'manifests_removed': len(rows), 'chunks_removed': result['chunks_removed'],
+                'bytes_freed': result['bytes_freed']}
+
+    async def restore_incremental_backup(self, backup_id: str, restore_dir: str) -> str:
+        """Restaurar backup incremental desde su manifiesto"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self._get_chunk_store().restore, backup_id, Path(restore_dir)
+        )
+
     async def _create_raid1_backup(self, backup_id: str) -> List[Dict[str, Any]]:
         """Crear backup RAID 1 (mirror)"""
         backup_dir = Path(f"backups/{backup_id}")
-        backup_dir.mkdir(parents=True, exist_ok=True)
-
-        # Crear dos copias idénticas
-        files = []
-        for mirror in ['mirror1', 'mirror2']:
-            mirror_path = backup_dir / mirror / f"smartcompute_{backup_id}.db"
-            mirror_path.parent.mkdir(exist_ok=True)
-
-            # Copiar base de datos
-            import shutil
-            shutil.copy2(self.db_path, mirror_path)
-
-            # Calcular checksum
-            with open(mirror_path, 'rb') as f:
-                checksum = hashlib.sha256(f.read()).hexdigest()
-
-            files.append({
-                'path': str(mirror_path),
-                'size': mirror_path.stat().st_size,
-                'checksum': checksum,
-                'mirror': mirror
-            })
+        paths = [backup_dir / mirror / f"smartcompute_{backup_id}.db"
+                 for mirror in ['mirror1', 'mirror2']]
+
+        # Una instantánea consistente; el segundo espejo se escribe desde ella
+        checksum = await self._snapshot_and_mirror(backup_id, paths[0], paths[1:])
 
-        return files
+        return [{
+            'path': str(path),
+            'size': path.stat().st_size,
+            'checksum': checksum,
+            'mirror': path.parent.name
+        } for path in paths]
 
     async def _create_raid0_backup(self, backup_id: str) -> List[Dict[str, Any]]:
         """Crear backup RAID 0 (stripe)"""
         # Para simplicidad, crear archivo único (RAID 0 requiere múltiples discos)
         backup_dir = Path(f"backups/{backup_id}")
-        backup_dir.mkdir(parents=True, exist_ok=True)
-
         backup_path = backup_dir / f"smartcompute_{backup_id}.db"
 
-        import shutil
-        shutil.copy2(self.db_path, backup_path)
-
-        with open(backup_path, 'rb') as f:
-            checksum = hashlib.sha256(f.read()).hexdigest()
+        checksum = await self._snapshot_and_mirror(backup_id, backup_path, [])
 
         return [{
             'path': str(backup_path),
@@ -569,31 +878,19 @@ class SmartComputeCentralServer:
         """Crear backup RAID 5 (con paridad)"""
         # Simulación de RAID 5 con archivos de paridad
         backup_dir = Path(f"backups/{backup_id}")
-        backup_dir.mkdir(parents=True, exist_ok=True)
-
-        files = []
-
-        # Crear archivo principal
         main_path = backup_dir / f"smartcompute_{backup_id}_main.db"
-        import shutil
-        shutil.copy2(self.db_path, main_path)
 
         # Crear archivo de paridad (simplificado)
         parity_path = backup_dir / f"smartcompute_{backup_id}_parity.db"
-        shutil.copy2(self.db_path, parity_path)
 
-        for path in [main_path, parity_path]:
-            with open(path, 'rb') as f:
-                checksum = hashlib.sha256(f.read()).hexdigest()
-
-            files.append({
-                'path': str(path),
-                'size': path.stat().st_size,
-                'checksum': checksum,
-                'type': 'main' if 'main' in path.name else 'parity'
-            })
+        checksum = await self._snapshot_and_mirror(backup_id, main_path, [parity_path])
 
-        return files
+        return [{
+            'path': str(path),
+            'size': path.stat().st_size,
+            'checksum': checksum,
+            'type': 'main' if 'main' in path.name else 'parity'
+        } for path in [main_path, parity_path]]
 
     async def _create_raid10_backup(self, backup_id: str) -> List[Dict[str, Any]]:
         """Crear backup RAID 10 (mirror + stripe)"""
@@ -678,6 +975,47 @@ class SmartComputeCentralServer:
             logger.error(f"Error submitting analysis: {e}")
             return web.json_response({'error': str(e)}, status=500)
 
+    async def handle_analysis_history(self, request):
+        """Handler para historial de análisis en NDJSON (una línea por registro)"""
+        auth_header = request.headers.get('Authorization', '')
+        if not auth_header.startswith('Bearer '):
+            return web.json_response({'error': 'Invalid authorization'}, status=401)
+
+        client_info = self.verify_client_token(auth_header[7:])
+        if not client_info:
+            return web.json_response({'error': 'Invalid token'}, status=401)
+
+        try:
+            limit = int(request.query.get('limit', 100))
+            before = self.parse_history_cursor(request.query.get('before'))
+            requested = [f for f in request.query.get('fields', '').split(',') if f]
+            # id y created_at siempre van: el cliente arma el siguiente cursor con ellos
+            fields = list(dict.fromkeys(['id', 'created_at'] + (requested or list(HISTORY_FIELDS))))
+            history = self.iter_analysis_history(client_info['client_id'], limit, before, fields)
+            # El primer bloque se pide antes de responder para poder devolver 400
+            first = await history.__anext__()
+            exhausted = False
+        except StopAsyncIteration:
+            first, exhausted = [], True
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400)
+
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+
+        async def write(records):
+            if records:
+                await response.write(''.join(
+                    json.dumps(record, default=str) + '\n' for record in records
+                ).encode())
+
+        await write(first)
+        if not exhausted:
+            async for records in history:
+                await write(records)
+        await response.write_eof()
+        return response
+
     async def handle_get_incidents(self, request):
         """Handler para obtener incidentes"""
         try:
@@ -686,6 +1024,15 @@ class SmartComputeCentralServer:
         except Exception as e:
             return web.json_response({'error': str(e)}, status=500)
 
+    async def handle_backup_progress(self, request):
+        """Handler para consultar el progreso de un backup"""
+        backup_id = request.match_info['backup_id']
+        self._prune_backup_progress()
+        progress = self.backup_progress.get(backup_id)
+        if progress is None:
+            return web.json_response({'error': 'Backup not found'}, status=404)
+        return web.json_response({'backup_id': backup_id, **progress})
+
     async def handle_websocket(self, request):
         """Handler para conexiones WebSocket"""
         ws = web.WebSocketResponse()
@@ -718,7 +1065,9 @@ class SmartComputeCentralServer:
         # Rutas API
         app.router.add_post('/api/register', self.handle_register)
         app.router.add_post('/api/analysis', self.handle_submit_analysis)
+        app.router.add_get('/api/analysis/history', self.handle_analysis_history)
         app.router.add_get('/api/incidents', self.handle_get_incidents)
+        app.router.add_get('/api/backups/{backup_id}/progress', self.handle_backup_progress)
         app.router.add_get('/ws', self.handle_websocket)
 
         # Servir archivos estáticos
@@ -779,6 +1128,9 @@ async def main():
     except KeyboardInterrupt:
         logger.info("Shutting down server...")
         await runner.cleanup()
+        server.storage.close()
+        if server._history_executor:
+            server._history_executor.shutdown()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+SmartCompute Central Server - Storage Layer
+===========================================
+
+Capa de almacenamiento SQLite para el servidor central:
+
+- Un único hilo escritor con conexión dedicada en modo WAL.  Las escrituras
+  que llegan dentro de una ventana de pocos milisegundos se confirman en un
+  solo COMMIT (group commit), así un pico de clientes no se convierte en un
+  fsync por petición.
+- Un pool pequeño de conexiones de solo lectura, una por hilo lector, para
+  que las consultas no compitan con el escritor ni bloqueen el event loop.
+
+Las corrutinas ``execute``/``fetchall`` devuelven el control al event loop
+mientras el trabajo se hace en los hilos.
+"""
+
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class CentralStorage:
+    """Escritor único con group commit + pool de lectores para SQLite"""
+
+    def __init__(self, db_path: str, batch_window_ms: float = 3.0, max_batch: int = 256,
+                 reader_connections: int = 4):
+        self.db_path = db_path
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch = max_batch
+        self.reader_connections = reader_connections
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._readers: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._reader_conns: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'batches': 0,
+            'statements': 0,
+            'largest_batch': 0,
+            'errors': 0
+        }
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Abrir conexión con los pragmas de rendimiento"""
+        if read_only:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True,
+                                   check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def start(self):
+        """Arrancar hilo escritor y pool de lectores (idempotente)"""
+        with self._lock:
+            if self._writer is not None:
+                return
+
+            # Abrir el escritor primero: activa WAL antes de que existan lectores
+            conn = self._connect()
+            self._writer = threading.Thread(
+                target=self._writer_loop, args=(conn,),
+                name="central-storage-writer", daemon=True
+            )
+            self._writer.start()
+            self._readers = ThreadPoolExecutor(
+                max_workers=self.reader_connections,
+                thread_name_prefix="central-storage-reader"
+            )
+            logger.info(
+                f"Storage started (WAL, group commit {self.batch_window * 1000:.1f} ms, "
+                f"{self.reader_connections} readers)"
+            )
+
+    def close(self, timeout: float = 10.0):
+        """Vaciar la cola pendiente y detener los hilos"""
+        with self._lock:
+            writer, readers = self._writer, self._readers
+            self._writer = None
+            self._readers = None
+
+        if writer is not None:
+            self._queue.put(_STOP)
+            writer.join(timeout)
+        if readers is not None:
+            readers.shutdown(wait=True)
+
+        # Los hilos lectores ya terminaron; cerrar sus conexiones
+        with self._lock:
+            conns, self._reader_conns = self._reader_conns, []
+        for conn in conns:
+            conn.close()
+
+    # ── Escritura ───────────────────────────────────────────────
+
+    def submit(self, sql: str, params: Sequence[Any] = ()) -> "asyncio.Future":
+        """
+        Encolar una escritura.  El future se resuelve con ``lastrowid`` una vez
+        que el lote que la contiene está confirmado en el WAL.
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((sql, params, loop, future))
+        return future
+
+    async def execute(self, sql: str, params: Sequence[Any] = ()) -> int:
+        """Escritura confirmada (espera al group commit)"""
+        return await self.submit(sql, params)
+
+    @staticmethod
+    def _resolve(loop: asyncio.AbstractEventLoop, future: "asyncio.Future",
+                 result: Any = None, error: Optional[BaseException] = None):
+        def _set():
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        try:
+            loop.call_soon_threadsafe(_set)
+        except RuntimeError:
+            # El event loop ya se cerró; nadie espera el resultado
+            pass
+
+    def _next_batch(self) -> List[Any]:
+        """Bloquear por el primer elemento y agrupar los que lleguen en la ventana"""
+        batch = [self._queue.get()]
+        if batch[0] is _STOP:
+            return batch
+
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 \
+                    else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item is _STOP:
+                break
+        return batch
+
+    def _writer_loop(self, conn: sqlite3.Connection):
+        stopping = False
+        try:
+            while not stopping:
+                batch = self._next_batch()
+                if batch[-1] is _STOP:
+                    stopping = True
+                    batch.pop()
+                    # Vaciar lo que quede encolado antes de salir
+                    while True:
+                        try:
+                            batch.append(self._queue.get_nowait())
+                        except queue.Empty:
+                            break
+                if batch:
+                    self._commit_batch(conn, batch)
+        finally:
+            conn.close()
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: List[Any]):
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for sql, params, loop, future in batch:
+                try:
+                    cursor = conn.execute(sql, params)
+                    results.append((loop, future, cursor.lastrowid, None))
+                except Exception as e:
+                    # Un error de una sentencia (SQL o parámetros) no invalida el resto del lote
+                    self.stats['errors'] += 1
+                    results.append((loop, future, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            # Cualquier fallo del lote se entrega a sus futures; el hilo escritor sigue vivo
+            logger.error(f"Group commit failed ({len(batch)} statements): {e}")
+            try:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            except sqlite3.Error as rollback_error:
+                logger.error(f"Rollback failed: {rollback_error}")
+            self.stats['errors'] += len(batch)
+            for _sql, _params, loop, future in batch:
+                self._resolve(loop, future, error=e)
+            return
+
+        self.stats['batches'] += 1
+        self.stats['statements'] += len(batch)
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+        for loop, future, result, error in results:
+            self._resolve(loop, future, result, error)
+
+    # ── Lectura ─────────────────────────────────────────────────
+
+    def _reader_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect(read_only=True)
+            self._local.conn = conn
+            with self._lock:
+                self._reader_conns.append(conn)
+        return conn
+
+    def _fetchall_sync(self, sql: str, params: Sequence[Any]) -> List[tuple]:
+        return self._reader_conn().execute(sql, params).fetchall()
+
+    async def fetchall(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        """Consulta en un hilo lector con su propia conexión"""
+        self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self._fetchall_sync, sql, params)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['avg_batch'] = round(stats['statements'] / stats['batches'], 2) \
+            if stats['batches'] else 0
+        return stats
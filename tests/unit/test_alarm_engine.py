@@ -0,0 +1,147 @@
+"""
+Tests for the ISA-18.2 alarm engine.
+
+Covers: one annunciation per excursion instead of one per scan, deadband
+and on-delay, acknowledge/return-to-normal paths, shelving, chattering and
+flood suppression with first-out, deadline-driven escalation, and the
+monitor leaving an alarm unacknowledged when the engine rejects it.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from smartcompute.industrial.variables.alarms import AlarmEngine, AlarmState
+from smartcompute.industrial.variables.monitor import (
+    ALARM_LEVELS,
+    AlarmSeverity,
+    IndustrialAlarm,
+    IndustrialVariablesMonitor,
+)
+
+T0 = 1_700_000_000.0
+
+
+def tag(name: str, area: str = "area_1", **options):
+    return SimpleNamespace(id=name, location=area, min_value=0.0, max_value=100.0,
+                           alarm_low=10.0, warning_low=20.0, warning_high=80.0, alarm_high=90.0,
+                           **options)
+
+
+def kinds(events, alarm_type="high_warning"):
+    return [e.kind for e in events if e.alarm_type == alarm_type]
+
+
+@pytest.fixture
+def engine():
+    engine = AlarmEngine(ALARM_LEVELS)
+    engine.register([tag("x")])
+    return engine
+
+
+def feed(engine, values, start=T0, step=1.0, rows=None):
+    rows = engine.rows_for(["x"]) if rows is None else rows
+    events = []
+    for i, value in enumerate(values):
+        events += engine.process(rows, start + i * step, np.atleast_1d(value))
+    return events
+
+
+class TestStateMachine:
+    def test_one_annunciation_per_excursion(self, engine):
+        events = feed(engine, [50] + [85] * 100 + [50])
+        assert kinds(events) == ["active", "cleared"]
+        assert engine.get_stats()["transitions"] == 2
+
+    def test_deadband_and_on_delay(self):
+        engine = AlarmEngine(ALARM_LEVELS)
+        engine.register([tag("x", alarm_deadband=2.0, alarm_on_delay_s=3.0)])
+        # 2 s por encima no basta; a los 3 s se activa
+        assert kinds(feed(engine, [81, 81, 50])) == []
+        assert kinds(feed(engine, [81, 81, 81, 81], start=T0 + 10)) == ["active"]
+        # Dentro de la banda muerta (79 > 80 - 2) sigue activa
+        assert kinds(feed(engine, [79.5, 78.5, 79], start=T0 + 20)) == []
+        assert kinds(feed(engine, [77.9], start=T0 + 30)) == ["cleared"]
+
+    def test_acknowledge_paths(self, engine):
+        active = [e for e in feed(engine, [85]) if e.alarm_type == "high_warning"][0]
+        assert kinds(engine.acknowledge(active.alarm_id, T0 + 1)) == ["acked"]
+        assert kinds(feed(engine, [50], start=T0 + 2)) == ["normal"]
+
+        again = [e for e in feed(engine, [85], start=T0 + 100) if e.alarm_type == "high_warning"][0]
+        assert again.alarm_id != active.alarm_id
+        assert kinds(feed(engine, [50], start=T0 + 101)) == ["cleared"]
+        row, level = engine.by_id[again.alarm_id]
+        assert engine.state[row, level] == AlarmState.CLEARED
+        assert kinds(engine.acknowledge(again.alarm_id, T0 + 102)) == ["normal"]
+        with pytest.raises(KeyError):
+            engine.acknowledge(again.alarm_id, T0 + 103)
+
+
+class TestSuppression:
+    def test_shelving_hides_until_expiry(self, engine):
+        feed(engine, [85])
+        shelved = engine.shelve("x", 60.0, T0 + 1, alarm_type="high_warning")
+        assert kinds(shelved) == ["shelved"]
+        assert kinds(feed(engine, [50, 85], start=T0 + 2)) == []
+        assert engine.get_stats()["suppressed"]["shelved"] == 1
+        # Al vencer, la condición sigue activa y se vuelve a anunciar
+        assert kinds(feed(engine, [85], start=T0 + 61)) == ["active"]
+
+    def test_chattering(self):
+        engine = AlarmEngine(ALARM_LEVELS)
+        engine.register([tag("x", alarm_deadband=0.0)])
+        events = feed(engine, [85, 50] * 4)
+        assert kinds(events).count("active") == 2
+        assert engine.get_stats()["suppressed"]["chattering"] == 2
+
+    def test_flood_keeps_first_out_and_critical(self):
+        engine = AlarmEngine(ALARM_LEVELS, flood_threshold=3)
+        engine.register([tag(f"t{i}") for i in range(8)] + [tag("other", area="area_2")])
+        rows = engine.rows_for([f"t{i}" for i in range(8)])
+        values = np.full(8, 50.0)
+        engine.process(rows, T0, values)
+
+        events = []
+        for i in range(8):
+            values[i] = 85.0
+            events += engine.process(rows, T0 + i + 1, values)
+        warnings = [e for e in events if e.alarm_type == "high_warning"]
+        assert [e.variable_id for e in warnings] == ["t0", "t1", "t2"]
+        assert [e.first_out for e in warnings] == [True, False, False]
+        assert engine.is_flooded("area_1") and not engine.is_flooded("area_2")
+
+        values[7] = 95.0
+        critical = engine.process(rows, T0 + 20, values)
+        assert kinds(critical, "high_alarm") == ["active"]
+
+
+def test_escalation_is_deadline_driven(engine):
+    active = [e for e in feed(engine, [95]) if e.alarm_type == "high_alarm"][0]
+    assert kinds(engine.tick(T0 + 299), "high_alarm") == []
+    assert kinds(engine.tick(T0 + 300), "high_alarm") == ["escalated"]
+    assert engine.tick(T0 + 900) == []
+
+    # Reconocida antes del plazo: no escala
+    engine.acknowledge(active.alarm_id, T0 + 901)
+    feed(engine, [50], start=T0 + 1000)
+    second = [e for e in feed(engine, [95], start=T0 + 1100) if e.alarm_type == "high_alarm"][0]
+    engine.acknowledge(second.alarm_id, T0 + 1101)
+    assert engine.tick(T0 + 2000) == []
+
+
+class TestMonitorAcknowledge:
+    @pytest.mark.asyncio
+    async def test_engine_failure_leaves_alarm_unacknowledged(self, engine):
+        # Sólo el estado que usa acknowledge_alarm (el constructor abre ficheros del sistema)
+        monitor = IndustrialVariablesMonitor.__new__(IndustrialVariablesMonitor)
+        alarm = IndustrialAlarm("stale", "x", datetime.now(), AlarmSeverity.HIGH, "x high", 95.0, 90.0)
+        monitor.active_alarms, monitor.alarm_engine = {"stale": alarm}, engine
+
+        with pytest.raises(KeyError):
+            await monitor.acknowledge_alarm("stale", "operator")
+        assert (alarm.acknowledged, alarm.acknowledged_by, alarm.acknowledged_at) == (False, None, None)
@@ -0,0 +1,144 @@
+"""
+Tests for the compiled SCADA alert-rule matcher.
+
+Covers: dispatch by category/alarm type/severity, compiled tag globs,
+windowed occurrence counters, sustained statistical deviation, time-range
+and operator conditions, unknown condition keys, and the logger wiring
+including recompilation when a rule is replaced.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from smartcompute.industrial.scada.logging_system import (
+    ICSEventCategory,
+    IndustrialSCADALogger,
+    LogSeverity,
+    ProcessAlarmType,
+    SCADALogEntry,
+    SCADASystem,
+)
+from smartcompute.industrial.scada.rules import AlertRuleMatcher, CompiledRule
+
+T0 = datetime(2025, 1, 15, 14, 30)  # Miércoles
+
+
+def entry(category=ICSEventCategory.PROCESS_CONTROL, severity=LogSeverity.INFO, alarm_type=None,
+          tag_name=None, tag_value=None, timestamp=T0, operator_id=None, **details) -> SCADALogEntry:
+    return SCADALogEntry(log_id="x", timestamp=timestamp, scada_system=SCADASystem.WONDERWARE,
+                         source_node="node", severity=severity, category=category, message="m",
+                         details=details, tag_name=tag_name, tag_value=tag_value,
+                         alarm_type=alarm_type, operator_id=operator_id)
+
+
+def rule(**conditions):
+    return {"conditions": conditions, "actions": {}}
+
+
+class TestDispatch:
+    def test_entries_only_visit_candidate_rules(self):
+        rules = {f"pump_{i}": rule(categories=[ICSEventCategory.MAINTENANCE], tag_patterns=[f"*.PUMP{i}.*"])
+                 for i in range(300)}
+        rules["safety"] = rule(alarm_types=[ProcessAlarmType.SAFETY], tag_patterns=["*SIS*"])
+        matcher = AlertRuleMatcher(rules)
+
+        assert matcher.match(entry(alarm_type=ProcessAlarmType.HIGH)) == []
+        hits = matcher.match(entry(ICSEventCategory.MAINTENANCE, tag_name="area1.pump42.speed"))
+        assert [r.name for r in hits] == ["pump_42"]
+        hits = matcher.match(entry(alarm_type=ProcessAlarmType.SAFETY, tag_name="SIS_01.TRIP"))
+        assert [r.name for r in hits] == ["safety"]
+        # Sólo se visitan las reglas cuyo patrón coincide con el tag
+        assert matcher.stats["rule_visits"] == 2
+
+    def test_compiled_rule_matches_legacy_semantics(self):
+        config = rule(tag_patterns=["*SAFETY*", "TRIP_?"], severity=[LogSeverity.CRITICAL])
+        compiled = CompiledRule("r", config)
+        assert compiled.matches(entry(severity=LogSeverity.CRITICAL, tag_name="unit.safety.valve"))
+        assert compiled.matches(entry(severity=LogSeverity.CRITICAL, tag_name="trip_1"))
+        assert not compiled.matches(entry(severity=LogSeverity.CRITICAL, tag_name="trip_12"))
+        # Sin tag, los patrones no descartan la entrada (como antes)
+        assert compiled.matches(entry(severity=LogSeverity.CRITICAL))
+        assert not compiled.matches(entry(severity=LogSeverity.INFO, tag_name="safety"))
+
+    def test_unknown_condition_is_rejected(self):
+        with pytest.raises(ValueError, match="unsupported"):
+            AlertRuleMatcher({"typo": rule(alarm_type=[ProcessAlarmType.HIGH])})
+
+
+class TestStatefulConditions:
+    def test_minimum_occurrences_in_window(self):
+        compiled = CompiledRule("comm", rule(alarm_types=[ProcessAlarmType.COMM_FAIL],
+                                             minimum_occurrences=3, time_window=300))
+        fail = lambda minutes: entry(alarm_type=ProcessAlarmType.COMM_FAIL,
+                                     timestamp=T0 + timedelta(minutes=minutes))
+        # Dos fallos y el tercero fuera de la ventana: no dispara
+        assert [compiled.matches(fail(m)) for m in (0, 1, 6)] == [False, False, False]
+        assert [compiled.matches(fail(m)) for m in (7, 8)] == [False, True]
+        # Tras disparar, la cuenta empieza de nuevo
+        assert compiled.matches(fail(9)) is False
+
+    def test_sustained_statistical_deviation(self):
+        compiled = CompiledRule("dev", rule(statistical_deviation=3.0, consecutive_readings=3,
+                                            critical_tags=["*REACTOR*"]))
+        readings = [50.0 + (i % 5) * 0.1 for i in range(20)]
+        assert not any(compiled.matches(entry(tag_name="REACTOR1.T", tag_value=v)) for v in readings)
+        spikes = [compiled.matches(entry(tag_name="REACTOR1.T", tag_value=90.0)) for _ in range(3)]
+        assert spikes == [False, False, True]
+        assert not compiled.matches(entry(tag_name="TANK1.L", tag_value=90.0))
+        assert not compiled.matches(entry(tag_name="REACTOR1.T", tag_value=True))
+
+    def test_time_ranges_and_excluded_operators(self):
+        compiled = CompiledRule("ops", rule(categories=[ICSEventCategory.OPERATOR_ACTION],
+                                            time_ranges=["22:00-06:00", "weekends"],
+                                            excluded_operators=["shift_supervisor"]))
+        action = lambda when, who="op1": entry(ICSEventCategory.OPERATOR_ACTION, timestamp=when, operator_id=who)
+        assert not compiled.matches(action(T0))
+        assert compiled.matches(action(T0.replace(hour=23)))
+        assert compiled.matches(action(T0.replace(hour=3)))
+        assert compiled.matches(action(T0 + timedelta(days=3)))  # Sábado
+        assert not compiled.matches(action(T0.replace(hour=23), "SHIFT_SUPERVISOR"))
+
+
+def test_logger_uses_compiled_rules(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scada = IndustrialSCADALogger(db_path=tmp_path / "r.db", simulate=False)
+    try:
+        # Una acción de operador en horario normal ya no dispara la regla fuera de horario
+        triggered = {}
+        scada.check_alert_rules(entry(ICSEventCategory.OPERATOR_ACTION, operator_id="op1"), triggered)
+        scada.check_alert_rules(entry(tag_name="Area1.Pump1.Speed", tag_value=1.0), triggered)
+        assert triggered == {}
+
+        scada.add_alert_rules({"pump_trip": rule(alarm_types=[ProcessAlarmType.HIGH_HIGH], tag_patterns=["*PUMP*"])})
+        scada.check_alert_rules(entry(alarm_type=ProcessAlarmType.HIGH_HIGH, tag_name="Area1.Pump1.Speed"), triggered)
+        assert triggered["pump_trip"][0] == 1
+        assert scada.get_ingest_stats()["alert_rules"]["rules"] == 6
+    finally:
+        scada.close()
+
+
+def test_replaced_rule_is_recompiled_and_others_keep_counters(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scada = IndustrialSCADALogger(db_path=tmp_path / "v.db", simulate=False)
+    try:
+        scada.add_alert_rules({
+            "burst": rule(categories=[ICSEventCategory.SAFETY_SYSTEM], minimum_occurrences=2, time_window=60),
+            "pump": rule(alarm_types=[ProcessAlarmType.HIGH_HIGH], tag_patterns=["*PUMP*"]),
+        })
+        triggered = {}
+        scada.check_alert_rules(entry(ICSEventCategory.SAFETY_SYSTEM), triggered)
+
+        # Mismo número de reglas, configuración distinta
+        scada.alert_rules["pump"] = rule(alarm_types=[ProcessAlarmType.HIGH_HIGH], tag_patterns=["*VALVE*"])
+        scada.check_alert_rules(entry(alarm_type=ProcessAlarmType.HIGH_HIGH, tag_name="Area1.Pump1"), triggered)
+        assert "pump" not in triggered
+
+        # El contador de "burst" sobrevivió a la recompilación
+        scada.check_alert_rules(entry(ICSEventCategory.SAFETY_SYSTEM, timestamp=T0 + timedelta(seconds=5)),
+                                triggered)
+        assert triggered["burst"][0] == 1
+    finally:
+        scada.close()
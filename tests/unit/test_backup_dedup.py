@@ -0,0 +1,172 @@
+"""
+Tests for content-defined chunking and the deduplicated chunk store.
+
+Covers: stable boundaries, dedup across runs, restore, garbage collection
+and its locking against concurrent backups, and unique temp files for
+concurrent chunk writes.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import random
+import threading
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+from smartcompute.enterprise.ops import backup_dedup
+from smartcompute.enterprise.ops.backup_dedup import (
+    ChunkStore,
+    ContentDefinedChunker,
+    DedupStoreError,
+)
+
+KEY = os.urandom(32)
+
+
+def _data(size: int, seed: int = 7) -> bytes:
+    """Deterministic incompressible data so chunk boundaries are reproducible"""
+    return random.Random(seed).randbytes(size)
+
+
+def _chunks(data: bytes, **kwargs) -> list:
+    return list(ContentDefinedChunker(**kwargs).iter_chunks(io.BytesIO(data)))
+
+
+class TestChunker:
+    def test_reassembles_input(self):
+        data = _data(1_000_000)
+        chunks = _chunks(data)
+        assert b"".join(chunks) == data
+        assert all(len(c) <= backup_dedup.MAX_CHUNK_SIZE for c in chunks)
+
+    def test_boundaries_independent_of_read_size(self):
+        data = _data(600_000)
+        assert _chunks(data) == _chunks(data, read_size=4099)
+
+    def test_insert_only_changes_local_chunks(self):
+        data = _data(2_000_000)
+        edited = data[:700_000] + b"INSERTED" + data[700_000:]
+        before, after = set(_chunks(data)), _chunks(edited)
+        assert sum(1 for c in after if c not in before) <= 2
+
+    def test_normalized_sizes_stay_near_average(self):
+        sizes = [len(c) for c in _chunks(_data(4_000_000, seed=11))[:-1]]
+        assert min(sizes) >= backup_dedup.MIN_CHUNK_SIZE
+        assert max(sizes) < 3 * backup_dedup.AVG_CHUNK_SIZE
+        assert 0.75 < sum(sizes) / len(sizes) / backup_dedup.AVG_CHUNK_SIZE < 1.25
+
+    def test_pure_python_fallback_matches(self, monkeypatch):
+        data = _data(200_000)
+        expected = _chunks(data)
+        monkeypatch.setattr(backup_dedup, "NUMPY_AVAILABLE", False)
+        assert _chunks(data) == expected
+
+
+class TestChunkStore:
+    def test_second_run_writes_only_changes(self, tmp_path: Path):
+        src = tmp_path / "historian.db"
+        data = _data(1_500_000)
+        src.write_bytes(data)
+        store = ChunkStore(tmp_path / "store", KEY)
+
+        first = store.backup(str(src), "b1")["stats"]
+        src.write_bytes(data[:400_000] + b"x" * 64 + data[400_000:])
+        second = store.backup(str(src), "b2")["stats"]
+
+        assert first["chunks_new"] == first["chunks_total"]
+        assert second["chunks_new"] <= 2
+        assert second["dedup_ratio"] > 10
+
+        store.restore("b2", tmp_path / "out")
+        assert (tmp_path / "out" / "historian.db").read_bytes() == src.read_bytes()
+
+    def test_garbage_collect_keeps_live_chunks(self, tmp_path: Path):
+        src = tmp_path / "data.bin"
+        src.write_bytes(_data(300_000))
+        store = ChunkStore(tmp_path / "store", KEY)
+        store.backup(str(src), "old")
+        src.write_bytes(_data(300_000, seed=8))
+        store.backup(str(src), "new")
+
+        store.delete_manifest("old")
+        result = store.garbage_collect()
+
+        assert result["chunks_removed"] > 0
+        store.restore("new", tmp_path / "out")
+
+    def test_garbage_collect_waits_for_running_backup(self, tmp_path: Path):
+        src = tmp_path / "data.bin"
+        src.write_bytes(_data(300_000))
+        store = ChunkStore(tmp_path / "store", KEY)
+        store.backup(str(src), "old")
+        store.delete_manifest("old")  # its chunks are now unreferenced
+
+        # The next backup reuses those chunks; pause it before its manifest exists
+        chunking, resume = threading.Event(), threading.Event()
+        chunker = store.chunker
+
+        class PausingChunker:
+            def iter_chunks(self, stream):
+                for chunk in chunker.iter_chunks(stream):
+                    yield chunk
+                chunking.set()
+                resume.wait(5)
+
+        store.chunker = PausingChunker()
+        backup = threading.Thread(target=store.backup, args=(str(src), "new"))
+        backup.start()
+        assert chunking.wait(5)
+
+        gc_result = {}
+        other = ChunkStore(tmp_path / "store", KEY)  # same root, same lock
+        gc = threading.Thread(target=lambda: gc_result.update(other.garbage_collect()))
+        gc.start()
+        gc.join(0.2)
+        assert gc.is_alive()  # blocked by the backup's shared lock
+
+        resume.set()
+        backup.join(5)
+        gc.join(5)
+        assert gc_result["chunks_removed"] == 0
+        store.restore("new", tmp_path / "out")
+
+    def test_concurrent_writes_use_distinct_temp_files(self, tmp_path: Path, monkeypatch):
+        replaced = []
+        replace = os.replace
+
+        def recording(src, dst):
+            replaced.append(src)
+            replace(src, dst)
+
+        monkeypatch.setattr(backup_dedup.os, "replace", recording)
+        target = tmp_path / "ab" / "chunk"
+        target.parent.mkdir()
+        threads = [threading.Thread(target=ChunkStore._write_atomic, args=(target, bytes([i]) * 100_000))
+                   for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        assert len(set(replaced)) == 4
+        assert target.read_bytes() in {bytes([i]) * 100_000 for i in range(4)}
+        assert list(target.parent.iterdir()) == [target]
+
+    def test_tampered_chunk_rejected(self, tmp_path: Path):
+        src = tmp_path / "data.bin"
+        src.write_bytes(_data(100_000))
+        store = ChunkStore(tmp_path / "store", KEY)
+        store.backup(str(src), "b1")
+
+        victim = next(store.chunks_dir.glob("*/*"))
+        raw = bytearray(victim.read_bytes())
+        raw[-1] ^= 0xFF
+        victim.write_bytes(bytes(raw))
+
+        with pytest.raises(DedupStoreError):
+            store.restore("b1", tmp_path / "out")
@@ -0,0 +1,195 @@
+"""
+Tests for the central server.
+
+Covers: online SQLite backups (snapshots, streamed checksums, mirrors,
+progress), backups table migration, incremental backup retention and the
+paginated analysis history.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+for _module in ("aiohttp", "aiofiles", "jwt", "redis", "websockets", "yaml", "cryptography"):
+    pytest.importorskip(_module)
+
+from smartcompute.network.central_server import AnalysisData, SmartComputeCentralServer
+
+
+@pytest.fixture
+def server(tmp_path: Path, monkeypatch) -> SmartComputeCentralServer:
+    monkeypatch.chdir(tmp_path)
+    srv = SmartComputeCentralServer(config_path=str(tmp_path / "missing.yaml"))
+    asyncio.run(srv.initialize_database())
+
+    conn = sqlite3.connect(srv.db_path)
+    conn.executemany(
+        "INSERT INTO analyses (client_id, analysis_type, timestamp, data_encrypted, severity) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [(f"client-{i}", "enterprise", "2026-01-01", "x" * 200, "low") for i in range(2000)],
+    )
+    conn.commit()
+    conn.close()
+    yield srv
+    srv.storage.close()
+
+
+def _sha256(path: str) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+class TestRaidBackups:
+    @pytest.mark.asyncio
+    async def test_raid1_mirrors_are_identical_snapshots(self, server):
+        info = await server.backup_database()
+
+        assert len(info["files"]) == 2
+        for file_info in info["files"]:
+            assert _sha256(file_info["path"]) == file_info["checksum"]
+            conn = sqlite3.connect(file_info["path"])
+            assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+            assert conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0] == 2000
+            conn.close()
+
+    @pytest.mark.asyncio
+    async def test_progress_is_reported(self, server):
+        server.config["database"]["backup_pages_per_step"] = 8
+        info = await server.backup_database()
+
+        progress = server.backup_progress[info["backup_id"]]
+        assert progress["status"] == "completed"
+        assert progress["percent"] == 100
+        assert progress["pages_copied"] == progress["pages_total"] > 8
+
+    @pytest.mark.asyncio
+    async def test_raid5_writes_main_and_parity(self, server):
+        server.config["database"]["raid_config"] = "raid5"
+        info = await server.backup_database()
+
+        assert sorted(f["type"] for f in info["files"]) == ["main", "parity"]
+        assert len({f["checksum"] for f in info["files"]}) == 1
+
+    @pytest.mark.asyncio
+    async def test_incremental_backup_restores(self, server, tmp_path):
+        server.config["database"]["backup_mode"] = "incremental"
+        info = await server.backup_database()
+
+        await server.restore_incremental_backup(info["backup_id"], str(tmp_path / "restore"))
+        conn = sqlite3.connect(tmp_path / "restore" / Path(server.db_path).name)
+        assert conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0] == 2000
+        conn.close()
+
+    @pytest.mark.asyncio
+    async def test_expired_incremental_backups_are_pruned(self, server, tmp_path):
+        server.config["database"]["backup_mode"] = "incremental"
+        store = server._get_chunk_store()
+        old_source = tmp_path / "old.bin"
+        old_source.write_bytes(b"old backup contents " * 10_000)
+        store.backup(str(old_source), "backup_old")
+        conn = sqlite3.connect(server.db_path)
+        conn.execute("INSERT INTO backups (backup_id, backup_type, file_path, size_bytes, checksum, created_at) "
+                     "VALUES ('backup_old', 'incremental', 'old', 1, 'x', datetime('now', '-40 days'))")
+        conn.commit()
+        conn.close()
+
+        info = await server.backup_database()
+
+        assert not store.manifest_path("backup_old").exists()
+        assert store.usage()["manifests"] == 1
+        ids = await server.storage.fetchall("SELECT backup_id FROM backups")
+        assert ids == [(info["backup_id"],)]
+        await server.restore_incremental_backup(info["backup_id"], str(tmp_path / "restore"))
+
+
+class TestBackupBookkeeping:
+    def test_old_backups_table_is_migrated(self, tmp_path: Path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        srv = SmartComputeCentralServer(config_path=str(tmp_path / "missing.yaml"))
+        conn = sqlite3.connect(srv.db_path)
+        conn.execute("CREATE TABLE backups (backup_id TEXT PRIMARY KEY, backup_type TEXT NOT NULL, "
+                     "file_path TEXT NOT NULL, size_bytes INTEGER NOT NULL, checksum TEXT NOT NULL, "
+                     "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, cloud_location TEXT)")
+        conn.execute("INSERT INTO backups VALUES ('backup_1', 'raid1', 'a.db', 10, 'c', '2025-01-01 00:00:00', NULL)")
+        conn.commit()
+        conn.close()
+
+        asyncio.run(srv.initialize_database())
+        srv.storage.close()
+        asyncio.run(srv.initialize_database())  # idempotent
+        srv.storage.close()
+
+        conn = sqlite3.connect(srv.db_path)
+        pk = [row[1] for row in sorted(conn.execute("PRAGMA table_info(backups)"), key=lambda r: r[5]) if row[5]]
+        assert pk == ["backup_id", "file_path"]
+        conn.execute("INSERT INTO backups (backup_id, backup_type, file_path, size_bytes, checksum) "
+                     "VALUES ('backup_1', 'raid1', 'b.db', 10, 'c')")
+        rows = conn.execute("SELECT backup_id, file_path, created_at FROM backups ORDER BY file_path").fetchall()
+        conn.close()
+        assert rows[0] == ("backup_1", "a.db", "2025-01-01 00:00:00") and len(rows) == 2
+
+    @pytest.mark.asyncio
+    async def test_finished_progress_expires(self, server):
+        server.config["database"]["backup_progress_ttl"] = 60
+        info = await server.backup_database()
+        server.backup_progress["backup_running"] = {"status": "running", "percent": 10}
+
+        server._prune_backup_progress()
+        assert info["backup_id"] in server.backup_progress
+
+        server.backup_progress[info["backup_id"]]["finished_at"] = "2020-01-01T00:00:00"
+        server._prune_backup_progress()
+        assert list(server.backup_progress) == ["backup_running"]
+
+
+async def _store(server, count: int):
+    await asyncio.gather(*[
+        server.store_analysis(AnalysisData(
+            client_id="plant-1", analysis_type="industrial",
+            timestamp=f"2026-01-01T00:00:{i:02d}", data={"seq": i}, severity="low",
+        ))
+        for i in range(count)
+    ])
+
+
+class TestAnalysisHistory:
+    @pytest.mark.asyncio
+    async def test_keyset_pagination_covers_all_rows_once(self, server):
+        server.config["database"]["history_chunk_size"] = 7
+        await _store(server, 30)
+
+        seen, before = [], None
+        while True:
+            page = await server.get_analysis_history(
+                "plant-1", limit=8, before=before, fields=["id", "created_at", "data"]
+            )
+            if not page:
+                break
+            seen.extend(r["data"]["seq"] for r in page)
+            before = (page[-1]["created_at"], page[-1]["id"])
+
+        assert sorted(seen) == list(range(30))
+
+    @pytest.mark.asyncio
+    async def test_projection_skips_decryption(self, server):
+        await _store(server, 3)
+        page = await server.get_analysis_history("plant-1", fields=["severity"])
+        assert page == [{"severity": "low"}] * 3
+
+    @pytest.mark.asyncio
+    async def test_default_fields_unchanged(self, server):
+        await _store(server, 1)
+        (record,) = await server.get_analysis_history("plant-1")
+        assert set(record) == {"client_id", "analysis_type", "timestamp", "data",
+                               "severity", "status", "incident_id"}
+
+    def test_cursor_parsing(self):
+        parse = SmartComputeCentralServer.parse_history_cursor
+        assert parse("2026-01-01 10:00:00,42") == ("2026-01-01 10:00:00", 42)
+        assert parse(None) is None
+        with pytest.raises(ValueError):
+            parse("2026-01-01")
@@ -0,0 +1,117 @@
+"""
+Tests for the central server storage layer.
+
+Covers: group commit, per-statement and batch errors, reader pool and its
+connections, WAL mode.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from smartcompute.network.storage import CentralStorage
+
+
+@pytest.fixture
+def storage(tmp_path: Path):
+    db_path = str(tmp_path / "central.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT UNIQUE)")
+    conn.commit()
+    conn.close()
+
+    store = CentralStorage(db_path, batch_window_ms=20, reader_connections=2)
+    store.start()
+    yield store
+    store.close()
+
+
+class TestGroupCommit:
+    @pytest.mark.asyncio
+    async def test_concurrent_writes_share_commits(self, storage):
+        ids = await asyncio.gather(*[
+            storage.execute("INSERT INTO items (name) VALUES (?)", (f"item-{i}",))
+            for i in range(100)
+        ])
+
+        assert sorted(ids) == list(range(1, 101))
+        assert storage.stats["statements"] == 100
+        assert storage.stats["batches"] < 100
+
+    @pytest.mark.asyncio
+    async def test_failed_statement_does_not_poison_batch(self, storage):
+        await storage.execute("INSERT INTO items (name) VALUES ('dup')")
+        results = await asyncio.gather(
+            storage.execute("INSERT INTO items (name) VALUES ('dup')"),
+            storage.execute("INSERT INTO items (name) VALUES ('ok')"),
+            return_exceptions=True,
+        )
+
+        assert isinstance(results[0], sqlite3.IntegrityError)
+        rows = await storage.fetchall("SELECT name FROM items ORDER BY id")
+        assert rows == [("dup",), ("ok",)]
+
+    @pytest.mark.asyncio
+    async def test_uses_wal(self, storage):
+        rows = await storage.fetchall("PRAGMA journal_mode")
+        assert rows[0][0] == "wal"
+
+    def test_close_flushes_pending_writes(self, tmp_path, storage):
+        async def enqueue():
+            storage.submit("INSERT INTO items (name) VALUES ('late')")
+
+        asyncio.run(enqueue())
+        storage.close()
+
+        conn = sqlite3.connect(storage.db_path)
+        assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+        conn.close()
+
+
+    @pytest.mark.asyncio
+    async def test_non_sqlite_statement_error_is_isolated(self, storage):
+        results = await asyncio.gather(
+            storage.execute("INSERT INTO items (id, name) VALUES (?, 'big')", (2 ** 70,)),
+            storage.execute("INSERT INTO items (name) VALUES ('ok')"),
+            return_exceptions=True,
+        )
+
+        assert isinstance(results[0], OverflowError)
+        assert await storage.execute("INSERT INTO items (name) VALUES ('after')")
+        rows = await storage.fetchall("SELECT name FROM items ORDER BY id")
+        assert rows == [("ok",), ("after",)]
+
+    @pytest.mark.asyncio
+    async def test_unexpected_batch_error_fails_futures(self, storage):
+        class BrokenConnection:
+            in_transaction = False
+
+            def execute(self, sql, params=()):
+                if sql == "COMMIT":
+                    raise RuntimeError("disk went away")
+                return sqlite3.connect(":memory:").execute("SELECT 1")
+
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in range(2)]
+        storage._commit_batch(BrokenConnection(), [("INSERT", (), loop, f) for f in futures])
+
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+
+class TestReaders:
+    @pytest.mark.asyncio
+    async def test_close_closes_reader_connections(self, storage):
+        await asyncio.gather(*[storage.fetchall("SELECT 1") for _ in range(4)])
+        conns = list(storage._reader_conns)
+        assert conns
+
+        storage.close()
+        for conn in conns:
+            with pytest.raises(sqlite3.ProgrammingError):
+                conn.execute("SELECT 1")
+        assert await storage.fetchall("SELECT COUNT(*) FROM items") == [(0,)]  # restarts on demand
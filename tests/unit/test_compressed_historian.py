@@ -0,0 +1,148 @@
+"""
+Tests for the compressed historian.
+
+Covers: block packing, deadband + swinging-door error bound, per-tag
+independence of the vectorized state, day partitions and retention,
+rollups and the interpolating query after a restart, and failed flushes
+racing with ingestion.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from smartcompute.industrial.variables.historian import (
+    PARTITION_SECONDS,
+    CompressedHistorian,
+    pack_block,
+    unpack_block,
+)
+
+T0 = 1_700_000_000.0
+
+
+def tag(name: str, precision: float = 0.1):
+    return SimpleNamespace(id=name, precision=precision, min_value=0.0, max_value=100.0)
+
+
+def signal(count: int, noise: float, seed: int = 37):
+    rng = np.random.default_rng(seed)
+    times = T0 + np.arange(count, dtype=float)
+    return times, 50 + 10 * np.sin(times / 600) + rng.normal(0, noise, count)
+
+
+def feed(historian, rows, times, values):
+    for t, value in zip(times, values):
+        historian.ingest(rows, t, np.atleast_1d(value))
+
+
+def test_pack_round_trip():
+    times = T0 + np.cumsum(np.random.default_rng(1).uniform(0.1, 5, 500)).round(3)
+    values = np.random.default_rng(2).normal(0, 1e3, 500)
+    decoded_times, decoded_values = unpack_block(*pack_block(times, values))
+    assert np.allclose(decoded_times, times, atol=1e-6)
+    assert np.array_equal(decoded_values, values)
+
+
+class TestCompression:
+    @pytest.mark.parametrize("noise", [0.0, 0.02, 0.2])
+    def test_reconstruction_error_is_bounded(self, tmp_path, noise):
+        historian = CompressedHistorian(tmp_path / "h.db", block_points=64)
+        rows = historian.register([tag("x")])
+        times, values = signal(20_000, noise)
+        feed(historian, rows, times, values)
+
+        archived_t, archived_v = historian.points("x", times[0], times[-1])
+        error = np.abs(np.interp(times, archived_t, archived_v) - values)
+        assert error.max() <= 0.1 * (1 + 2 * historian.exception_ratio) + 1e-9
+        if noise < 0.05:
+            assert historian.get_stats()["compression_ratio"] > 50
+
+    def test_rows_are_independent(self, tmp_path):
+        together = CompressedHistorian(tmp_path / "a.db")
+        rows = together.register([tag("a"), tag("b", precision=0.5)])
+        times, a = signal(3000, 0.05, seed=1)
+        _, b = signal(3000, 0.3, seed=2)
+        for t, va, vb in zip(times, a, b):
+            together.ingest(rows, t, np.array([va, vb]))
+
+        alone = CompressedHistorian(tmp_path / "b.db")
+        feed(alone, alone.register([tag("b", precision=0.5)]), times, b)
+
+        assert np.array_equal(together.points("b", T0, times[-1])[1], alone.points("b", T0, times[-1])[1])
+
+    def test_missing_values_are_skipped(self, tmp_path):
+        historian = CompressedHistorian(tmp_path / "h.db")
+        rows = historian.register([tag("a"), tag("b")])
+        historian.ingest(rows, T0, np.array([1.0, np.nan]))
+        assert historian.get_stats()["readings"] == 1
+        assert len(historian.points("b", T0, T0 + 1)[0]) == 0
+
+
+class TestStorage:
+    def test_partitions_rollups_and_query_after_restart(self, tmp_path):
+        path = tmp_path / "h.db"
+        historian = CompressedHistorian(path, block_points=32)
+        rows = historian.register([tag("x")])
+        # Dos días a 10 s por muestra, empezando en el inicio de una partición
+        start = (T0 // PARTITION_SECONDS + 1) * PARTITION_SECONDS
+        times = start + np.arange(0, 2 * PARTITION_SECONDS, 10.0)
+        values = 50 + 10 * np.sin(times / 3600)
+        feed(historian, rows, times, values)
+        historian.close()
+
+        reopened = CompressedHistorian(path)
+        conn = reopened._connection()
+        partitions = {p for (p,) in conn.execute("SELECT DISTINCT partition FROM historian_blocks")}
+        assert partitions == {int(start // PARTITION_SECONDS), int(start // PARTITION_SECONDS) + 1}
+
+        hourly = reopened.rollups("x", start, times[-1], resolution=3600)
+        assert len(hourly) == 48
+        first_hour = values[:360]
+        assert hourly[0]["count"] == 360
+        assert hourly[0]["min"] == pytest.approx(first_hour.min())
+        assert hourly[0]["max"] == pytest.approx(first_hour.max())
+        assert hourly[0]["avg"] == pytest.approx(first_hour.mean())
+
+        trend = reopened.interpolate("x", start - 600, start + 3600, points=71)
+        grid = np.array(trend["timestamps"])
+        assert all(v is None for v in np.array(trend["values"], dtype=object)[grid < start])
+        inside = np.array([v for t, v in zip(grid, trend["values"]) if t >= start])
+        assert np.allclose(inside, np.interp(grid[grid >= start], times, values), atol=0.2)
+
+        assert reopened.drop_partitions(start + PARTITION_SECONDS) > 0
+        remaining = {p for (p,) in conn.execute("SELECT DISTINCT partition FROM historian_blocks")}
+        assert remaining == {int(start // PARTITION_SECONDS) + 1}
+
+    def test_failed_flush_keeps_blocks_sealed_meanwhile(self, tmp_path, monkeypatch):
+        historian = CompressedHistorian(tmp_path / "h.db", block_points=1)
+        rows = historian.register([tag("x")])
+        feed(historian, rows, T0 + np.arange(4.0), [0.0, 100.0, 0.0, 100.0])
+        sealed = len(historian._sealed)
+        assert sealed > 0
+
+        class FailingConnection:
+            in_transaction = False
+
+            def execute(self, sql, *args):
+                # Ingesta concurrente durante la escritura: no debe bloquearse ni perderse
+                feed(historian, rows, T0 + np.arange(4.0, 8.0), [0.0, 100.0, 0.0, 100.0])
+                raise sqlite3.OperationalError("database is locked")
+
+        monkeypatch.setattr(historian, "_connection", lambda: FailingConnection())
+        historian.flush()
+        assert len(historian._sealed) > sealed
+        assert [b[2] for b in historian._sealed] == sorted(b[2] for b in historian._sealed)
+
+        monkeypatch.undo()
+        historian.close()
+        times, _ = historian.points("x", T0, T0 + 8)
+        assert len(times) == 8
+
+    def test_invalid_rollup_resolution(self, tmp_path):
+        with pytest.raises(ValueError):
+            CompressedHistorian(tmp_path / "h.db").rollups("x", T0, T0 + 60, resolution=15)
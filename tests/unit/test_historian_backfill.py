@@ -0,0 +1,200 @@
+"""
+Tests for chunked historian backfill.
+
+Covers: chunk planning, bounded concurrency against a simulated historian,
+rows written with their checkpoint in one transaction, resuming after an
+interrupted or failed run without duplicates, re-running an overlapping
+range with other chunking without duplicates, transient retries, and the
+COLOS connector entry point.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from smartcompute.industrial.protocols.backfill import (
+    BackfillStore,
+    HistorianBackfill,
+    backfill_job_id,
+    plan_chunks,
+)
+from smartcompute.industrial.protocols.systems_integrator import COLOSConnector, IndustrialSystem, SystemConfiguration
+
+SCHEMA = '''
+    CREATE TABLE variable_readings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        variable_id TEXT NOT NULL, timestamp TIMESTAMP NOT NULL, value REAL NOT NULL,
+        quality INTEGER, status TEXT, raw_value REAL, processed_value REAL, anomaly_score REAL
+    )
+'''
+
+START = datetime(2026, 3, 1)
+
+
+class SimulatedHistorian:
+    """Historiador remoto simulado: latencia por consulta, una muestra por paso y fallos inyectables"""
+
+    def __init__(self, step=timedelta(seconds=10), latency=0.005):
+        self.step = step
+        self.latency = latency
+        self.in_flight = 0
+        self.peak = 0
+        self.queries = 0
+        self.fail_once = set()   # Inicios de ventana que fallan la primera vez
+        self.fail_always = set()
+
+    async def query(self, tags, start, end):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        self.queries += 1
+        try:
+            await asyncio.sleep(self.latency)
+            if start in self.fail_always:
+                raise ConnectionError("historian unavailable")
+            if start in self.fail_once:
+                self.fail_once.discard(start)
+                raise TimeoutError("historian timeout")
+            rows = []
+            for tag in tags:
+                t = start
+                while t < end:
+                    rows.append((tag, t.isoformat(' '), float(t.minute), 100, 'online', 0.0, 0.0, 0.0))
+                    t += self.step
+            return rows
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def historian():
+    return SimulatedHistorian()
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / "historian.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(SCHEMA)
+    store = BackfillStore(path)
+    yield store
+    store.close()
+
+
+def stored(store):
+    with sqlite3.connect(store.db_path) as conn:
+        return conn.execute("SELECT COUNT(*), COUNT(DISTINCT variable_id || timestamp) FROM variable_readings"
+                            ).fetchone()
+
+
+TAGS = [f"tag{i}" for i in range(7)]
+END = START + timedelta(hours=2, minutes=30)
+EXPECTED_ROWS = len(TAGS) * 150 * 6
+
+
+async def _enumerate(stream):
+    index = 0
+    async for item in stream:
+        yield index, item
+        index += 1
+
+
+class TestPlanning:
+    def test_plan_chunks_covers_range_once(self):
+        chunks = plan_chunks(TAGS, START, END, timedelta(hours=1), tags_per_chunk=3)
+        assert len(chunks) == 3 * 3
+        assert [c.index for c in chunks] == list(range(9))
+        assert [c.tags for c in chunks[:3]] == [("tag0", "tag1", "tag2"), ("tag3", "tag4", "tag5"), ("tag6",)]
+        assert chunks[-1].start == START + timedelta(hours=2) and chunks[-1].end == END
+        assert all(a.start <= b.start for a, b in zip(chunks, chunks[1:]))
+        with pytest.raises(ValueError):
+            plan_chunks(TAGS, START, END, timedelta(0))
+
+
+class TestBackfill:
+    @pytest.mark.asyncio
+    async def test_backfill_streams_chunks_with_bounded_concurrency(self, historian, store):
+        backfill = HistorianBackfill(historian.query, store, concurrency=3, chunk_duration=timedelta(minutes=30),
+                                     tags_per_chunk=2, source="colos")
+        seen = 0
+        async for result in backfill.run(TAGS, START, END):
+            seen += len(result.rows)
+            assert historian.in_flight <= 3
+        assert seen == EXPECTED_ROWS and stored(store) == (EXPECTED_ROWS, EXPECTED_ROWS)
+        assert historian.peak == 3 and historian.queries == 5 * 4
+        stats = backfill.get_stats()
+        assert stats['rows'] == EXPECTED_ROWS and stats['rows_per_sec'] > 0
+
+        job_id = backfill_job_id("colos", TAGS, START, END, timedelta(minutes=30), 2)
+        assert store.job_status(job_id)['completed_chunks'] == 20
+        assert store.job_status(job_id)['completed_at'] is not None
+
+    @pytest.mark.asyncio
+    async def test_interrupted_backfill_resumes_without_duplicates(self, historian, store):
+        options = dict(concurrency=2, chunk_duration=timedelta(hours=1), tags_per_chunk=4)
+        stream = HistorianBackfill(historian.query, store, **options).run(TAGS, START, END)
+        async for index, _ in _enumerate(stream):
+            if index == 2:
+                break
+        await stream.aclose()
+        assert historian.in_flight == 0  # Los trozos en vuelo se cancelan al cerrar el flujo
+        assert stored(store)[0] < EXPECTED_ROWS
+
+        # Un trozo que falla siempre detiene el backfill, pero lo ya guardado se conserva
+        historian.fail_always.add(START + timedelta(hours=2))
+        historian.fail_once.add(START + timedelta(hours=1))
+        failing = HistorianBackfill(historian.query, store, retry_delay=0, **options)
+        with pytest.raises(ConnectionError):
+            async for _ in failing.run(TAGS, START, END):
+                pass
+        assert failing.get_stats()['retries'] >= 1
+
+        historian.fail_always.clear()
+        queries = historian.queries
+        resumed = HistorianBackfill(historian.query, store, **options)
+        async for _ in resumed.run(TAGS, START, END):
+            pass
+        assert stored(store) == (EXPECTED_ROWS, EXPECTED_ROWS)
+        assert historian.queries - queries == 6 - resumed.get_stats()['skipped_chunks']
+        assert resumed.get_stats()['skipped_chunks'] >= 3
+
+    @pytest.mark.asyncio
+    async def test_rerun_with_other_chunking_does_not_duplicate(self, historian, store):
+        first = HistorianBackfill(historian.query, store, chunk_duration=timedelta(hours=1), tags_per_chunk=4)
+        async for _ in first.run(TAGS, START, END):
+            pass
+        assert stored(store) == (EXPECTED_ROWS, EXPECTED_ROWS)
+
+        # Otros trozos son otro trabajo: se vuelve a consultar todo, pero no se reinserta nada
+        queries = historian.queries
+        other = HistorianBackfill(historian.query, store, chunk_duration=timedelta(minutes=20), tags_per_chunk=3)
+        async for _ in other.run(TAGS, START + timedelta(minutes=30), END + timedelta(minutes=20)):
+            pass
+        assert historian.queries > queries and other.get_stats()['skipped_chunks'] == 0
+        extra = len(TAGS) * 2 * 60
+        assert stored(store) == (EXPECTED_ROWS + extra, EXPECTED_ROWS + extra)
+
+
+class TestColosConnector:
+    @pytest.mark.asyncio
+    async def test_colos_connector_backfill(self, store):
+        config = SystemConfiguration(
+            system_id="colos", system_type=IndustrialSystem.COLOS, name="COLOS", description="", host="localhost",
+            port=1433, database_path=None, project_path=None, credentials={},
+            connection_params={"historian_interval_s": 30, "backfill_chunk_minutes": 20})
+        connector = COLOSConnector(config)
+        with pytest.raises(ConnectionError):
+            await connector.fetch_historian_chunk(["Tank.Level.PV"], START, END)
+        assert await connector.connect()
+
+        tags = ["Process.Temperature.PV", "Tank.Level.PV", "Motor.Current.PV"]
+        results = [r async for r in connector.backfill_historian(tags, START, START + timedelta(hours=1), store)]
+        assert len(results) == 3
+        assert stored(store) == (3 * 120, 3 * 120)
+        with sqlite3.connect(store.db_path) as conn:
+            first = conn.execute("SELECT variable_id, timestamp, quality FROM variable_readings "
+                                 "ORDER BY timestamp, variable_id LIMIT 1").fetchone()
+        assert first == ("colos_Motor.Current.PV", "2026-03-01 00:00:00", 100)
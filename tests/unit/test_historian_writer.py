@@ -0,0 +1,166 @@
+"""
+Tests for the batched historian writer.
+
+Covers: executemany flushes on the writer thread, backpressure, batches
+larger than the buffer, overflow spill and replay, failed commits (also
+non-sqlite errors) kept for retry and persisted on close, and commit
+acknowledgements.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from smartcompute.industrial.variables.historian import HistorianWriter
+
+SCHEMA = '''
+    CREATE TABLE variable_readings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        variable_id TEXT NOT NULL, timestamp TIMESTAMP NOT NULL, value REAL NOT NULL,
+        quality INTEGER, status TEXT, raw_value REAL, processed_value REAL, anomaly_score REAL
+    )
+'''
+
+
+def rows(count: int, start: int = 0):
+    return [(f"tag_{i % 10}", f"2026-01-01 00:00:{i % 60:02d}", float(i), 100, "online",
+             float(i), float(i), 0.0) for i in range(start, start + count)]
+
+
+def count_rows(db_path) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM variable_readings").fetchone()[0]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "historian.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(SCHEMA)
+    return path
+
+
+class TestHistorianWriter:
+    @pytest.mark.asyncio
+    async def test_batches_rows_per_flush(self, db_path):
+        writer = HistorianWriter(db_path, flush_interval_ms=50)
+        for i in range(100):
+            await writer.write(rows(100, i * 100))
+        await asyncio.sleep(0.15)
+        await asyncio.to_thread(writer.close)
+
+        stats = writer.get_stats()
+        assert count_rows(db_path) == 10_000
+        assert stats["rows"] == 10_000
+        assert stats["flushes"] < 10
+        assert stats["flush_p99_ms"] > 0
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    @pytest.mark.asyncio
+    async def test_backpressure_waits_for_flush(self, db_path):
+        writer = HistorianWriter(db_path, flush_interval_ms=20, max_buffered_rows=100)
+        assert writer.append(rows(80))
+        assert not writer.append(rows(40))
+
+        await asyncio.wait_for(writer.write(rows(40, 80)), timeout=5)
+        await asyncio.to_thread(writer.close)
+
+        assert writer.stats["blocked_writes"] == 1
+        assert count_rows(db_path) == 120
+
+    @pytest.mark.asyncio
+    async def test_batch_larger_than_buffer_is_split(self, db_path):
+        writer = HistorianWriter(db_path, flush_interval_ms=10, max_buffered_rows=100)
+        await asyncio.wait_for(writer.write(rows(350)), timeout=5)
+        await asyncio.to_thread(writer.put, rows(250, 350))
+        await asyncio.to_thread(writer.close)
+
+        assert count_rows(db_path) == 600
+
+    @pytest.mark.asyncio
+    async def test_spill_runs_off_the_event_loop(self, db_path, monkeypatch):
+        writer = HistorianWriter(db_path, max_buffered_rows=100, overflow="spill")
+        threads = []
+        spill = writer._spill
+        monkeypatch.setattr(writer, "_spill", lambda batch: (threads.append(threading.get_ident()),
+                                                             spill(batch)))
+        writer.start()
+        await writer.write(rows(150))
+        await asyncio.to_thread(writer.close)
+
+        assert threads and threads[0] != threading.get_ident()
+        assert writer.stats["spilled"] == 50
+
+    def test_wait_committed_flushes_early(self, db_path):
+        writer = HistorianWriter(db_path, flush_interval_ms=60_000)
+        assert writer.wait_committed()  # Nada encolado
+        writer.put(rows(10))
+        assert writer.wait_committed(timeout=5)
+        assert count_rows(db_path) == 10
+        writer.close()
+        writer.append(rows(1))
+        assert not writer.wait_committed(timeout=0.1)
+
+    def test_overflow_spills_and_replays(self, db_path):
+        writer = HistorianWriter(db_path, flush_interval_ms=10, max_buffered_rows=100,
+                                 overflow="spill")
+        assert writer.append(rows(250))
+        assert writer.buffered == 100
+        assert writer.stats["spilled"] == 150
+        assert writer.spill_path.exists()
+
+        writer.start()
+        writer.close()
+
+        assert count_rows(db_path) == 250
+        assert writer.stats["replayed"] == 150
+        assert not writer.spill_path.exists()
+
+    def test_failed_commit_is_kept_and_replayed_on_restart(self, tmp_path):
+        db_path = tmp_path / "late.db"
+        writer = HistorianWriter(db_path, flush_interval_ms=10, replay_rows=30)
+        writer.start()
+        writer.append(rows(50))
+        writer.close()
+
+        # La tabla no existía: nada se pierde, todo queda en el spill
+        assert writer.stats["errors"] >= 1
+        assert writer.spill_path.exists()
+
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(SCHEMA)
+        restarted = HistorianWriter(db_path, flush_interval_ms=10)
+        restarted.start()
+        restarted.close()
+
+        assert count_rows(db_path) == 50
+        assert not restarted.spill_path.exists()
+
+    def test_non_sqlite_error_keeps_batch_and_writer(self, db_path):
+        class FlakyWriter(HistorianWriter):
+            failures = 2
+
+            def _execute(self, conn, batch):
+                if self.failures:
+                    self.failures -= 1
+                    raise RuntimeError("partition router failed")
+                super()._execute(conn, batch)
+
+        writer = FlakyWriter(db_path, flush_interval_ms=10, max_buffered_rows=20)
+        writer.start()
+        thread = writer._writer
+        writer.put(rows(50))  # Más que el buffer: con el escritor muerto se quedaría esperando
+        assert writer.wait_committed(timeout=5)
+        assert count_rows(db_path) == 50
+        assert writer.stats["errors"] == 2
+        assert writer._writer is thread and thread.is_alive()
+        writer.close()
+
+    def test_invalid_overflow_policy(self, db_path):
+        with pytest.raises(ValueError):
+            HistorianWriter(db_path, overflow="drop")
@@ -0,0 +1,198 @@
+"""
+Tests for the asyncio Modbus TCP client.
+
+Covers: data type decoding, pipelined requests against the local
+simulator, exceptions, timeouts, reconnect and the PLC engine integration.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from smartcompute.industrial.protocols.modbus_tcp import (
+    ModbusConnectionError,
+    ModbusExceptionResponse,
+    ModbusTCPClient,
+    ModbusTCPSimulator,
+    ModbusTimeoutError,
+    decode_registers,
+    encode_value,
+)
+from smartcompute.industrial.variables.monitor import PLCCommunicationEngine
+from smartcompute.industrial.variables.scan import ScanScheduler
+
+
+class TestDecoding:
+    @pytest.mark.parametrize("order", ["ABCD", "CDAB", "BADC", "DCBA"])
+    @pytest.mark.parametrize("data_type,value", [
+        ("int16", -1234), ("uint16", 65000), ("int32", -123456789),
+        ("uint32", 4000000000), ("float32", 12.5), ("float64", -0.1),
+    ])
+    def test_round_trip(self, data_type, value, order):
+        assert decode_registers(encode_value(value, data_type, order), data_type, order) == value
+
+    def test_known_word_orders(self):
+        # 123.456f = 0x42F6E979
+        assert decode_registers([0x42F6, 0xE979], "float32", "ABCD") == pytest.approx(123.456, rel=1e-6)
+        assert decode_registers([0xE979, 0x42F6], "float32", "CDAB") == pytest.approx(123.456, rel=1e-6)
+        assert decode_registers([0xF642, 0x79E9], "float32", "BADC") == pytest.approx(123.456, rel=1e-6)
+        assert decode_registers([0x79E9, 0xF642], "float32", "DCBA") == pytest.approx(123.456, rel=1e-6)
+
+    def test_too_few_registers(self):
+        with pytest.raises(ValueError):
+            decode_registers([1], "float32")
+
+
+@pytest.fixture
+def simulator():
+    sim = ModbusTCPSimulator(latency=0.02)
+    sim.holding[:200] = list(range(200))
+    sim.holding[300:302] = encode_value(21.75, "float32")
+    return sim
+
+
+class TestClient:
+    @pytest.mark.asyncio
+    async def test_read_and_write(self, simulator):
+        host, port = await simulator.start()
+        client = ModbusTCPClient(host, port, timeout=1.0)
+        try:
+            await client.connect()
+            assert await client.read_holding_registers(10, 5) == [10, 11, 12, 13, 14]
+            assert await client.read_value("holding", 300, "float32") == 21.75
+
+            await client.write_registers(500, [7, 8, 9])
+            await client.write_register(503, 10)
+            assert await client.read_holding_registers(500, 4) == [7, 8, 9, 10]
+        finally:
+            await client.close()
+            await simulator.stop()
+
+    @pytest.mark.asyncio
+    async def test_pipelined_requests_share_one_connection(self, simulator):
+        host, port = await simulator.start()
+        client = ModbusTCPClient(host, port, timeout=2.0, max_in_flight=32)
+        try:
+            await client.connect()
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            results = await asyncio.gather(*[
+                client.read_holding_registers(i, 1) for i in range(32)
+            ])
+            elapsed = loop.time() - started
+
+            assert results == [[i] for i in range(32)]
+            assert simulator.max_in_flight > 1
+            # 32 peticiones de 20 ms en serie tardarían ~0.64 s
+            assert elapsed < 0.3
+        finally:
+            await client.close()
+            await simulator.stop()
+
+    @pytest.mark.asyncio
+    async def test_exception_response(self, simulator):
+        host, port = await simulator.start()
+        client = ModbusTCPClient(host, port, timeout=1.0)
+        try:
+            await client.connect()
+            with pytest.raises(ModbusExceptionResponse) as exc:
+                await client.read_holding_registers(65530, 10)
+            assert exc.value.exception_code == 0x02
+        finally:
+            await client.close()
+            await simulator.stop()
+
+    @pytest.mark.asyncio
+    async def test_timeout(self, simulator):
+        simulator.latency = 0.5
+        host, port = await simulator.start()
+        client = ModbusTCPClient(host, port, timeout=0.05, retries=0)
+        try:
+            await client.connect()
+            with pytest.raises(ModbusTimeoutError):
+                await client.read_holding_registers(0, 1)
+            assert client.stats["timeouts"] == 1
+        finally:
+            await client.close()
+            await simulator.stop()
+
+    @pytest.mark.asyncio
+    async def test_timed_out_writes_are_not_retried(self, simulator):
+        simulator.latency = 0.1
+        host, port = await simulator.start()
+        client = ModbusTCPClient(host, port, timeout=0.03, retries=2)
+        try:
+            await client.connect()
+            with pytest.raises(ModbusTimeoutError):
+                await client.write_register(10, 7)
+            await asyncio.sleep(0.15)
+            assert simulator.requests == 1 and simulator.holding[10] == 7
+
+            with pytest.raises(ModbusTimeoutError):
+                await client.read_holding_registers(0, 1)
+            await asyncio.sleep(0.15)
+            assert simulator.requests == 1 + 3
+
+            with pytest.raises(ModbusTimeoutError):
+                await client.write_registers(20, [1, 2], retry=True)
+            await asyncio.sleep(0.15)
+            assert simulator.requests == 4 + 3
+        finally:
+            await client.close()
+            await simulator.stop()
+
+    @pytest.mark.asyncio
+    async def test_reconnects_after_server_restart(self, simulator):
+        simulator.latency = 0
+        host, port = await simulator.start()
+        client = ModbusTCPClient(host, port, timeout=1.0, backoff_initial=0.01)
+        try:
+            await client.connect()
+            await simulator.stop()
+            await asyncio.sleep(0.05)
+            with pytest.raises(ModbusConnectionError):
+                await client.read_holding_registers(0, 1)
+
+            restarted = ModbusTCPSimulator(host, port)
+            restarted.holding[0] = 99
+            await restarted.start()
+            await asyncio.sleep(0.05)
+            assert await client.read_holding_registers(0, 1) == [99]
+            assert client.stats["reconnects"] >= 1
+            await restarted.stop()
+        finally:
+            await client.close()
+
+    @pytest.mark.asyncio
+    async def test_connect_failure(self):
+        client = ModbusTCPClient("127.0.0.1", 1, timeout=0.5)
+        with pytest.raises(ModbusConnectionError):
+            await client.connect()
+
+
+class TestEngineIntegration:
+    @pytest.mark.asyncio
+    async def test_scan_over_real_connection(self, simulator):
+        host, port = await simulator.start()
+        engine = PLCCommunicationEngine()
+        try:
+            assert await engine.connect_plc({
+                "id": "main_plc", "protocol": "modbus_tcp", "ip_address": host, "port": port
+            })
+            assert await engine.read_variable("main_plc", "40006") == 5.0
+            assert await engine.read_variable("main_plc", "40301:float32") == 21.75
+
+            scheduler = ScanScheduler(engine, publish=None)
+            variables = [SimpleNamespace(id=f"v{i}", plc_address=str(40001 + i),
+                                         update_rate_ms=1000, plc_id="main_plc")
+                         for i in range(150)]
+            batch = await scheduler.scan_once(scheduler.build_groups(variables)[0])
+
+            assert batch.requests == 2
+            assert batch.values["v149"] == 149.0
+        finally:
+            await engine.disconnect_all()
+            await simulator.stop()
@@ -0,0 +1,145 @@
+"""
+Tests for PLC scan groups.
+
+Covers: address parsing, block planning limits, decoding, grouping and
+the scan batch produced for a simulated PLC.
+"""
+
+from __future__ import annotations
+
+import struct
+from types import SimpleNamespace
+
+import pytest
+
+from smartcompute.industrial.variables.monitor import PLCCommunicationEngine
+from smartcompute.industrial.variables.scan import (
+    MODBUS_MAX_REGISTERS,
+    S7_MAX_BLOCK_BYTES,
+    BlockRead,
+    ScanScheduler,
+    parse_address,
+    plan_block_reads,
+)
+
+
+def _var(vid, address, rate=1000, plc_id="main_plc"):
+    return SimpleNamespace(id=vid, plc_address=address, update_rate_ms=rate, plc_id=plc_id)
+
+
+class TestParseAddress:
+    def test_modbus_holding_and_input(self):
+        assert parse_address("modbus_tcp", "40001").area == "holding"
+        assert parse_address("modbus_tcp", "40001").offset == 0
+        assert parse_address("modbus_tcp", "400010").offset == 9
+        assert parse_address("modbus_tcp", "30005").area == "input"
+        assert parse_address("modbus_tcp", "00001") is None
+
+    def test_s7_addresses(self):
+        tag = parse_address("s7comm", "DB1.DBD8")
+        assert (tag.area, tag.offset, tag.size, tag.kind) == ("DB1", 8, 4, "real")
+        tag = parse_address("s7comm", "DB3.DBX2.5")
+        assert (tag.area, tag.offset, tag.kind, tag.bit) == ("DB3", 2, "bit", 5)
+        assert parse_address("s7comm", "MW10").kind == "int"
+        assert parse_address("s7comm", "I0.1").area == "I"
+        assert parse_address("s7comm", "bogus") is None
+
+    def test_unsupported_protocol(self):
+        assert parse_address("opcua", "ns=2;s=Tank.Level") is None
+
+
+class TestPlanBlockReads:
+    def test_contiguous_registers_share_a_block(self):
+        blocks, singles = plan_block_reads("modbus_tcp", ["40003", "40001", "40002", "40001"])
+
+        assert singles == []
+        assert len(blocks) == 1
+        assert (blocks[0].start, blocks[0].count) == (0, 3)
+        assert len(blocks[0].tags) == 3
+
+    def test_gap_splits_blocks(self):
+        blocks, _ = plan_block_reads("modbus_tcp", ["40001", "40005", "40100"], max_gap=8)
+
+        assert [(b.start, b.count) for b in blocks] == [(0, 5), (99, 1)]
+
+    def test_block_respects_modbus_limit(self):
+        addresses = [str(40001 + i) for i in range(300)]
+        blocks, _ = plan_block_reads("modbus_tcp", addresses)
+
+        assert len(blocks) == 3
+        assert all(b.count <= MODBUS_MAX_REGISTERS for b in blocks)
+        assert sum(len(b.tags) for b in blocks) == 300
+
+    def test_areas_are_not_merged(self):
+        blocks, _ = plan_block_reads("modbus_tcp", ["40001", "30001"])
+
+        assert sorted(b.area for b in blocks) == ["holding", "input"]
+
+    def test_s7_blocks_respect_pdu(self):
+        addresses = [f"DB1.DBD{4 * i}" for i in range(100)]
+        blocks, _ = plan_block_reads("s7comm", addresses)
+
+        assert all(b.count <= S7_MAX_BLOCK_BYTES for b in blocks)
+        assert sum(len(b.tags) for b in blocks) == 100
+
+    def test_non_block_protocol_reads_singly(self):
+        blocks, singles = plan_block_reads("opcua", ["a", "b"])
+
+        assert blocks == []
+        assert singles == ["a", "b"]
+
+
+class TestDecode:
+    def test_s7_decode(self):
+        block = BlockRead("DB1", 0, 7, [
+            ("DB1.DBD0", parse_address("s7comm", "DB1.DBD0")),
+            ("DB1.DBW4", parse_address("s7comm", "DB1.DBW4")),
+            ("DB1.DBX6.1", parse_address("s7comm", "DB1.DBX6.1")),
+        ])
+        raw = struct.pack(">fhB", 12.5, -3, 0b10)
+
+        assert block.decode(raw) == {"DB1.DBD0": 12.5, "DB1.DBW4": -3.0, "DB1.DBX6.1": 1.0}
+
+    def test_short_response_yields_none(self):
+        block = BlockRead("holding", 0, 2, [
+            ("40001", parse_address("modbus_tcp", "40001")),
+            ("40002", parse_address("modbus_tcp", "40002")),
+        ])
+
+        assert block.decode([7]) == {"40001": 7.0, "40002": None}
+
+
+class TestScanScheduler:
+    @pytest.fixture
+    def engine(self):
+        engine = PLCCommunicationEngine()
+        engine.connections["main_plc"] = {"protocol": "modbus_tcp", "connection": {}}
+        return engine
+
+    def test_groups_by_plc_and_rate(self, engine):
+        scheduler = ScanScheduler(engine, publish=None)
+        groups = scheduler.build_groups([
+            _var("a", "40001"), _var("b", "40002"),
+            _var("c", "40003", rate=500), _var("d", "40001", plc_id="other_plc"),
+        ])
+
+        assert [(g.plc_id, g.rate_ms, len(g.variables)) for g in groups] == [
+            ("main_plc", 500, 1), ("main_plc", 1000, 2), ("other_plc", 1000, 1)
+        ]
+        # PLC sin conexión: sin protocolo, lectura individual
+        assert groups[2].singles == ["40001"]
+
+    @pytest.mark.asyncio
+    async def test_scan_fans_out_shared_addresses(self, engine):
+        variables = [_var(f"v{i}", str(40001 + i)) for i in range(200)]
+        variables.append(_var("dup", "40001"))
+        scheduler = ScanScheduler(engine, publish=None)
+        group = scheduler.build_groups(variables)[0]
+
+        batch = await scheduler.scan_once(group)
+
+        assert batch.requests == 2
+        assert engine.request_count == 2
+        assert len(batch.values) == 201
+        assert all(v is not None for v in batch.values.values())
+        assert batch.values["dup"] == batch.values["v0"]
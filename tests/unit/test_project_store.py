@@ -0,0 +1,140 @@
+"""
+Tests for content-hash incremental PLC project backups.
+
+Covers: unchanged artifacts referencing earlier versions instead of being
+rewritten, no new version when nothing changed, diff metadata, removed
+artifacts, object sharing across systems, zip export of any version,
+corruption detection, I/O throttling, and ``TIAPortalConnector`` backups
+(per-version locators; unchanged runs are not recorded as new backups).
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import zipfile
+
+import pytest
+
+from smartcompute.industrial.protocols.project_store import ProjectArtifactStore, text_diff
+from smartcompute.industrial.protocols.sync_engine import IOThrottle
+from smartcompute.industrial.protocols.systems_integrator import (
+    IndustrialSystem,
+    IndustrialSystemsManager,
+    SystemConfiguration,
+    TIAPortalConnector,
+)
+
+PROGRAM = "\n".join(f"NETWORK {i}: A I0.{i % 8} = Q0.{i % 8}" for i in range(200)).encode()
+
+
+def project(program=PROGRAM, hmi=b"<HMI/>", extra=()):
+    yield "hardware.xml", b"<Hardware cpu='1515'/>"
+    yield "program.scl", program
+    yield "hmi.xml", hmi
+    yield from extra
+
+
+class TestProjectStore:
+    def test_unchanged_artifacts_are_referenced_not_rewritten(self, tmp_path):
+        store = ProjectArtifactStore(tmp_path, io_throttle=IOThrottle(None))
+        first = store.commit("plc1", project(), {"note": "initial"})
+        assert (first.version, first.parent, first.created) == (1, None, True)
+        assert first.changed == ["hardware.xml", "hmi.xml", "program.scl"] and first.bytes_written > 0
+        assert store.io_throttle.bytes == first.bytes_written
+
+        again = store.commit("plc1", project())
+        assert (again.version, again.created, again.digest) == (1, False, first.digest)
+        assert len(store.history("plc1")) == 1
+
+        edited = PROGRAM.replace(b"NETWORK 10: A I0.2 = Q0.2", b"NETWORK 10: AN I0.2 = Q0.3\nNETWORK 10b: = M1.0")
+        second = store.commit("plc1", project(program=edited))
+        assert (second.version, second.parent, second.changed) == (2, 1, ["program.scl"])
+        assert second.bytes_written < first.bytes_written
+        refs = {a.name: a for a in second.artifacts}
+        assert refs["hardware.xml"].since == 1 and refs["hardware.xml"].change == "unchanged"
+        assert refs["program.scl"].since == 2 and refs["program.scl"].change == "modified"
+        assert second.diffs == {"program.scl": {"bytes_delta": len(edited) - len(PROGRAM),
+                                                "lines_added": 2, "lines_removed": 1, "hunks": 1}}
+
+        third = store.commit("plc1", [("hardware.xml", b"<Hardware cpu='1515'/>"), ("program.scl", edited)])
+        assert third.version == 3 and third.removed == ["hmi.xml"] and third.bytes_written == 0
+        assert [h["version"] for h in store.history("plc1")] == [3, 2, 1]
+        assert [h["changed_artifacts"] for h in store.history("plc1")] == [0, 1, 3]
+
+        reloaded = ProjectArtifactStore(tmp_path).get_version("plc1", 2)
+        assert reloaded.diffs == second.diffs and reloaded.digest == second.digest
+
+    def test_objects_shared_across_systems_and_export(self, tmp_path):
+        store = ProjectArtifactStore(tmp_path)
+        store.commit("plc1", project())
+        twin = store.commit("plc2", project())
+        assert twin.created and twin.version == 1 and twin.bytes_written == 0
+        store.commit("plc1", project(hmi=b"<HMI screens='3'/>"))
+
+        for version, hmi in ((1, b"<HMI/>"), (2, b"<HMI screens='3'/>")):
+            path = store.export_zip("plc1", version, tmp_path / f"v{version}.zip")
+            with zipfile.ZipFile(path) as archive:
+                assert archive.read("hmi.xml") == hmi and archive.read("program.scl") == PROGRAM
+        with pytest.raises(KeyError):
+            store.export_zip("plc1", 9, tmp_path / "missing.zip")
+
+        # Un objeto alterado en disco se detecta al leerlo
+        digest = store.head("plc1").artifacts[0].digest
+        path = store._object_path(digest)
+        path.write_bytes(__import__("zlib").compress(b"tampered"))
+        with pytest.raises(ValueError):
+            store.read_artifact(digest)
+
+
+class TestTextDiff:
+    def test_text_diff_binary_artifacts(self):
+        assert text_diff(b"\xff\x00", b"\xff\x00\x01") == {"bytes_delta": 1}
+
+
+class TestTIAPortalBackup:
+    @pytest.mark.asyncio
+    async def test_tia_backup_only_writes_changed_artifacts(self, tmp_path, monkeypatch):
+        config = SystemConfiguration(
+            system_id="tia1", system_type=IndustrialSystem.TIA_PORTAL, name="TIA", description="",
+            host="localhost", port=102, database_path=None, project_path=None, credentials={},
+            connection_params={})
+        connector = TIAPortalConnector(config)
+        assert await connector.connect()
+        connector.project_store = ProjectArtifactStore(tmp_path / "store")
+
+        first = await connector.backup_project()
+        assert first.metadata["version"] == 1 and first.metadata["new_version"]
+        assert sorted(first.metadata["changed_artifacts"]) == [
+            "hardware.xml", "hmi.xml", "program.scl", "project.json"]
+
+        unchanged = await connector.backup_project()
+        assert unchanged.metadata["version"] == 1 and not unchanged.metadata["new_version"]
+        assert unchanged.metadata["bytes_written"] == 0 and unchanged.checksum == first.checksum
+
+        original = connector._generate_program_scl()
+        monkeypatch.setattr(connector, "_generate_program_scl", lambda: original.replace("45.0", "47.5"))
+        changed = await connector.backup_project()
+        assert changed.metadata["version"] == 2 and changed.metadata["changed_artifacts"] == ["program.scl"]
+        assert changed.metadata["diffs"]["program.scl"]["lines_added"] == 1
+        assert changed.backup_id != first.backup_id
+        root = connector.project_store.root
+        assert (first.backup_path, changed.backup_path) == (f"{root}#tia1@v1", f"{root}#tia1@v2")
+
+    @pytest.mark.asyncio
+    async def test_unchanged_backup_is_not_recorded(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(IndustrialSystemsManager, "setup_logging",
+                            lambda self: logging.getLogger("test-systems-manager"))
+        manager = IndustrialSystemsManager(db_path=tmp_path / "systems.db")
+        connector = TIAPortalConnector(manager.system_configs["tia_portal_main"])
+        assert await connector.connect()
+        connector.project_store = ProjectArtifactStore(tmp_path / "store")
+
+        await manager.perform_system_backup("tia_portal_main", connector)
+        recorded = await manager.get_last_backup_time("tia_portal_main")
+        await manager.perform_system_backup("tia_portal_main", connector)
+        with sqlite3.connect(manager.db_path) as conn:
+            rows = conn.execute("SELECT backup_path FROM project_backups").fetchall()
+        assert rows == [(f"{connector.project_store.root}#tia_portal_main@v1",)]
+        assert await manager.get_last_backup_time("tia_portal_main") == recorded
+        assert manager.last_backup_check["tia_portal_main"] > recorded
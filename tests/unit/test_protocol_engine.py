@@ -0,0 +1,196 @@
+"""
+Tests for the asyncio secure protocol servers.
+
+Covers: handshake, one authenticated request per protocol, length-prefixed framing with coalesced and split
+segments, per-session cipher caching, auth failures and graceful shutdown.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import struct
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+from smartcompute.industrial.protocols import engine as protocols_engine  # noqa: E402
+from smartcompute.industrial.protocols.engine import (  # noqa: E402
+    EtherNetIPSecureProtocol,
+    ModbusSecureProtocol,
+    PROFINETSecureProtocol,
+    SecureProtocolBase,
+    SecureProtocolClient,
+    frame,
+    read_frame,
+    seal_envelope,
+)
+
+
+def _read_holding(tid: int, address: int = 0, count: int = 10) -> bytes:
+    return struct.pack("!HHHBBHH", tid, 0, 6, 1, 0x03, address, count)
+
+
+@pytest.fixture(scope="module")
+def protocol():
+    return ModbusSecureProtocol()
+
+
+async def _start(protocol):
+    task = asyncio.create_task(protocol.start_secure_server("127.0.0.1", 0))
+    while protocol._server is None or protocol.bound_address is None:
+        await asyncio.sleep(0.01)
+        if task.done():
+            task.result()
+    return task, protocol.bound_address
+
+
+async def _client(protocol, address):
+    client = SecureProtocolClient(protocol.protocol_name, protocol.encryption_key)
+    await client.connect(*address)
+    return client
+
+
+class TestSecureServer:
+    @pytest.mark.asyncio
+    async def test_request_round_trip(self, protocol):
+        task, address = await _start(protocol)
+        try:
+            client = await _client(protocol, address)
+            response = await client.request(_read_holding(7))
+
+            tid, _proto, _length, unit, fc, byte_count = struct.unpack("!HHHBBB", response[:9])
+            assert (tid, unit, fc, byte_count) == (7, 1, 0x03, 20)
+            assert client.session_id in protocol.authenticated_clients
+            await client.close()
+        finally:
+            await protocol.stop_server()
+            await task
+
+    @pytest.mark.asyncio
+    async def test_coalesced_and_split_frames(self, protocol):
+        task, address = await _start(protocol)
+        try:
+            client = await _client(protocol, address)
+            frames = [frame(seal_envelope(client.cipher, "Modbus", client.client_id, _read_holding(i)))
+                      for i in range(3)]
+
+            # Tres tramas en un solo write, y la cuarta byte a byte
+            client._writer.write(b"".join(frames))
+            split = frame(seal_envelope(client.cipher, "Modbus", client.client_id, _read_holding(3)))
+            for i in range(len(split)):
+                client._writer.write(split[i:i + 1])
+                await client._writer.drain()
+
+            tids = []
+            for _ in range(4):
+                envelope = await read_frame(client._reader, 1024)
+                plain = protocols_engine.open_envelope(client.cipher, "Modbus", client.client_id, envelope)
+                tids.append(struct.unpack("!H", plain[:2])[0])
+            assert tids == [0, 1, 2, 3]
+            await client.close()
+        finally:
+            await protocol.stop_server()
+            await task
+
+    @pytest.mark.asyncio
+    async def test_session_cipher_is_built_once(self, protocol, monkeypatch):
+        created = []
+        real = protocols_engine.AESGCM
+
+        def counting_aesgcm(key):
+            created.append(key)
+            return real(key)
+
+        monkeypatch.setattr(protocols_engine, "AESGCM", counting_aesgcm)
+        task, address = await _start(protocol)
+        try:
+            client = await _client(protocol, address)
+            baseline = len(created)
+            for i in range(20):
+                await client.request(_read_holding(i))
+            assert len(created) == baseline
+            await client.close()
+        finally:
+            await protocol.stop_server()
+            await task
+
+    @pytest.mark.asyncio
+    async def test_oversized_frame_closes_connection(self, protocol):
+        task, address = await _start(protocol)
+        try:
+            client = await _client(protocol, address)
+            client._writer.write(struct.pack("!I", 1 << 20))
+            await client._writer.drain()
+            assert await client._reader.read() == b""
+            await client.close()
+        finally:
+            await protocol.stop_server()
+            await task
+
+    @pytest.mark.asyncio
+    async def test_bad_auth_is_rejected(self, protocol):
+        task, address = await _start(protocol)
+        failures = protocol.server_stats["auth_failures"]
+        try:
+            reader, writer = await asyncio.open_connection(*address)
+            assert json.loads(await read_frame(reader, 1024))["type"] == "auth_challenge"
+            writer.write(frame(json.dumps({
+                "type": "auth_response", "response_hash": "00" * 32, "timestamp": 0
+            }).encode()))
+            await writer.drain()
+
+            assert await read_frame(reader, 1024) is None
+            assert protocol.server_stats["auth_failures"] == failures + 1
+            writer.close()
+        finally:
+            await protocol.stop_server()
+            await task
+
+    @pytest.mark.asyncio
+    async def test_graceful_shutdown_closes_clients(self, protocol):
+        task, address = await _start(protocol)
+        clients = [await _client(protocol, address) for _ in range(5)]
+        assert len(protocol._connections) == 5
+
+        await protocol.stop_server(timeout=2.0)
+        await asyncio.wait_for(task, 2.0)
+
+        assert protocol._connections == {}
+        assert protocol.authenticated_clients == {}
+        for client in clients:
+            assert await client._reader.read() == b""
+            await client.close()
+
+
+class TestProtocols:
+    @pytest.mark.parametrize("protocol_cls, request_data, expected", [
+        (ModbusSecureProtocol, _read_holding(9), _read_holding(9)[:2]),
+        (EtherNetIPSecureProtocol, bytes([0x0E, 0x02]), bytes([0x8E, 0x00])),
+        (PROFINETSecureProtocol, struct.pack("!BBIHH", 0x01, 0x00, 0xCAFE, 0, 0),
+         struct.pack("!BBI", 0x01, 0x01, 0xCAFE)),
+    ])
+    @pytest.mark.asyncio
+    async def test_authenticated_request(self, protocol_cls, request_data, expected):
+        protocol = protocol_cls()
+        task, address = await _start(protocol)
+        try:
+            client = await _client(protocol, address)
+            response = await client.request(request_data)
+            assert response.startswith(expected)
+            assert protocol.server_stats["messages"] == 1
+            await client.close()
+        finally:
+            await protocol.stop_server()
+            await task
+
+    @pytest.mark.asyncio
+    async def test_profinet_unsupported_service(self):
+        response = PROFINETSecureProtocol().process_request(
+            struct.pack("!BBIHH", 0x04, 0x00, 7, 0, 0), "session-id")
+        assert struct.unpack("!BBIHH", response) == (0x04, 0x05, 7, 0, 0)
+
+    def test_base_requires_process_request(self):
+        with pytest.raises(TypeError):
+            SecureProtocolBase("Custom")
@@ -0,0 +1,192 @@
+"""
+Tests for the streaming, chunk-encrypted report export.
+
+Covers: round trips across chunk boundaries, detection of tampered,
+reordered, truncated and extended files, length prefixes bounded before
+reading, wrong keys, reading the previous single-blob format, the
+operator key cache (TTL, salt matching, eviction),
+the streaming JSON/CSV writers against the stdlib output, and that peak
+memory does not grow with report size.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import secrets
+import tracemalloc
+
+import pytest
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from smartcompute.industrial.scada import report_stream
+from smartcompute.industrial.scada.report_stream import (
+    OperatorKeyCache,
+    ReportStreamError,
+    iter_csv,
+    iter_json,
+    read_encrypted_report,
+    read_report_metadata,
+    write_encrypted_report,
+)
+
+FAST = 1_000  # Iteraciones PBKDF2 reducidas para los tests
+
+
+@pytest.fixture
+def cache():
+    return OperatorKeyCache(ttl_seconds=60, iterations=FAST)
+
+
+def decrypt(path, key="operator-key", key_cache=None) -> bytes:
+    return b"".join(read_encrypted_report(path, key, key_cache or OperatorKeyCache(iterations=FAST)))
+
+
+@pytest.mark.parametrize("pieces", [[], ["a" * 64], ["x" * 10, b"y" * 200, "z" * 57], ["ñ" * 500]])
+def test_round_trip_across_chunk_boundaries(tmp_path, cache, pieces):
+    path = tmp_path / "r.csv.encrypted"
+    stats = write_encrypted_report(path, iter(pieces), "operator-key", cache, {"encrypted_by": "u"}, chunk_size=64)
+    expected = b"".join(p.encode() if isinstance(p, str) else p for p in pieces)
+    assert decrypt(path) == expected
+    assert stats.bytes_in == len(expected)
+    assert stats.chunks == len(expected) // 64 + 1  # El último bloque (marcado final) puede ir vacío
+    assert stats.bytes_out == path.stat().st_size
+    metadata = read_report_metadata(path)
+    assert metadata["encrypted_by"] == "u" and metadata["chunk_size"] == 64
+    assert not list(tmp_path.glob("*.partial"))
+
+
+def records(path):
+    """(cabecera, [registros]) de un fichero versión 2"""
+    data = path.read_bytes()
+    size = int.from_bytes(data[:4], "big")
+    header, body, out = data[:4 + size], data[4 + size:], []
+    while body:
+        length = int.from_bytes(body[1:5], "big")
+        out.append(body[:5 + length])
+        body = body[5 + length:]
+    return header, out
+
+
+@pytest.mark.parametrize("damage", ["flip", "reorder", "truncate", "extend", "drop_final_flag"])
+def test_tampering_is_detected(tmp_path, cache, damage):
+    path = tmp_path / "r.json.encrypted"
+    write_encrypted_report(path, ["0123456789" * 30], "operator-key", cache, chunk_size=100)
+    header, recs = records(path)
+    assert len(recs) == 4
+    if damage == "flip":
+        recs[1] = recs[1][:20] + bytes([recs[1][20] ^ 1]) + recs[1][21:]
+    elif damage == "reorder":
+        recs[0], recs[1] = recs[1], recs[0]
+    elif damage == "truncate":
+        recs = recs[:-1]
+    elif damage == "extend":
+        recs.append(recs[-1])
+    elif damage == "drop_final_flag":
+        recs[-1] = b"\x00" + recs[-1][1:]
+    path.write_bytes(header + b"".join(recs))
+    with pytest.raises(ReportStreamError):
+        decrypt(path)
+
+
+@pytest.mark.parametrize("field", ["metadata_size", "record_length", "chunk_size"])
+def test_oversized_lengths_rejected_before_read(tmp_path, cache, field):
+    path = tmp_path / "r.csv.encrypted"
+    write_encrypted_report(path, ["0123456789" * 30], "operator-key", cache, chunk_size=100)
+    header, recs = records(path)
+    if field == "metadata_size":
+        header = (0xFFFFFFF0).to_bytes(4, "big") + header[4:]
+    elif field == "record_length":
+        recs[0] = recs[0][:1] + (100 + 17).to_bytes(4, "big") + recs[0][5:]
+    else:
+        metadata = json.loads(header[4:])
+        metadata["chunk_size"] = 1 << 40
+        encoded = json.dumps(metadata).encode()
+        header = len(encoded).to_bytes(4, "big") + encoded
+    path.write_bytes(header + b"".join(recs))
+    with pytest.raises(ReportStreamError, match="size|length"):
+        decrypt(path)
+
+
+def test_wrong_key_fails(tmp_path, cache):
+    path = tmp_path / "r.pdf.encrypted"
+    write_encrypted_report(path, ["secret"], "operator-key", cache)
+    with pytest.raises(ReportStreamError):
+        decrypt(path, "other-key")
+
+
+def test_reads_single_blob_format(tmp_path):
+    # Formato anterior: [tamaño][metadata][sal 16B][nonce 12B][AES-GCM(contenido)]
+    salt, nonce = secrets.token_bytes(16), secrets.token_bytes(12)
+    key = report_stream._pbkdf2("operator-key", salt, 100_000)
+    metadata = json.dumps({"encrypted": True, "algorithm": "AES-GCM", "iterations": 100_000,
+                           "salt": salt.hex()}).encode()
+    path = tmp_path / "old.csv.encrypted"
+    path.write_bytes(len(metadata).to_bytes(4, "big") + metadata + salt + nonce
+                     + AESGCM(key).encrypt(nonce, b"a,b\n1,2\n", None))
+    assert b"".join(read_encrypted_report(path, "operator-key")) == b"a,b\n1,2\n"
+
+
+class TestOperatorKeyCache:
+    def test_reuses_salt_and_key_within_ttl(self, cache):
+        first = cache.derive("k")
+        assert cache.derive("k") == first
+        assert cache.derive("k", first[0]) == first
+        assert cache.stats == {"hits": 2, "misses": 1}
+        # Otra sal (un fichero antiguo) deriva de nuevo
+        other = cache.derive("k", b"\x00" * 16)
+        assert other[1] != first[1]
+
+    def test_expires(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(report_stream.time, "monotonic", lambda: now[0])
+        cache = OperatorKeyCache(ttl_seconds=5, iterations=FAST)
+        salt, _ = cache.derive("k")
+        now[0] += 6
+        assert cache.derive("k")[0] != salt
+        assert cache.stats["misses"] == 2
+
+    def test_bounded(self):
+        cache = OperatorKeyCache(max_entries=3, iterations=FAST)
+        for i in range(10):
+            cache.derive(f"k{i}")
+        assert len(cache._entries) == 3
+        assert all(b"k9" not in digest for digest in cache._entries)  # Nunca la clave en claro
+
+
+def test_iter_json_matches_json_dumps():
+    entries = [{"id": i, "msg": f"línea {i}", "tags": ["a", "b"], "nested": {"x": [1, {"y": None}]}}
+               for i in range(5)]
+    data = {"title": "Reporte", "stats": {"WARNING": 3}, "empty": [], "entries": entries, "tail": 1.5}
+    expected = json.dumps(data, indent=2, ensure_ascii=False)
+    streamed = dict(data, entries=iter(entries), empty=iter([]))
+    assert "".join(iter_json(streamed)) == expected
+    assert "".join(iter_json({})) == json.dumps({}, indent=2)
+
+
+def test_iter_csv_matches_dict_writer():
+    rows = [{"a": i, "b": f"x,{i}", "c": 'q"uote'} for i in range(2_500)]
+    expected = io.StringIO()
+    writer = csv.DictWriter(expected, fieldnames=["a", "b", "c"])
+    writer.writeheader()
+    writer.writerows(rows)
+    pieces = list(iter_csv(["a", "b", "c"], iter(rows), rows_per_piece=1_000))
+    assert len(pieces) == 3
+    assert "".join(pieces) == expected.getvalue()
+
+
+def test_peak_memory_is_independent_of_report_size(tmp_path, cache):
+    def peak(rows: int) -> int:
+        lines = ({"ts": "2025-01-15 14:30:25", "message": "pump speed high " * 8, "value": i} for i in range(rows))
+        tracemalloc.start()
+        write_encrypted_report(tmp_path / f"{rows}.csv.encrypted", iter_csv(["ts", "message", "value"], lines),
+                               "operator-key", cache, chunk_size=256 * 1024)
+        _, top = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return top
+
+    small, large = peak(20_000), peak(200_000)
+    assert (tmp_path / "200000.csv.encrypted").stat().st_size > 25_000_000
+    assert large < small * 1.5
+    assert large < 4 * 1024 * 1024
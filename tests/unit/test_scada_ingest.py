@@ -0,0 +1,109 @@
+"""
+Tests for the batched SCADA log ingestion pipeline.
+
+Covers: ingest_many persistence through the batched writers, duplicate and
+unparseable lines, batches larger than the writer buffer, error propagation, the bounded submit queue, and process-pool parsing of
+FactoryTalk XML matching the in-process parser.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from smartcompute.industrial.scada.logging_system import IndustrialSCADALogger, SCADASystem
+
+
+def wonderware(i: int) -> str:
+    return (f"2025-01-15 14:30:{i % 60:02d}.{i % 1000:03d} [ALARM] Area1.Pump{i}.Speed HH "
+            f"{1800 + i % 100}.5 rpm (Limit: 1800.0) Operator: JSmith")
+
+
+def factorytalk_xml(i: int) -> str:
+    return (f'<Event type="Start" timestamp="2025-01-15T14:30:{i % 60:02d}Z">'
+            f'<BatchId>B{i}</BatchId><Recipe>R1</Recipe><Operator>OP{i % 3}</Operator></Event>')
+
+
+@pytest.fixture
+def scada(tmp_path: Path, monkeypatch) -> IndustrialSCADALogger:
+    monkeypatch.chdir(tmp_path)
+    logger = IndustrialSCADALogger(db_path=tmp_path / "scada.db", simulate=False, flush_interval_ms=20)
+    yield logger
+    logger.close()
+
+
+def count(db_path: Path, table: str) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+class TestIngestMany:
+    def test_rows_and_alarms_are_persisted_in_batches(self, scada):
+        lines = [wonderware(i) for i in range(500)]
+        assert scada.ingest_many(lines, SCADASystem.WONDERWARE, "ww_01") == 500
+        # Las mismas líneas otra vez: mismo log_id, no se duplican
+        scada.ingest_many(lines[:100], SCADASystem.WONDERWARE)
+        scada.close()
+
+        assert count(scada.db_path, "scada_logs") == 500
+        assert count(scada.db_path, "process_alarms") == 500
+        assert scada.log_writer.stats["flushes"] < 50
+        assert scada.log_statistics["total"] == 600
+
+    def test_unparseable_lines_are_skipped(self, scada):
+        lines = [wonderware(1), "garbage", wonderware(2)]
+        assert scada.ingest_many(lines, SCADASystem.WONDERWARE) == 2
+        assert scada.log_statistics["parse_errors"] == 1
+        assert scada.log_parser.stats["parse_errors"] == 1
+        assert scada.ingest_many(["x"], SCADASystem.ABB_800XA) == 0
+
+    def test_batch_larger_than_writer_buffer(self, scada):
+        scada.log_writer.max_buffered_rows = 100
+        scada.alarm_writer.max_buffered_rows = 100
+        assert scada.ingest_many([wonderware(i) for i in range(350)], SCADASystem.WONDERWARE) == 350
+        scada.close()
+        assert count(scada.db_path, "scada_logs") == 350
+
+    def test_processing_errors_propagate(self, scada, monkeypatch):
+        def broken(entries):
+            raise RuntimeError("disk full")
+
+        monkeypatch.setattr(scada, "process_log_entries", broken)
+        with pytest.raises(RuntimeError):
+            scada.ingest_many([wonderware(1)], SCADASystem.WONDERWARE)
+        assert scada.log_statistics["total"] == 0
+
+    def test_single_line_path(self, scada):
+        scada.ingest_raw_log(wonderware(7), SCADASystem.WONDERWARE)
+        scada.close()
+        with sqlite3.connect(scada.db_path) as conn:
+            (tag,) = conn.execute("SELECT tag_name FROM scada_logs").fetchone()
+        assert tag == "Area1.Pump7.Speed"
+
+
+def test_bounded_queue(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scada = IndustrialSCADALogger(db_path=tmp_path / "q.db", simulate=False, queue_size=16, batch_size=64)
+    for i in range(1000):
+        scada.submit(wonderware(i), SCADASystem.WONDERWARE)
+    scada.flush()
+    assert scada.log_statistics["total"] == 1000
+    scada.close()
+    assert count(tmp_path / "q.db", "scada_logs") == 1000
+
+
+def test_process_pool_matches_serial_parse(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scada = IndustrialSCADALogger(db_path=tmp_path / "p.db", simulate=False,
+                                  parse_workers=2, parallel_threshold=10)
+    try:
+        lines = [factorytalk_xml(i) for i in range(200)]
+        pooled = scada.parse_many(lines, SCADASystem.FACTORYTALK)
+        assert scada._parse_pool is not None
+        serial = [scada.log_parser.parse_log_entry(line, SCADASystem.FACTORYTALK) for line in lines]
+        assert [e.log_id for e in pooled] == [e.log_id for e in serial]
+        assert pooled[5].details["batch_id"] == "B5"
+    finally:
+        scada.close()
@@ -0,0 +1,135 @@
+"""
+Tests for the partitioned SCADA log store.
+
+Covers: rows routed to weekly partitions behind the ``scada_logs`` view,
+FTS5 phrase and expression search, keyset pagination across partitions
+(no duplicates or gaps), partition pruning by time range, dropping old
+partitions, migration of a legacy ``scada_logs`` table, and the logger's
+partitioned writer.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from smartcompute.industrial.scada.log_store import LOG_COLUMNS, SCADALogStore
+from smartcompute.industrial.scada.logging_system import IndustrialSCADALogger, SCADASystem
+
+BASE = datetime(2025, 1, 6)  # Lunes
+
+
+def row(i: int, when: datetime, message: str = "pump speed high", system: str = "wonderware",
+        tag: str = "Area1.Pump1.Speed"):
+    values = dict.fromkeys(LOG_COLUMNS)
+    values.update(log_id=f"id{i}", timestamp=when.isoformat(" "), scada_system=system, source_node="node1",
+                  severity="warning", category="process_control", message=message, tag_name=tag)
+    return tuple(values[column] for column in LOG_COLUMNS)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SCADALogStore(tmp_path / "logs.db")
+
+
+def insert(store, rows):
+    conn = sqlite3.connect(store.db_path)
+    store.insert(conn, rows)
+    conn.commit()
+    conn.close()
+
+
+class TestPartitions:
+    def test_rows_land_in_weekly_partitions_behind_view(self, store):
+        insert(store, [row(i, BASE + timedelta(days=i)) for i in range(15)])
+        assert [name for name, _, _ in store.partitions()] == [
+            "scada_logs_p20250120", "scada_logs_p20250113", "scada_logs_p20250106"]
+        with sqlite3.connect(store.db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM scada_logs").fetchone() == (15,)
+            assert conn.execute("SELECT COUNT(*) FROM scada_logs_p20250113").fetchone() == (7,)
+
+        # INSERT OR IGNORE: un duplicado no llega ni a la tabla ni al índice FTS
+        insert(store, [row(0, BASE)])
+        assert store.count_by("scada_system", text="pump") == {"wonderware": 15}
+
+    def test_time_range_prunes_partitions(self, store):
+        insert(store, [row(i, BASE + timedelta(days=i)) for i in range(21)])
+        page = store.query(since=BASE + timedelta(days=8), until=BASE + timedelta(days=10))
+        assert [r["log_id"] for r in page.rows] == ["id9", "id8"]
+        assert page.partitions_scanned == ["scada_logs_p20250113"]
+
+    def test_drop_partitions(self, store):
+        insert(store, [row(i, BASE + timedelta(days=i)) for i in range(21)])
+        assert store.drop_partitions(BASE + timedelta(days=14)) == 2
+        assert [name for name, _, _ in store.partitions()] == ["scada_logs_p20250120"]
+        with sqlite3.connect(store.db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM scada_logs").fetchone() == (7,)
+            dropped = conn.execute("SELECT name FROM sqlite_master WHERE name LIKE 'scada_logs_p20250106%'")
+            assert dropped.fetchall() == []
+
+        # Una partición borrada se vuelve a crear si llegan filas de ese periodo
+        insert(store, [row(100, BASE)])
+        assert store.query(until=BASE + timedelta(days=1)).rows[0]["log_id"] == "id100"
+
+    def test_legacy_table_is_migrated(self, tmp_path):
+        db_path = tmp_path / "legacy.db"
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(f"CREATE TABLE scada_logs ({', '.join(LOG_COLUMNS)}, raw_data BLOB, created_at TIMESTAMP)")
+            conn.executemany(f"INSERT INTO scada_logs ({', '.join(LOG_COLUMNS)}) VALUES "
+                             f"({', '.join('?' * len(LOG_COLUMNS))})",
+                             [row(i, BASE + timedelta(days=4 * i)) for i in range(5)])
+        store = SCADALogStore(db_path)
+        assert len(store.partitions()) == 3
+        assert [r["log_id"] for r in store.query(text="speed", limit=2).rows] == ["id4", "id3"]
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute("SELECT type FROM sqlite_master WHERE name = 'scada_logs'").fetchone() == ("view",)
+
+
+class TestQuery:
+    def test_full_text_search_and_filters(self, store):
+        insert(store, [
+            row(1, BASE, "Safety trip on reactor R1"),
+            row(2, BASE + timedelta(hours=1), "Pump speed HIGH", tag="P2"),
+            row(3, BASE + timedelta(hours=2), "pump seal leak", system="emerson_deltav", tag="P3"),
+        ])
+        assert [r["log_id"] for r in store.query(text="pump").rows] == ["id3", "id2"]
+        assert [r["log_id"] for r in store.query(text="pump", scada_system="wonderware").rows] == ["id2"]
+        assert [r["log_id"] for r in store.query(match="safety OR seal").rows] == ["id3", "id1"]
+        assert store.query(text='reactor "on').rows == []  # Las comillas se escapan, no rompen la consulta
+        assert [r["log_id"] for r in store.query(tag_name="P3").rows] == ["id3"]
+        with pytest.raises(ValueError):
+            store.query(message="x")
+
+    def test_pagination_across_partitions_is_complete_and_ordered(self, store):
+        # Marcas de tiempo repetidas: el desempate por rowid no debe perder filas
+        insert(store, [row(i, BASE + timedelta(days=i // 10, minutes=i // 3)) for i in range(60)])
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = store.query(limit=7, cursor=cursor)
+            seen.extend(page.rows)
+            pages += 1
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        assert pages == 9
+        assert sorted(r["log_id"] for r in seen) == sorted(f"id{i}" for i in range(60))
+        stamps = [r["timestamp"] for r in seen]
+        assert stamps == sorted(stamps, reverse=True)
+        assert len(list(store.iter_query(page_size=11))) == 60
+
+
+class TestLoggerWriter:
+    def test_logger_writes_through_partitioned_writer(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        scada = IndustrialSCADALogger(db_path=tmp_path / "s.db", simulate=False, flush_interval_ms=20)
+        lines = [f"2025-01-{15 + i % 10:02d} 14:30:25.{i:03d} [ALARM] Area1.Pump{i}.Speed HH 1850.5 rpm "
+                 f"(Limit: 1800.0) Operator: JSmith" for i in range(40)]
+        scada.ingest_many(lines, SCADASystem.WONDERWARE)
+        scada.close()
+
+        assert len(scada.log_store.partitions()) == 2
+        page = scada.search_logs("Pump7", limit=5)
+        assert [r["tag_name"] for r in page.rows] == ["Area1.Pump7.Speed"]
+        assert sum(scada.log_store.count_by("severity").values()) == 40
@@ -0,0 +1,111 @@
+"""
+Tests for the fast-path SCADA parsers.
+
+Covers: cached timestamp decoding against strptime, the non-cryptographic
+log id, format auto-detection, and the per-system parsers (including the
+Experion '%' unit and FactoryTalk user capture).
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+from smartcompute.industrial.scada.logging_system import (
+    IndustrialSCADALogger,
+    ProcessAlarmType,
+    SCADALogParser,
+    SCADASystem,
+)
+from smartcompute.industrial.scada.parsing import TimestampDecoder, detect_format, fast_log_id
+
+SAMPLES = {
+    SCADASystem.WONDERWARE:
+        "2025-01-15 14:30:25.123 [ALARM] Area1.PumpMotor1.Speed HH 1850.5 rpm (Limit: 1800.0) Operator: JSmith",
+    SCADASystem.EMERSON_DELTAV:
+        "15-JAN-25 14:30:25.123 REACTOR01/TIC_001/PV.CV HI_ALM 85.5 DEG_C PRIO=3 USER=OPERATOR1",
+    SCADASystem.HONEYWELL_EXPERION:
+        "2025.01.15 14:30:25.123 C300_01 ALARM FC_101.PV HIGH 75.5 % [ACK: OPERATOR2 14:32:15]",
+    SCADASystem.SIEMENS_WINCC:
+        "2025-01-15,14:30:25.123,S7-1500_01,MotorSpeed,1850.5,rpm,HH_ALM,User01,Acknowledged",
+    SCADASystem.FACTORYTALK:
+        "[2025-01-15 14:30:25] [INFO] HMI_Station_01: Motor1_Start = TRUE (User: OPERATOR1)",
+}
+
+
+class TestTimestampDecoder:
+    @pytest.mark.parametrize("date_format,length,text,full_format", [
+        ('%Y-%m-%d', 10, "2025-01-15 14:30:25.123", '%Y-%m-%d %H:%M:%S.%f'),
+        ('%d-%b-%y', 9, "15-JAN-25 04:05:06.7", '%d-%b-%y %H:%M:%S.%f'),
+        ('%Y.%m.%d', 10, "2025.12.31 23:59:59", '%Y.%m.%d %H:%M:%S'),
+    ])
+    def test_matches_strptime(self, date_format, length, text, full_format):
+        decoder = TimestampDecoder(date_format, length)
+        assert decoder.decode(text) == datetime.strptime(text, full_format)
+        assert decoder.decode(text) == datetime.strptime(text, full_format)  # Desde la caché
+        assert len(decoder._dates) == 1
+
+    def test_rejects_malformed_time(self):
+        decoder = TimestampDecoder('%Y-%m-%d', 10)
+        for text in ("2025-01-15 14-30-25", "2025-01-15 14:30", "2025-01-15 14:30:25,123", "2025-13-01 10:00:00"):
+            with pytest.raises(ValueError):
+                decoder.decode(text)
+
+
+def test_fast_log_id_is_stable_and_distinct():
+    ids = {fast_log_id(f"line {i}") for i in range(10_000)}
+    assert len(ids) == 10_000
+    assert fast_log_id("line 1") == fast_log_id("line 1")
+    assert len(fast_log_id("x")) == 16
+
+
+@pytest.mark.parametrize("system", list(SAMPLES))
+def test_detect_format(system):
+    lines = ["", SAMPLES[system], SAMPLES[system]]
+    assert detect_format(lines) == system.value
+    assert SCADALogParser().detect_system(lines) is system
+
+
+def test_detect_format_unknown():
+    assert detect_format(["garbage", "more garbage"]) is None
+    assert detect_format(['<Event type="Start" timestamp="2025-01-15T14:30:00Z"/>']) == "factorytalk"
+
+
+class TestParsers:
+    @pytest.fixture
+    def parser(self):
+        return SCADALogParser()
+
+    @pytest.mark.parametrize("system", list(SAMPLES))
+    def test_each_system_parses(self, parser, system):
+        entry = parser.parse_log_entry(SAMPLES[system], system)
+        assert entry is not None
+        assert entry.timestamp == datetime(2025, 1, 15, 14, 30, 25, 123000 if system is not SCADASystem.FACTORYTALK else 0)
+        assert entry.log_id == fast_log_id(SAMPLES[system])
+
+    def test_experion_percent_units(self, parser):
+        entry = parser.parse_log_entry(SAMPLES[SCADASystem.HONEYWELL_EXPERION], SCADASystem.HONEYWELL_EXPERION)
+        assert entry.details["units"] == "%"
+        assert entry.operator_id == "OPERATOR2"
+        assert entry.alarm_type is ProcessAlarmType.HIGH
+
+    def test_factorytalk_text_captures_message_and_user(self, parser):
+        entry = parser.parse_log_entry(SAMPLES[SCADASystem.FACTORYTALK], SCADASystem.FACTORYTALK)
+        assert entry.message == "Motor1_Start = TRUE"
+        assert entry.operator_id == "OPERATOR1"
+
+    def test_wincc_bad_time_is_rejected(self, parser):
+        bad = SAMPLES[SCADASystem.SIEMENS_WINCC].replace("14:30:25.123", "14h30")
+        assert parser.parse_log_entry(bad, SCADASystem.SIEMENS_WINCC) is None
+
+
+def test_ingest_many_autodetects(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scada = IndustrialSCADALogger(db_path=tmp_path / "d.db", simulate=False)
+    try:
+        assert scada.ingest_many([SAMPLES[SCADASystem.EMERSON_DELTAV]] * 3) == 3
+        assert scada.log_statistics[SCADASystem.EMERSON_DELTAV.value] == 3
+        assert scada.ingest_many(["garbage"]) == 0
+    finally:
+        scada.close()
@@ -0,0 +1,270 @@
+"""
+Tests for the SCADA ingestion sources.
+
+Covers: block reads with partial lines carried across reads, inode+offset
+checkpoints across restarts, rename and copytruncate rotation (also while
+stopped), unconfirmed batches re-read from the checkpoint, the
+inotify-driven follower, bounded syslog pending lines, syslog header parsing, and a
+loopback UDP/TCP syslog sender feeding IndustrialSCADALogger.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import socket
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+
+from smartcompute.industrial.scada.logging_system import IndustrialSCADALogger, SCADASystem
+from smartcompute.industrial.scada.sources import (
+    CheckpointStore,
+    DeliveryError,
+    FileFollower,
+    FileTailer,
+    SyslogListener,
+    parse_syslog,
+)
+
+
+def wonderware(i: int) -> str:
+    return (f"2025-01-15 14:30:{i % 60:02d}.{i % 1000:03d} [ALARM] Area1.Pump{i}.Speed HH "
+            f"{1800 + i % 100}.5 rpm (Limit: 1800.0) Operator: JSmith")
+
+
+def wait_for(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def store(tmp_path: Path):
+    store = CheckpointStore(tmp_path / "checkpoints.db")
+    yield store
+    store.close()
+
+
+def make_tailer(path, store, **options):
+    lines = []
+    tailer = FileTailer(path, store, lambda batch, _: lines.extend(batch), **options)
+    return tailer, lines
+
+
+class TestFileTailer:
+    def test_partial_lines_are_carried_across_reads(self, tmp_path, store):
+        log = tmp_path / "app.log"
+        log.write_bytes(b"first line\r\nsecond li")
+        tailer, lines = make_tailer(log, store, block_size=4)
+        assert tailer.poll() == 1
+        assert lines == ["first line"]
+        assert tailer.offset == len(b"first line\r\n")
+
+        with open(log, "ab") as f:
+            f.write(b"ne\nthird\n")
+        tailer.poll()
+        assert lines == ["first line", "second line", "third"]
+
+    def test_checkpoint_resumes_after_restart(self, tmp_path, store):
+        log = tmp_path / "app.log"
+        log.write_text("a\nb\n")
+        tailer, _ = make_tailer(log, store)
+        tailer.poll()
+        tailer.close()
+
+        with open(log, "a") as f:
+            f.write("c\n")
+        restarted, lines = make_tailer(log, store)
+        restarted.poll()
+        assert lines == ["c"]
+
+    def test_unconfirmed_batch_is_reread(self, tmp_path, store):
+        log = tmp_path / "app.log"
+        log.write_text("a\nb\n")
+        outcomes, lines = [RuntimeError("db down"), False, None], []
+
+        def on_lines(batch, _):
+            lines.append(list(batch))
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        tailer = FileTailer(log, store, on_lines)
+        with pytest.raises(RuntimeError):
+            tailer.poll()
+        with pytest.raises(DeliveryError):
+            tailer.poll()
+        assert store.get(tailer.key)[1] == 0
+        assert tailer.poll() == 2
+        assert lines == [["a", "b"]] * 3
+        assert store.get(tailer.key)[1] == 4
+        assert tailer.stats["retries"] == 2
+
+    def test_rename_rotation(self, tmp_path, store):
+        log = tmp_path / "app.log"
+        writer = open(log, "w")
+        writer.write("one\n")
+        writer.flush()
+        tailer, lines = make_tailer(log, store)
+        tailer.poll()
+
+        # El escritor termina el fichero antiguo después de rotarlo
+        log.rename(tmp_path / "app.log.1")
+        writer.write("two\nunterminated")
+        writer.close()
+        log.write_text("three\n")
+
+        tailer.poll()
+        assert lines == ["one", "two", "unterminated", "three"]
+        assert tailer.stats["rotations"] == 1
+
+    def test_rotation_while_stopped(self, tmp_path, store):
+        log = tmp_path / "app.log"
+        log.write_text("one\n")
+        tailer, _ = make_tailer(log, store)
+        tailer.poll()
+        tailer.close()
+
+        with open(log, "a") as f:
+            f.write("two\n")
+        log.rename(tmp_path / "app.log.1")
+        log.write_text("three\n")
+
+        restarted, lines = make_tailer(log, store)
+        restarted.poll()
+        assert lines == ["two", "three"]
+
+    def test_copytruncate(self, tmp_path, store):
+        log = tmp_path / "app.log"
+        log.write_text("one\ntwo\n")
+        tailer, lines = make_tailer(log, store)
+        tailer.poll()
+        log.write_text("x\n")
+        tailer.poll()
+        assert lines == ["one", "two", "x"]
+        assert tailer.stats["truncations"] == 1
+
+
+def test_follower_thread_picks_up_appends(tmp_path, store):
+    log = tmp_path / "app.log"
+    log.write_text("")
+    lines = []
+    follower = FileFollower(store, lambda batch, _: lines.extend(batch), poll_interval=0.5)
+    follower.follow(log)
+    follower.start()
+    try:
+        for i in range(3):
+            with open(log, "a") as f:
+                f.write(f"line {i}\n")
+        wait_for(lambda: len(lines) == 3)
+        assert follower.get_stats()["files"][str(log)]["lines"] == 3
+    finally:
+        follower.stop()
+
+
+def test_parse_syslog():
+    assert parse_syslog("<34>Oct 11 22:14:15 plc01 wincc[12]: 2025-01-15,14:30") == ("plc01", "2025-01-15,14:30")
+    assert parse_syslog("<165>1 2025-01-15T14:30:25Z hist01 app - ID47 [x@1 a=\"b\"] hello") == ("hist01", "hello")
+    assert parse_syslog("<165>1 2025-01-15T14:30:25Z - app - - - hello") == (None, "hello")
+    assert parse_syslog("2025-01-15 14:30:25.123 [INFO] raw") == (None, "2025-01-15 14:30:25.123 [INFO] raw")
+
+
+@pytest.mark.asyncio
+async def test_syslog_loopback_udp_and_tcp():
+    received = {}
+    listener = SyslogListener(lambda lines, source: received.setdefault(source, []).extend(lines),
+                              host="127.0.0.1", udp_port=0, tcp_port=0, flush_interval=0.05)
+    await listener.start()
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+            udp.sendto(b"<34>Jan 15 14:30:25 hmi01 ft: first", listener.udp_address)
+        _, writer = await asyncio.open_connection(*listener.tcp_address)
+        second = "<34>Jan 15 14:30:26 hmi02 ft: second".encode()
+        writer.write(b"%d %s" % (len(second), second))
+        writer.write(b"2025-01-15 raw line\n")
+        await writer.drain()
+
+        for _ in range(100):
+            if sum(map(len, received.values())) == 3:
+                break
+            await asyncio.sleep(0.02)
+        writer.close()
+    finally:
+        await listener.stop()
+
+    assert received["syslog:hmi01"] == ["first"]
+    assert received["syslog:hmi02"] == ["second"]
+    assert received["syslog:127.0.0.1"] == ["2025-01-15 raw line"]
+
+
+@pytest.mark.asyncio
+async def test_syslog_pending_lines_are_bounded():
+    received = []
+    listener = SyslogListener(lambda lines, source: received.extend(lines), host="127.0.0.1",
+                              udp_port=0, tcp_port=0, batch_size=1000, flush_interval=30, max_pending=5)
+    await listener.start()
+    try:
+        # UDP: por encima del tope se descarta y se cuenta
+        listener.receive(b"\n".join(b"udp %d" % i for i in range(8)), "10.0.0.1")
+        assert listener.stats["dropped"] == 3
+        await listener.flush()
+        assert len(received) == 5
+
+        # TCP: se deja de leer hasta que el lote se entrega; no se pierde nada
+        _, writer = await asyncio.open_connection(*listener.tcp_address)
+        writer.write(b"".join(b"tcp %d\n" % i for i in range(20)))
+        await writer.drain()
+        for _ in range(100):
+            if len(received) == 25:
+                break
+            await asyncio.sleep(0.02)
+        writer.close()
+    finally:
+        await listener.stop()
+
+    assert len(received) == 25
+    assert listener.stats["dropped"] == 3
+    assert listener.stats["tcp_pauses"] >= 3
+
+
+@pytest.mark.asyncio
+async def test_logger_syslog_listener_ingests(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scada = IndustrialSCADALogger(db_path=tmp_path / "s.db", simulate=False, flush_interval_ms=20)
+    listener = await scada.start_syslog_listener("127.0.0.1", udp_port=0, tcp_port=None, flush_interval=0.05)
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+        for i in range(20):
+            udp.sendto(f"<34>Jan 15 14:30:25 ww01 intouch: {wonderware(i)}".encode(), listener.udp_address)
+    for _ in range(100):
+        if scada.log_statistics["total"] == 20:
+            break
+        await asyncio.sleep(0.02)
+    await listener.stop()
+    scada.close()
+
+    with sqlite3.connect(scada.db_path) as conn:
+        rows = conn.execute("SELECT COUNT(*), MIN(scada_system) FROM scada_logs").fetchone()
+    assert rows == (20, SCADASystem.WONDERWARE.value)
+
+
+def test_logger_follow_file_resumes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    log = tmp_path / "intouch.log"
+    log.write_text("".join(wonderware(i) + "\n" for i in range(10)))
+
+    scada = IndustrialSCADALogger(db_path=tmp_path / "f.db", simulate=False, flush_interval_ms=20)
+    tailer = scada.follow_file(log)
+    wait_for(lambda: scada.log_statistics["total"] == 10)
+    assert tailer.scada_system is SCADASystem.WONDERWARE
+    scada.close()
+
+    with open(log, "a") as f:
+        f.write(wonderware(10) + "\n")
+    scada = IndustrialSCADALogger(db_path=tmp_path / "f.db", simulate=False, flush_interval_ms=20)
+    scada.follow_file(log, SCADASystem.WONDERWARE)
+    wait_for(lambda: scada.log_statistics["total"] == 1)
+    scada.close()
@@ -0,0 +1,235 @@
+"""
+Tests for the industrial systems sync engine.
+
+Covers: per-connector concurrency and rate limits, the change filter and
+the batched upsert (unchanged values are not rewritten, ``sync_count``
+counts real changes, state survives a restart), background jobs
+(priority order, de-duplication, failures), the byte-rate I/O throttle,
+and the manager running variable sync while a slow backup is in
+progress.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import zipfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from smartcompute.industrial.protocols import systems_integrator
+from smartcompute.industrial.protocols.sync_engine import (
+    BackgroundJobRunner,
+    ChangeTracker,
+    ConnectorGate,
+    ConnectorLimits,
+    IOThrottle,
+    RateLimiter,
+    SyncMetrics,
+    ThrottledWriter,
+)
+from smartcompute.industrial.protocols.systems_integrator import IndustrialSystemsManager, SystemVariable
+
+
+def variable(tag, value, data_type="Real", system_id="plc"):
+    return SystemVariable(variable_id=f"{system_id}_{tag}", system_id=system_id, tag_name=tag, data_type=data_type,
+                          value=value, quality="Good", timestamp=datetime.now(), access_rights="ReadWrite")
+
+
+class TestGate:
+    @pytest.mark.asyncio
+    async def test_gate_limits_concurrency_and_rate(self):
+        gate = ConnectorGate(ConnectorLimits(max_concurrency=2, requests_per_second=200, read_batch_size=3))
+        active, peak, batches = 0, 0, []
+
+        async def read(tags):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            batches.append(tags)
+            return {tag: tag.upper() for tag in tags}
+
+        result = await gate.map_batches(read, [f"t{i}" for i in range(10)])
+        assert result == {f"t{i}": f"T{i}" for i in range(10)}
+        assert sorted(len(batch) for batch in batches) == [1, 3, 3, 3]
+        assert peak == gate.stats['max_in_flight'] == 2
+        assert gate.stats['requests'] == 4 and gate.in_flight == 0
+
+        limiter = RateLimiter(rate=50, burst=1)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(6):
+            await limiter.acquire()
+        assert loop.time() - started >= 5 / 50 * 0.9
+
+
+class TestChangeTracker:
+    def test_change_tracker_filters_unchanged_values(self):
+        tracker = ChangeTracker()
+        tracker.seed([("plc_a", "1.5", "Real")])
+        batch = [variable("a", 1.5), variable("b", True, "Bool")]
+        assert [v.tag_name for v in tracker.changed(batch)] == ["b"]
+        tracker.commit(batch)
+        assert tracker.changed(batch) == []
+        changed = tracker.changed([variable("a", 1.6), variable("b", True, "Int")])
+        assert [v.tag_name for v in changed] == ["a", "b"]
+
+
+class TestBackgroundJobs:
+    @pytest.mark.asyncio
+    async def test_background_jobs_priority_dedup_and_failures(self):
+        runner, order = BackgroundJobRunner(workers=1), []
+
+        def job(name, fail=False):
+            async def run():
+                order.append(name)
+                if fail:
+                    raise RuntimeError(name)
+            return run
+
+        assert runner.submit("backup:a", job("a"), priority=10)
+        assert not runner.submit("backup:a", job("a-again"))
+        assert runner.submit("urgent", job("urgent", fail=True), priority=1)
+        assert runner.submit("backup:b", job("b"), priority=10)
+        worker = asyncio.create_task(runner.run())
+        await asyncio.wait_for(runner.join(), 1)
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+
+        assert order == ["urgent", "a", "b"]
+        assert runner.get_stats() == {'submitted': 3, 'completed': 2, 'failed': 1, 'deduplicated': 1,
+                                      'queued': 0, 'running': []}
+        assert runner.submit("backup:a", job("a"))  # Terminado: se puede volver a encolar
+
+
+class TestIOThrottle:
+    def test_io_throttle_paces_bytes(self, tmp_path):
+        clock, sleeps = [0.0], []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        throttle = IOThrottle(1000, sleep=sleep, clock=lambda: clock[0])
+        for _ in range(4):
+            throttle.consume(500)
+        assert sleeps == [0.5, 0.5, 0.5] and throttle.bytes == 2000
+
+        throttle = IOThrottle(1_000_000)
+        with ThrottledWriter(open(tmp_path / "a.zip", "wb"), throttle) as out:
+            with zipfile.ZipFile(out, "w") as archive:
+                archive.writestr("data.txt", "x" * 10_000)
+        assert zipfile.ZipFile(tmp_path / "a.zip").read("data.txt") == b"x" * 10_000
+        assert throttle.bytes >= (tmp_path / "a.zip").stat().st_size
+
+
+class TestMetrics:
+    def test_sync_metrics_snapshot(self):
+        metrics = SyncMetrics(interval=5)
+        assert metrics.snapshot()['lag_seconds'] is None
+        metrics.record(started=10.2, finished=10.5, due=10.0, read=8, written=3)
+        snapshot = metrics.snapshot(now=metrics.last_success)
+        assert (snapshot['lag_seconds'], snapshot['last_cycle_seconds'], snapshot['last_start_delay_seconds']) == (
+            0.0, 0.3, 0.2)
+        assert (snapshot['variables_read'], snapshot['variables_written'], snapshot['cycles']) == (8, 3, 1)
+
+
+class FakeConnector:
+    def __init__(self, system_id, backup_seconds=0.0):
+        self.system_id = system_id
+        self.values = {"Level": 50.0, "Running": True, "Count": 10}
+        self.backup_seconds = backup_seconds
+        self.backups = 0
+        self.io_throttle = None
+
+    def list_tags(self):
+        return list(self.values)
+
+    async def read_variables(self, tags):
+        await asyncio.sleep(0)
+        return {tag: variable(tag, self.values.get(tag, 0.0), system_id=self.system_id) for tag in tags}
+
+    async def backup_project(self):
+        await asyncio.sleep(self.backup_seconds)
+        self.backups += 1
+        return None
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(IndustrialSystemsManager, "setup_logging",
+                        lambda self: logging.getLogger("test-systems-manager"))
+    manager = IndustrialSystemsManager(db_path=tmp_path / "systems.db")
+    manager.backup_check_interval = 0.01
+    for config in manager.system_configs.values():
+        config.sync_interval = 0.02
+    return manager
+
+
+def sync_counts(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return dict(conn.execute("SELECT tag_name, sync_count FROM synchronized_variables"))
+
+
+class TestManager:
+    @pytest.mark.asyncio
+    async def test_manager_writes_only_changes(self, manager):
+        connector = FakeConnector("tia_portal_main")
+        manager.connectors["tia_portal_main"] = connector
+
+        assert await manager.sync_system_variables("tia_portal_main", connector) == (3, 3)
+        assert await manager.sync_system_variables("tia_portal_main", connector) == (3, 0)
+        connector.values["Level"] = 51.5
+        assert await manager.sync_system_variables("tia_portal_main", connector) == (3, 1)
+        assert sync_counts(manager.db_path) == {"Level": 2, "Running": 1, "Count": 1}
+
+        # Tras reiniciar no se reescribe lo que ya está en la base
+        restarted = IndustrialSystemsManager(db_path=manager.db_path)
+        restarted.connectors["tia_portal_main"] = connector
+        assert await restarted.sync_system_variables("tia_portal_main", connector) == (3, 0)
+
+        manager.system_configs["tia_portal_main"].connection_params["sync_tags"] = ["Count"]
+        manager._sync_tags.clear()
+        assert await manager.get_sync_variables("tia_portal_main") == ["Count"]
+        assert await manager.get_sync_variables("rslogix_motor_control") == systems_integrator.DEFAULT_SYNC_TAGS[
+            "rslogix_motor_control"]
+
+    @pytest.mark.asyncio
+    async def test_backup_interval_shorter_than_a_day(self, manager):
+        connector = FakeConnector("tia_portal_main")
+        with sqlite3.connect(manager.db_path) as conn:
+            conn.execute("INSERT INTO project_backups (backup_id, system_id, backup_path, timestamp) "
+                         "VALUES ('b1', 'tia_portal_main', 'x', ?)",
+                         ((datetime.now() - timedelta(hours=2)).isoformat(),))
+        # El planificador decide que toca; el trabajo encolado no vuelve a comprobarlo
+        manager.backup_interval = timedelta(hours=1)
+        await manager.perform_system_backup("tia_portal_main", connector)
+        assert connector.backups == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_backup_does_not_stall_variable_sync(self, manager):
+        slow = FakeConnector("tia_portal_main", backup_seconds=0.3)
+        plain = SimpleNamespace(read_tags=FakeConnector("rslogix_motor_control").read_variables)
+        manager.connectors = {"tia_portal_main": slow, "rslogix_motor_control": plain}
+
+        sync = asyncio.create_task(manager.start_synchronization())
+        await asyncio.sleep(0.2)
+        metrics = manager.get_sync_metrics()
+        assert slow.backups == 0 and list(manager.background_jobs.running) == ["backup:tia_portal_main"]
+        assert metrics["tia_portal_main"]["cycles"] >= 4 and metrics["rslogix_motor_control"]["cycles"] >= 4
+        assert metrics["tia_portal_main"]["lag_seconds"] < 0.1
+        assert metrics["tia_portal_main"]["variables_written"] == 3
+
+        await asyncio.sleep(0.2)
+        assert slow.backups == 1  # En marcha no se encola otro backup del mismo sistema
+        status = manager.get_integration_status()
+        assert status["systems"]["tia_portal_main"]["sync"]["cycles"] >= 8
+        assert status["background_jobs"]["completed"] >= 1
+
+        manager.sync_active = False
+        await asyncio.wait_for(sync, 1)
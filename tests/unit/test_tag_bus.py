@@ -0,0 +1,166 @@
+"""
+Tests for the tag update bus.
+
+Covers: change-of-value and deadband filtering against the last delivered
+value, per-tag deadbands, coalescing for slow subscribers, the initial
+snapshot, registration growth, NaN and quality transitions, and the SSE
+and WebSocket endpoints (malformed messages and invalid re-subscriptions).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from smartcompute.industrial.variables.bus import TagBus, create_tag_stream_app
+
+
+def publish(bus, values, ids=("a", "b", "c"), t=1.0):
+    bus.publish(list(ids), np.array(values, dtype=float), np.full(len(ids), 100), t)
+
+
+def delivered(subscription):
+    return {u["id"]: u["value"] for u in subscription.drain()}
+
+
+class TestFiltering:
+    def test_change_of_value(self):
+        bus = TagBus()
+        sub = bus.subscribe()
+        publish(bus, [1, 2, 3])
+        assert delivered(sub) == {"a": 1, "b": 2, "c": 3}
+        publish(bus, [1, 2, 3])
+        assert delivered(sub) == {}
+        publish(bus, [1, 2.5, 3])
+        assert delivered(sub) == {"b": 2.5}
+
+    def test_deadband_tracks_last_delivered_value(self):
+        bus = TagBus()
+        sub = bus.subscribe(tags=["a"], deadband=1.0)
+        publish(bus, [10, 0, 0])
+        assert delivered(sub) == {"a": 10}
+        # Deriva lenta: ningún paso supera la banda, la suma sí
+        for value in (10.4, 10.8):
+            publish(bus, [value, 5, 5])
+            assert delivered(sub) == {}
+        publish(bus, [11.2, 5, 5])
+        assert delivered(sub) == {"a": 11.2}
+
+    def test_per_tag_deadband(self):
+        bus = TagBus()
+        sub = bus.subscribe(deadband={"a": 5.0})
+        publish(bus, [0, 0, 0])
+        sub.drain()
+        publish(bus, [1, 1, 0])
+        assert delivered(sub) == {"b": 1}
+
+    def test_nan_transitions_are_delivered_as_null(self):
+        bus = TagBus()
+        sub = bus.subscribe(deadband=1.0)
+        publish(bus, [1, 2, 3])
+        sub.drain()
+        publish(bus, [float("nan"), 2, 3])
+        updates = sub.drain()
+        assert updates == [{"id": "a", "value": None, "quality": 100, "timestamp": 1.0}]
+        assert json.loads(json.dumps(updates))[0]["value"] is None
+        publish(bus, [float("nan"), 2, 3])
+        assert delivered(sub) == {}
+        publish(bus, [1.2, 2, 3])
+        assert delivered(sub) == {"a": 1.2}
+
+    def test_quality_change_alone_is_delivered(self):
+        bus = TagBus()
+        sub = bus.subscribe(deadband=1.0)
+        publish(bus, [1, 2, 3])
+        sub.drain()
+        bus.publish(["a", "b"], np.array([1.0, 2.0]), np.array([100, 0]), 2.0)
+        assert [(u["id"], u["quality"]) for u in sub.drain()] == [("b", 0)]
+
+
+class TestDelivery:
+    def test_slow_subscriber_gets_latest_value_once(self):
+        bus = TagBus()
+        sub = bus.subscribe()
+        for scan in range(50):
+            publish(bus, [scan, 0, 0], t=float(scan))
+        updates = sub.drain()
+        assert len(updates) == 3
+        assert updates[0] == {"id": "a", "value": 49.0, "quality": 100, "timestamp": 49.0}
+        assert sub.stats["coalesced"] == 3 * 49
+
+    def test_snapshot_and_growth(self):
+        bus = TagBus(capacity=2)
+        publish(bus, [1, 2, 3])
+        sub = bus.subscribe(tags=["c", "d"])
+        assert delivered(sub) == {"c": 3}
+        publish(bus, [4], ids=("d",))
+        assert delivered(sub) == {"d": 4}
+        assert len(bus.value) >= 4
+
+    @pytest.mark.asyncio
+    async def test_get_waits_and_close_ends_iteration(self):
+        bus = TagBus()
+        sub = bus.subscribe()
+        waiter = asyncio.create_task(sub.get())
+        await asyncio.sleep(0)
+        publish(bus, [1, 2, 3])
+        assert len(await waiter) == 3
+
+        sub.close()
+        assert [updates async for updates in sub] == []
+        assert bus.get_stats()["subscriptions"] == 0
+
+
+@pytest.mark.asyncio
+async def test_sse_stream():
+    pytest.importorskip("aiohttp")
+    from aiohttp.test_utils import TestClient, TestServer
+
+    bus = TagBus()
+    publish(bus, [1, 2, 3])
+    async with TestClient(TestServer(create_tag_stream_app(bus))) as client:
+        response = await client.get("/api/tags/stream", params={"tags": "b,c", "deadband": "0.5"})
+        assert response.headers["Content-Type"] == "text/event-stream"
+
+        async def event():
+            lines = []
+            while not lines or lines[-1] != b"\n":
+                lines.append(await response.content.readline())
+            return json.loads(lines[1][len(b"data: "):])
+
+        assert {u["id"]: u["value"] for u in await event()} == {"b": 2, "c": 3}
+        publish(bus, [9, 2.2, 4])
+        assert [u["id"] for u in await event()] == ["c"]
+        response.close()
+
+
+@pytest.mark.asyncio
+async def test_websocket_reports_malformed_messages():
+    pytest.importorskip("aiohttp")
+    from aiohttp.test_utils import TestClient, TestServer
+
+    bus = TagBus()
+    publish(bus, [1, 2, 3])
+    async with TestClient(TestServer(create_tag_stream_app(bus))) as client:
+        ws = await client.ws_connect("/ws/tags")
+        assert (await ws.receive_json())["type"] == "tags"
+
+        await ws.send_str("{not json")
+        assert await ws.receive_json() == {"type": "error", "error": "invalid message"}
+        await ws.send_str(json.dumps({"type": "ping"}))
+        assert await ws.receive_json() == {"type": "pong"}
+
+        # Un filtro inválido se rechaza y la suscripción anterior sigue entregando
+        await ws.send_str(json.dumps({"type": "subscribe", "tags": ["a"], "deadband": "wide"}))
+        assert await ws.receive_json() == {"type": "error", "error": "deadband must be a number"}
+        await ws.send_str(json.dumps({"type": "subscribe", "tags": "abc"}))
+        assert await ws.receive_json() == {"type": "error", "error": "tags must be a list of strings"}
+        publish(bus, [1, 2, 30])
+        assert [u["id"] for u in (await ws.receive_json())["updates"]] == ["c"]
+
+        await ws.send_str(json.dumps({"type": "subscribe", "tags": ["b"], "deadband": "0.5"}))
+        assert [u["id"] for u in (await ws.receive_json())["updates"]] == ["b"]
+        await ws.close()
@@ -0,0 +1,136 @@
+"""
+Tests for the columnar scan-batch processing path.
+
+Covers: EMA, anomaly score and threshold levels matching the per-reading
+VariableDataProcessor, alarms materialized only for tripped rows, trend
+slope, lazily materialized readings and column growth.
+"""
+
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from smartcompute.industrial.variables.monitor import (
+    IndustrialVariable,
+    LiveReadings,
+    SensorStatus,
+    VariableBatchProcessor,
+    VariableDataProcessor,
+    VariableReading,
+    VariableType,
+)
+
+
+def make_variable(i: int, **overrides) -> IndustrialVariable:
+    fields = dict(
+        id=f"tag_{i}", name=f"Tag {i}", description="", variable_type=VariableType.FLUID,
+        unit="bar", min_value=0.0, max_value=100.0, nominal_value=50.0,
+        warning_low=30.0, warning_high=70.0, alarm_low=20.0, alarm_high=80.0,
+        location="", plc_address=str(40001 + i), update_rate_ms=1000,
+    )
+    fields.update(overrides)
+    return IndustrialVariable(**fields)
+
+
+@pytest.fixture
+def variables():
+    return [make_variable(i) for i in range(50)]
+
+
+def reading(variable, value, timestamp):
+    return VariableReading(variable.id, timestamp, value, 100, SensorStatus.ONLINE)
+
+
+class TestVariableBatchProcessor:
+    def test_matches_per_reading_processor(self, variables):
+        rng = random.Random(35)
+        batch = VariableBatchProcessor(capacity=8)
+        scalar = VariableDataProcessor()
+        rows = batch.register(variables)
+        start = datetime(2026, 1, 1)
+
+        for scan in range(40):
+            timestamp = start + timedelta(seconds=scan)
+            values = np.array([rng.uniform(10.0, 90.0) for _ in variables])
+            alarms = batch.process(rows, values, np.full(len(rows), 100), timestamp)
+
+            expected_alarms = []
+            for row, (variable, value) in enumerate(zip(variables, values)):
+                expected = scalar.process_reading(reading(variable, float(value), timestamp), variable)
+                assert batch.filtered[row] == pytest.approx(expected["filtered_value"])
+                assert batch.anomaly[row] == pytest.approx(expected["analysis"]["anomaly_score"])
+                expected_alarms += [(row, alarm) for alarm in expected["alarms"]]
+
+            assert alarms == expected_alarms
+
+        result = batch.reading("tag_3")
+        assert result["analysis"]["statistics"] == pytest.approx(
+            scalar.calculate_statistics("tag_3", 0.0))
+        assert result["alarms"] == scalar.check_alarm_thresholds(
+            reading(variables[3], float(values[3]), timestamp), variables[3])
+        assert set(result) == set(expected)
+
+    def test_alarms_only_for_tripped_rows(self, variables):
+        batch = VariableBatchProcessor()
+        rows = batch.register(variables)
+        values = np.full(len(rows), 50.0)
+        values[[3, 7, 11, 19]] = [15.0, 85.0, 25.0, 75.0]
+
+        alarms = batch.process(rows, values, np.full(len(rows), 99), datetime.now())
+
+        assert [(row, alarm["type"]) for row, alarm in alarms] == [
+            (3, "low_alarm"), (7, "high_alarm"), (11, "low_warning"), (19, "high_warning")
+        ]
+        assert alarms[0][1]["message"] == "Tag 3 critically low: 15.0 bar (threshold: 20.0)"
+        assert batch.level[:len(rows)].nonzero()[0].tolist() == [3, 7, 11, 19]
+
+    def test_trend_and_prediction(self):
+        variable = make_variable(0)
+        batch = VariableBatchProcessor()
+        rows = batch.register([variable])
+        start = datetime(2026, 1, 1)
+        assert batch.reading(variable.id) is None
+
+        points = []
+        for i in range(30):
+            batch.process(rows, np.array([40.0 + i]), np.array([100]), start + timedelta(seconds=i))
+            points.append(((start + timedelta(seconds=i)).timestamp(), batch.filtered[0]))
+
+        analysis = batch.reading(variable.id)["analysis"]
+        xs, ys = np.array(points[-20:]).T
+        assert analysis["trend"]["slope"] == pytest.approx(np.polyfit(xs, ys, 1)[0])
+        assert analysis["trend"]["trend"] == "increasing"
+        recent = ys[-10:]
+        five = analysis["prediction"]["predictions"]["5_minutes"]
+        assert five["predicted_value"] == pytest.approx(ys[-1] + (recent[-1] - recent[0]) / 10 * 5)
+
+    def test_register_grows_and_updates_thresholds(self):
+        batch = VariableBatchProcessor(capacity=2)
+        rows = batch.register([make_variable(i) for i in range(5)])
+        assert rows.tolist() == [0, 1, 2, 3, 4]
+        assert len(batch.raw) >= 5
+
+        batch.register([make_variable(4, alarm_high=60.0)])
+        alarms = batch.process(rows, np.full(5, 75.0), np.full(5, 100), datetime.now())
+        assert [(row, alarm["type"]) for row, alarm in alarms] == [
+            (0, "high_warning"), (1, "high_warning"), (2, "high_warning"),
+            (3, "high_warning"), (4, "high_alarm"),
+        ]
+
+    def test_live_readings_view(self, variables):
+        batch = VariableBatchProcessor()
+        rows = batch.register(variables)
+        live = LiveReadings(batch)
+        assert len(live) == 0
+        assert live.get("tag_0") is None
+
+        batch.process(rows[:10], np.full(10, 50.0), np.full(10, 97), datetime.now())
+        assert len(live) == 10
+        assert live["tag_0"]["quality_score"] == 97
+        assert live["tag_0"]["raw_reading"]["value"] == 50.0
+        with pytest.raises(KeyError):
+            live["tag_10"]
@@ -0,0 +1,114 @@
+"""
+Tests for the incremental statistics in VariableDataProcessor.
+
+Covers: sliding-window Welford mean/std and min/max, running-sum trend
+slope and the per-variable EMA, checked against a NumPy recomputation.
+"""
+
+from __future__ import annotations
+
+import random
+
+import numpy as np
+import pytest
+
+from smartcompute.industrial.variables.monitor import (
+    SlidingWindowStats,
+    TrendWindow,
+    VariableDataProcessor,
+)
+
+
+class TestSlidingWindowStats:
+    @pytest.mark.parametrize("size", [1, 3, 10])
+    def test_matches_numpy(self, size):
+        rng = random.Random(34)
+        window = SlidingWindowStats(size)
+        values = []
+        for _ in range(1000):
+            x = rng.gauss(1000.0, 50.0) if rng.random() < 0.9 else rng.uniform(-1e4, 1e4)
+            window.push(x)
+            values.append(x)
+            tail = np.array(values[-size:])
+            assert window.count == len(tail)
+            assert window.mean == pytest.approx(tail.mean(), rel=1e-9, abs=1e-9)
+            assert window.std == pytest.approx(tail.std(), rel=1e-6, abs=1e-6)
+            assert window.min == tail.min()
+            assert window.max == tail.max()
+
+    def test_constant_values_have_zero_std(self):
+        window = SlidingWindowStats(5)
+        for _ in range(50):
+            window.push(42.0)
+        assert window.std == 0.0
+        assert window.min == window.max == 42.0
+
+
+class TestTrendWindow:
+    def test_slope_matches_polyfit(self):
+        rng = random.Random(7)
+        trend = TrendWindow(20)
+        points = []
+        t = 1.7e9
+        for _ in range(200):
+            t += rng.uniform(0.5, 1.5)
+            y = 0.25 * (t - 1.7e9) + rng.gauss(0, 1)
+            trend.push(t, y)
+            points.append((t, y))
+            if trend.count >= 2:
+                xs, ys = np.array(points[-20:]).T
+                assert trend.slope() == pytest.approx(np.polyfit(xs, ys, 1)[0], rel=1e-6, abs=1e-9)
+
+    def test_degenerate_time_axis(self):
+        trend = TrendWindow(5)
+        for y in range(5):
+            trend.push(100.0, float(y))
+        assert trend.slope() == 0.0
+
+
+class TestVariableDataProcessor:
+    def test_exponential_moving_average(self):
+        processor = VariableDataProcessor()
+        assert processor.apply_noise_filter("v", 10.0) == 10.0
+        assert processor.apply_noise_filter("v", 20.0) == pytest.approx(13.0)
+        assert processor.apply_noise_filter("v", 20.0) == pytest.approx(15.1)
+
+    def test_statistics_and_anomalies_use_raw_window(self):
+        processor = VariableDataProcessor()
+        raw = [float(v) for v in range(1, 16)]
+        for value in raw:
+            processor.apply_noise_filter("v", value)
+
+        stats = processor.calculate_statistics("v", 0.0)
+        window = np.array(raw[-10:])
+        assert stats["mean"] == pytest.approx(window.mean())
+        assert stats["std"] == pytest.approx(window.std())
+        assert (stats["min"], stats["max"], stats["range"]) == (6.0, 15.0, 9.0)
+
+        expected = min(abs(30.0 - window.mean()) / window.std() / 3.0, 1.0)
+        assert processor.detect_anomalies("v", 30.0) == pytest.approx(expected)
+
+    def test_trend_and_prediction(self):
+        processor = VariableDataProcessor()
+        assert processor.analyze_trend("v", 1.0) == {"trend": "insufficient_data"}
+        assert processor.predict_future_values("v", 1.0) == {"prediction": "insufficient_data"}
+
+        for value in range(2, 13):
+            trend = processor.analyze_trend("v", float(value))
+        assert trend["trend"] in ("increasing", "stable")
+        assert trend["confidence"] == pytest.approx(12 / 20.0)
+
+        prediction = processor.predict_future_values("v", 12.0)
+        recent = np.arange(3.0, 13.0)
+        slope = (recent[-1] - recent[0]) / len(recent)
+        horizon = prediction["predictions"]["5_minutes"]
+        assert horizon["predicted_value"] == pytest.approx(12.0 + slope * 5)
+        assert horizon["upper_bound"] - horizon["predicted_value"] == pytest.approx(2 * recent.std())
+
+    def test_slots_are_per_variable(self):
+        processor = VariableDataProcessor()
+        processor.apply_noise_filter("a", 1.0)
+        processor.apply_noise_filter("b", 100.0)
+        assert processor.slots["a"].ema == 1.0
+        assert processor.slots["b"].ema == 100.0
+        assert processor.calculate_statistics("c", 1.0) == {}
@@ -0,0 +1,133 @@
+"""
+Tests for the ICS advisory knowledge base.
+
+Covers: version parsing and ordering, vendor/product normalization and CPE
+entries, inclusive/exclusive and exact version ranges, the interval index
+against a brute-force scan of every advisory, incremental feed imports
+(unchanged files skipped, updated and withdrawn advisories, touched
+products), persistence across instances, and rollback of a failed import.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+
+import pytest
+
+from smartcompute.industrial.scada.advisories import (
+    VulnerabilityKnowledgeBase,
+    normalize_name,
+    parse_advisory,
+    parse_version,
+)
+
+
+def advisory(advisory_id, vendor="Siemens AG", product="S7-1515", versions=None, **extra):
+    return dict({"id": advisory_id, "cve": f"CVE-2024-{advisory_id[-4:]}", "title": advisory_id, "cvss_score": 7.5,
+                 "affected": [{"vendor": vendor, "product": product,
+                               "versions": versions or [{"introduced": "2.0", "fixed": "2.9.2"}]}]}, **extra)
+
+
+@pytest.fixture
+def kb(tmp_path):
+    return VulnerabilityKnowledgeBase(tmp_path / "kb.db")
+
+
+def ids(advisories):
+    return sorted(a.advisory_id for a in advisories)
+
+
+class TestVersions:
+    def test_version_ordering(self):
+        ordered = ["0.9", "V1", "1.0.1", "1.2", "1.2a", "1.10", "V2.8.3", "10.0"]
+        assert sorted(ordered, key=parse_version) == ordered
+        assert parse_version("1.0") == parse_version("1.0.0") == parse_version("v1")
+        assert normalize_name("Schneider Electric SE") == "schneider electric"
+        assert normalize_name("SIMATIC  S7-1500") == "simatic s7 1500"
+
+
+class TestMatching:
+    def test_range_kinds_and_normalized_names(self, kb):
+        kb.import_feed([
+            advisory("ICSA-0001", versions=[{"introduced": "2.0", "fixed": "2.9.2"}]),
+            advisory("ICSA-0002", versions=[{"introduced": "3.0", "last_affected": "3.0.1"}, {"version": "1.8.5"}]),
+            advisory("ICSA-0003", product="*", versions=[{"introduced": "0"}]),
+            {"id": "ICSA-0004", "cvss_score": 9.8,
+             "affected": [{"cpe": "cpe:2.3:h:siemens:s7-1515:2.8.3:*:*:*:*:*:*:*"}]},
+            advisory("ICSA-0005", vendor="Wonderware", product="InTouch"),
+        ])
+        assert ids(kb.match("Siemens", "S7 1515", "V2.8.3")) == ["ICSA-0001", "ICSA-0003", "ICSA-0004"]
+        assert ids(kb.match("siemens", "s7-1515", "2.9.2")) == ["ICSA-0003"]  # fixed es exclusivo
+        assert ids(kb.match("Siemens", "S7-1515", "3.0.1")) == ["ICSA-0002", "ICSA-0003"]  # last_affected inclusivo
+        assert ids(kb.match("Siemens", "S7-1515", "1.8.5")) == ["ICSA-0002", "ICSA-0003"]
+        assert ids(kb.match("Siemens", "S7-1200", "1.0")) == ["ICSA-0003"]  # Aviso de todo el fabricante
+        assert kb.match("Omron", "S7-1515", "2.5") == []
+        assert kb.advisories["ICSA-0004"].severity == "critical"
+
+    def test_index_matches_brute_force(self, kb):
+        rng = random.Random(3)
+        feed = []
+        for i in range(600):
+            ranges = []
+            for _ in range(rng.randint(1, 3)):
+                low = f"{rng.randint(0, 5)}.{rng.randint(0, 9)}"
+                kind = rng.choice(["fixed", "last_affected", "open", "exact"])
+                if kind == "exact":
+                    ranges.append({"version": f"{low}.{rng.randint(0, 3)}"})
+                elif kind == "open":
+                    ranges.append({"introduced": low})
+                else:
+                    ranges.append({"introduced": low, kind: f"{rng.randint(0, 6)}.{rng.randint(0, 9)}"})
+            feed.append(advisory(f"ICSA-{i:04d}", product=f"P{i % 7}", versions=ranges))
+        kb.import_feed(feed)
+        parsed = [parse_advisory(data) for data in feed]
+        for _ in range(500):
+            product, version = f"P{rng.randint(0, 7)}", f"{rng.randint(0, 6)}.{rng.randint(0, 9)}.{rng.randint(0, 3)}"
+            expected = sorted(a.advisory_id for a in parsed if a.affects("Siemens", product, version))
+            assert ids(kb.match("Siemens", product, version)) == expected, (product, version)
+
+
+class TestImport:
+    def test_incremental_file_import(self, kb, tmp_path):
+        feeds = tmp_path / "feeds"
+        feeds.mkdir()
+        base = feeds / "2024-01.json"
+        base.write_text(json.dumps({"advisories": [advisory("ICSA-0001"), advisory("ICSA-0002", product="S7-1200")]}))
+        first = kb.import_path(feeds)
+        assert (first.files_read, first.added) == (1, 2)
+        assert first.products == {("siemens", "s7 1515"), ("siemens", "s7 1200")}
+
+        # Sin cambios en disco: el fichero no se vuelve a leer
+        again = kb.import_path(feeds)
+        assert (again.files_read, again.files_skipped, again.changed) == (0, 1, False)
+
+        # Mismo contenido con otra fecha: se comprueba el hash y no se aplica
+        os.utime(base, ns=(1, 1))
+        assert kb.import_path(feeds).files_skipped == 1
+
+        delta = feeds / "2024-02.json"
+        delta.write_text(json.dumps({
+            "advisories": [advisory("ICSA-0001", versions=[{"introduced": "2.0", "fixed": "3.0"}]),
+                           advisory("ICSA-0003", vendor="Omron", product="E5CC")],
+            "withdrawn": ["ICSA-0002", "ICSA-9999"],
+        }))
+        result = kb.import_path(feeds)
+        assert (result.files_read, result.added, result.updated, result.removed) == (1, 1, 1, 1)
+        assert result.products == {("siemens", "s7 1515"), ("siemens", "s7 1200"), ("omron", "e5cc")}
+        assert ids(kb.match("Siemens", "S7-1515", "2.9.5")) == ["ICSA-0001"]
+        assert kb.match("Siemens", "S7-1200", "2.5") == []
+
+        # Persistido: otra instancia reconstruye el índice desde SQLite
+        reopened = VulnerabilityKnowledgeBase(kb.db_path)
+        assert len(reopened) == 2
+        assert ids(reopened.match("Omron", "E5CC", "2.1")) == ["ICSA-0003"]
+
+    def test_failed_import_rolls_back(self, kb):
+        kb.import_feed([advisory("ICSA-0001")])
+        with pytest.raises(ValueError):
+            kb.import_feed([advisory("ICSA-0002"), advisory("ICSA-0003", versions=[{"introduced": "1", "bogus": "2"}])])
+        assert list(kb.advisories) == ["ICSA-0001"]
+        assert ids(kb.match("Siemens", "S7-1515", "2.5")) == ["ICSA-0001"]
+        assert len(VulnerabilityKnowledgeBase(kb.db_path)) == 1
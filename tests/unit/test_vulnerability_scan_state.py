@@ -0,0 +1,363 @@
+"""
+Tests for the incremental vulnerability scan state.
+
+Covers: asset fingerprints (what triggers a rescan and what does not), the
+scan ledger decisions including advisory revisions from the knowledge
+base, the single-transaction zone save (upsert keeps ``created_at``,
+removed findings are deleted, ledger and ``last_scan`` written), the
+incremental aggregates against a from-scratch recomputation, and the
+manager on a temporary database: incremental ``scan_all_zones`` rescans
+(changed assets, new advisories, ``force``), retired assets pruned before
+the result is built, a failed save leaving memory as on disk,
+``_rescan_assets`` keeping remediation and reporting vanished findings,
+``load_scan_state`` after a restart, and ``update_remediation`` keeping the
+aggregates current.
+"""
+
+from __future__ import annotations
+
+import importlib
+import json
+import logging
+import random
+import sqlite3
+import sys
+import types
+from datetime import datetime, timedelta
+from enum import Enum
+from types import SimpleNamespace
+
+import pytest
+
+from smartcompute.industrial.scada.advisories import VulnerabilityKnowledgeBase
+from smartcompute.industrial.scada.scan_state import (
+    VULNERABILITY_COLUMNS,
+    AssetScanLedger,
+    VulnerabilityAggregates,
+    asset_fingerprint,
+    save_zone_scan,
+)
+
+
+class Severity(Enum):
+    CRITICAL = "critical"
+    HIGH = "high"
+    MEDIUM = "medium"
+
+
+class Status(Enum):
+    IDENTIFIED = "identified"
+    COMPLETED = "completed"
+
+
+def asset(**changes):
+    values = dict(asset_id="plc1", name="PLC 1", asset_type="PLC", manufacturer="Siemens", model="S7-1515",
+                  firmware_version="V2.8.3", zone_id="line1", protocols=["S7comm", "Modbus TCP"],
+                  services=[{"name": "S7comm", "port": 102}], last_scan=None, online=True)
+    values.update(changes)
+    return SimpleNamespace(**values)
+
+
+def vuln(vuln_id, zone="line1", asset_id="plc1", severity=Severity.HIGH, status=Status.IDENTIFIED, **changes):
+    values = dict(vuln_id=vuln_id, cve_id=None, title=vuln_id, description="", severity=severity, cvss_score=7.5,
+                  cvss_vector="CVSS:3.1/AV:N/AC:L", affected_assets=[asset_id], discovery_date=datetime(2025, 1, 1),
+                  source="test", exploit_available=False, exploit_complexity="low", threat_actor_interest="high",
+                  industrial_impact={}, safety_impact=False, production_impact=True, environmental_impact=False,
+                  affected_zones=[zone], business_priority=5, technical_priority=8, operational_impact_hours=6.0,
+                  remediation_status=status, assigned_to=None, remediation_plan=None, estimated_effort_hours=2.0,
+                  target_resolution_date=None)
+    values.update(changes)
+    return SimpleNamespace(**values)
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"CREATE TABLE vulnerabilities ({', '.join(VULNERABILITY_COLUMNS)}, "
+                 f"created_at TIMESTAMP DEFAULT 'first', PRIMARY KEY (vuln_id))")
+    conn.execute("CREATE TABLE industrial_assets (asset_id TEXT PRIMARY KEY, last_scan TIMESTAMP)")
+    conn.execute("INSERT INTO industrial_assets VALUES ('plc1', NULL)")
+    AssetScanLedger().load(conn)
+    yield conn
+    conn.close()
+
+
+def recompute(vulns, now):
+    """Lo que calculaba antes el dashboard recorriendo todas las vulnerabilidades"""
+    zones = {}
+    for v in vulns:
+        for zone in v.affected_zones:
+            zones.setdefault(zone, []).append(v)
+    return {
+        "total": len(vulns),
+        "risk": sum(v.business_priority * v.technical_priority for v in vulns),
+        "severity": {s: n for s in {v.severity.value for v in vulns}
+                     if (n := sum(v.severity.value == s for v in vulns))},
+        "completed": round(sum(v.estimated_effort_hours for v in vulns if v.remediation_status == Status.COMPLETED), 6),
+        "assets": len({a for v in vulns for a in v.affected_assets}),
+        "safety": sum(bool(v.safety_impact) for v in vulns),
+        "overdue": sum(1 for v in vulns if v.target_resolution_date and v.target_resolution_date < now),
+        "zones": {zone: (len(zv), sum(v.business_priority * v.technical_priority for v in zv),
+                         sum(v.severity == Severity.CRITICAL for v in zv)) for zone, zv in zones.items()},
+    }
+
+
+def snapshot(aggregates, now):
+    return {
+        "total": len(aggregates),
+        "risk": aggregates.risk_sum,
+        "severity": dict(aggregates.severity),
+        "completed": round(aggregates.effort_completed, 6),
+        "assets": len(aggregates.assets),
+        "safety": aggregates.flags["safety_impact"],
+        "overdue": aggregates.overdue(now),
+        "zones": {zone: (z.count, z.risk_sum, z.severity["critical"]) for zone, z in aggregates.zones.items()},
+    }
+
+
+class TestFingerprints:
+    def test_fingerprint_tracks_what_decides_findings(self):
+        zone = SimpleNamespace(sector=SimpleNamespace(value="production"),
+                               criticality=SimpleNamespace(value="high"))
+        base = asset_fingerprint(asset(), zone)
+        assert asset_fingerprint(asset(last_scan=datetime.now(), online=False), zone) == base
+        assert asset_fingerprint(asset(protocols=["Modbus TCP", "S7comm"]), zone) == base
+        changes = ({"firmware_version": "V2.9.0"}, {"zone_id": "line2"}, {"services": []}, {"model": "S7-1516"})
+        for change in changes:
+            assert asset_fingerprint(asset(**change), zone) != base, change
+        assert asset_fingerprint(asset(), SimpleNamespace(sector=zone.sector, criticality="low")) != base
+
+
+class TestLedger:
+    def test_ledger_decides_rescans_with_advisory_revisions(self, tmp_path):
+        kb = VulnerabilityKnowledgeBase(tmp_path / "kb.db")
+        ledger = AssetScanLedger()
+        fingerprint = asset_fingerprint(asset())
+        revision = kb.revision_for("Siemens", "S7-1515")
+        assert ledger.reason("plc1", fingerprint, revision) == "new"
+
+        ledger.commit([("plc1", fingerprint, kb.revision, datetime.now())])
+        assert ledger.reason("plc1", fingerprint, kb.revision_for("Siemens", "S7-1515")) is None
+        assert ledger.reason("plc1", asset_fingerprint(asset(firmware_version="V3")), 0) == "changed"
+
+        # Un aviso de otro producto no obliga a re-escanear; uno del fabricante entero sí
+        kb.import_feed([{"id": "A1", "affected": [{"vendor": "Omron", "product": "E5CC"}]}])
+        assert ledger.reason("plc1", fingerprint, kb.revision_for("Siemens AG", "S7 1515")) is None
+        kb.import_feed([{"id": "A2", "affected": [{"vendor": "Siemens", "product": "*"}]}])
+        assert ledger.reason("plc1", fingerprint, kb.revision_for("Siemens AG", "S7 1515")) == "advisories"
+        # Las revisiones sobreviven a reabrir la base
+        assert VulnerabilityKnowledgeBase(kb.db_path).revision_for("siemens", "s7-1515") == kb.revision == 2
+
+
+class TestZoneSave:
+    def test_save_zone_scan_is_one_upserting_transaction(self, conn):
+        scanned_at = datetime(2025, 2, 1, 8, 0)
+        save_zone_scan(conn, [vuln("v1"), vuln("v2")], [], [("plc1", "fp1", 1, scanned_at)])
+        conn.execute("UPDATE vulnerabilities SET created_at = 'kept'")
+        conn.commit()
+
+        save_zone_scan(conn, [vuln("v1", severity=Severity.CRITICAL)], ["v2"], [("plc1", "fp2", 2, scanned_at)])
+        assert conn.execute("SELECT vuln_id, severity, created_at FROM vulnerabilities").fetchall() == [
+            ("v1", "critical", "kept")]
+        assert conn.execute("SELECT last_scan FROM industrial_assets").fetchone() == (str(scanned_at),)
+        ledger = AssetScanLedger()
+        ledger.load(conn)
+        assert ledger.records["plc1"][:2] == ("fp2", 2)
+
+        # Un fallo a mitad no deja nada a medias
+        with pytest.raises(sqlite3.Error):
+            save_zone_scan(conn, [vuln("v3")], ["v1"], [("plc1", "fp3", 3)])
+        assert conn.execute("SELECT vuln_id FROM vulnerabilities").fetchall() == [("v1",)]
+
+        save_zone_scan(conn, [], ["v1"], [], forgotten_assets=["plc1"])
+        ledger.load(conn)
+        assert ledger.records == {}
+
+
+class TestAggregates:
+    def test_aggregates_match_recomputation(self):
+        rng = random.Random(5)
+        now = datetime(2025, 6, 1)
+        aggregates, current = VulnerabilityAggregates(), {}
+        for step in range(2_000):
+            vuln_id = f"v{rng.randrange(150)}"
+            if vuln_id in current and rng.random() < 0.3:
+                aggregates.discard(vuln_id)
+                del current[vuln_id]
+            else:
+                deadline = now + timedelta(days=rng.randint(-30, 30)) if rng.random() < 0.5 else None
+                v = vuln(vuln_id, zone=f"z{rng.randrange(6)}", asset_id=f"a{rng.randrange(40)}",
+                         severity=rng.choice(list(Severity)), status=rng.choice(list(Status)),
+                         business_priority=rng.randint(1, 10), safety_impact=rng.random() < 0.4,
+                         estimated_effort_hours=rng.choice([0.5, 2.0, 8.0]), target_resolution_date=deadline)
+                aggregates.upsert(v)
+                current[vuln_id] = v
+            if step % 97 == 0:
+                assert snapshot(aggregates, now) == recompute(list(current.values()), now)
+        assert snapshot(aggregates, now) == recompute(list(current.values()), now)
+
+        for vuln_id in list(current):
+            aggregates.discard(vuln_id)
+        emptied = (len(aggregates), aggregates.zones, dict(aggregates.severity), aggregates.overdue(now))
+        assert emptied == (0, {}, {}, 0)
+
+
+MANAGER_MODULE = "smartcompute.industrial.scada.vulnerability_manager"
+
+
+@pytest.fixture
+def manager_module(monkeypatch, tmp_path):
+    """The manager imports ``requests`` at module level but never uses it while scanning"""
+    monkeypatch.setitem(sys.modules, "requests", types.ModuleType("requests"))
+    monkeypatch.delitem(sys.modules, MANAGER_MODULE, raising=False)
+    monkeypatch.chdir(tmp_path)  # setup_logging opens its log file in the working directory
+    logger = logging.getLogger("IndustrialVulnManager")
+    handlers = list(logger.handlers)
+    yield importlib.import_module(MANAGER_MODULE)
+    for handler in [h for h in logger.handlers if h not in handlers]:
+        logger.removeHandler(handler)
+        handler.close()
+
+
+@pytest.fixture
+def manager(manager_module, tmp_path):
+    return manager_module.IndustrialVulnerabilityManager(tmp_path / "vulns.db")
+
+
+def spy_rescans(monkeypatch, manager):
+    """Ids of the assets each re-scan plans (``_plan_rescan``) for"""
+    rescanned = []
+    plan = manager._plan_rescan
+
+    def recording(zone_id, assets):
+        rescanned.extend(asset.asset_id for asset in assets)
+        return plan(zone_id, assets)
+
+    monkeypatch.setattr(manager, "_plan_rescan", recording)
+    return rescanned
+
+
+class TestManager:
+    @pytest.mark.asyncio
+    async def test_scan_all_zones_only_rescans_what_changed(self, manager, monkeypatch, tmp_path):
+        rescanned = spy_rescans(monkeypatch, manager)
+        first = await manager.scan_all_zones()
+        assert sorted(rescanned) == sorted(manager.industrial_assets)
+        assert set(first) == set(manager.plant_zones)
+        assert sum(len(found) for found in first.values()) == len(manager.vulnerabilities) > 0
+
+        rescanned.clear()
+        assert await manager.scan_all_zones() == first
+        assert rescanned == []
+
+        manager.industrial_assets["plc_main_prod_1"].firmware_version = "V2.9.0"
+        await manager.scan_all_zones()
+        assert rescanned == ["plc_main_prod_1"]
+
+        # Un aviso nuevo sólo re-escanea los activos de ese producto
+        rescanned.clear()
+        feed = tmp_path / "feed.json"
+        feed.write_text(json.dumps([{"id": "ICSA-0001", "cve": "CVE-2024-0001", "title": "HMI", "cvss_score": 8.1,
+                                     "affected": [{"vendor": "Wonderware", "product": "*"}]}]))
+        manager.import_advisories(feed)
+        await manager.scan_all_zones()
+        assert rescanned == ["hmi_control_main"]
+        assert any(v.cve_id == "CVE-2024-0001" for v in manager.vulnerabilities.values())
+
+        rescanned.clear()
+        await manager.scan_all_zones(force=True)
+        assert sorted(rescanned) == sorted(manager.industrial_assets)
+
+    @pytest.mark.asyncio
+    async def test_rescan_assets_keeps_remediation_and_reports_removed(self, manager, manager_module):
+        await manager.scan_all_zones()
+        plc = manager.industrial_assets["plc_main_prod_1"]
+        before = sorted(manager._asset_findings[plc.asset_id])
+        assert before
+        target = manager.update_remediation(before[0], manager_module.RemediationStatus.ASSIGNED,
+                                            assigned_to="ot-team")
+
+        findings, removed = manager._rescan_assets(plc.zone_id, [plc])
+        assert sorted(v.vuln_id for v in findings) == before and removed == []
+        kept = manager.vulnerabilities[target.vuln_id]
+        assigned = manager_module.RemediationStatus.ASSIGNED
+        assert (kept.remediation_status, kept.assigned_to) == (assigned, "ot-team")
+        assert kept.discovery_date == target.discovery_date
+
+        plc.manufacturer = "Beckhoff"
+        findings, removed = manager._rescan_assets(plc.zone_id, [plc])
+        assert findings == [] and sorted(removed) == before
+        assert not set(before) & set(manager.vulnerabilities)
+        assert not manager._asset_findings[plc.asset_id]
+        assert len(manager.aggregates) == len(manager.vulnerabilities)
+
+    @pytest.mark.asyncio
+    async def test_retired_assets_are_pruned_before_the_result(self, manager):
+        await manager.scan_all_zones()
+        plc = manager.industrial_assets.pop("plc_main_prod_1")
+        result = await manager.scan_all_zones()
+        reported = {asset_id for found in result.values() for v in found for asset_id in v.affected_assets}
+        assert plc.asset_id not in reported and plc.asset_id not in manager.scan_ledger.records
+        assert sum(len(found) for found in result.values()) == len(manager.vulnerabilities)
+
+    @pytest.mark.asyncio
+    async def test_failed_save_leaves_memory_as_on_disk(self, manager, manager_module, tmp_path):
+        await manager.scan_all_zones()
+        before = set(manager.vulnerabilities)
+        plc = manager.industrial_assets["plc_main_prod_1"]
+        ledger = manager.scan_ledger.records[plc.asset_id]
+        plc.manufacturer = "Beckhoff"  # Sus hallazgos desaparecerían
+
+        def failing(*args, **kwargs):
+            raise sqlite3.OperationalError("database is locked")
+
+        save = manager._save_scan
+        manager._save_scan = failing
+        await manager.scan_all_zones()
+        assert set(manager.vulnerabilities) == before
+        assert manager.scan_ledger.records[plc.asset_id] == ledger
+        assert len(manager.aggregates) == len(before)
+
+        manager._save_scan = save
+        await manager.scan_all_zones()
+        assert not manager._asset_findings[plc.asset_id]
+        reopened = manager_module.IndustrialVulnerabilityManager(tmp_path / "vulns.db")
+        assert set(reopened.vulnerabilities) == set(manager.vulnerabilities) < before
+
+    @pytest.mark.asyncio
+    async def test_load_scan_state_restores_findings_without_rescanning(self, manager, manager_module, monkeypatch,
+                                                                         tmp_path):
+        await manager.scan_all_zones()
+        vuln_id = sorted(manager.vulnerabilities)[0]
+        manager.update_remediation(vuln_id, manager_module.RemediationStatus.IN_PROGRESS)
+
+        reopened = manager_module.IndustrialVulnerabilityManager(tmp_path / "vulns.db")
+        assert set(reopened.vulnerabilities) == set(manager.vulnerabilities)
+        assert reopened.scan_ledger.records.keys() == manager.scan_ledger.records.keys()
+        assert reopened.vulnerabilities[vuln_id].remediation_status == manager_module.RemediationStatus.IN_PROGRESS
+        assert reopened._calculate_summary_metrics() == manager._calculate_summary_metrics()
+
+        rescanned = spy_rescans(monkeypatch, reopened)
+        await reopened.scan_all_zones()
+        assert rescanned == []
+
+    @pytest.mark.asyncio
+    async def test_update_remediation_maintains_aggregates(self, manager, manager_module):
+        await manager.scan_all_zones()
+        vuln = manager.vulnerabilities[sorted(manager.vulnerabilities)[0]]
+        completed = manager.aggregates.effort_completed
+        progress = manager._get_remediation_progress()
+
+        manager.update_remediation(vuln.vuln_id, manager_module.RemediationStatus.COMPLETED,
+                                   estimated_effort_hours=4.0)
+        assert manager.aggregates.effort_completed == pytest.approx(completed + 4.0)
+        assert manager._get_remediation_progress() != progress
+
+        deadline = datetime.now() - timedelta(days=1)
+        overdue = manager.aggregates.overdue()
+        manager.update_remediation(vuln.vuln_id, manager_module.RemediationStatus.IN_PROGRESS,
+                                   target_resolution_date=deadline)
+        assert manager.aggregates.effort_completed == pytest.approx(completed)
+        assert manager.aggregates.overdue() == overdue + 1
+        with pytest.raises(AttributeError):
+            manager.update_remediation(vuln.vuln_id, manager_module.RemediationStatus.ASSIGNED, owner="nobody")